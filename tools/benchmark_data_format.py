@@ -0,0 +1,123 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# 分别以data_format为NCHW、NHWC转换同一个TensorFlow模型（如MobileNet），
+# 用Paddle Inference在CPU上统计两种模型的推理延时，并检查两者的输出是否一致。
+# 使用方式: python tools/benchmark_data_format.py model.pb input_shapes [repeat] [paddle_type] [threads]
+# 例如: python tools/benchmark_data_format.py mobilenet_v1.pb "input:1,224,224,3" 100
+
+import os.path as osp
+import sys
+import tempfile
+import time
+
+import numpy as np
+from x2paddle.convert import tf2paddle
+from x2paddle.core.util import parse_input_shapes
+
+model_path = sys.argv[1]
+input_shapes = sys.argv[2]
+repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+paddle_type = sys.argv[4] if len(sys.argv) > 4 else "dygraph"
+threads = int(sys.argv[5]) if len(sys.argv) > 5 else 1
+warmup = 10
+
+
+def convert(data_format, save_dir):
+    sys_path = list(sys.path)
+    try:
+        tf2paddle(
+            model_path,
+            save_dir,
+            paddle_type=paddle_type,
+            input_shapes=input_shapes,
+            interactive=False,
+            data_format=data_format)
+    finally:
+        # 生成的代码以x2paddle_code/x2paddle_model被import，第二次转换前需要清理
+        sys.path[:] = sys_path
+        for module_name in ["x2paddle_code", "x2paddle_model"]:
+            sys.modules.pop(module_name, None)
+    return osp.join(save_dir, "inference_model", "model")
+
+
+def count_transpose(path_prefix):
+    import paddle
+    paddle.enable_static()
+    exe = paddle.static.Executor(paddle.CPUPlace())
+    program, _, _ = paddle.static.load_inference_model(path_prefix, exe)
+    return len([
+        op for op in program.global_block().ops
+        if op.type in ["transpose", "transpose2"]
+    ])
+
+
+def benchmark(path_prefix, feeds):
+    from paddle import inference
+    config = inference.Config(path_prefix + ".pdmodel",
+                              path_prefix + ".pdiparams")
+    config.disable_gpu()
+    config.set_cpu_math_library_num_threads(threads)
+    config.switch_ir_optim(True)
+    predictor = inference.create_predictor(config)
+    for name in predictor.get_input_names():
+        predictor.get_input_handle(name).copy_from_cpu(feeds[name])
+
+    def run():
+        predictor.run()
+        return [
+            predictor.get_output_handle(name).copy_to_cpu()
+            for name in predictor.get_output_names()
+        ]
+
+    for i in range(warmup):
+        outputs = run()
+    costs = list()
+    for i in range(repeat):
+        start = time.time()
+        run()
+        costs.append(time.time() - start)
+    return outputs, costs
+
+
+shapes = parse_input_shapes(input_shapes)
+np.random.seed(0)
+feeds = dict()
+for name, shape in shapes.items():
+    feeds[name] = np.random.rand(*[1 if s < 0 else s
+                                   for s in shape]).astype("float32")
+
+results = dict()
+with tempfile.TemporaryDirectory() as tmp_dir:
+    for data_format in ["NCHW", "NHWC"]:
+        path_prefix = convert(data_format, osp.join(tmp_dir, data_format))
+        outputs, costs = benchmark(path_prefix, feeds)
+        results[data_format] = (count_transpose(path_prefix), outputs, costs)
+
+print("\n{:<8} {:>10} {:>12} {:>12} {:>12}".format(
+    "format", "transpose", "median(ms)", "mean(ms)", "min(ms)"))
+for data_format, (transpose_num, _, costs) in results.items():
+    print("{:<8} {:>10} {:>12.3f} {:>12.3f} {:>12.3f}".format(
+        data_format, transpose_num,
+        np.median(costs) * 1000, np.mean(costs) * 1000, min(costs) * 1000))
+nchw_median = np.median(results["NCHW"][2])
+nhwc_median = np.median(results["NHWC"][2])
+print("NHWC/NCHW latency: {:.3f}".format(nhwc_median / nchw_median))
+diff = max([
+    float(np.abs(a - b).max())
+    for a, b in zip(results["NCHW"][1], results["NHWC"][1])
+])
+print("max abs diff of outputs: {:.6f}".format(diff))
+if diff > 1e-4:
+    sys.exit(1)
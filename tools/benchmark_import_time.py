@@ -0,0 +1,62 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# 统计导入x2paddle命令行入口的耗时，并检查是否误导入了深度学习框架等重量级依赖。
+# 使用方式: python tools/benchmark_import_time.py [repeat] [max_ms]
+
+import subprocess
+import sys
+
+repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+max_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 500.0
+
+heavy_modules = [
+    "paddle", "tensorflow", "onnx", "torch", "pandas", "treelib",
+    "x2paddle.optimizer.fusion", "x2paddle.optimizer.elimination"
+]
+
+code = """
+import sys
+import time
+start = time.time()
+import x2paddle.convert
+import x2paddle.optimizer.optimizer
+cost = (time.time() - start) * 1000
+loaded = [m for m in {} if m in sys.modules]
+print(cost)
+print(",".join(loaded))
+""".format(heavy_modules)
+
+costs = list()
+loaded = ""
+for i in range(repeat):
+    out = subprocess.check_output([sys.executable, "-c", code])
+    lines = out.decode().strip().split("\n")
+    costs.append(float(lines[0]))
+    loaded = lines[1] if len(lines) > 1 else ""
+costs.sort()
+median = costs[len(costs) // 2]
+print("import x2paddle.convert: median {:.1f}ms, min {:.1f}ms, max {:.1f}ms".
+      format(median, costs[0], costs[-1]))
+
+failed = False
+if loaded != "":
+    print("[ERROR] heavy modules imported at startup: {}".format(loaded))
+    failed = True
+if median > max_ms:
+    print(
+        "[ERROR] import time {:.1f}ms exceeds {:.1f}ms".format(median, max_ms))
+    failed = True
+if failed:
+    sys.exit(1)
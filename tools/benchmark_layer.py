@@ -0,0 +1,75 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# 构造包含大量layer的图，统计PaddleGraph的构建耗时、深拷贝耗时及内存峰值。
+# 使用方式: python tools/benchmark_layer.py [layer_num]
+# 设置环境变量X2PADDLE_VALIDATE_LAYER=0可对比关闭layer检查后的耗时。
+
+import copy
+import sys
+import time
+import tracemalloc
+
+from x2paddle.core.program import PaddleGraph
+
+layer_num = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+kernels = [
+    "paddle.matmul", "paddle.add", "paddle.nn.functional.softmax",
+    "paddle.reshape", "paddle.transpose", "paddle.nn.LayerNorm"
+]
+
+
+def gen_graph(layer_num):
+    graph = PaddleGraph(source_type="onnx", graph_type="dygraph")
+    graph.add_layer("paddle.to_tensor", inputs={}, outputs=["x0"], data="x0")
+    for i in range(layer_num - 1):
+        # 模拟由各op_mapper拼接得到的kernel字符串
+        kernel = "".join(kernels[i % len(kernels)])
+        graph.add_layer(
+            kernel,
+            inputs={"x": "x{}".format(i),
+                    "y": "x{}".format(i // 2)},
+            outputs=["x{}".format(i + 1)],
+            axis=-1)
+    return graph
+
+
+start = time.time()
+graph = gen_graph(layer_num)
+construct_cost = time.time() - start
+
+start = time.time()
+graph.build()
+build_cost = time.time() - start
+
+start = time.time()
+copied = copy.deepcopy(graph)
+copy_cost = time.time() - start
+del graph, copied
+
+# tracemalloc会显著拖慢执行，内存单独统计
+tracemalloc.start()
+graph = gen_graph(layer_num)
+graph_memory = tracemalloc.get_traced_memory()[0]
+tracemalloc.reset_peak()
+copied = copy.deepcopy(graph)
+copy_memory = tracemalloc.get_traced_memory()[1] - graph_memory
+tracemalloc.stop()
+
+print("layers: {}".format(len(graph.layers)))
+print("construct: {:.3f}s, memory {:.1f}MB".format(construct_cost, graph_memory
+                                                   / 1024 / 1024))
+print("build: {:.3f}s".format(build_cost))
+print("deepcopy: {:.3f}s, memory {:.1f}MB".format(copy_cost, copy_memory / 1024
+                                                  / 1024))
@@ -0,0 +1,113 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# 构造由重复的Conv+BatchNorm+Scale组成的Caffe动态图，统计GraphOptimizer的耗时，
+# 并检查优化后增量维护的边与重新build得到的边是否一致。
+# 使用方式: python tools/benchmark_optimizer.py [block_num] [repeat]
+
+import copy
+import sys
+import time
+
+import numpy as np
+from x2paddle.core.program import PaddleGraph
+from x2paddle.optimizer.optimizer import GraphOptimizer
+from x2paddle.optimizer.pass_manager import PassManager
+
+block_num = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+
+def gen_graph(block_num):
+    graph = PaddleGraph(source_type="caffe", graph_type="dygraph")
+    graph.outputs = ["x{}".format(block_num)]
+    graph.add_layer("paddle.to_tensor", inputs={}, outputs=["x0"], data="x0")
+    for i in range(block_num):
+        x = "x{}".format(i)
+        prefix = "block{}".format(i)
+        graph.add_layer(
+            "paddle.nn.Conv2D",
+            inputs={"input": x},
+            outputs=["conv{}".format(i), prefix + "_conv"],
+            in_channels=8,
+            out_channels=8,
+            kernel_size=[3, 3])
+        graph.add_layer(
+            "paddle.nn.BatchNorm2D",
+            inputs={"input": prefix + "_conv"},
+            outputs=["bn{}".format(i), prefix + "_bn"],
+            num_features=8,
+            weight_attr=False,
+            bias_attr=False)
+        graph.add_layer(
+            "self.create_parameter",
+            inputs={},
+            outputs=[prefix + "_cparam1"],
+            shape=[8])
+        graph.add_layer(
+            "paddle.multiply",
+            inputs={"x": prefix + "_bn",
+                    "y": prefix + "_cparam1"},
+            outputs=[prefix + "_mul"],
+            axis=1)
+        graph.add_layer(
+            "self.create_parameter",
+            inputs={},
+            outputs=[prefix + "_cparam2"],
+            shape=[8])
+        graph.add_layer(
+            "paddle.add",
+            inputs={"x": prefix + "_mul",
+                    "y": prefix + "_cparam2"},
+            outputs=[prefix + "_add"],
+            axis=1)
+        graph.add_layer(
+            "paddle.nn.ReLU",
+            inputs={"x": prefix + "_add"},
+            outputs=["relu{}".format(i), "x{}".format(i + 1)])
+        graph.parameters[prefix + "_cparam1"] = np.ones([8], "float32")
+        graph.parameters[prefix + "_cparam2"] = np.zeros([8], "float32")
+    graph.build()
+    return graph
+
+
+costs = list()
+for i in range(repeat):
+    graph = gen_graph(block_num)
+    layer_num = len(graph.layers)
+    optimizer = GraphOptimizer(source_frame="caffe", paddle_type="dygraph")
+    start = time.time()
+    optimizer.optimize(graph)
+    costs.append(time.time() - start)
+
+if len(graph.layers) != layer_num - block_num * 4:
+    print("[ERROR] {} layers left, expected {}".format(
+        len(graph.layers), layer_num - block_num * 4))
+    sys.exit(1)
+
+# GraphOptimizer最后会整体build，这里单独执行pass检查增量维护的边
+checked_graph = gen_graph(block_num)
+PassManager.lookup("dygraph_bn_scale_fuse_pass")().apply(checked_graph)
+expected = copy.deepcopy(checked_graph)
+expected.build()
+if checked_graph.edges_in != expected.edges_in or \
+        checked_graph.edges_out != expected.edges_out:
+    print("[ERROR] edges are inconsistent with PaddleGraph.build")
+    sys.exit(1)
+
+costs.sort()
+print(
+    "optimize {} layers -> {} layers: median {:.3f}s, min {:.3f}s, max {:.3f}s".
+    format(layer_num,
+           len(graph.layers), costs[len(costs) // 2], costs[0], costs[-1]))
@@ -13,7 +13,8 @@
 # limitations under the License.
 
 from six import text_type as _text_type
-from x2paddle import program
+from x2paddle.core.profiler import profiler
+from x2paddle.core.util import parse_input_shapes, parse_pass_names
 import argparse
 import sys
 
@@ -70,6 +71,18 @@ def arg_parser():
         action="store_true",
         default=False,
         help="define input shape for tf model")
+    parser.add_argument(
+        "--input_shapes",
+        type=_text_type,
+        default=None,
+        help=
+        "optional: define input shapes for tensorflow/onnx model, e.g. \"name:1,3,224,224;other:-1,128\""
+    )
+    parser.add_argument(
+        "--non_interactive",
+        action="store_true",
+        default=False,
+        help="optional: fail instead of asking for input shapes from keyboard")
     parser.add_argument(
         "--paddle_type",
         "-pt",
@@ -77,14 +90,91 @@ def arg_parser():
         default="dygraph",
         help="define the paddle model type after converting(dygraph/static)"
     )
-    
+    parser.add_argument(
+        "--batch",
+        "-b",
+        type=_text_type,
+        default=None,
+        help="optional: a yaml/json file which describes several conversion jobs"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=
+        "optional: number of processes used in batch mode, default is the number of cpu cores"
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=_text_type,
+        default=None,
+        help=
+        "optional: directory to cache converted models, keyed on the model files and options"
+    )
+    parser.add_argument(
+        "--cache_size",
+        type=float,
+        default=10.0,
+        help=
+        "optional: max size(GB) of --cache_dir, least recently used models are evicted"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=False,
+        help=
+        "optional: report time of each conversion phase, op mapper and optimizer pass, saved as profile.json in save_dir"
+    )
+    parser.add_argument(
+        "--pass_report",
+        action="store_true",
+        default=False,
+        help=
+        "optional: report matches, removed/added layers, folded parameters, iterations and time of each optimizer pass"
+    )
+    parser.add_argument(
+        "-O",
+        dest="opt_level",
+        type=int,
+        default=2,
+        choices=[0, 1, 2, 3],
+        help=
+        "optional: optimization level, -O0 runs no pass, -O1 only local fusions, -O2(default) adds transpose elimination, -O3 adds aggressive constant folding that may enlarge the model"
+    )
+    parser.add_argument(
+        "--passes",
+        type=_text_type,
+        default=None,
+        help=
+        "optional: comma separated optimizer passes to run instead of the default pipeline of -O"
+    )
+    parser.add_argument(
+        "--disable_passes",
+        type=_text_type,
+        default=None,
+        help="optional: comma separated optimizer passes to skip")
+    parser.add_argument(
+        "--data_format",
+        type=_text_type,
+        default="NCHW",
+        choices=["NCHW", "NHWC"],
+        help=
+        "optional: data format of tensorflow conv/pool/batchnorm/resize in the converted model, NHWC keeps the layout of tensorflow without transposes"
+    )
+
     return parser
 
 
 def tf2paddle(model_path,
               save_dir,
               define_input_shape=False,
-              paddle_type="dygraph"):
+              paddle_type="dygraph",
+              input_shapes=None,
+              interactive=True,
+              opt_level=2,
+              passes=None,
+              disable_passes=None,
+              data_format="NCHW"):
     # check tensorflow installation and version
     try:
         import os
@@ -95,37 +185,50 @@ def tf2paddle(model_path,
             print(
                 "[ERROR] 1.0.0<=tensorflow<2.0.0 is required, and v1.14.0 is recommended"
             )
-            return
+            return False
     except:
         print(
             "[ERROR] Tensorflow is not installed, use \"pip install tensorflow\"."
         )
-        return
-    
+        return False
+
     from x2paddle.decoder.tf_decoder import TFDecoder
     if paddle_type == "dygraph":
         from x2paddle.op_mapper.dygraph.tf2paddle.tf_op_mapper import TFOpMapper
     else:
         from x2paddle.op_mapper.static.tf2paddle.tf_op_mapper import TFOpMapper
-        
-    
+
     print("Now translating model from tensorflow to paddle.")
-    model = TFDecoder(model_path, define_input_shape=define_input_shape)
-    mapper = TFOpMapper(model)
-    mapper.paddle_graph.build()
-    if paddle_type == "dygraph":
-        from x2paddle.optimizer.optimizer import GraphOptimizer
-        graph_opt = GraphOptimizer(source_frame="tf", paddle_type=paddle_type)
-        graph_opt.optimize(mapper.paddle_graph)
-    else:
+    with profiler.record("phase", "decode"):
+        model = TFDecoder(
+            model_path,
+            define_input_shape=define_input_shape,
+            input_shapes=input_shapes,
+            interactive=interactive)
+    with profiler.record("phase", "op_mapping"):
+        mapper = TFOpMapper(model, data_format=data_format)
+        mapper.paddle_graph.build()
+    with profiler.record("phase", "optimize"):
         from x2paddle.optimizer.optimizer import GraphOptimizer
-        graph_opt = GraphOptimizer(source_frame="tf", paddle_type=paddle_type)
+        graph_opt = GraphOptimizer(
+            source_frame="tf",
+            paddle_type=paddle_type,
+            opt_level=opt_level,
+            passes=parse_pass_names(passes),
+            disable_passes=parse_pass_names(disable_passes))
         graph_opt.optimize(mapper.paddle_graph)
     mapper.paddle_graph.gen_model(save_dir)
-        
+    return True
 
 
-def caffe2paddle(proto, weight, save_dir, caffe_proto, paddle_type):
+def caffe2paddle(proto,
+                 weight,
+                 save_dir,
+                 caffe_proto,
+                 paddle_type,
+                 opt_level=2,
+                 passes=None,
+                 disable_passes=None):
     from x2paddle.decoder.caffe_decoder import CaffeDecoder
     if paddle_type == "dygraph":
         from x2paddle.op_mapper.dygraph.caffe2paddle.caffe_op_mapper import CaffeOpMapper
@@ -139,28 +242,44 @@ def caffe2paddle(proto, weight, save_dir, caffe_proto, paddle_type):
         version_satisfy = True
     assert version_satisfy, '[ERROR] google.protobuf >= 3.6.0 is required'
     print("Now translating model from caffe to paddle.")
-    model = CaffeDecoder(proto, weight, caffe_proto)
-    mapper = CaffeOpMapper(model)
-    mapper.paddle_graph.build()
+    with profiler.record("phase", "decode"):
+        model = CaffeDecoder(proto, weight, caffe_proto)
+    with profiler.record("phase", "op_mapping"):
+        mapper = CaffeOpMapper(model)
+        mapper.paddle_graph.build()
     print("Model optimizing ...")
     from x2paddle.optimizer.optimizer import GraphOptimizer
-    graph_opt = GraphOptimizer(source_frame="caffe", paddle_type=paddle_type)
-    graph_opt.optimize(mapper.paddle_graph)
+    with profiler.record("phase", "optimize"):
+        graph_opt = GraphOptimizer(
+            source_frame="caffe",
+            paddle_type=paddle_type,
+            opt_level=opt_level,
+            passes=parse_pass_names(passes),
+            disable_passes=parse_pass_names(disable_passes))
+        graph_opt.optimize(mapper.paddle_graph)
     print("Model optimized.")
     mapper.paddle_graph.gen_model(save_dir)
+    return True
 
 
-def onnx2paddle(model_path, save_dir, paddle_type):
+def onnx2paddle(model_path,
+                save_dir,
+                paddle_type="dygraph",
+                input_shapes=None,
+                interactive=True,
+                opt_level=2,
+                passes=None,
+                disable_passes=None):
     # check onnx installation and version
     try:
         import onnx
         version = onnx.version.version
         if version < '1.6.0':
             print("[ERROR] onnx>=1.6.0 is required")
-            return
+            return False
     except:
         print("[ERROR] onnx is not installed, use \"pip install onnx==1.6.0\".")
-        return
+        return False
     print("Now translating model from onnx to paddle.")
 
     from x2paddle.decoder.onnx_decoder import ONNXDecoder
@@ -168,13 +287,33 @@ def onnx2paddle(model_path, save_dir, paddle_type):
         from x2paddle.op_mapper.dygraph.onnx2paddle.onnx_op_mapper import ONNXOpMapper
     else:
         from x2paddle.op_mapper.static.onnx2paddle.onnx_op_mapper import ONNXOpMapper
-    model = ONNXDecoder(model_path)
-    mapper = ONNXOpMapper(model)
-    mapper.paddle_graph.build()
+    with profiler.record("phase", "decode"):
+        model = ONNXDecoder(model_path, input_shapes, interactive)
+    with profiler.record("phase", "op_mapping"):
+        mapper = ONNXOpMapper(model)
+        mapper.paddle_graph.build()
+    print("Model optimizing ...")
+    from x2paddle.optimizer.optimizer import GraphOptimizer
+    with profiler.record("phase", "optimize"):
+        graph_opt = GraphOptimizer(
+            source_frame="onnx",
+            paddle_type=paddle_type,
+            opt_level=opt_level,
+            passes=parse_pass_names(passes),
+            disable_passes=parse_pass_names(disable_passes))
+        graph_opt.optimize(mapper.paddle_graph)
+    print("Model optimized.")
     mapper.paddle_graph.gen_model(save_dir)
+    return True
 
 
-def pytorch2paddle(module, save_dir, jit_type="trace", input_examples=None):
+def pytorch2paddle(module,
+                   save_dir,
+                   jit_type="trace",
+                   input_examples=None,
+                   opt_level=2,
+                   passes=None,
+                   disable_passes=None):
     # check pytorch installation and version
     try:
         import torch
@@ -183,29 +322,287 @@ def pytorch2paddle(module, save_dir, jit_type="trace", input_examples=None):
         print(ver_part)
         if int(ver_part[1]) < 5:
             print("[ERROR] pytorch>=1.5.0 is required")
-            return
+            return False
     except:
         print(
             "[ERROR] Pytorch is not installed, use \"pip install torch==1.5.0 torchvision\"."
         )
-        return
+        return False
     print("Now translating model from pytorch to paddle.")
-    
+
     from x2paddle.decoder.pytorch_decoder import ScriptDecoder, TraceDecoder
     from x2paddle.op_mapper.dygraph.pytorch2paddle.pytorch_op_mapper import PyTorchOpMapper
 
-    if jit_type == "trace":
-        model = TraceDecoder(module, input_examples)
-    else:
-        model = ScriptDecoder(module, input_examples)
-    mapper = PyTorchOpMapper(model)
-    mapper.paddle_graph.build()
+    with profiler.record("phase", "decode"):
+        if jit_type == "trace":
+            model = TraceDecoder(module, input_examples)
+        else:
+            model = ScriptDecoder(module, input_examples)
+    with profiler.record("phase", "op_mapping"):
+        mapper = PyTorchOpMapper(model)
+        mapper.paddle_graph.build()
     print("Model optimizing ...")
     from x2paddle.optimizer.optimizer import GraphOptimizer
-    graph_opt = GraphOptimizer(source_frame="pytorch", paddle_type="dygraph", jit_type=jit_type)
-    graph_opt.optimize(mapper.paddle_graph)
+    with profiler.record("phase", "optimize"):
+        graph_opt = GraphOptimizer(
+            source_frame="pytorch",
+            paddle_type="dygraph",
+            jit_type=jit_type,
+            opt_level=opt_level,
+            passes=parse_pass_names(passes),
+            disable_passes=parse_pass_names(disable_passes))
+        graph_opt.optimize(mapper.paddle_graph)
     print("Model optimized.")
     mapper.paddle_graph.gen_model(save_dir, jit_type=jit_type)
+    return True
+
+
+def _report_profile(save_dir):
+    """ 打印耗时统计表格，并以json格式保存到save_dir/profile.json。
+    """
+    import os
+    print(profiler.summary())
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+    profile_path = os.path.join(save_dir, "profile.json")
+    profiler.dump(profile_path)
+    print("\nProfile is saved in {}.".format(profile_path))
+
+
+def _report_passes():
+    """ 打印各优化pass的统计表格。
+    """
+    from x2paddle.optimizer.pass_manager import PassManager
+    print("\n" + PassManager.report())
+
+
+def _get_cache(cache_dir, cache_size, framework, paddle_type, model_files,
+               interactive, **options):
+    """ 获取转换缓存及本次转换对应的key，cache_dir为None时返回(None, None)。
+    交互模式下指定define_input_shape时，未在input_shapes中给出的输入形状由用户在转换时输入，
+    不包含在key中，因此不使用缓存，同样返回(None, None)。
+    """
+    if cache_dir is None:
+        return None, None
+    if interactive and options.get("define_input_shape", False):
+        print("Conversion cache is not used since input shapes may be typed "
+              "at the prompt, use --input_shapes with --non_interactive to "
+              "cache the result.")
+        return None, None
+    from x2paddle.core.cache import ConversionCache
+    cache = ConversionCache(cache_dir, cache_size)
+    options["framework"] = framework
+    options["paddle_type"] = paddle_type
+    key = cache.get_key(model_files, options)
+    return cache, key
+
+
+def _import_frameworks(frameworks):
+    """ 在batch模式的每个子进程中预先导入一次框架，后续任务复用。
+    """
+    import os
+    os.environ["TF_CPP_MIN_LOG_LEVEL"] = '3'
+    modules = {
+        "tensorflow": ["tensorflow"],
+        "onnx": ["onnx"],
+        "caffe": ["google.protobuf"],
+    }
+    import importlib
+    for module_name in ["paddle"] + sum(
+        [modules.get(f, []) for f in frameworks], []):
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            pass
+
+
+def _run_job(job):
+    """ 执行batch中的单个转换任务，返回该任务的状态与耗时。
+    """
+    import time
+    import traceback
+    framework = job.get("framework")
+    paddle_type = job.get("paddle_type", "dygraph")
+    save_dir = job.get("save_dir")
+    result = {
+        "name": job.get("name", save_dir),
+        "framework": framework,
+        "success": False,
+        "cached": False,
+        "time": 0.0,
+        "error": None
+    }
+    # 生成的代码会以x2paddle_code/x2paddle_model被import，
+    # 任务结束后需要清理，避免同一进程中的下一个任务复用到旧模块
+    sys_path = list(sys.path)
+    if job.get("profile", False):
+        profiler.reset()
+        profiler.enable()
+    if job.get("pass_report", False):
+        from x2paddle.optimizer.pass_manager import PassManager
+        PassManager.reset_stats()
+    optimize_options = {
+        "opt_level": job.get("opt_level", 2),
+        "passes": parse_pass_names(job.get("passes")),
+        "disable_passes": parse_pass_names(job.get("disable_passes"))
+    }
+    start = time.time()
+    try:
+        assert save_dir is not None, "save_dir is not defined"
+        assert paddle_type in ["dygraph", "static"
+                               ], "paddle_type must be 'dygraph' or 'static'"
+        cache, cache_key = _get_cache(
+            job.get("cache_dir"),
+            job.get("cache_size", 10.0),
+            framework,
+            paddle_type, [
+                job.get("model"),
+                job.get("prototxt"),
+                job.get("weight"),
+                job.get("caffe_proto")
+            ],
+            job.get("interactive", False),
+            define_input_shape=job.get("define_input_shape", False),
+            input_shapes=parse_input_shapes(job.get("input_shapes")),
+            data_format=job.get("data_format", "NCHW"),
+            **optimize_options)
+        if cache is not None and cache.restore(cache_key, save_dir):
+            result["cached"] = True
+        elif framework == "tensorflow":
+            assert job.get("model") is not None, "model is not defined"
+            success = tf2paddle(
+                job["model"],
+                save_dir,
+                job.get("define_input_shape", False),
+                paddle_type,
+                job.get("input_shapes"),
+                job.get("interactive", False),
+                data_format=job.get("data_format", "NCHW"),
+                **optimize_options)
+        elif framework == "caffe":
+            assert job.get("prototxt") is not None and job.get(
+                "weight") is not None, "prototxt and weight are not defined"
+            success = caffe2paddle(job["prototxt"], job["weight"], save_dir,
+                                   job.get("caffe_proto"), paddle_type,
+                                   **optimize_options)
+        elif framework == "onnx":
+            assert job.get("model") is not None, "model is not defined"
+            success = onnx2paddle(job["model"], save_dir, paddle_type,
+                                  job.get("input_shapes"),
+                                  job.get("interactive", False),
+                                  **optimize_options)
+        else:
+            raise Exception("framework only support tensorflow/caffe/onnx")
+        # 依赖缺失等情况下转换函数只打印错误并返回False，save_dir中可能是之前的转换结果
+        if not result["cached"] and not success:
+            raise Exception("fail to convert the model, see the error above")
+        if cache is not None and not result["cached"]:
+            cache.store(cache_key, save_dir, since=start)
+        if job.get("profile", False):
+            _report_profile(save_dir)
+        if job.get("pass_report", False):
+            _report_passes()
+        result["success"] = True
+    except BaseException as e:
+        result["error"] = "{}: {}".format(type(e).__name__, e)
+        traceback.print_exc()
+    finally:
+        profiler.disable()
+        sys.path[:] = sys_path
+        for module_name in ["x2paddle_code", "x2paddle_model"]:
+            sys.modules.pop(module_name, None)
+    result["time"] = time.time() - start
+    return result
+
+
+def load_batch_jobs(batch_file):
+    """ 读取batch任务文件，文件内容为任务列表或包含jobs字段的字典。
+
+    Args:
+        batch_file (str): yaml或json文件路径，每个任务的字段与命令行参数一致。
+    """
+    with open(batch_file, "r") as f:
+        content = f.read()
+    if batch_file.endswith(".json"):
+        import json
+        jobs = json.loads(content)
+    else:
+        import yaml
+        jobs = yaml.safe_load(content)
+    if isinstance(jobs, dict):
+        jobs = jobs.get("jobs", [])
+    assert isinstance(jobs,
+                      list), "jobs in {} should be a list".format(batch_file)
+    for i, job in enumerate(jobs):
+        assert isinstance(job, dict), "job {} should be a dict".format(i)
+        job.setdefault("name", job.get("save_dir", str(i)))
+    return jobs
+
+
+def batch_convert(jobs,
+                  workers=None,
+                  cache_dir=None,
+                  cache_size=10.0,
+                  profile=False,
+                  pass_report=False):
+    """ 使用进程池并行执行多个转换任务。
+
+    Args:
+        jobs (list): 任务列表，每个任务为一个dict，
+            包括framework、model/prototxt/weight、save_dir、paddle_type等字段。
+        workers (int): 进程数，默认为cpu核数。
+        cache_dir (str): 转换缓存目录，任务中未指定cache_dir时使用。
+        cache_size (float): 转换缓存的最大容量，单位为GB。
+        profile (bool): 是否统计每个任务的耗时，结果保存在各任务的save_dir/profile.json。
+        pass_report (bool): 是否打印每个任务中各优化pass的统计表格。
+    Returns:
+        list: 每个任务的name、framework、success、cached、time、error。
+    """
+    import multiprocessing
+    import time
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    workers = max(1, min(workers, len(jobs)))
+    for job in jobs:
+        # 子进程中无法从键盘输入shape，缺少shape时直接报错
+        job.setdefault("interactive", False)
+        if profile:
+            job.setdefault("profile", True)
+        if pass_report:
+            job.setdefault("pass_report", True)
+        if cache_dir is not None:
+            job.setdefault("cache_dir", cache_dir)
+            job.setdefault("cache_size", cache_size)
+    frameworks = list(set([job.get("framework") for job in jobs]))
+    start = time.time()
+    # maxtasksperchild为None，每个子进程只导入一次框架
+    pool = multiprocessing.Pool(
+        processes=workers,
+        initializer=_import_frameworks,
+        initargs=(frameworks, ))
+    try:
+        results = pool.map(_run_job, jobs, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    total_time = time.time() - start
+
+    print("\n==================== Batch Summary ====================")
+    print("{:<40} {:<12} {:<8} {:>10}".format("job", "framework", "status",
+                                              "time(s)"))
+    for result in results:
+        print("{:<40} {:<12} {:<8} {:>10.2f}".format(
+            str(result["name"])[-40:],
+            str(result["framework"]), ("cached"
+                                       if result["cached"] else "success")
+            if result["success"] else "failed", result["time"]))
+        if result["error"] is not None:
+            print("    {}".format(result["error"]))
+    success_num = len([r for r in results if r["success"]])
+    print("{} jobs, {} succeeded, {} failed, {} workers, total {:.2f}s".format(
+        len(results), success_num,
+        len(results) - success_num, workers, total_time))
+    return results
 
 
 def main():
@@ -224,9 +621,46 @@ def main():
             x2paddle.__version__))
         return
 
+    if args.batch is not None:
+        jobs = load_batch_jobs(args.batch)
+        results = batch_convert(jobs, args.workers, args.cache_dir,
+                                args.cache_size, args.profile, args.pass_report)
+        if not all([r["success"] for r in results]):
+            sys.exit(1)
+        return
+
     assert args.framework is not None, "--framework is not defined(support tensorflow/caffe/onnx)"
     assert args.save_dir is not None, "--save_dir is not defined"
-    assert args.paddle_type in ["dygraph", "static"], "--paddle_type must be 'dygraph' or 'static'"
+    assert args.paddle_type in ["dygraph", "static"
+                                ], "--paddle_type must be 'dygraph' or 'static'"
+    optimize_options = {
+        "opt_level": args.opt_level,
+        "passes": parse_pass_names(args.passes),
+        "disable_passes": parse_pass_names(args.disable_passes)
+    }
+
+    cache, cache_key = _get_cache(
+        args.cache_dir,
+        args.cache_size,
+        args.framework,
+        args.paddle_type,
+        [args.model, args.prototxt, args.weight, args.caffe_proto],
+        not args.non_interactive,
+        define_input_shape=args.define_input_shape,
+        input_shapes=parse_input_shapes(args.input_shapes),
+        data_format=args.data_format,
+        **optimize_options)
+    if cache is not None and cache.restore(cache_key, args.save_dir):
+        print(
+            "Converted model is restored from cache {}.".format(args.cache_dir))
+        return
+    import time
+    start = time.time()
+    if args.profile:
+        profiler.enable()
+    if args.pass_report:
+        from x2paddle.optimizer.pass_manager import PassManager
+        PassManager.reset_stats()
 
     try:
         import platform
@@ -252,22 +686,42 @@ def main():
         define_input_shape = False
         if args.define_input_shape:
             define_input_shape = True
-        tf2paddle(args.model, args.save_dir, 
-                  define_input_shape, args.paddle_type)
+        success = tf2paddle(
+            args.model,
+            args.save_dir,
+            define_input_shape,
+            args.paddle_type,
+            args.input_shapes,
+            not args.non_interactive,
+            data_format=args.data_format,
+            **optimize_options)
 
     elif args.framework == "caffe":
         assert args.prototxt is not None and args.weight is not None, "--prototxt and --weight should be defined while translating caffe model"
-        caffe2paddle(args.prototxt, args.weight, args.save_dir,
-                     args.caffe_proto, args.paddle_type)
+        success = caffe2paddle(args.prototxt, args.weight, args.save_dir,
+                               args.caffe_proto, args.paddle_type,
+                               **optimize_options)
     elif args.framework == "onnx":
         assert args.model is not None, "--model should be defined while translating onnx model"
-        onnx2paddle(args.model, args.save_dir, args.paddle_type)
+        success = onnx2paddle(args.model, args.save_dir, args.paddle_type,
+                              args.input_shapes, not args.non_interactive,
+                              **optimize_options)
     elif args.framework == "paddle2onnx":
-        print("Paddle to ONNX tool has been migrated to the new github: https://github.com/PaddlePaddle/paddle2onnx")
+        print(
+            "Paddle to ONNX tool has been migrated to the new github: https://github.com/PaddlePaddle/paddle2onnx"
+        )
+        success = False
 
     else:
-        raise Exception(
-            "--framework only support tensorflow/caffe/onnx now")
+        raise Exception("--framework only support tensorflow/caffe/onnx now")
+
+    # 依赖缺失等情况下转换函数返回False，save_dir中可能是之前的转换结果，不能存入缓存
+    if cache is not None and success:
+        cache.store(cache_key, args.save_dir, since=start)
+    if args.profile:
+        _report_profile(args.save_dir)
+    if args.pass_report:
+        _report_passes()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+# -*- coding:UTF-8 -*-
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import os.path as osp
+import shutil
+import time
+import uuid
+
+# 生成的代码中会写入save_dir的绝对路径，缓存时替换为占位符，恢复时再替换回来
+SAVE_DIR_PLACEHOLDER = "@X2PADDLE_SAVE_DIR@"
+CODE_FILES = ["x2paddle_code.py", "x2paddle_model.py"]
+# gen_model写入save_dir的转换结果，只缓存这些文件与目录
+ARTIFACTS = [
+    "x2paddle_code.py", "model.pdparams", "inference_model", "model_with_code"
+]
+LAST_USED_FILE = ".last_used"
+
+
+class ConversionCache(object):
+    """ 以模型文件内容与转换参数为key的转换结果缓存。
+
+    Args:
+        cache_dir (str): 缓存目录。
+        max_size (float): 缓存的最大容量，单位为GB，超出后按最近最少使用淘汰。
+    """
+
+    def __init__(self, cache_dir, max_size=10.0):
+        self.cache_dir = osp.abspath(cache_dir)
+        self.max_size = int(max_size * 1024 * 1024 * 1024)
+        if not osp.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def get_key(self, model_files, options):
+        """ 计算缓存的key。
+
+        Args:
+            model_files (list): 模型文件路径，为None的项会被忽略。
+            options (dict): 影响转换结果的参数。
+        """
+        import x2paddle
+        sha = hashlib.sha256()
+        for model_file in model_files:
+            if model_file is None:
+                sha.update(b"\0")
+                continue
+            with open(model_file, "rb") as f:
+                while True:
+                    chunk = f.read(1 << 20)
+                    if not chunk:
+                        break
+                    sha.update(chunk)
+            sha.update(b"\0")
+        info = dict(options)
+        info["x2paddle_version"] = x2paddle.__version__
+        # 生成的代码及inference_model与paddle的版本有关
+        try:
+            import paddle
+            info["paddle_version"] = paddle.__version__
+        except ImportError:
+            info["paddle_version"] = None
+        sha.update(json.dumps(info, sort_keys=True).encode())
+        return sha.hexdigest()
+
+    def restore(self, key, save_dir):
+        """ 若缓存命中，将缓存的转换结果复制到save_dir并返回True。
+        """
+        entry_dir = osp.join(self.cache_dir, key)
+        if not osp.isdir(entry_dir):
+            return False
+        save_dir = osp.abspath(save_dir)
+        for name in os.listdir(entry_dir):
+            if name == LAST_USED_FILE:
+                continue
+            src = osp.join(entry_dir, name)
+            dst = osp.join(save_dir, name)
+            if osp.isdir(src):
+                if osp.exists(dst):
+                    shutil.rmtree(dst)
+                shutil.copytree(src, dst)
+            else:
+                if not osp.exists(save_dir):
+                    os.makedirs(save_dir)
+                shutil.copy2(src, dst)
+        self._replace_save_dir(save_dir, SAVE_DIR_PLACEHOLDER, save_dir)
+        self._touch(entry_dir)
+        return True
+
+    def store(self, key, save_dir, since=None):
+        """ 将save_dir中的转换结果（ARTIFACTS）存入缓存，并淘汰超出容量的缓存项。
+        save_dir中的其他文件不会被缓存。
+
+        Args:
+            key (str): get_key得到的key。
+            save_dir (str): 转换结果所在目录。
+            since (float): 本次转换开始的时间，早于该时间写入的结果（之前转换遗留的）不会被缓存。
+        """
+        entry_dir = osp.join(self.cache_dir, key)
+        if osp.isdir(entry_dir):
+            self._touch(entry_dir)
+            return
+        save_dir = osp.abspath(save_dir)
+        names = list()
+        for name in ARTIFACTS:
+            path = osp.join(save_dir, name)
+            if not osp.exists(path):
+                continue
+            # 部分文件系统的时间戳精度为秒，留出1秒的误差
+            if since is not None and self._get_mtime(path) < since - 1:
+                continue
+            names.append(name)
+        if len(names) == 0:
+            return
+        # 先写入临时目录再重命名，避免并行转换时读到不完整的缓存项
+        tmp_dir = osp.join(self.cache_dir, ".tmp_{}_{}".format(
+            key, uuid.uuid4().hex))
+        os.makedirs(tmp_dir)
+        for name in names:
+            src = osp.join(save_dir, name)
+            if osp.isdir(src):
+                shutil.copytree(src, osp.join(tmp_dir, name))
+            else:
+                shutil.copy2(src, osp.join(tmp_dir, name))
+        self._replace_save_dir(tmp_dir, save_dir, SAVE_DIR_PLACEHOLDER)
+        self._touch(tmp_dir)
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """ 按最近使用时间从旧到新删除缓存项，直到总大小不超过max_size。
+        """
+        entries = list()
+        total_size = 0
+        for name in os.listdir(self.cache_dir):
+            entry_dir = osp.join(self.cache_dir, name)
+            if name.startswith(".") or not osp.isdir(entry_dir):
+                continue
+            size = self._get_size(entry_dir)
+            last_used_file = osp.join(entry_dir, LAST_USED_FILE)
+            if osp.exists(last_used_file):
+                last_used = osp.getmtime(last_used_file)
+            else:
+                last_used = osp.getmtime(entry_dir)
+            entries.append((last_used, size, entry_dir))
+            total_size += size
+        entries.sort()
+        for last_used, size, entry_dir in entries:
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+
+    def _touch(self, entry_dir):
+        last_used_file = osp.join(entry_dir, LAST_USED_FILE)
+        with open(last_used_file, "w") as f:
+            f.write(str(time.time()))
+        os.utime(last_used_file, None)
+
+    def _get_mtime(self, path):
+        if not osp.isdir(path):
+            return osp.getmtime(path)
+        mtime = osp.getmtime(path)
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                mtime = max(mtime, osp.getmtime(osp.join(root, name)))
+        return mtime
+
+    def _get_size(self, path):
+        size = 0
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                size += osp.getsize(osp.join(root, name))
+        return size
+
+    def _replace_save_dir(self, root_dir, old, new):
+        for root, dirs, files in os.walk(root_dir):
+            for name in files:
+                if name not in CODE_FILES:
+                    continue
+                code_path = osp.join(root, name)
+                with open(code_path, "r") as f:
+                    code = f.read()
+                if old not in code:
+                    continue
+                with open(code_path, "w") as f:
+                    f.write(code.replace(old, new))
@@ -11,14 +11,29 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import paddle.fluid as fluid
-from paddle.fluid.proto import framework_pb2
 from x2paddle.core.util import *
 import inspect
 import os
+import struct
+
+
+def normalize_paddle_param(param, param_name):
+    """ 将参数转换为Paddle支持的dtype和shape（uint8/bool转为int64，0维转为[1]）。
+    """
+    shape = param.shape
+    if str(param.dtype) in ['uint8', 'uint_8', 'bool']:
+        param = param.astype('int64')
+    if len(shape) == 0:
+        assert param.size == 1, "Unexpected situation happend!"
+        shape = [1]
+    assert str(param.dtype) in [
+        "int16", "int32", "int64", "float16", "float32", "float64", "bool"
+    ], "Unknown dtype {} of params: {}.".format(str(param.dtype), param_name)
+    return numpy.ascontiguousarray(param).reshape(shape)
 
 
 def export_paddle_param(param, param_name, dir):
+    from paddle.fluid.proto import framework_pb2
     dtype_map = {
         "int16": [framework_pb2.VarType.INT16, 'h'],
         "int32": [framework_pb2.VarType.INT32, 'i'],
@@ -28,32 +43,46 @@ def export_paddle_param(param, param_name, dir):
         "float64": [framework_pb2.VarType.FP64, 'd'],
         "bool": [framework_pb2.VarType.BOOL, None]
     }
-    shape = param.shape
-    if str(param.dtype) in ['uint8', 'uint_8', 'bool']:
-        param = param.astype('int64')
-    if len(shape) == 0:
-        assert param.size == 1, "Unexpected situation happend!"
-        shape = [1]
-    assert str(
-        param.dtype) in dtype_map, "Unknown dtype {} of params: {}.".format(
-            str(param.dtype), param_name)
-    fp = open(os.path.join(dir, param_name), 'wb')
-    numpy.array([0], dtype='int32').tofile(fp)
-    numpy.array([0], dtype='int64').tofile(fp)
-    numpy.array([0], dtype='int32').tofile(fp)
+    param = normalize_paddle_param(param, param_name)
     tensor_desc = framework_pb2.VarType.TensorDesc()
     tensor_desc.data_type = dtype_map[str(param.dtype)][0]
-    tensor_desc.dims.extend(shape)
-    desc_size = tensor_desc.ByteSize()
-    numpy.array([desc_size], dtype='int32').tofile(fp)
-    fp.write(tensor_desc.SerializeToString())
-    param.tofile(fp)
-    fp.close()
+    tensor_desc.dims.extend(param.shape)
+    desc = tensor_desc.SerializeToString()
+    # 文件头依次为: version(int32)、lod_level(int64)、version(int32)、desc_size(int32)，
+    # 与desc一起一次写入
+    header = struct.pack("<iqii", 0, 0, 0, len(desc)) + desc
+    with open(os.path.join(dir, param_name), 'wb') as fp:
+        fp.write(header)
+        param.tofile(fp)
+
+
+def export_paddle_params(params, dir, workers=None):
+    """ 使用线程池将参数分别保存为Paddle的参数文件，写文件时不持有GIL，
+    总耗时主要取决于磁盘带宽。
+
+    Args:
+        params (dict): 参数名到numpy.ndarray的dict。
+        dir (str): 保存的目录。
+        workers (int): 线程数，默认为min(32, cpu数 + 4)。
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    # 在主线程中导入，避免多个线程同时导入
+    from paddle.fluid.proto import framework_pb2
+    if not os.path.exists(dir):
+        os.makedirs(dir)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(export_paddle_param, param, param_name, dir)
+            for param_name, param in params.items()
+        ]
+        for future in futures:
+            future.result()
 
 
 # This func will copy to generate code file
 def run_net(param_dir="./"):
     import os
+    import paddle.fluid as fluid
     inputs, outputs = x2paddle_net()
 
     ops = fluid.default_main_program().global_block().ops
@@ -205,8 +234,7 @@ class OpMapper(object):
         if not os.path.exists(py_code_dir):
             os.makedirs(py_code_dir)
 
-        for name, param in self.weights.items():
-            export_paddle_param(param, name, py_code_dir)
+        export_paddle_params(self.weights, py_code_dir)
         self.add_heads()
 
         if hasattr(self, "used_custom_layers"):
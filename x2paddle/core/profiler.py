@@ -0,0 +1,147 @@
+# -*- coding:UTF-8 -*-
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import functools
+import json
+import time
+
+
+class _NullRecord(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _Record(object):
+    def __init__(self, profiler, category, name):
+        self.profiler = profiler
+        self.category = category
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.add(self.category, self.name, time.time() - self.start)
+        return False
+
+
+_null_record = _NullRecord()
+
+
+class Profiler(object):
+    """ 转换过程的耗时统计。
+    统计结果按类别组织，目前包括：
+        phase: 转换的各个阶段（解析、op映射、优化、代码生成、导出模型等）；
+        decoder: 解析模型时耗时较多的函数（如TFDecoder.infer_tensor）；
+        op_mapper: 以源框架op类型为key的op映射耗时；
+        pass: 各个优化pass的耗时及达到不动点所需的迭代次数。
+    未开启时record返回空的上下文，开销可以忽略。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.records = collections.OrderedDict()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.records = collections.OrderedDict()
+
+    def record(self, category, name):
+        """ 返回统计耗时的上下文，用法为`with profiler.record("phase", "decode"):`。
+        """
+        if not self.enabled:
+            return _null_record
+        return _Record(self, category, name)
+
+    def profile(self, category, name=None):
+        """ 统计函数耗时的装饰器。
+        """
+
+        def decorator(func):
+            record_name = name if name is not None else func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.record(category, record_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def add(self, category, name, cost, count=1, **extra):
+        """ 累加一条统计，extra中的数值字段同样会被累加。
+        """
+        if not self.enabled:
+            return
+        if category not in self.records:
+            self.records[category] = collections.OrderedDict()
+        if name not in self.records[category]:
+            self.records[category][name] = {"time": 0.0, "count": 0}
+        info = self.records[category][name]
+        info["time"] += cost
+        info["count"] += count
+        for k, v in extra.items():
+            info[k] = info.get(k, 0) + v
+
+    def to_dict(self):
+        return json.loads(json.dumps(self.records))
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.records, f, indent=2)
+
+    def summary(self):
+        """ 生成可读的表格，每个类别按耗时从高到低排列。
+        """
+        lines = list()
+        for category, infos in self.records.items():
+            extra_keys = list()
+            for info in infos.values():
+                for k in info:
+                    if k not in ["time", "count"] and k not in extra_keys:
+                        extra_keys.append(k)
+            total = sum([info["time"] for info in infos.values()])
+            lines.append("")
+            lines.append("[{}] total {:.3f}s".format(category, total))
+            head = "{:<48} {:>10} {:>8} {:>7}".format("name", "time(s)",
+                                                      "count", "ratio")
+            for k in extra_keys:
+                head += " {:>10}".format(k)
+            lines.append(head)
+            lines.append("-" * len(head))
+            items = sorted(
+                infos.items(), key=lambda x: x[1]["time"], reverse=True)
+            for name, info in items:
+                ratio = info["time"] / total * 100 if total > 0 else 0.0
+                line = "{:<48} {:>10.3f} {:>8} {:>6.1f}%".format(
+                    name[-48:], info["time"], info["count"], ratio)
+                for k in extra_keys:
+                    line += " {:>10}".format(info.get(k, ""))
+                lines.append(line)
+        return "\n".join(lines)
+
+
+profiler = Profiler()
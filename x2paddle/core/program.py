@@ -15,21 +15,59 @@
 
 from __future__ import print_function
 from __future__ import division
-import paddle
-from paddle.fluid.proto import framework_pb2
 import collections
+import copy
 import numpy
 import sys
 import os
 import six
 import pickle
+import shutil
+import tempfile
 import numpy as np
-from os import path as osp 
+from os import path as osp
 from x2paddle.core.util import *
+from x2paddle.core.profiler import profiler
 
 
 class PaddleLayer(object):
+    # 大模型中会有数十万个layer，使用__slots__减少每个layer的内存占用
+    # input_shapes只由TensorFlow的elementwise layer设置，供转置消除判断输入是否为标量
+    __slots__ = ("id", "kernel", "inputs", "outputs", "scope_name", "attrs",
+                 "blocks", "input_shapes")
+
+    # 是否检查inputs/outputs的类型，设置环境变量X2PADDLE_VALIDATE_LAYER=0可关闭
+    validate = os.environ.get("X2PADDLE_VALIDATE_LAYER", "1") != "0"
+
     def __init__(self, id, kernel, inputs, outputs, scope_name="", **kwargs):
+        if PaddleLayer.validate:
+            self.check(inputs, outputs)
+        # kernel的种类很少，驻留后所有layer共享同一个字符串，比较时也更快
+        self.kernel = sys.intern(kernel)
+        self.inputs = inputs
+        self.outputs = outputs
+        self.scope_name = scope_name
+        self.attrs = kwargs
+        self.id = id
+        # 绝大多数layer没有子图，共用空tuple，在add_block时再创建list
+        self.blocks = ()
+
+    def __deepcopy__(self, memo):
+        layer = PaddleLayer.__new__(PaddleLayer)
+        memo[id(self)] = layer
+        layer.id = self.id
+        layer.kernel = self.kernel
+        layer.scope_name = self.scope_name
+        layer.inputs = copy.deepcopy(self.inputs, memo)
+        layer.outputs = copy.deepcopy(self.outputs, memo)
+        layer.attrs = copy.deepcopy(self.attrs, memo)
+        layer.blocks = copy.deepcopy(self.blocks, memo)
+        if hasattr(self, "input_shapes"):
+            layer.input_shapes = copy.deepcopy(self.input_shapes, memo)
+        return layer
+
+    @staticmethod
+    def check(inputs, outputs):
         assert isinstance(
             inputs,
             dict), "parameter 'inputs' for PaddleLayer should be type of dict"
@@ -50,22 +88,122 @@ class PaddleLayer(object):
             assert isinstance(
                 v, six.
                 string_types), "elements in outputs should be type of string"
-        self.kernel = kernel
-        self.inputs = inputs
-        self.outputs = outputs
-        self.scope_name = scope_name
-        self.attrs = kwargs
-        self.id = id
-        self.blocks = list()
-        
 
     def add_block(self, block):
+        if len(self.blocks) == 0:
+            self.blocks = list()
         self.blocks.append(block)
 
 
+class LayerDict(collections.OrderedDict):
+    """ 记录被修改过的layer id的OrderedDict。
+    PaddleGraph根据changed增量更新边，无需每次修改后重新build。
+    在PaddleGraph建立索引前（changed为None）不做记录。
+    version在每次修改后递增，用于判断缓存的kernel索引是否失效。
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.changed = None
+        # 新加入（包括删除后重新加入）的layer id，这些layer位于最后，需要重新编号
+        self.added = None
+        self.version = 0
+        super(LayerDict, self).__init__(*args, **kwargs)
+
+    def __setitem__(self, key, value):
+        self.version += 1
+        if self.changed is not None:
+            self.changed.add(key)
+            if key not in self:
+                self.added.add(key)
+        super(LayerDict, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.version += 1
+        if self.changed is not None:
+            self.changed.add(key)
+        super(LayerDict, self).__delitem__(key)
+
+    def pop(self, key, *args):
+        self.version += 1
+        if self.changed is not None:
+            self.changed.add(key)
+        return super(LayerDict, self).pop(key, *args)
+
+    def popitem(self, last=True):
+        key, value = super(LayerDict, self).popitem(last)
+        self.version += 1
+        if self.changed is not None:
+            self.changed.add(key)
+        return key, value
+
+    def move_to_end(self, key, last=True):
+        self.version += 1
+        if self.changed is not None:
+            self.changed.add(key)
+        super(LayerDict, self).move_to_end(key, last)
+
+    def clear(self):
+        self.version += 1
+        if self.changed is not None:
+            self.changed.update(self.keys())
+        super(LayerDict, self).clear()
+
+
+class CodeWriter(object):
+    """ 将生成的代码直接写入文件，接口与生成代码时使用的list一致（append/extend）。
+
+    Args:
+        f (file): 写入的文件。
+        dedup (bool): 是否跳过已经写入过的代码行。
+        skip_lines (list): 需要跳过的代码行（不含缩进）。
+        tracked_names (list): 需要记录最后一次赋值的变量名，写入的代码不再保存在内存中，
+            prim2code中的prim_if通过get_assignment读取条件变量的赋值。
+    """
+
+    def __init__(self, f, dedup=False, skip_lines=None, tracked_names=None):
+        self.f = f
+        self.writen_codes = set() if dedup else None
+        self.skip_lines = set(skip_lines) if skip_lines else None
+        self.tracked_names = set(tracked_names) if tracked_names else None
+        self.assignments = dict()
+
+    def append(self, code_line):
+        if self.tracked_names is not None:
+            s = code_line.replace("    ", "")
+            name = s.split(" = ")[0]
+            if name != s and name in self.tracked_names:
+                self.assignments[name] = s
+        if self.skip_lines is not None and code_line.strip() in self.skip_lines:
+            return
+        if self.writen_codes is not None:
+            if code_line in self.writen_codes:
+                return
+            self.writen_codes.add(code_line)
+        self.f.write(code_line)
+
+    def extend(self, code_lines):
+        for code_line in code_lines:
+            self.append(code_line)
+
+    def get_assignment(self, name):
+        """ 获取变量name最后一次赋值的代码（去掉缩进），name未被记录或未被赋值时返回None。
+        """
+        return self.assignments.get(name, None)
+
+
+def _get_input_vars(layer):
+    vars = list()
+    for input_key, input_var in layer.inputs.items():
+        if isinstance(input_var, (list, tuple)):
+            vars.extend(input_var)
+        else:
+            vars.append(input_var)
+    return vars
+
+
 class PaddleGraph(object):
     def __init__(self, source_type=None, parent_layer=None, graph_type="static"):
-        self.layers = collections.OrderedDict()
+        self.layers = LayerDict()
         self.edges_out = dict()
         self.edges_in = dict()
         self.inputs = list()
@@ -76,24 +214,58 @@ class PaddleGraph(object):
         self.source_type = source_type
         self.custom_code = None
         self.inputs_info = None
+        # 卷积等layer使用的数据格式，TensorFlow模型以data_format="NHWC"转换时为NHWC
+        self.data_format = "NCHW"
+        # 转换时已知的静态形状（tensor名字到形状的映射），用于常量折叠
+        self.static_shapes = dict()
+        # 模式匹配的工作表（子图id到layer id集合的映射），为None时匹配整个图
+        self.match_worklist = None
+        # 最近一次融合后生成的下一轮工作表，由GraphOptimizer读取
+        self.next_match_worklist = None
+        # 建立索引时的layers，layers被整体替换后需要重新建立索引
+        self._indexed_layers = None
+        self._block_io = (None, None)
+        self._kernel_index = None
+
+    def __getstate__(self):
+        # 拷贝（如transpose消除中的deepcopy）时不复制索引，需要时重新建立
+        state = dict(self.__dict__)
+        for key in [
+                "_layer_pos", "_producers", "_layer_outputs", "_kernel_index"
+        ]:
+            state.pop(key, None)
+        state["_indexed_layers"] = None
+        return state
 
     def set_name(self, name):
         self.name = name.replace("-", "_").replace("/", "_")
 
     def set_parameters(self, parameters):
         self.parameters = parameters
-        
+
     def set_custom(self, custom_code):
         self.custom_code = custom_code
-        
+
     def set_inputs_info(self, inputs_info):
         self.inputs_info = inputs_info
-        
+
+    def set_static_shape(self, name, shape):
+        """ 记录tensor的静态形状，只记录每一维均已知的形状。
+        """
+        if not isinstance(shape, (list, tuple)) or len(shape) == 0:
+            return
+        try:
+            shape = [int(s) for s in shape]
+        except (TypeError, ValueError):
+            return
+        if all([s > 0 for s in shape]):
+            self.static_shapes[name] = shape
+
     def set_script(self, script):
         self.script = script
 
     def clear(self):
-        self.layers = collections.OrderedDict()
+        self.layers = LayerDict()
         self.edges_out = dict()
         self.edges_in = dict()
         self.inputs = list()
@@ -104,6 +276,69 @@ class PaddleGraph(object):
         self.edges_out = dict()
         self.edges_in = dict()
 
+    def _index_layer(self, layer_id, layer, pos):
+        # 索引中使用tuple而非list/set，避免大量容器对象增加垃圾回收的开销
+        outputs = tuple(layer.outputs)
+        self._layer_pos[layer_id] = pos
+        self._layer_outputs[layer_id] = outputs
+        for output in outputs:
+            producers = self._producers.get(output, ())
+            if layer_id in producers:
+                continue
+            index = len(producers)
+            while index > 0 and self._layer_pos[producers[index - 1]] > pos:
+                index -= 1
+            self._producers[
+                output] = producers[:index] + (layer_id, ) + producers[index:]
+
+    def _unindex_layer(self, layer_id):
+        self._layer_pos.pop(layer_id, None)
+        for output in self._layer_outputs.pop(layer_id, ()):
+            producers = self._producers.get(output, ())
+            if layer_id in producers:
+                producers = tuple([i for i in producers if i != layer_id])
+                if len(producers) == 0:
+                    self._producers.pop(output)
+                else:
+                    self._producers[output] = producers
+
+    def _get_consumers(self, var):
+        """ 根据当前的边获取使用var的layer。
+        """
+        consumers = set()
+        for in_layer_id in self._producers.get(var, ()) + (-1, ):
+            for layer_id in self.edges_out.get(in_layer_id, []):
+                if layer_id in self.layers and var in _get_input_vars(
+                        self.layers[layer_id]):
+                    consumers.add(layer_id)
+        return consumers
+
+    def _get_producer(self, var, pos):
+        """ 获取拓扑序在pos之前、最后一个产生var的layer，不存在时为-1。
+        """
+        for layer_id in reversed(self._producers.get(var, ())):
+            if self._layer_pos[layer_id] < pos:
+                return layer_id
+        return -1
+
+    def _add_edge_out(self, in_layer_id, layer_id):
+        edges = self.edges_out.setdefault(in_layer_id, list())
+        # 与build保持一致：输出边按拓扑序排列，block输出对应的-1在最前
+        pos = self._layer_pos[layer_id]
+        index = len(edges)
+        while index > 0 and edges[index - 1] != -1 and \
+                self._layer_pos[edges[index - 1]] > pos:
+            index -= 1
+        edges.insert(index, layer_id)
+
+    def _remove_edges_out(self, in_layer_id, layer_id):
+        edges = self.edges_out.get(in_layer_id)
+        if edges is None:
+            return
+        edges[:] = [i for i in edges if i != layer_id]
+        if len(edges) == 0:
+            self.edges_out.pop(in_layer_id)
+
     def add_layer(self, kernel, inputs, outputs, scope_name="", **kwargs):
         layer_id = str(len(self.layers))
         if self.parent_layer is not None:
@@ -114,6 +349,101 @@ class PaddleGraph(object):
         self.layers[layer_id] = layer
         return layer_id
 
+    def update_edges(self, layer_ids=None, remove_isolated=False):
+        """ 增量更新边，只重新计算被修改的layer及与其相连的layer的边，
+        结果与build一致。通过layers增加、删除、替换的layer会被自动记录，
+        直接修改了inputs/outputs的layer需要通过layer_ids传入；
+        整体替换layers时退化为重新建立全部的边。
+
+        Args:
+            layer_ids (list): 被直接修改过的layer id。
+            remove_isolated (bool): 是否与build一样删除没有任何边的layer。
+
+        Returns:
+            set: 被修改过的layer id，重新建立全部的边时为所有layer id。
+        """
+        changed = set()
+        if self.layers is self._indexed_layers:
+            changed = set(self.layers.changed)
+            if layer_ids is not None:
+                changed.update(layer_ids)
+            changed.discard(-1)
+        if self.layers is not self._indexed_layers or \
+                len(changed) * 4 > len(self.layers):
+            # 修改的layer较多时，重新建立全部的边更快
+            self._build_edges(*self._block_io)
+            changed = set(self.layers.keys())
+        else:
+            added = self.layers.added
+            self.layers.changed = set()
+            self.layers.added = set()
+            self._update_changed_edges(changed, added)
+        if remove_isolated and len(changed) > 0:
+            candidates = set()
+            for layer_id in changed:
+                candidates.add(layer_id)
+                candidates.update(self.edges_out.get(layer_id, []))
+                candidates.update(self.edges_in.get(layer_id, []))
+            self._remove_isolated_layers(
+                [i for i in candidates if i in self.layers])
+            for layer_id in self.layers.changed:
+                self._unindex_layer(layer_id)
+            self.layers.changed = set()
+            if self.graph_type == "dygraph" and self.parent_layer is None:
+                self.get_dygraph_inputs()
+        return changed
+
+    def _update_changed_edges(self, changed, added):
+        if len(changed) == 0:
+            return
+        # 需要重新计算输入边的layer：被修改的layer及使用其新、旧输出的layer
+        recompute = set(changed)
+        positions = dict()
+        for layer_id in changed:
+            recompute.update(self.edges_out.get(layer_id, []))
+            if layer_id in self._layer_pos:
+                positions[layer_id] = self._layer_pos[layer_id]
+            self._unindex_layer(layer_id)
+        if any([i in self.layers for i in added]):
+            # 有新加入的layer，按当前顺序重新编号
+            self._layer_pos = dict()
+            for i, layer_id in enumerate(self.layers.keys()):
+                self._layer_pos[layer_id] = i
+                if layer_id in changed:
+                    positions[layer_id] = i
+        for layer_id in changed:
+            if layer_id in self.layers:
+                layer = self.layers[layer_id]
+                self._index_layer(layer_id, layer, positions[layer_id])
+                for output in layer.outputs:
+                    recompute.update(self._get_consumers(output))
+        recompute.discard(-1)
+
+        # 删除旧的边
+        for layer_id in recompute:
+            for in_layer_id in self.edges_in.pop(layer_id, []):
+                self._remove_edges_out(in_layer_id, layer_id)
+        for layer_id in changed:
+            self.edges_out.pop(layer_id, None)
+
+        # 建立新的边
+        block_inputs, block_outputs = self._block_io
+        recompute = sorted(
+            [i for i in recompute if i in self.layers],
+            key=lambda i: self._layer_pos[i])
+        for layer_id in recompute:
+            layer = self.layers[layer_id]
+            for v in _get_input_vars(layer):
+                in_layer_id = self._get_producer(v, self._layer_pos[layer_id])
+                self._add_edge_out(in_layer_id, layer_id)
+                self.edges_in.setdefault(layer_id, list()).append(in_layer_id)
+            if layer_id in changed:
+                if block_inputs is not None and block_outputs is not None \
+                        and set(layer.outputs).issubset(block_outputs):
+                    self.edges_out.setdefault(layer_id, list()).insert(0, -1)
+                for block in layer.blocks:
+                    block.build(layer.inputs, layer.outputs)
+
     def del_layer(self, layer_id):
         layer = self.layers[layer_id]
         outputs = self.edges_out.get(layer_id, [])
@@ -133,11 +463,7 @@ class PaddleGraph(object):
                     if self.layers[out].inputs[k] == layer.outputs[0]:
                         del self.layers[out].inputs[k]
 
-            del self.layers[layer_id]
-            if layer_id in self.edges_in:
-                del self.edges_in[layer_id]
-            if layer_id in self.edges_out:
-                del self.edges_out[layer_id]
+            self._del_layer_index(layer_id)
             return
 
         # 将所有输出layer的输入layer进行替换
@@ -155,16 +481,54 @@ class PaddleGraph(object):
                 if v == layer.outputs[0]:
                     self.layers[out].inputs[k] = list(layer.inputs.values())[0]
 
+        self._del_layer_index(layer_id)
+
+    def _del_layer_index(self, layer_id):
+        """ del_layer已直接修改了边，这里同步更新索引。
+        """
         del self.layers[layer_id]
         if layer_id in self.edges_out:
             del self.edges_out[layer_id]
         if layer_id in self.edges_in:
             del self.edges_in[layer_id]
+        if self.layers is not self._indexed_layers:
+            return
+        self.layers.changed.discard(layer_id)
+        self._unindex_layer(layer_id)
 
     def build(self, inputs=None, outputs=None):
+        self._build_edges(inputs, outputs)
+
+        # 删除不必要的节点
+        self._remove_isolated_layers(list(self.layers.keys()))
+        for layer_id in self.layers.changed:
+            self._unindex_layer(layer_id)
+        self.layers.changed = set()
+
+        if self.graph_type == "dygraph":
+            self.get_dygraph_inputs()
+            if len(self.outputs) == 0:
+                self.get_dygraph_outputs()
+
+    def _build_edges(self, inputs=None, outputs=None):
+        """ 重新建立全部的边，同时建立layer的拓扑序号，
+        以及tensor名字到产生/使用该tensor的layer的索引。
+        """
         self.clear_edges()
+        self._block_io = (inputs, outputs)
+        if not isinstance(self.layers, LayerDict):
+            self.layers = LayerDict(self.layers)
+        self._indexed_layers = self.layers
+        self.layers.changed = set()
+        self.layers.added = set()
+        # layer_id -> 拓扑序号
+        self._layer_pos = dict()
+        # tensor名字 -> 产生该tensor的layer id（按拓扑序）
+        self._producers = dict()
+        # layer_id -> 建立索引时该layer的输出
+        self._layer_outputs = dict()
         outputs_from_nodes = dict()
-        for layer_id, layer in self.layers.items():
+        for pos, (layer_id, layer) in enumerate(self.layers.items()):
             for input_key, input_var in layer.inputs.items():
                 vs = input_var
                 if not isinstance(vs, (list, tuple)):
@@ -189,6 +553,13 @@ class PaddleGraph(object):
                     self.edges_in[layer_id].append(in_layer_id)
             for output in layer.outputs:
                 outputs_from_nodes[output] = layer_id
+                producers = self._producers.get(output)
+                if producers is None:
+                    self._producers[output] = (layer_id, )
+                elif producers[-1] != layer_id:
+                    self._producers[output] = producers + (layer_id, )
+            self._layer_pos[layer_id] = pos
+            self._layer_outputs[layer_id] = tuple(layer.outputs)
 
             # 将block的输出用于父图
             if inputs is not None and outputs is not None and set(
@@ -202,9 +573,10 @@ class PaddleGraph(object):
                 for block in layer.blocks:
                     block.build(layer.inputs, layer.outputs)
 
-        # 删除不必要的节点
+    def _remove_isolated_layers(self, layer_ids):
         invalid_list = list()
-        for layer_id, layer in self.layers.items():
+        for layer_id in layer_ids:
+            layer = self.layers[layer_id]
             if len(self.layers) > 1:
                 if self.edges_in.get(layer_id, 0) == 0 and self.edges_out.get(
                         layer_id, 0) == 0 and layer.kernel != "prim.assert" \
@@ -219,10 +591,36 @@ class PaddleGraph(object):
         for layer_id in invalid_list:
             self.layers.pop(layer_id)
 
-        if self.graph_type == "dygraph":
-            self.get_dygraph_inputs()
-            if len(self.outputs) == 0:
-                self.get_dygraph_outputs()
+    def get_kernel_index(self):
+        """ 获取模式匹配使用的kernel索引，layers未被修改时复用上次的结果，
+        因此同一个图上的多个pattern、多个pass可以共享同一份索引。
+
+        Returns:
+            tuple: (layer_items, kernel_positions, block_positions, layer_positions)，
+                layer_items为按拓扑序排列的(layer_id, layer)，
+                kernel_positions为kernel到其所有layer拓扑序号的映射，
+                block_positions为含有子图的layer的拓扑序号，
+                layer_positions为layer id到拓扑序号的映射。
+        """
+        version = getattr(self.layers, "version", None)
+        cache = getattr(self, "_kernel_index", None)
+        if version is not None and cache is not None and \
+                cache[0] is self.layers and cache[1] == version:
+            return cache[2]
+        layer_items = list(self.layers.items())
+        kernel_positions = dict()
+        block_positions = list()
+        layer_positions = dict()
+        for i, (layer_id, layer) in enumerate(layer_items):
+            kernel_positions.setdefault(layer.kernel, list()).append(i)
+            layer_positions[layer_id] = i
+            if len(layer.blocks) > 0:
+                block_positions.append(i)
+        index = (layer_items, kernel_positions, block_positions,
+                 layer_positions)
+        if version is not None:
+            self._kernel_index = (self.layers, version, index)
+        return index
 
     def get_global_layers(self):
         # 该全局layers的信息是按照拓扑排序组成的
@@ -235,7 +633,7 @@ class PaddleGraph(object):
                     global_layers.update(block_global_layers)
             return global_layers
         return update(self.layers)
-    
+
     def gen_model(self, save_dir, jit_type=None):
         if not osp.exists(save_dir):
             os.makedirs(save_dir)
@@ -243,50 +641,77 @@ class PaddleGraph(object):
             self.gen_static_model(save_dir)
         else:
             self.gen_dygraph_model(save_dir, jit_type)
-                
+
     def gen_static_model(self, save_dir):
         code_dir = osp.join(save_dir, 'model_with_code')
         infer_dir = osp.join(save_dir, 'inference_model')
-        self.gen_static_code(code_dir)
+        with profiler.record("phase", "gen_code"):
+            self.gen_static_code(code_dir)
         sys.path.append(code_dir)
         import x2paddle_model
+        import paddle
+        from x2paddle.core.op_mapper import export_paddle_params, normalize_paddle_param
         paddle.enable_static()
         scope = paddle.static.Scope()
         startup_program = paddle.static.Program()
         main_program = paddle.static.Program()
         with paddle.static.scope_guard(scope):
             with paddle.static.program_guard(main_program, startup_program):
-                inputs, outputs = x2paddle_model.x2paddle_net()
-                exe = paddle.static.Executor(paddle.CPUPlace())
-                exe.run(startup_program)
+                with profiler.record("phase", "build_static_program"):
+                    inputs, outputs = x2paddle_model.x2paddle_net()
+                    exe = paddle.static.Executor(paddle.CPUPlace())
+                    exe.run(startup_program)
                 param_dir = osp.join(code_dir, 'weights')
+                # 参数转为program中变量的dtype并检查shape，与paddle.static.load一致，
+                # 保证保存的参数与program中的变量描述一致
+                from paddle.fluid.data_feeder import convert_dtype
+                block = main_program.global_block()
+                params = dict()
                 for k, v in self.parameters.items():
-                    if scope.find_var(k):
-                        self.dump_parameter(k, v, param_dir)
-                paddle.static.load(main_program, param_dir, exe)
-                paddle.static.save_inference_model(
-                    path_prefix=osp.join(infer_dir, "model"),
-                    feed_vars=[i for i in inputs],
-                    fetch_vars=outputs,
-                    executor=exe)
-                
+                    if not scope.find_var(k):
+                        continue
+                    param = normalize_paddle_param(v, k)
+                    if block.has_var(k):
+                        var = block.var(k)
+                        if list(param.shape) != list(var.shape):
+                            raise Exception(
+                                "Shape of param {} is {}, but {} is expected.".
+                                format(k, list(param.shape), list(var.shape)))
+                        param = param.astype(
+                            convert_dtype(var.dtype), copy=False)
+                    params[k] = param
+                with profiler.record("phase", "dump_parameter"):
+                    export_paddle_params(params, param_dir)
+                with profiler.record("phase", "save_inference_model"):
+                    # 参数直接写入scope，无需从刚保存的参数文件中重新加载
+                    place = paddle.CPUPlace()
+                    for k, param in params.items():
+                        scope.find_var(k).get_tensor().set(param, place)
+                    paddle.static.save_inference_model(
+                        path_prefix=osp.join(infer_dir, "model"),
+                        feed_vars=[i for i in inputs],
+                        fetch_vars=outputs,
+                        executor=exe)
+
     def gen_dygraph_model(self, save_dir, jit_type=None):
         if jit_type == "trace":
-            from x2paddle.optimizer.pytorch_code_optimizer import HierarchicalTree
-            hierarchical_tree = HierarchicalTree(self)
-            for layer_id, layer in self.layers.items():
-                hierarchical_tree.insert(layer)
-            hierarchical_tree.save_source_files(save_dir)
-            self.dump_dygraph_parameter(save_dir)
+            from x2paddle.optimizer.pytorch_code_optimizer.hierachical_tree import HierarchicalTree
+            with profiler.record("phase", "gen_code"):
+                hierarchical_tree = HierarchicalTree(self)
+                for layer_id, layer in self.layers.items():
+                    hierarchical_tree.insert(layer)
+                hierarchical_tree.save_source_files(save_dir)
         else:
             if self.source_type == "pytorch":
-                from x2paddle.optimizer.pytorch_code_optimizer import ModuleGraph
-                module_graph = ModuleGraph(self)
-                module_graph.save_source_files(save_dir)
-                self.dump_dygraph_parameter(save_dir)
+                from x2paddle.optimizer.pytorch_code_optimizer.module_graph import ModuleGraph
+                with profiler.record("phase", "gen_code"):
+                    module_graph = ModuleGraph(self)
+                    module_graph.save_source_files(save_dir)
             else:
-                self.gen_dygraph_code(save_dir)
-                self.dump_dygraph_parameter(save_dir)
+                with profiler.record("phase", "gen_code"):
+                    self.gen_dygraph_code(save_dir)
+        with profiler.record("phase", "dump_parameter"):
+            self.dump_dygraph_parameter(save_dir)
         # 动转静
         code_path = osp.join(osp.abspath(save_dir), "x2paddle_code.py")
         print("Exporting inference model from python code ('{}')... \n".format(code_path))
@@ -297,7 +722,8 @@ class PaddleGraph(object):
                 input_shapes.append(self.inputs_info[input_name][0])
                 input_types.append(self.inputs_info[input_name][1])
             try:
-                self.dygraph2static(save_dir, input_shapes, input_types)
+                with profiler.record("phase", "dygraph2static"):
+                    self.dygraph2static(save_dir, input_shapes, input_types)
             except Exception as e:
                 print("Fail to generate inference model! Problem happend while export inference model from python code '{}';\n".format(code_path))
                 print("===================Error Information===============")
@@ -315,7 +741,7 @@ class PaddleGraph(object):
         if not osp.exists(code_dir):
             os.makedirs(code_dir)
         f = open(osp.join(code_dir, 'x2paddle_model.py'), 'w')
-        
+
         if self.source_type == "caffe":
             custom_import = "from x2paddle.op_mapper.static.caffe2paddle " + \
                              "import caffe_custom_layer as x2paddle_nn"
@@ -328,17 +754,17 @@ class PaddleGraph(object):
         write_code(
             f, [
                 custom_import,
-                "import paddle", 
-                "import math", 
+                "import paddle",
+                "import math",
                 "",
             ],
             indent=0)
         if self.custom_code is not None:
             write_code(
-                f, 
+                f,
                 list(self.custom_code.values()),
                 indent=0)
-        write_code(f, 
+        write_code(f,
             ["", "def x2paddle_net():"],
             indent=0)
         write_code(
@@ -388,40 +814,6 @@ class PaddleGraph(object):
         f.close()
 
 
-    def dump_parameter(self, param_name, param, save_dir):
-        if not osp.exists(save_dir):
-            os.makedirs(save_dir)
-        dtype_map = {
-            "int16": [framework_pb2.VarType.INT16, 'h'],
-            "int32": [framework_pb2.VarType.INT32, 'i'],
-            "int64": [framework_pb2.VarType.INT64, 'q'],
-            "float16": [framework_pb2.VarType.FP16, 'e'],
-            "float32": [framework_pb2.VarType.FP32, 'f'],
-            "float64": [framework_pb2.VarType.FP64, 'd'],
-            "bool": [framework_pb2.VarType.BOOL, None]
-        }
-        shape = param.shape
-        if str(param.dtype) in ['uint8', 'uint_8', 'bool']:
-            param = param.astype('int64')
-        if len(shape) == 0:
-            assert param.size == 1, "Unexpected situation happend!"
-            shape = [1]
-        assert str(
-            param.dtype) in dtype_map, "Unknown dtype {} of params: {}.".format(
-                str(param.dtype), param_name)
-        fp = open(osp.join(save_dir, param_name), 'wb')
-        numpy.array([0], dtype='int32').tofile(fp)
-        numpy.array([0], dtype='int64').tofile(fp)
-        numpy.array([0], dtype='int32').tofile(fp)
-        tensor_desc = framework_pb2.VarType.TensorDesc()
-        tensor_desc.data_type = dtype_map[str(param.dtype)][0]
-        tensor_desc.dims.extend(shape)
-        desc_size = tensor_desc.ByteSize()
-        numpy.array([desc_size], dtype='int32').tofile(fp)
-        fp.write(tensor_desc.SerializeToString())
-        param.tofile(fp)
-        fp.close()
-
     def get_dygraph_inputs(self):
         def update(layers):
             for layer_id, layer in layers.items():
@@ -447,7 +839,7 @@ class PaddleGraph(object):
                     layer_id, 0) == 0:
                 continue
             if self.edges_out.get(layer_id, 0) == 0:
-                
+
                 for i, output_name in enumerate(layer.outputs):
                     if ("paddle.nn" in layer.kernel and "functional" not in layer.kernel):
                         if i == 0:
@@ -478,15 +870,16 @@ class PaddleGraph(object):
                                  "import onnx_custom_layer as x2paddle_nn"
             else:
                 custom_import = ""
-            self.head = gen_codes(
-                [
-                    "import paddle",
-                    "import math",
-                    custom_import,
-                    "",
-                    "class {}(paddle.nn.Layer):".format(self.name),
-                ],
-                indent=0)
+            self.head.extend(
+                gen_codes(
+                    [
+                        "import paddle",
+                        "import math",
+                        custom_import,
+                        "",
+                        "class {}(paddle.nn.Layer):".format(self.name),
+                    ],
+                    indent=0))
             input_data_name = ', '.join(self.inputs)
             self.init_func.extend(
                 gen_codes(
@@ -498,15 +891,15 @@ class PaddleGraph(object):
                 gen_codes(
                     ["def forward(self, {}):".format(input_data_name)],
                     indent=1))
-            
+
         def gen_main_code(code_dir):
             input_data_name = ', '.join(self.inputs)
-            self.run_func = gen_codes(
-                [
-                    "",
-                    "def main({}):".format(input_data_name),
-                ],
-                indent=0)
+            self.run_func.extend(
+                gen_codes(
+                    [
+                        "",
+                        "def main({}):".format(input_data_name),
+                    ], indent=0))
             comment_list = list()
             comment_list.append("# There are {} inputs.".format(len(self.inputs_info)))
             for k, v in self.inputs_info.items():
@@ -525,134 +918,162 @@ class PaddleGraph(object):
                            "out = model({})".format(input_data_name),
                            "return out"], indent=1))
 
-        def write_code(code_dir):
-            f = open(osp.join(code_dir, 'x2paddle_code.py'), 'w')
-            for code_line in self.head:
-                f.write(code_line)
-            init_writen_codes = []
-            for code_line in self.init_func:
-                if code_line in init_writen_codes:
-                    continue
-                f.write(code_line)
-                init_writen_codes.append(code_line)
-            f.write("\n")
+        def write_code():
+            # __init__中的代码已直接写入文件，这里拼接暂存的forward代码
+            self.init_func.f.write("\n")
             return_code = "return {}".format(", ".join(self.outputs))
             self.forward_func.extend(gen_codes([return_code], indent=2))
-            for code_line in self.forward_func:
-                if "assert [1, 1] == 1 or [1, 1] == [1, 1], 'The [1, 1] must be [1, [1, 1]]!'" in code_line:
-                    continue
-                f.write(code_line)
-            for code_line in self.run_func:
-                f.write(code_line)
-            f.close()
+            self.forward_func.f.seek(0)
+            shutil.copyfileobj(self.forward_func.f, self.init_func.f)
 
-        self.init_func = []
-        self.forward_func = []
-        if indent == 2 and code_dir is not None:
-            gen_head()
+        def gen_layers():
+            for layer_id, layer in self.layers.items():
+                if layer.kernel.startswith("paddle"):
+                    remove_default_attrs(layer.kernel, layer.attrs)
+                if ("paddle.nn" in layer.kernel and "functional" not in layer.kernel
+                    ) or layer.kernel == "paddle.to_tensor" or \
+                    layer.kernel.startswith("custom_layer"):
+                    line = "{}".format(
+                        layer.outputs[0]
+                    ) if layer.kernel == "paddle.to_tensor" and not layer.attrs["data"].startswith(
+                        "params[") else "self.{}".format(layer.outputs[0])
+                    if layer.kernel.startswith("custom_layer"):
+                        line += "= x2paddle_nn.{}(".format(
+                            layer.kernel.split(":")[-1])
+                    else:
+                        line += " = {}(".format(layer.kernel)
+                    for k, v in layer.attrs.items():
+                        line += "{}={}, ".format(k, v)
+                    line = line.strip(", ")
+                    line += ")"
 
-        for layer_id, layer in self.layers.items():
-            if layer.kernel.startswith("paddle"):
-                remove_default_attrs(layer.kernel, layer.attrs)
-            if ("paddle.nn" in layer.kernel and "functional" not in layer.kernel
-                ) or layer.kernel == "paddle.to_tensor" or \
-                layer.kernel.startswith("custom_layer"):
-                line = "{}".format(
-                    layer.outputs[0]
-                ) if layer.kernel == "paddle.to_tensor" and not layer.attrs[
-                    "data"].startswith("params[") else "self.{}".format(
-                        layer.outputs[0])
-                if layer.kernel.startswith("custom_layer"):
-                    line += "= x2paddle_nn.{}(".format(layer.kernel.split(":")[-1])
-                else:
-                    line += " = {}(".format(layer.kernel)
-                for k, v in layer.attrs.items():
-                    line += "{}={}, ".format(k, v)
-                line = line.strip(", ")
-                line += ")"
+                    if layer.kernel == "paddle.to_tensor" and not layer.attrs["data"].startswith(
+                            "params["):
+                        self.forward_func.extend(
+                            gen_codes([line], indent=indent))
+                        continue
+                    else:
+                        self.init_func.extend(gen_codes([line], indent=2))
 
-                if layer.kernel == "paddle.to_tensor" and not layer.attrs[
-                        "data"].startswith("params["):
+                    if len(layer.outputs) == 1:
+                        line = layer.outputs[0]
+                    elif len(layer.outputs) == 2:
+                        line = layer.outputs[1]
+                    else:
+                        if layer.kernel in ["paddle.nn.LSTM"]:
+                            line = "{}, ({})".format(
+                                layer.outputs[1], ', '.join(layer.outputs[-2:]))
+                        else:
+                            line = ','.join(layer.outputs[1:])
+                    if layer.kernel == "paddle.to_tensor" and layer.attrs["data"].startswith(
+                            "params["):
+                        line += " = self.{}".format(layer.outputs[0])
+                    else:
+                        line += " = self.{}(".format(layer.outputs[0])
+                        for v in layer.inputs.values():
+                            if isinstance(v, list):
+                                line += "[{}], ".format(", ".join(v))
+                            elif isinstance(v, tuple):
+                                line += "({}), ".format(", ".join(v))
+                            else:
+                                line += "{}, ".format(v)
+                        line = line.strip(", ")
+                        line += ")"
                     self.forward_func.extend(gen_codes([line], indent=indent))
-                    continue
-                else:
-                    self.init_func.extend(gen_codes([line], indent=2))
-
-                if len(layer.outputs) == 1:
-                    line = layer.outputs[0]
-                elif len(layer.outputs) == 2:
-                    line = layer.outputs[1]
-                else:
-                    if layer.kernel in ["paddle.nn.LSTM"]:
-                        line = "{}, ({})".format(layer.outputs[1], ', '.join(layer.outputs[-2:]))
+                elif "prim" in layer.kernel:
+                    func_name = layer.kernel.replace(".", "_")
+                    from x2paddle.op_mapper.dygraph.pytorch2paddle import prim2code
+                    if hasattr(prim2code, func_name):
+                        func = getattr(prim2code, func_name)
+                        func(
+                            layer,
+                            indent=indent,
+                            init_func=self.init_func,
+                            forward_func=self.forward_func)
                     else:
-                        line = ','.join(layer.outputs[1:])
-                if layer.kernel == "paddle.to_tensor" and layer.attrs[
-                        "data"].startswith("params["):
-                    line += " = self.{}".format(layer.outputs[0])
+                        raise Exception(
+                            "The kind {} in paddle model is not supported yet.".
+                            format(layer.kernel))
                 else:
-                    line += " = self.{}(".format(layer.outputs[0])
-                    for v in layer.inputs.values():
+                    if len(layer.outputs) == 1:
+                        line = layer.outputs[0]
+                    else:
+                        line = ','.join(layer.outputs)
+                    line += " = {}(".format(layer.kernel)
+                    for k, v in layer.inputs.items():
                         if isinstance(v, list):
-                            line += "[{}], ".format(", ".join(v))
+                            line += "{}=[{}], ".format(k, ", ".join(v))
                         elif isinstance(v, tuple):
-                            line += "({}), ".format(", ".join(v))
+                            line += "{}=({}), ".format(k, ", ".join(v))
                         else:
-                            line += "{}, ".format(v)
+                            if k == "args":
+                                line += v
+                            else:
+                                line += "{}={}, ".format(k, v)
+                    for k, v in layer.attrs.items():
+                        line += "{}={}, ".format(k, v)
                     line = line.strip(", ")
                     line += ")"
-                self.forward_func.extend(gen_codes([line], indent=indent))                
-            elif "prim" in layer.kernel:
-                func_name = layer.kernel.replace(".", "_")
-                from x2paddle.op_mapper.dygraph.pytorch2paddle import prim2code
-                if hasattr(prim2code, func_name):
-                    func = getattr(prim2code, func_name)
-                    func(
-                        layer,
-                        indent=indent,
-                        init_func=self.init_func,
-                        forward_func=self.forward_func)
-                else:
-                    raise Exception(
-                        "The kind {} in paddle model is not supported yet.".
-                        format(layer.kernel))
-            else:
-                if len(layer.outputs) == 1:
-                    line = layer.outputs[0]
-                else:
-                    line = ','.join(layer.outputs)
-                line += " = {}(".format(layer.kernel)
-                for k, v in layer.inputs.items():
-                    if isinstance(v, list):
-                        line += "{}=[{}], ".format(k, ", ".join(v))
-                    elif isinstance(v, tuple):
-                        line += "{}=({}), ".format(k, ", ".join(v))
+                    if layer.kernel == "self.create_parameter":
+                        self.init_func.extend(
+                            gen_codes(["self." + line], indent=2))
+                        self.forward_func.extend(
+                            gen_codes(
+                                [
+                                    "{} = self.{}".format(
+                                        layer.outputs[0], layer.outputs[0])
+                                ],
+                                indent=indent))
                     else:
-                        if k == "args":
-                            line += v
-                        else:
-                            line += "{}={}, ".format(k, v)
-                for k, v in layer.attrs.items():
-                    line += "{}={}, ".format(k, v)
-                line = line.strip(", ")
-                line += ")"
-                if layer.kernel == "self.create_parameter":
-                    self.init_func.extend(gen_codes(["self." + line], indent=2))
-                    self.forward_func.extend(gen_codes(["{} = self.{}".format(layer.outputs[0], 
-                                                                              layer.outputs[0])], indent=indent))
-                else:
-                    self.forward_func.extend(gen_codes([line], indent=indent))
+                        self.forward_func.extend(
+                            gen_codes([line], indent=indent))
+
         if indent == 2 and code_dir is not None:
-            gen_main_code(code_dir)
-            write_code(code_dir)
+            # 生成的代码边生成边写入文件，forward部分先写入临时文件，
+            # 避免超大模型的代码全部保存在内存中
+            code_path = osp.join(code_dir, 'x2paddle_code.py')
+            f = open(code_path, 'w')
+            forward_f = tempfile.TemporaryFile(mode="w+")
+            finished = False
+            try:
+                self.head = CodeWriter(f)
+                self.init_func = CodeWriter(f, dedup=True)
+                # prim.if在条件可以直接计算时只生成对应分支的代码，需要条件变量的赋值
+                if_inputs = [
+                    layer.inputs["input"] for layer in self.layers.values()
+                    if layer.kernel == "prim.if" and "input" in layer.inputs
+                ]
+                self.forward_func = CodeWriter(
+                    forward_f,
+                    skip_lines=[
+                        "assert [1, 1] == 1 or [1, 1] == [1, 1], 'The [1, 1] must be [1, [1, 1]]!'"
+                    ],
+                    tracked_names=if_inputs)
+                self.run_func = CodeWriter(f)
+                gen_head()
+                gen_layers()
+                write_code()
+                gen_main_code(code_dir)
+                finished = True
+            finally:
+                forward_f.close()
+                f.close()
+                # 生成失败时删除不完整的代码文件，避免被当作转换结果
+                if not finished and osp.exists(code_path):
+                    os.remove(code_path)
         else:
+            self.init_func = []
+            self.forward_func = []
+            gen_layers()
             return self.init_func, self.forward_func
 
     def dump_dygraph_parameter(self, code_dir):
+        import paddle
         save_path = osp.join(code_dir, 'model.pdparams')
         paddle.save(self.parameters, save_path)
 
     def dygraph2static(self, save_dir, input_shapes=[], input_types=[]):
+        import paddle
         sepc_list = list()
         for i, name in enumerate(self.inputs):
             sepc_list.append(
@@ -23,9 +23,70 @@ def string(param):
     """
     return "\'{}\'".format(param)
 
+def parse_input_shapes(input_shapes):
+    """ 解析输入的shape。
+
+    Args:
+        input_shapes (str|dict): 形如"name:1,3,224,224;other:-1,128"的字符串，
+            或key为输入名字、value为shape的dict，未知的维度用-1或None表示。
+    Returns:
+        dict: key为输入名字，value为int组成的shape，未知的维度为-1。
+    """
+    if input_shapes is None:
+        return dict()
+    if not isinstance(input_shapes, dict):
+        parsed = dict()
+        for item in input_shapes.strip().strip(";").split(";"):
+            assert ":" in item, "Shape of input should be like " \
+                "'name:1,3,224,224', but received '{}'".format(item)
+            name, shape = item.strip().rsplit(":", 1)
+            parsed[name.strip()] = shape.strip().split(",")
+        input_shapes = parsed
+    shapes = dict()
+    for name, shape in input_shapes.items():
+        dims = list()
+        for dim in shape:
+            if dim is None or str(dim).strip() in ["None", "?", ""]:
+                dims.append(-1)
+            else:
+                dims.append(int(dim))
+        shapes[name] = dims
+    return shapes
+
+
+def get_out_shape(node):
+    """ 获取节点的输出形状，节点有多个输出时为被使用的输出（node.index）的形状。
+
+    Args:
+        node (GraphNode): ONNX或TensorFlow的节点。
+    Returns:
+        list: 输出的形状，未知时返回None。
+    """
+    out_shapes = node.out_shapes
+    index = getattr(node, "index", 0)
+    if index >= len(out_shapes):
+        return None
+    return list(out_shapes[index])
+
+
+def parse_pass_names(passes):
+    """ 解析pass的名字。
+
+    Args:
+        passes (str|list): 形如"pass_a,pass_b"的字符串，或pass名字组成的list。
+    Returns:
+        list: pass的名字，passes为None时返回None。
+    """
+    if passes is None:
+        return None
+    if not isinstance(passes, (list, tuple)):
+        passes = passes.split(",")
+    return [name.strip() for name in passes if name.strip() != ""]
+
+
 def name_generator(nn_name, nn_name2id):
     """ 生成paddle.nn类op的名字。
-    
+
     Args:
         nn_name (str): 名字。
         nn_name2id (dict): key为名字，value为名字出现的次数-1。
@@ -37,24 +98,27 @@ def name_generator(nn_name, nn_name2id):
     real_nn_name = nn_name + str(nn_name2id[nn_name])
     return real_nn_name
 
-def remove_default_attrs(kernel, attrs):
-    """ 删除每个OP的默认参数。
-    
+# 以(paddle版本, kernel)为key缓存每个OP的默认参数，同一进程内的所有图共享
+_default_attrs_cache = dict()
+
+
+def get_default_attrs(kernel):
+    """ 获取OP的默认参数，结果会被缓存，每个kernel只需通过inspect解析一次。
+
     Args:
         kernel (str): OP的类型名字。
-        attrs (dict): 目前该OP所包含的参数， key为参数名，value为参数值。
+
+    Returns:
+        tuple: (is_func, default_attrs)，is_func表示kernel是否为函数（否则为类），
+            default_attrs为参数名到默认值的dict。
     """
-    def get_default_args(func):
-        signature = inspect.signature(func)
-        return {
-            k: v.default
-            for k, v in signature.parameters.items()
-            if v.default is not inspect.Parameter.empty
-        }
+    import paddle
+    key = (paddle.__version__, kernel)
+    if key in _default_attrs_cache:
+        return _default_attrs_cache[key]
     is_func = True
     if "paddle.nn" in kernel and "functional"not in kernel:
         is_func = False
-    import paddle
     obj = paddle
     for i, part in enumerate(kernel.split(".")):
         if i == 0:
@@ -63,8 +127,25 @@ def remove_default_attrs(kernel, attrs):
     if is_func:
         func = obj
     else:
-        func = obj.__init__ 
-    default_attrs = get_default_args(func)
+        func = obj.__init__
+    signature = inspect.signature(func)
+    default_attrs = {
+        k: v.default
+        for k, v in signature.parameters.items()
+        if v.default is not inspect.Parameter.empty
+    }
+    _default_attrs_cache[key] = (is_func, default_attrs)
+    return is_func, default_attrs
+
+
+def remove_default_attrs(kernel, attrs):
+    """ 删除每个OP的默认参数。
+
+    Args:
+        kernel (str): OP的类型名字。
+        attrs (dict): 目前该OP所包含的参数， key为参数名，value为参数值。
+    """
+    is_func, default_attrs = get_default_attrs(kernel)
     for default_k, default_v in default_attrs.items():
         if default_k in attrs:
             if (isinstance(attrs[default_k], list) or isinstance(attrs[default_k], tuple)) \
@@ -72,4 +153,4 @@ def remove_default_attrs(kernel, attrs):
                 if len(set(attrs[default_k])) == 1:
                     attrs[default_k] = attrs[default_k][0]
             if default_v == attrs[default_k]:
-                attrs.pop(default_k)
\ No newline at end of file
+                attrs.pop(default_k)
@@ -14,6 +14,8 @@
 
 from x2paddle.core.graph import GraphNode, Graph
 from x2paddle.core.fluid_code import FluidCode
+from x2paddle.core.profiler import profiler
+from x2paddle.core.util import parse_input_shapes
 from x2paddle.decoder.onnx_shape_inference import SymbolicShapeInference
 from onnx.checker import ValidationError
 from onnx.checker import check_model
@@ -65,7 +67,7 @@ class ONNXGraphNode(GraphNode):
         if 'value' not in self.attr_map:
             return None
         return self.attr_map['value']
-    
+
     @property
     def name(self):
         if hasattr(self, 'index'):
@@ -147,7 +149,7 @@ class ONNXGraphDataNode(GraphNode):
             out_shapes = list()
             out_shapes.append(values)
             return out_shapes
-        
+
     @property
     def name(self):
         return self.layer_name
@@ -163,20 +165,23 @@ class ONNXGraphDataNode(GraphNode):
 
 
 class ONNXGraph(Graph):
-    def __init__(self, onnx_model):
+    def __init__(self, onnx_model, input_shapes=None, interactive=True):
         super(ONNXGraph, self).__init__(onnx_model)
-        self.fixed_input_shape = {}
+        self.fixed_input_shape = parse_input_shapes(input_shapes)
+        self.interactive = interactive
         self.initializer = {}
         self.place_holder_nodes = list()
         self.value_infos = {}
         self.graph = onnx_model.graph
         self.get_place_holder_nodes()
         print("shape inferencing ...")
-        self.graph = SymbolicShapeInference.infer_shapes(
-            onnx_model, fixed_input_shape=self.fixed_input_shape)
+        with profiler.record("decoder", "SymbolicShapeInference"):
+            self.graph = SymbolicShapeInference.infer_shapes(
+                onnx_model, fixed_input_shape=self.fixed_input_shape)
         if self.graph is None:
             print('[WARNING] Shape inference by ONNX offical interface.')
-            onnx_model = shape_inference.infer_shapes(onnx_model)
+            with profiler.record("decoder", "onnx.shape_inference"):
+                onnx_model = shape_inference.infer_shapes(onnx_model)
             self.graph = onnx_model.graph
         print("shape inferenced.")
         self.build()
@@ -213,6 +218,11 @@ class ONNXGraph(Graph):
                         'dim_param') and vi.name not in self.fixed_input_shape:
                     shape = self.get_symbolic_shape(
                         vi.type.tensor_type.shape.dim)
+                    if not self.interactive:
+                        raise Exception(
+                            "Unknown shape for input tensor '{}' -> shape: {}, " \
+                            "use --input_shapes \"{}:<shape>\" to define it.".format(
+                                vi.name, shape, vi.name))
                     print(
                         "Unknown shape for input tensor[tensor name: '{}'] -> shape: {}, Please define shape of input here,\nNote:you can use visualization tools like Netron to check input shape."
                         .format(vi.name, shape))
@@ -350,9 +360,9 @@ class ONNXGraph(Graph):
             else:
                 if ipt_node.layer_name in node.which_child:
                     ipt_node.index = node.which_child[ipt_node.layer_name]
-                
+
             return ipt_node
-        
+
 
     def graph_weights(self):
         """
@@ -407,7 +417,7 @@ class ONNXGraph(Graph):
 
 
 class ONNXDecoder(object):
-    def __init__(self, onnx_model):
+    def __init__(self, onnx_model, input_shapes=None, interactive=True):
         onnx_model = onnx.load(onnx_model)
         print('model ir_version: {}, op version: {}'.format(
             onnx_model.ir_version, onnx_model.opset_import[0].version))
@@ -417,7 +427,7 @@ class ONNXDecoder(object):
 
         onnx_model = self.optimize_model_skip_op(onnx_model)
         onnx_model = self.optimize_node_name(onnx_model)
-        self.graph = ONNXGraph(onnx_model)
+        self.graph = ONNXGraph(onnx_model, input_shapes, interactive)
 
     def build_value_refs(self, nodes):
         """
@@ -14,6 +14,8 @@
 
 from x2paddle.core.graph import GraphNode, Graph
 from x2paddle.core.fluid_code import FluidCode
+from x2paddle.core.profiler import profiler
+from x2paddle.core.util import parse_input_shapes
 from tensorflow.python.framework import tensor_util
 from tensorflow.core.framework import attr_value_pb2
 import tensorflow as tf
@@ -173,7 +175,7 @@ class TFGraph(Graph):
         self._optimize_dialiation_conv()
         self._remove_identity_node()
         self._remove_cast_node()
-        
+
 
     def get_node(self, node_name, copy=False):
         items = node_name.strip().split(':')
@@ -190,7 +192,7 @@ class TFGraph(Graph):
         if len(items) == 1 and node.layer_type in self.multi_out_ops:
             node.index = 0
         return node
-    
+
     def get_input_node(self, node, idx=0, copy=False):
         input_node_name = node.layer.input[idx]
         if idx > 0:
@@ -318,13 +320,31 @@ class TFGraph(Graph):
 
 
 class TFDecoder(object):
-    def __init__(self, pb_model, data_format="NHWC", define_input_shape=False):
+    def __init__(self,
+                 pb_model,
+                 data_format="NHWC",
+                 define_input_shape=False,
+                 input_shapes=None,
+                 interactive=True):
         try:
             self.sess = tf.compat.v1.Session()
         except:
             self.sess = tf.Session()
         self.inputs_info = dict()
         self.define_input_shape = define_input_shape
+        # input_shapes中的shape直接用于替换Placeholder，
+        # 非交互模式下若仍需定义shape则直接报错，不等待键盘输入
+        self.input_shapes = dict()
+        for name, shape in parse_input_shapes(input_shapes).items():
+            # tensor名字可能带有输出的索引，如"input:0"
+            if name.endswith(":0"):
+                name = name[:-2]
+            self.input_shapes[name] = shape
+        self.interactive = interactive
+        # infer_tensor的结果缓存：(tensor名字, batch size) -> 值
+        self.tensor_cache = dict()
+        # 每个batch size的随机输入只生成一次，同一batch size下的结果可以复用
+        self.probe_feeds = dict()
         with open(pb_model, 'rb') as f:
             try:
                 graph_def = tf.compat.v1.GraphDef()
@@ -365,7 +385,9 @@ class TFDecoder(object):
                 continue
 
             need_define_shape = 0
-            if self.define_input_shape:
+            if layer.name in self.input_shapes:
+                need_define_shape = 4
+            elif self.define_input_shape:
                 need_define_shape = 3
             elif graph_node.layer.attr[
                     'shape'].shape.unknown_rank or not graph_node.get_attr(
@@ -385,7 +407,20 @@ class TFDecoder(object):
                 except:
                     pass
 
-            if need_define_shape > 0:
+            if need_define_shape == 4:
+                shape = [
+                    None if dim == -1 else dim
+                    for dim in self.input_shapes[layer.name]
+                ]
+                assert shape.count(None) <= 1, \
+                    "Only one dimension can be None for input tensor '{}'".format(
+                        layer.name)
+            elif need_define_shape > 0 and not self.interactive:
+                raise Exception(
+                    "Shape of input tensor '{}' should be defined, " \
+                    "use --input_shapes \"{}:<shape>\" to define it.".format(
+                        layer.name, layer.name))
+            elif need_define_shape > 0:
                 shape = None
                 if graph_node.get_attr("shape"):
                     value = value = graph_node.layer.attr["shape"].shape
@@ -421,6 +456,8 @@ class TFDecoder(object):
                     for dim in shape.strip().split(',')
                 ]
                 assert shape.count(None) <= 1, "Only one dimension can be None"
+
+            if need_define_shape > 0:
                 try:
                     x2paddle_input = tf.compat.v1.placeholder(
                         dtype=dtype,
@@ -444,31 +481,93 @@ class TFDecoder(object):
 
         return input_map
 
-    # trick method
-    # should be removed after PaddlePaddle V1.6 been released
-    def infer_tensor(self, graph_node, out_shape=None, use_diff_inputs=True):
+    def get_tensor_name(self, graph_node):
         if hasattr(graph_node, "index"):
-            tensor_name = graph_node.layer.name + ":{}".format(graph_node.index)
-        else:
-            tensor_name = graph_node.layer.name + ":0"
-        feed = dict()
-        if use_diff_inputs:
-            batch_size = [2, 3, 5]
-        else:
-            batch_size = [2]
-        results = list()
-        for b in batch_size:
+            return graph_node.layer.name + ":{}".format(graph_node.index)
+        return graph_node.layer.name + ":0"
+
+    def get_probe_feed(self, batch_size):
+        """ 获取batch size对应的随机输入，未知的维度（-1）替换为batch size。
+        """
+        if batch_size not in self.probe_feeds:
+            feed = dict()
             for input_name, info in self.inputs_info.items():
                 (shape, dtype) = cp.deepcopy(info)
-                input_tensor = self.sess.graph.get_tensor_by_name(input_name + ":0")
+                input_tensor = self.sess.graph.get_tensor_by_name(
+                    input_name + ":0")
                 if shape.count(-1) > 0:
-                    shape[shape.index(-1)] = b
+                    shape[shape.index(-1)] = batch_size
                 feed[input_tensor] = numpy.random.random_sample(shape)
+            self.probe_feeds[batch_size] = feed
+        return self.probe_feeds[batch_size]
+
+    def run_tensor(self, tensor_name, batch_size):
+        """ 计算tensor在batch size下的值，结果按(tensor名字, batch size)缓存。
+        """
+        key = (tensor_name, batch_size)
+        if key not in self.tensor_cache:
             output_tensor = self.sess.graph.get_tensor_by_name(tensor_name)
-            if use_diff_inputs:
-                results.append(self.sess.run([output_tensor], feed)[0].flatten())
-            else:
-                return self.sess.run([output_tensor], feed)[0]
+            self.tensor_cache[key] = self.sess.run(
+                [output_tensor], self.get_probe_feed(batch_size))[0]
+        return self.tensor_cache[key]
+
+    @profiler.profile("decoder", "TFDecoder.prefetch_tensors")
+    def prefetch_tensors(self, requests):
+        """ 在每个batch size下用一次sess.run获取多个tensor的值并缓存，
+        之后的infer_tensor直接使用缓存，避免每个tensor都执行一次完整的前向。
+
+        Args:
+            requests (list): (graph_node, use_diff_inputs)组成的list，
+                use_diff_inputs与infer_tensor的参数一致，为False时只需要batch size为2的值。
+        """
+        names = dict()
+        for graph_node, use_diff_inputs in requests:
+            tensor_name = self.get_tensor_name(graph_node)
+            names[tensor_name] = names.get(tensor_name,
+                                           False) or use_diff_inputs
+        for batch_size in [2, 3, 5]:
+            fetch_names = [
+                name for name, use_diff_inputs in names.items()
+                if (batch_size == 2 or use_diff_inputs) and
+                (name, batch_size) not in self.tensor_cache
+            ]
+            if len(fetch_names) == 0:
+                continue
+            self.fetch_tensors(fetch_names, batch_size)
+
+    def fetch_tensors(self, fetch_names, batch_size):
+        """ 用一次sess.run获取fetch_names中tensor的值并缓存。
+        失败时将fetch_names二分后分别获取，使其余tensor仍能批量计算；
+        单个tensor无法计算时打印警告并跳过，由infer_tensor计算时报告错误。
+        """
+        fetches = [
+            self.sess.graph.get_tensor_by_name(name) for name in fetch_names
+        ]
+        try:
+            values = self.sess.run(fetches, self.get_probe_feed(batch_size))
+        except Exception as e:
+            if len(fetch_names) == 1:
+                print("Warning: failed to prefetch tensor[tensor name: \"{}\"] "
+                      "with batch size {}: {}".format(fetch_names[0],
+                                                      batch_size,
+                                                      str(e).split("\n")[0]))
+                return
+            middle = len(fetch_names) // 2
+            self.fetch_tensors(fetch_names[:middle], batch_size)
+            self.fetch_tensors(fetch_names[middle:], batch_size)
+            return
+        for name, value in zip(fetch_names, values):
+            self.tensor_cache[(name, batch_size)] = value
+
+    # trick method
+    # should be removed after PaddlePaddle V1.6 been released
+    @profiler.profile("decoder", "TFDecoder.infer_tensor")
+    def infer_tensor(self, graph_node, out_shape=None, use_diff_inputs=True):
+        tensor_name = self.get_tensor_name(graph_node)
+        if not use_diff_inputs:
+            # 缓存中的值可能被多次使用，返回副本
+            return numpy.copy(self.run_tensor(tensor_name, 2))
+        results = [self.run_tensor(tensor_name, b).flatten() for b in [2, 3, 5]]
 
         compare01 = (results[0] == results[1])
         compare12 = (results[1] == results[2])
@@ -493,4 +592,3 @@ class TFDecoder(object):
             return results[0].tolist()
         else:
             raise Exception("Couldn't infer a stable shape shape tensor value")
-            
\ No newline at end of file
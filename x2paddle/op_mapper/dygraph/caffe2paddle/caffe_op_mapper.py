@@ -16,8 +16,9 @@ import sys
 import numbers
 import numpy as np
 from x2paddle.core.op_mapper import OpMapper
+from x2paddle.core.profiler import profiler
 from x2paddle.core.util import *
-from x2paddle.core.program import PaddleGraph 
+from x2paddle.core.program import PaddleGraph
 from x2paddle.decoder.caffe_decoder import CaffeGraphNode
 
 
@@ -128,7 +129,7 @@ class CaffeOpMapper(OpMapper):
         self.params = dict()
         self.paddle_graph = PaddleGraph(parent_layer=None, graph_type="dygraph", source_type="caffe")
         self.paddle_graph.outputs = self.graph.output_nodes
-        self.input_index = 0 
+        self.input_index = 0
         self.inputs_info = {}
         self.nn_name2id = {}
         print("Total nodes: {}".format(
@@ -141,16 +142,17 @@ class CaffeOpMapper(OpMapper):
             sys.stderr.write("\rConverting node {} ...     ".format(i + 1))
             node = self.graph.get_node(node_name)
             op = node.layer_type
-            if hasattr(self, op):
-                func = getattr(self, op)
-                func(node)
-            elif op in self.directly_map_ops:
-                self.directly_map(node)
+            with profiler.record("op_mapper", op):
+                if hasattr(self, op):
+                    func = getattr(self, op)
+                    func(node)
+                elif op in self.directly_map_ops:
+                    self.directly_map(node)
         print("\nNodes converted.")
         self.paddle_graph.set_name(self.graph.graph_name)
         self.paddle_graph.set_parameters(self.params)
         self.paddle_graph.set_inputs_info(self.inputs_info)
-                
+
     def op_checker(self):
         unsupported_ops = set()
         for node_name in self.graph.topo_sort:
@@ -167,7 +169,7 @@ class CaffeOpMapper(OpMapper):
             for op in unsupported_ops:
                 print("========== {} ============".format(op))
             return False
-        
+
     def directly_map(self, node):
         inputs = node.layer.input
         assert len(inputs) == 1, 'directly_map error with multi inputs'
@@ -198,7 +200,7 @@ class CaffeOpMapper(OpMapper):
         shape = list(node.layer.input_param.shape[0].dim)[1:]
         self.inputs_info["x{}".format(self.input_index)] = [[-1] + shape, "float32"]
         self.input_index += 1
-        
+
     def MemoryData(self, node):
         params = node.layer.memory_data_param
         transform_params = node.layer.transform_param
@@ -260,7 +262,7 @@ class CaffeOpMapper(OpMapper):
             inputs={"input": input.name},
             outputs=layer_outputs,
             **layer_attrs)
-        
+
     def DepthwiseConvolution(self, node):
         node.layer_type = "ConvolutionDepthwise"
         self.ConvolutionDepthwise(node)
@@ -306,7 +308,7 @@ class CaffeOpMapper(OpMapper):
             inputs={"input": input.name},
             outputs=layer_outputs,
             **layer_attrs)
-        
+
     def ConvolutionDepthwise(self, node):
         conv2d_name = name_generator("conv", self.nn_name2id)
         output_name = node.layer_name
@@ -423,7 +425,7 @@ class CaffeOpMapper(OpMapper):
             "beta": params.beta,
         }
         self.paddle_graph.add_layer(
-            "paddle.fluid.layers.lrn", 
+            "paddle.fluid.layers.lrn",
             inputs={"input": input.name},
             outputs=[node.layer_name],
             **layer_attrs)
@@ -466,7 +468,7 @@ class CaffeOpMapper(OpMapper):
         assert params.bias_term == True
         layer_attrs = {
             "in_features": data[0].shape[0],
-            "out_features": params.num_output           
+            "out_features": params.num_output
         }
         if len(data) == 1:
             layer_attrs["bias"] = False
@@ -487,7 +489,7 @@ class CaffeOpMapper(OpMapper):
                 inputs={"input": input.name},
                 outputs=layer_outputs,
                 **layer_attrs)
-        
+
     def AbsVal(self, node):
         assert len(
             node.inputs
@@ -714,7 +716,7 @@ class CaffeOpMapper(OpMapper):
                 inputs={"x": node.layer_name},
                 outputs=[node.layer_name],
                 axis=[2,3])
-   
+
     def Scale(self, node):
         if node.data is None:
             print(
@@ -806,7 +808,7 @@ class CaffeOpMapper(OpMapper):
                 "paddle.add",
                 inputs=inputs_dict,
                 outputs=[node.layer_name])
-            
+
     def Reshape(self, node):
         input = self.graph.get_input_node(node, idx=0, copy=True)
         output_shape = node.out_shapes[0]
@@ -852,7 +854,7 @@ class CaffeOpMapper(OpMapper):
                 inputs={"x": input.name},
                 outputs=["_", node.layer_name],
                 k=top_k)
-            
+
     def Axpy(self, node):
         assert len(node.inputs) == 1 and len(
             node.outputs
@@ -880,7 +882,7 @@ class CaffeOpMapper(OpMapper):
             "paddle.add",
             inputs=inputs_dict,
             outputs=[node.layer_name + "_mul"])
-        
+
 
     def Crop(self, node):
         assert len(
@@ -953,7 +955,7 @@ class CaffeOpMapper(OpMapper):
             axis += input_len + 1
         dim = list(range(input_len))
         # operation = SUM
-        if operation == 1:  
+        if operation == 1:
             layer_attrs = {
                 "dim": dim[axis:],
                 "keep_dim": False,
@@ -964,7 +966,7 @@ class CaffeOpMapper(OpMapper):
                 outputs=[node.layer_name],
                 **layer_attrs)
         # operation = ASUM
-        elif operation == 2:  
+        elif operation == 2:
             self.paddle_graph.add_layer(
                 "paddle.abs",
                 inputs={"x": input.name},
@@ -979,7 +981,7 @@ class CaffeOpMapper(OpMapper):
                 outputs=[node.layer_name],
                 **layer_attrs)
         # operation = SUMSQ
-        elif operation == 3: 
+        elif operation == 3:
             self.paddle_graph.add_layer(
                 "paddle.pow",
                 inputs={"x": input.name},
@@ -995,7 +997,7 @@ class CaffeOpMapper(OpMapper):
                 outputs=[node.layer_name],
                 **layer_attrs)
         # operation = MEAN
-        else: 
+        else:
             layer_attrs = {
                 "axis": dim[axis:],
                 "keepdim": False,
@@ -1010,7 +1012,7 @@ class CaffeOpMapper(OpMapper):
             inputs={"x": node.layer_name},
             outputs=[node.layer_name],
             scale=coeff)
-        
+
     def DetectionOutput(self, node):
         detection_output_name = name_generator("detection_output", self.nn_name2id)
         output_name = node.layer_name
@@ -1054,7 +1056,7 @@ class CaffeOpMapper(OpMapper):
             inputs=inputs_dict,
             outputs=layer_outputs,
             **layer_attrs)
-                    
+
     def Normalize(self, node):
         normalize_name = name_generator("normalize", self.nn_name2id)
         output_name = node.layer_name
@@ -1072,8 +1074,8 @@ class CaffeOpMapper(OpMapper):
                 np.zeros([1] if params.channel_shared else [node.in_shapes[0][1]]).astype("float32")
         else:
             self.params[param_name] = _adjust_parameters(node)[0]
-        
-        
+
+
         self.paddle_graph.add_layer(
             "self.create_parameter",
             inputs={},
@@ -1089,19 +1091,19 @@ class CaffeOpMapper(OpMapper):
                     "param": param_name},
             outputs=layer_outputs,
             **layer_attrs)
-        
+
     def Permute(self, node):
         assert len(
             node.inputs) == 1, "The count of Permute node\'s input is not 1."
         input = self.graph.get_input_node(node, idx=0, copy=True)
         params = node.layer.permute_param
-        order = list(params.order)    
+        order = list(params.order)
         self.paddle_graph.add_layer(
             "paddle.transpose",
             inputs={"x": input.name},
             outputs=[node.layer_name],
             perm=order)
-        
+
     def PriorBox(self, node):
         priorbox_name = name_generator("priorbox", self.nn_name2id)
         output_name = node.layer_name
@@ -1132,7 +1134,7 @@ class CaffeOpMapper(OpMapper):
             inputs=inputs_dict,
             outputs=layer_outputs,
             **layer_attrs)
-        
+
     def ReLU6(self, node):
         relu6_name = name_generator("relu6", self.nn_name2id)
         output_name = node.layer_name
@@ -1144,7 +1146,7 @@ class CaffeOpMapper(OpMapper):
             "paddle.nn.ReLU6",
             inputs={"input": input.name},
             outputs=layer_outputs)
-        
+
     def ROIPooling(self, node):
         roipooling_name = name_generator("roipooling", self.nn_name2id)
         output_name = node.layer_name
@@ -1166,7 +1168,7 @@ class CaffeOpMapper(OpMapper):
             inputs=inputs_dict,
             outputs=layer_outputs,
             **layer_attrs)
-        
+
     def ShuffleChannel(self, node):
         assert len(
             node.inputs) == 1, "The count of ShuffleChannel node\'s input is not 1."
@@ -1177,7 +1179,7 @@ class CaffeOpMapper(OpMapper):
             inputs={"x": input.name},
             outputs=[node.layer_name],
             group=params.group)
-        
+
     def Upsample(self, node):
         assert len(
             node.inputs) == 1, "The count of Upsample node\'s input is not 1."
@@ -1192,7 +1194,7 @@ class CaffeOpMapper(OpMapper):
             inputs={"input": input.name},
             outputs=[node.layer_name],
             **layer_attrs)
-    
+
     def Select(self, node):
         select_name = name_generator("select", self.nn_name2id)
         output_name = node.layer_name
@@ -1211,7 +1213,3 @@ class CaffeOpMapper(OpMapper):
             inputs={"x": input.name},
             outputs=layer_outputs,
             **layer_attrs)
-        
-
-    
-
@@ -43,19 +43,19 @@ def _const_weight_or_none(node, necessary=False):
 
 
 def _rename_or_remove_weight(weights, origin_name, target_name=None, is_remove=True):
-    ''' 
+    '''
     Rename parameters by Paddle's naming rule of parameters.
 
     Args:
         weights(dict[String:np.ndarray]): Dict stored paramters, the key in weights is name of parameter.
         origin_name(String): Name of parameter to rename or remove.
-        target_name(String, optional): if target_name is not None, add new key-value pair 
-            {target_name:weights[origin_name]} to weights, and target_name must follow paddle's 
+        target_name(String, optional): if target_name is not None, add new key-value pair
+            {target_name:weights[origin_name]} to weights, and target_name must follow paddle's
             naming rule of parameters. Default: None.
         is_remove: if is_remove is True, remove origin key-value pair. Default: True.
     Returns:
         None
-    '''   
+    '''
     if origin_name not in weights:
         raise KeyError('{} not a key in {}'.format(origin_name, weights))
     if is_remove:
@@ -118,44 +118,44 @@ class OpSet9():
         'Ceil': ['paddle.ceil'],
         # reduce function
         'ReduceMean': ['paddle.mean',
-                       dict(axes='axis', keepdims='keepdim'), 
+                       dict(axes='axis', keepdims='keepdim'),
                        dict(axes=None, keepdims=1)],
-        'ReduceSum': ['paddle.sum', 
-                      dict(axes='axis', keepdims='keepdim'), 
+        'ReduceSum': ['paddle.sum',
+                      dict(axes='axis', keepdims='keepdim'),
                       dict(axes=None, keepdims=1)],
-        'ReduceMin': ['paddle.min', 
-                      dict(axes='axis', keepdims='keepdim'), 
+        'ReduceMin': ['paddle.min',
+                      dict(axes='axis', keepdims='keepdim'),
                       dict(axes=None, keepdim=1)],
-        'ReduceMax': ['paddle.max', 
-                      dict(axes='axis', keepdims='keepdim'), 
+        'ReduceMax': ['paddle.max',
+                      dict(axes='axis', keepdims='keepdim'),
                       dict(axes=None, keepdim=1)],
-        'ReduceProd': ['paddle.prod', 
-                      dict(axes='axis', keepdims='keepdim'), 
+        'ReduceProd': ['paddle.prod',
+                      dict(axes='axis', keepdims='keepdim'),
                       dict(axes=None, keepdim=1)],
         # active function
         'Relu': ['paddle.nn.ReLU'],
-        'LeakyRelu': ['paddle.nn.LeakyReLU', 
-                      dict(alpha='negative_slope'), 
+        'LeakyRelu': ['paddle.nn.LeakyReLU',
+                      dict(alpha='negative_slope'),
                       dict(negative_slope=.01)],
-        'Elu': ['paddle.nn.functional.elu', 
-                dict(alpha='alpha'), 
+        'Elu': ['paddle.nn.functional.elu',
+                dict(alpha='alpha'),
                 dict(alpha=1.)],
-        'ThresholdedRelu': ['paddle.nn.functional.thresholded_relu', 
+        'ThresholdedRelu': ['paddle.nn.functional.thresholded_relu',
                             dict(alpha='threshold'),
                             dict(alpha=1.)],
         'Tanh': ['paddle.nn.Tanh'],
         'Sigmoid': ['paddle.nn.Sigmoid'],
         'Softsign': ['paddle.nn.Softsign'],
-        'Softplus': ['paddle.nn.Softplus', 
-                     dict(threshold='threshold'), 
+        'Softplus': ['paddle.nn.Softplus',
+                     dict(threshold='threshold'),
                      dict(threshold=float(sys.maxsize))],
         'Exp': ['paddle.exp'],
         'Log': ['paddle.log'],
-        'LogSoftmax': ['paddle.nn.functional.log_softmax', 
-                    dict(axis='axis'), 
+        'LogSoftmax': ['paddle.nn.functional.log_softmax',
+                    dict(axis='axis'),
                     dict(axis=1)],
-        'Softmax': ['paddle.nn.Softmax', 
-                    dict(axis='axis'), 
+        'Softmax': ['paddle.nn.Softmax',
+                    dict(axis='axis'),
                     dict(axis=1)],
         'Sqrt': ['paddle.sqrt'],
         'Floor': ['paddle.floor'],
@@ -209,19 +209,19 @@ class OpSet9():
                 kernel=paddle_op,
                 inputs={"x": input.name},
                 outputs=[node.name],
-                **layer_attrs)        
-       
-            
+                **layer_attrs)
+
+
     @print_mapping_info
     def elementwise_map(self, node):
         op_type = self.elementwise_ops[node.layer_type]
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
         val_y = self.graph.get_input_node(node, idx=1, copy=True)
-        inputs_dict = {'x': val_x.name, 
+        inputs_dict = {'x': val_x.name,
                        'y': val_y.name}
         self.paddle_graph.add_layer(
-            op_type, 
-            inputs=inputs_dict, 
+            op_type,
+            inputs=inputs_dict,
             outputs=[node.name])
 
     @print_mapping_info
@@ -248,8 +248,8 @@ class OpSet9():
         shape = node.out_shapes[0]
         if hasattr(node.weight, "shape") and len(node.weight.shape) == 0:
             self.paddle_graph.add_layer(
-                "paddle.full", 
-                inputs={}, 
+                "paddle.full",
+                inputs={},
                 outputs=[node.name],
                 dtype=string(dtype),
                 shape=[1],
@@ -263,7 +263,7 @@ class OpSet9():
                 shape=shape,
                 attr=string(node.name),
                 dtype=string(dtype),
-                default_initializer="paddle.nn.initializer.Constant(value=0.0)")       
+                default_initializer="paddle.nn.initializer.Constant(value=0.0)")
 
     def _pad_if_asymmetric(self, node, pads, val_name):  # pads: SSEE
         assert len(pads) & 1 == 0
@@ -286,13 +286,13 @@ class OpSet9():
             if len(node.layer.input) == 2:
                 # opset 10
                 val_scales = self.graph.get_input_node(node, idx=1, copy=True)
-                # TODO(syf): paddle.nn.functional.interpolate will support the length  
+                # TODO(syf): paddle.nn.functional.interpolate will support the length
                 # which is the same as the rank of input.
                 attrs['scale_factor'] = self.weights[val_scales.name].tolist()[2:]
             elif len(node.layer.input) == 3:
                 # opset 11
                 val_scales = self.graph.get_input_node(node, idx=2, copy=True)
-                # TODO(syf): paddle.nn.functional.interpolate will support the length  
+                # TODO(syf): paddle.nn.functional.interpolate will support the length
                 # which is the same as the rank of input.
                 attrs['scale_factor'] = self.weights[val_scales.name].tolist()[2:]
             elif len(node.layer.input) == 4:
@@ -329,7 +329,7 @@ class OpSet9():
                 starts=[2],
                 ends=[4])
             inputs['scale_factor'] = val_scales.name
- 
+
         mode = node.get_attr('mode', 'nearest')
         attrs.update({"align_corners": False,
                       "mode": string(mode),
@@ -343,7 +343,7 @@ class OpSet9():
             inputs=inputs,
             outputs=[node.name],
             **attrs)
-        
+
     @print_mapping_info
     def HardSigmoid(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -360,11 +360,12 @@ class OpSet9():
             inputs={"x": node.name + "_val"},
             outputs=[node.name],
             min=0.0,
-            max=1.0)  
-        
+            max=1.0)
+
     @print_mapping_info
     def Shape(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
+        self.paddle_graph.set_static_shape(val_x.name, get_out_shape(val_x))
         self.paddle_graph.add_layer(
             kernel="paddle.shape",
             inputs={"input": val_x.name},
@@ -373,7 +374,7 @@ class OpSet9():
                 'paddle.cast',
                 inputs={"x": node.name},
                 outputs=[node.name],
-                dtype=string('int64'))   
+                dtype=string('int64'))
 
     @print_mapping_info
     def RoiAlign(self, node):
@@ -396,7 +397,7 @@ class OpSet9():
                     'rois': val_rois.name},
             outputs=[node.name],
             **layer_attrs)
-                       
+
 
     @print_mapping_info
     def MaxRoiPool(self, node):
@@ -489,9 +490,9 @@ class OpSet9():
             else:
                  raise Exception("The padding value {} is wrong!".format(pads))
             self.paddle_graph.add_layer(
-                paddle_op, 
-                inputs={'x': val_x.name}, 
-                outputs=layer_outputs[1:] if paddle_op == 'paddle.nn.functional.pad' else layer_outputs, 
+                paddle_op,
+                inputs={'x': val_x.name},
+                outputs=layer_outputs[1:] if paddle_op == 'paddle.nn.functional.pad' else layer_outputs,
                 **layer_attrs)
             if not op_independent:
                 return node.name + '_paded'
@@ -501,7 +502,7 @@ class OpSet9():
                 if data_shape:
                     assume_pad |= data_shape and 2 * (len(data_shape) - 2) == pads_len # NCHW
                 if output_shape:
-                    assume_pad |= output_shape and 2 * (len(output_shape) - 2) == pads_len  # NCHW 
+                    assume_pad |= output_shape and 2 * (len(output_shape) - 2) == pads_len  # NCHW
                 if assume_pad:
                     if pads_len == 2:
                         data_format = "NCL"
@@ -510,8 +511,8 @@ class OpSet9():
                     else:
                         data_format = "NCDHW"
                     self.paddle_graph.add_layer(
-                        "custom_layer:PadWithTwoInput", 
-                        inputs={'x': val_x.name, 'pad': val_pad.name}, 
+                        "custom_layer:PadWithTwoInput",
+                        inputs={'x': val_x.name, 'pad': val_pad.name},
                         outputs=layer_outputs,
                         value=value,
                         mode=string(mode),
@@ -524,9 +525,9 @@ class OpSet9():
                     if assume_pad:
                         if pads_len == 4:
                             self.paddle_graph.add_layer(
-                                "custom_layer:PadAllDim2", 
-                                inputs={'x': val_x.name, 'pad': val_pad.name}, 
-                                outputs=layer_outputs, 
+                                "custom_layer:PadAllDim2",
+                                inputs={'x': val_x.name, 'pad': val_pad.name},
+                                outputs=layer_outputs,
                                 value=value,
                                 mode=string(mode))
                         else:
@@ -538,13 +539,13 @@ class OpSet9():
                     assume_pad |= output_shape and 2 * len(output_shape) == pads_len  # NCHW
                 if assume_pad:
                     self.paddle_graph.add_layer(
-                        "custom_layer:PadAllDim4", 
-                        inputs={'x': val_x.name, 'pad': val_pad.name}, 
-                        outputs=layer_outputs, 
+                        "custom_layer:PadAllDim4",
+                        inputs={'x': val_x.name, 'pad': val_pad.name},
+                        outputs=layer_outputs,
                         value=value,
                         mode=string(mode))
             else:
-                raise Exception("The padding value is wrong!")   
+                raise Exception("The padding value is wrong!")
             if not op_independent:
                 return node.name + '_paded'
 
@@ -562,8 +563,8 @@ class OpSet9():
                     shape=[1])
         else:
             self.paddle_graph.add_layer(
-                'paddle.unsqueeze', 
-                inputs={"x": val_x.name}, 
+                'paddle.unsqueeze',
+                inputs={"x": val_x.name},
                 outputs=[node.name],
                 **layer_attrs)
 
@@ -574,9 +575,9 @@ class OpSet9():
         lambd = node.get_attr('lambd')
         assert bias == 0.0, 'not support bias!=0'
         self.paddle_graph.add_layer(
-            'paddle.nn.functional.hardshrink', 
-            inputs={"x": val_x.name}, 
-            outputs=[node.name], 
+            'paddle.nn.functional.hardshrink',
+            inputs={"x": val_x.name},
+            outputs=[node.name],
             threshold=lambd)
 
     @print_mapping_info
@@ -603,8 +604,8 @@ class OpSet9():
             value = value.tolist()
             value = value[0]
             self.paddle_graph.add_layer(
-                "paddle.full", 
-                inputs={}, 
+                "paddle.full",
+                inputs={},
                 outputs=[node.name],
                 dtype=string(dtype),
                 shape=[1],
@@ -654,9 +655,9 @@ class OpSet9():
         else:
             raise Exception("The paddle only support 2D, 3D, 4D or 5D input in InstanceNormalization.")
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs={"x": val_x.name}, 
-            outputs=layer_outputs, 
+            paddle_op,
+            inputs={"x": val_x.name},
+            outputs=layer_outputs,
             **layer_attrs)
 
     @print_mapping_info
@@ -675,7 +676,7 @@ class OpSet9():
             inputs={},
             outputs=[name_ones],
             **attr_ones)
-        inputs_dict = {'x': name_ones, 
+        inputs_dict = {'x': name_ones,
                        'y': val_x.name}
         self.paddle_graph.add_layer(
             'paddle.multiply',
@@ -734,9 +735,9 @@ class OpSet9():
             for i in range(len(perm)):
                 new_perm[perm[i]] = i
             self.paddle_graph.add_layer(
-                'paddle.transpose', 
-                inputs={"x": node.name}, 
-                outputs=[node.name], 
+                'paddle.transpose',
+                inputs={"x": node.name},
+                outputs=[node.name],
                 perm=new_perm)
             if len(indices_shape) < 1:
                 self.paddle_graph.add_layer(
@@ -920,8 +921,8 @@ class OpSet9():
         val_limit = self.graph.get_input_node(node, idx=1, copy=True)
         val_delta = self.graph.get_input_node(node, idx=2, copy=True)
         dtype = val_start.dtype
-        inputs = {'start': val_start.name, 
-                  'end': val_limit.name, 
+        inputs = {'start': val_start.name,
+                  'end': val_limit.name,
                   'step': val_delta.name}
         self.paddle_graph.add_layer(
             'paddle.arange',
@@ -952,7 +953,7 @@ class OpSet9():
             if len(node.inputs) > 4:
                 steps = self.graph.get_input_node(node, idx=4, copy=True)
                 steps = _const_weight_or_none(steps).tolist()
-            
+
             layer_attrs = {
                 "axes": axes,
                 "starts": starts.name,
@@ -967,7 +968,7 @@ class OpSet9():
                         ends_value[idx] = val_x.out_shapes[0][axes[idx]]
                     elif ends_value[idx] > 2**31 - 1:
                         ends_value[idx] = 2**31 - 1
-                  
+
                 layer_attrs = {
                     "axes": axes,
                     "starts": starts_value,
@@ -1005,15 +1006,15 @@ class OpSet9():
         if steps is not None:
             layer_attrs['strides'] = steps
             self.paddle_graph.add_layer(
-                'paddle.strided_slice', 
-                inputs={"x": val_x.name}, 
-                outputs=[node.name], 
+                'paddle.strided_slice',
+                inputs={"x": val_x.name},
+                outputs=[node.name],
                 **layer_attrs)
         else:
             self.paddle_graph.add_layer(
-                'paddle.slice', 
-                inputs={"input": val_x.name}, 
-                outputs=[node.name],  
+                'paddle.slice',
+                inputs={"input": val_x.name},
+                outputs=[node.name],
                 **layer_attrs)
 
     @print_mapping_info
@@ -1033,8 +1034,8 @@ class OpSet9():
                 'fill_value': value
             }
             self.paddle_graph.add_layer(
-                "paddle.full", 
-                inputs={'shape': val_shape.name}, 
+                "paddle.full",
+                inputs={'shape': val_shape.name},
                 outputs=[node.name],
                 **layer_attrs)
 
@@ -1050,11 +1051,11 @@ class OpSet9():
                 'max': max_value,
                 'min': min_value,
             }
-            
+
             self.paddle_graph.add_layer(
-                'paddle.clip', 
-                inputs={"x": val_x.name}, 
-                outputs=[node.name], 
+                'paddle.clip',
+                inputs={"x": val_x.name},
+                outputs=[node.name],
                 **layer_attrs)
         else:
             min_ipt = self.graph.get_input_node(node, idx=1, copy=True)
@@ -1068,9 +1069,9 @@ class OpSet9():
         if max_value is not None and min_value is not None:
             layer_attrs = {'max': max_value, 'min': min_value}
             self.paddle_graph.add_layer(
-                'paddle.clip', 
-                inputs={"x": val_x.name}, 
-                outputs=[node.name], 
+                'paddle.clip',
+                inputs={"x": val_x.name},
+                outputs=[node.name],
                 **layer_attrs)
         else:
             raise
@@ -1095,9 +1096,9 @@ class OpSet9():
         else:
             outputs_list.append(node.name)
         self.paddle_graph.add_layer(
-            'paddle.split', 
-            inputs={"x": val_x.name}, 
-            outputs=outputs_list, 
+            'paddle.split',
+            inputs={"x": val_x.name},
+            outputs=outputs_list,
             **layer_attrs)
 
     @print_mapping_info
@@ -1154,16 +1155,16 @@ class OpSet9():
         if output_dtype:
             assert dtype == output_dtype, 'dtype of to unmatches output'
         self.paddle_graph.add_layer(
-            'paddle.cast', 
-            inputs={'x': val_input.name}, 
-            outputs=[node.name], 
+            'paddle.cast',
+            inputs={'x': val_input.name},
+            outputs=[node.name],
             dtype=string(dtype))
 
     @print_mapping_info
     def Not(self, node):
         val_input = self.graph.get_input_node(node, idx=0, copy=True)
-        self.paddle_graph.add_layer('paddle.logical_not', 
-                                    inputs={'x': val_input.name}, 
+        self.paddle_graph.add_layer('paddle.logical_not',
+                                    inputs={'x': val_input.name},
                                     outputs=[node.name])
 
     @print_mapping_info
@@ -1201,9 +1202,9 @@ class OpSet9():
             "exclusive": 'True',
         }
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs={'x': val_x if isinstance(val_x, str) else val_x.name}, 
-            outputs=layer_outputs, 
+            paddle_op,
+            inputs={'x': val_x if isinstance(val_x, str) else val_x.name},
+            outputs=layer_outputs,
             **layer_attrs)
 
     @print_mapping_info
@@ -1218,9 +1219,9 @@ class OpSet9():
             assert 'Unspported situation happened, please create issue on https://github.com/PaddlePaddle/X2Paddle/issues.'
         axis = node.get_attr('axis')
         self.paddle_graph.add_layer(
-            'paddle.concat', 
-            inputs={"x": inputs_list}, 
-            outputs=[node.name], 
+            'paddle.concat',
+            inputs={"x": inputs_list},
+            outputs=[node.name],
             axis=axis)
 
     @print_mapping_info
@@ -1238,8 +1239,8 @@ class OpSet9():
             for s in output_shape[axis:]:
                 shape_list[1] *= s
         self.paddle_graph.add_layer(
-            'paddle.reshape', 
-            inputs={"x": val_x.name}, 
+            'paddle.reshape',
+            inputs={"x": val_x.name},
             outputs=[node.name],
             shape=shape_list)
 
@@ -1254,7 +1255,7 @@ class OpSet9():
         trans_a = bool(node.get_attr('transA', 0))  # optional
         trans_b = bool(node.get_attr('transB', 0))  # optional
         val_mm = node.name + '_mm'
-        matmul_inputs = {"x": val_a.name, 
+        matmul_inputs = {"x": val_a.name,
                          "y": val_b.name}
         attr_matmul = {
             "transpose_x": trans_a,
@@ -1266,14 +1267,14 @@ class OpSet9():
             outputs=[val_mm],
             **attr_matmul)
         self.paddle_graph.add_layer(
-            "paddle.scale", 
-            inputs={"x": val_mm}, 
+            "paddle.scale",
+            inputs={"x": val_mm},
             outputs=[val_mm],
             scale=alpha)
 
         if beta != 0:
             if beta == 1.:
-                add_inputs = {"x": val_mm, 
+                add_inputs = {"x": val_mm,
                               "y": val_c.name}
                 self.paddle_graph.add_layer(
                     "paddle.add",
@@ -1301,8 +1302,8 @@ class OpSet9():
             "y": self.graph.get_input_node(
                 node, idx=1, copy=True).name,
         }
-        self.paddle_graph.add_layer("paddle.add", 
-                                    inputs=inputs_dict, 
+        self.paddle_graph.add_layer("paddle.add",
+                                    inputs=inputs_dict,
                                     outputs=[node.name])
 
         for idx, ipt in enumerate(val_inps[2:]):
@@ -1312,8 +1313,8 @@ class OpSet9():
                 "y": y.name,
             }
             self.paddle_graph.add_layer(
-                "paddle.add", 
-                inputs=inputs_dict, 
+                "paddle.add",
+                inputs=inputs_dict,
                 outputs=[node.name])
 
     @print_mapping_info
@@ -1322,7 +1323,7 @@ class OpSet9():
         val_y = self.graph.get_input_node(node, idx=1, copy=True)
         x_shape = val_x.out_shapes[0]
         y_shape = val_y.out_shapes[0]
-        inputs_dict = {"x": val_x.name, 
+        inputs_dict = {"x": val_x.name,
                        "y": val_y.name}
         if y_shape[0] == 1 and x_shape[-1] != 1 and x_shape[0] != 1:
             y_squeeze = val_y.name + '_squeeze'
@@ -1333,13 +1334,13 @@ class OpSet9():
                 axis=[0])
             inputs_dict['y'] = y_squeeze
             self.paddle_graph.add_layer(
-                "paddle.matmul", 
-                inputs=inputs_dict, 
+                "paddle.matmul",
+                inputs=inputs_dict,
                 outputs=[node.name])
         else:
             self.paddle_graph.add_layer(
-                "paddle.matmul", 
-                inputs=inputs_dict, 
+                "paddle.matmul",
+                inputs=inputs_dict,
                 outputs=[node.name])
 
     @print_mapping_info
@@ -1372,9 +1373,9 @@ class OpSet9():
             "use_global_stats": False,
         }
         self.paddle_graph.add_layer(
-            "paddle.nn.BatchNorm", 
-            inputs={"x": val_x.name}, 
-            outputs=layer_outputs, 
+            "paddle.nn.BatchNorm",
+            inputs={"x": val_x.name},
+            outputs=layer_outputs,
             **layer_attrs)
 
     @print_mapping_info
@@ -1385,9 +1386,9 @@ class OpSet9():
         perm_default.reverse()
         perm = node.get_attr('perm', perm_default)
         self.paddle_graph.add_layer(
-            "paddle.transpose", 
+            "paddle.transpose",
             inputs={"x": val_x.name},
-            outputs=[node.name], 
+            outputs=[node.name],
             perm=perm)
 
     @print_mapping_info
@@ -1406,43 +1407,43 @@ class OpSet9():
         if mode == "element":
             self.paddle_graph.add_layer(
                 "paddle.zeros",
-                inputs={}, 
-                outputs=[output_name + "__zeros"], 
+                inputs={},
+                outputs=[output_name + "__zeros"],
                 shape=shape_slope,
                 dtype=string(node.dtype))
             self.paddle_graph.add_layer(
                 "paddle.maximum",
-                inputs={"x": val_x.name, 
-                        "y": output_name + "__zeros"}, 
+                inputs={"x": val_x.name,
+                        "y": output_name + "__zeros"},
                 outputs=[output_name + "__max"])
             self.paddle_graph.add_layer(
                 "paddle.minimum",
-                inputs={"x": val_x.name, 
-                        "y": output_name + "__zeros"}, 
+                inputs={"x": val_x.name,
+                        "y": output_name + "__zeros"},
                 outputs=[output_name + "__max"])
             self.paddle_graph.add_layer(
                 "paddle.multiply",
-                inputs={"x": val_slope.name, 
-                        "y": output_name + "__min"}, 
+                inputs={"x": val_slope.name,
+                        "y": output_name + "__min"},
                 outputs=[output_name + "__mul"])
             self.paddle_graph.add_layer(
                 "paddle.add",
-                inputs={"x": output_name + "__max", 
-                        "y": output_name + "__mul"}, 
+                inputs={"x": output_name + "__max",
+                        "y": output_name + "__mul"},
                 outputs=[output_name])
         else:
             if mode == 'channel':
                 slope_data = _const_weight_or_none(val_slope)
                 if slope_data is None:
                     self.paddle_graph.add_layer(
-                        "paddle.reshape", 
-                        inputs={"x": val_slope.name}, 
+                        "paddle.reshape",
+                        inputs={"x": val_slope.name},
                         outputs=[val_slope.name],
                         shape=[shape_slope[0]])
                     self.paddle_graph.add_layer(
-                        "paddle.nn.functional.prelu", 
+                        "paddle.nn.functional.prelu",
                         inputs={"x": val_x.name,
-                                "weight": val_slope.name}, 
+                                "weight": val_slope.name},
                         outputs=[node.name])
                     return
                 _rename_or_remove_weight(self.weights, val_slope.name)
@@ -1454,9 +1455,9 @@ class OpSet9():
                 _rename_or_remove_weight(self.weights, val_slope.name)
                 self.weights[op_name+'._weight'] = np.reshape(self.weights[val_slope.name], [1])
             self.paddle_graph.add_layer(
-                "paddle.nn.PReLU", 
-                inputs={"x": val_x.name}, 
-                outputs=layer_outputs, 
+                "paddle.nn.PReLU",
+                inputs={"x": val_x.name},
+                outputs=layer_outputs,
                 num_parameters=num_parameters)
 
     @print_mapping_info
@@ -1471,9 +1472,9 @@ class OpSet9():
                 dtype=string(val_x.dtype))
         else:
             self.paddle_graph.add_layer(
-                "paddle.squeeze", 
-                inputs={"x": val_x.name}, 
-                outputs=[node.name], 
+                "paddle.squeeze",
+                inputs={"x": val_x.name},
+                outputs=[node.name],
                 axis=axes)
 
     @print_mapping_info
@@ -1545,8 +1546,8 @@ class OpSet9():
         val_x_dim = len(val_x.out_shapes[0])
         if val_x_dim == 1:
             self.paddle_graph.add_layer(
-                "paddle.nonzero", 
-                inputs={"x": val_x.name}, 
+                "paddle.nonzero",
+                inputs={"x": val_x.name},
                 outputs=[val_x.name])
             self.paddle_graph.add_layer(
                 "paddle.transpose",
@@ -1555,26 +1556,26 @@ class OpSet9():
                 perm=[1, 0])
         if val_x_dim > 1:
             self.paddle_graph.add_layer(
-                "paddle.nonzero", 
-                inputs={"x": val_x.name}, 
+                "paddle.nonzero",
+                inputs={"x": val_x.name},
                 outputs=[val_x.name])
             self.paddle_graph.add_layer(
                 "paddle.split",
-                inputs={"x": val_x.name}, 
+                inputs={"x": val_x.name},
                 outputs=[val_x.name],
                 num_or_sections=1,
                 axis=val_x_dim)
             self.paddle_graph.add_layer(
-                "paddle.concat", 
-                inputs={"x": val_x.name}, 
+                "paddle.concat",
+                inputs={"x": val_x.name},
                 outputs=[node.name])
 
     @print_mapping_info
     def Identity(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
         self.paddle_graph.add_layer(
-            "paddle.assign", 
-            inputs={"x": val_x.name}, 
+            "paddle.assign",
+            inputs={"x": val_x.name},
             outputs=[node.name])
 
     @print_mapping_info
@@ -1601,9 +1602,9 @@ class OpSet9():
             "name": string(node.name),
         }
         self.paddle_graph.add_layer(
-            "paddle.tile", 
-            inputs={"x": val_x.name}, 
-                    outputs=[node.name], 
+            "paddle.tile",
+            inputs={"x": val_x.name},
+                    outputs=[node.name],
                     repeat_times=repeats)
 
     @print_mapping_info
@@ -1634,7 +1635,7 @@ class OpSet9():
             pad_w = _get_same_padding(input_shape[3], kernel_shape[1],
                                       strides[1])
             paddings = pad_h + pad_w
-            
+
         layer_attrs = {
             "kernel_size": kernel_shape,
             "stride": strides,
@@ -1642,9 +1643,9 @@ class OpSet9():
             "ceil_mode": ceil_mode,
         }
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs={'x': val_x if isinstance(val_x, str) else val_x.name}, 
-            outputs=layer_outputs, 
+            paddle_op,
+            inputs={'x': val_x if isinstance(val_x, str) else val_x.name},
+            outputs=layer_outputs,
             **layer_attrs)
 
     @print_mapping_info
@@ -1664,9 +1665,9 @@ class OpSet9():
         assert 1 <= poolnd <= 3, 'only Pool1D, Pool2D and Pool3D are supported'
         output_shape = node.out_shapes[0]
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs={'x': val_x.name}, 
-            outputs=layer_outputs, 
+            paddle_op,
+            inputs={'x': val_x.name},
+            outputs=layer_outputs,
             output_size=output_shape[2:])
 
     @print_mapping_info
@@ -1686,9 +1687,9 @@ class OpSet9():
         assert 1 <= poolnd <= 3, 'only Pool1D, Pool2D and Pool3D are supported'
         output_shape = node.out_shapes[0]
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs={'x': val_x.name}, 
-            outputs=layer_outputs, 
+            paddle_op,
+            inputs={'x': val_x.name},
+            outputs=layer_outputs,
             output_size=output_shape[2:])
 
     @print_mapping_info
@@ -1751,14 +1752,14 @@ class OpSet9():
             input_shape[0] = 0
             input_shape[2] = 0
             self.paddle_graph.add_layer(
-                "paddle.reshape", 
-                inputs=layer_inputs, 
-                outputs=[layer_inputs["x"]], 
+                "paddle.reshape",
+                inputs=layer_inputs,
+                outputs=[layer_inputs["x"]],
                 shape=input_shape)
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs=layer_inputs, 
-            outputs=layer_outputs, 
+            paddle_op,
+            inputs=layer_inputs,
+            outputs=layer_outputs,
             **layer_attrs)
 
     @print_mapping_info
@@ -1809,7 +1810,7 @@ class OpSet9():
             "padding": paddings,
             "groups": num_groups,
             "output_padding":out_padding}
-            
+
         _rename_or_remove_weight(self.weights, val_w.name, op_name+'.weight',)
         if val_b is not None:
             _rename_or_remove_weight(self.weights, val_b.name, op_name+'.bias')
@@ -1818,7 +1819,7 @@ class OpSet9():
             inputs=inputs_dict,
             outputs=layer_outputs,
             **layer_attrs)
-        
+
     @print_mapping_info
     def ArgMax(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -1827,49 +1828,50 @@ class OpSet9():
         layer_attrs = {'axis': axis,
                       'keepdim': keepdims}
         self.paddle_graph.add_layer(
-            'paddle.argmax', 
-            inputs={"x": val_x.name}, 
+            'paddle.argmax',
+            inputs={"x": val_x.name},
             outputs=[node.name],
             **layer_attrs)
 
-        
+
     @print_mapping_info
     def Size(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
+        self.paddle_graph.set_static_shape(val_x.name, get_out_shape(val_x))
         self.paddle_graph.add_layer(
-            "paddle.shape", 
-            inputs={"input": val_x.name}, 
+            "paddle.shape",
+            inputs={"input": val_x.name},
             outputs=[node.name])
         self.paddle_graph.add_layer(
             'paddle.cast',
             inputs={"x": node.name},
             outputs=[node.name],
-            dtype=string('int64'))  
+            dtype=string('int64'))
         self.paddle_graph.add_layer(
             "paddle.prod",
             inputs={"x": node.name},
             outputs=[node.name])
-        
+
     @print_mapping_info
     def Sign(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
         if node.dtype not in ["float16", "float32", "float64"]:
             self.paddle_graph.add_layer(
-                "paddle.cast", 
-                inputs={"x": val_x.name}, 
+                "paddle.cast",
+                inputs={"x": val_x.name},
                 outputs=[val_x.name],
                 dtype=string("float32"))
         self.paddle_graph.add_layer(
-            "paddle.sign", 
-            inputs={"x": val_x.name}, 
+            "paddle.sign",
+            inputs={"x": val_x.name},
             outputs=[node.name])
         if node.dtype not in ["float16", "float32", "float64"]:
             self.paddle_graph.add_layer(
-                "paddle.cast", 
-                inputs={"x": node.name}, 
+                "paddle.cast",
+                inputs={"x": node.name},
                 outputs=[node.name],
                 dtype=string(node.dtype))
-        
+
     @print_mapping_info
     def OneHot(self, node):
         nn_op_name = name_generator("onehot", self.nn_name2id)
@@ -1880,19 +1882,19 @@ class OpSet9():
         values = self.graph.get_input_node(node, idx=2, copy=True)
         axis = node.get_attr('axis', -1)
         self.paddle_graph.add_layer(
-            "custom_layer:OneHot", 
+            "custom_layer:OneHot",
             inputs={"indices": indices.name,
                     "depth": depth.name,
-                    "values": values.name}, 
+                    "values": values.name},
             outputs=layer_outputs,
             axis=axis)
-    
+
     @print_mapping_info
     def Reciprocal(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
         self.paddle_graph.add_layer(
-            "paddle.reciprocal", 
-            inputs={"x": val_x.name}, 
+            "paddle.reciprocal",
+            inputs={"x": val_x.name},
             outputs=[node.name])
 
     @print_mapping_info
@@ -1959,7 +1961,7 @@ class OpSet9():
 
         op_name = name_generator("lstm", self.nn_name2id)
         y_out = node.output(0)
-        yh_out = node.output(1) 
+        yh_out = node.output(1)
         yc_out = node.output(2)
         direction = node.get_attr('direction', 'forward')
 
@@ -1985,7 +1987,7 @@ class OpSet9():
                 assign_params(op_name, weights, 1, '_reverse')
 
         self.paddle_graph.add_layer(
-            'paddle.nn.LSTM', 
+            'paddle.nn.LSTM',
             inputs={'input': x.name, 'initial_states': (init_h.name, init_c.name)},
             outputs=[op_name, y_out, yh_out, yc_out],
             input_size=input_size,
@@ -2006,7 +2008,7 @@ class OpSet9():
             outputs=[y_out],
             perm=[0,2,1,3]
             )
-        
+
     @print_mapping_info
     def TopK(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -2016,12 +2018,12 @@ class OpSet9():
         layer_attrs["largest"] = True if node.get_attr('largest', 1) == 1 else False
         layer_attrs["sorted"] = True if node.get_attr('sorted', 1) == 1 else False
         self.paddle_graph.add_layer(
-            "paddle.topk", 
+            "paddle.topk",
             inputs={"x": val_x.name,
-                    "k": val_k.name}, 
+                    "k": val_k.name},
             outputs=["{}_p{}".format(node.layer_name, 0), "{}_p{}".format(node.layer_name, 1)],
             **layer_attrs)
-        
+
     @print_mapping_info
     def LRN(self, node):
         op_name = name_generator("lrn", self.nn_name2id)
@@ -2039,11 +2041,11 @@ class OpSet9():
             'k': bias
         }
         self.paddle_graph.add_layer(
-            "custom_layer:LocalResponseNorm", 
-            inputs={"x": val_x.name}, 
-            outputs=layer_outputs, 
+            "custom_layer:LocalResponseNorm",
+            inputs={"x": val_x.name},
+            outputs=layer_outputs,
             **layer_attrs)
-        
+
     @print_mapping_info
     def DepthToSpace(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -2089,4 +2091,3 @@ class OpSet9():
                 outputs=[node.name],
                 shape=[b, c // (blocksize ** 2), h * blocksize, w * blocksize]
                 )
-                
\ No newline at end of file
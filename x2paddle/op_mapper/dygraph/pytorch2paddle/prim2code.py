@@ -14,7 +14,7 @@
 # limitations under the License.
 
 NO_OUTPUT_COUNT = 0
- 
+
 def gen_codes(code_list, indent=0):
     indent_blank = "    " * indent
     codes = []
@@ -77,7 +77,7 @@ def prim_and(layer, indent=1, init_func=[], forward_func=[], layer_id=None, diff
 
 def prim_append(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     line = "{}.append({})".format(
-        get_value(layer, "list", layer_id, different_attrs), 
+        get_value(layer, "list", layer_id, different_attrs),
         get_value(layer, "element", layer_id, different_attrs))
     forward_func.extend(gen_codes([line], indent=indent))
 
@@ -140,8 +140,8 @@ def prim_contain(layer, indent=1, init_func=[], forward_func=[], layer_id=None,
 def prim_dict(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     line = "{} = dict()".format(layer.outputs[0])
     forward_func.extend(gen_codes([line], indent=indent))
-    
-    
+
+
 def prim_dict_construct(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     lines = list()
     line = "{} = dict()".format(layer.outputs[0])
@@ -152,8 +152,8 @@ def prim_dict_construct(layer, indent=1, init_func=[], forward_func=[], layer_id
                                     get_value(layer, "value{}".format(i), different_attrs))
         lines.append(line)
     forward_func.extend(gen_codes(lines, indent=indent))
-    
-    
+
+
 def prim_dict2values(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     line = "{} = list({}.values())".format(layer.outputs[0],
                                            get_value(layer, "x", different_attrs))
@@ -162,14 +162,14 @@ def prim_dict2values(layer, indent=1, init_func=[], forward_func=[], layer_id=No
 
 def prim_div(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     line = "{} = {} / {}".format(layer.outputs[0],
-                                 get_value(layer, "x", different_attrs), 
+                                 get_value(layer, "x", different_attrs),
                                  get_value(layer, "y", different_attrs))
     forward_func.extend(gen_codes([line], indent=indent))
 
 
 def prim_eq(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None,is_return_line=False):
     line = "{} = {} == {}".format(layer.outputs[0],
-                                  get_value(layer, "x", different_attrs), 
+                                  get_value(layer, "x", different_attrs),
                                   get_value(layer, "y", different_attrs))
     if is_return_line:
         return line.split(" = ")[1]
@@ -199,7 +199,7 @@ def prim_floor(layer, indent=1, init_func=[], forward_func=[], layer_id=None, di
 
 def prim_floordiv(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     line = "{} = {} // {}".format(layer.outputs[0],
-                                  get_value(layer, "x", different_attrs), 
+                                  get_value(layer, "x", different_attrs),
                                   get_value(layer, "y", different_attrs))
     forward_func.extend(gen_codes([line], indent=indent))
 
@@ -213,7 +213,7 @@ def prim_getitem(layer, indent=1, init_func=[], forward_func=[], layer_id=None,
 
 def prim_gt(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None, is_return_line=False):
     line = "{} = {} > {}".format(layer.outputs[0],
-                                 get_value(layer, "x", different_attrs), 
+                                 get_value(layer, "x", different_attrs),
                                  get_value(layer, "y", different_attrs))
     if is_return_line:
         return line.split(" = ")[1]
@@ -223,9 +223,17 @@ def prim_gt(layer, indent=1, init_func=[], forward_func=[], layer_id=None, diffe
 def prim_if(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     try:
         exec_s = None
-        for line in forward_func:
-            s = line.replace("    ", "")
-            if s.startswith("{} = ".format(get_value(layer, "input", different_attrs))):
+        if isinstance(forward_func, list):
+            for line in forward_func:
+                s = line.replace("    ", "")
+                if s.startswith("{} = ".format(
+                        get_value(layer, "input", different_attrs))):
+                    exec_s = s.split(" = ")[1]
+        else:
+            # 顶层的forward_func为CodeWriter，代码已写入文件，只能读取记录的赋值
+            s = forward_func.get_assignment(
+                get_value(layer, "input", different_attrs))
+            if s is not None:
                 exec_s = s.split(" = ")[1]
         lc=locals()
         if exec_s is not None:
@@ -270,7 +278,7 @@ def prim_int(layer, indent=1, init_func=[], forward_func=[], layer_id=None, diff
 
 def prim_is(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None, is_return_line=False):
     line = "{} = {} is {}".format(layer.outputs[0],
-                                  get_value(layer, "x", different_attrs), 
+                                  get_value(layer, "x", different_attrs),
                                   get_value(layer, "y", different_attrs))
     if is_return_line:
         return line.split(" = ")[1]
@@ -297,7 +305,7 @@ def prim_isnot(layer, indent=1, init_func=[], forward_func=[], layer_id=None, di
 
 def prim_le(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None, is_return_line=False):
     line = "{} = {} <= {}".format(layer.outputs[0],
-                                  get_value(layer, "x", different_attrs), 
+                                  get_value(layer, "x", different_attrs),
                                   get_value(layer, "y", different_attrs))
     if is_return_line:
         return line.split(" = ")[1]
@@ -319,7 +327,7 @@ def prim_len2list(layer, indent=1, init_func=[], forward_func=[], layer_id=None,
 
 def prim_lt(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None, is_return_line=False):
     line = "{} = {} < {}".format(layer.outputs[0],
-                                 get_value(layer, "x", different_attrs), 
+                                 get_value(layer, "x", different_attrs),
                                  get_value(layer, "y", different_attrs))
     if is_return_line:
         return line.split(" = ")[1]
@@ -358,14 +366,14 @@ def prim_min(layer, indent=1, init_func=[], forward_func=[], layer_id=None, diff
 
 def prim_mul(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     line = "{} = {} * {}".format(layer.outputs[0],
-                                 get_value(layer, "x", different_attrs), 
+                                 get_value(layer, "x", different_attrs),
                                  get_value(layer, "y", different_attrs))
     forward_func.extend(gen_codes([line], indent=indent))
 
 
 def prim_ne(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None, is_return_line=False):
     line = "{} = {} != {}".format(layer.outputs[0],
-                                  get_value(layer, "x", different_attrs), 
+                                  get_value(layer, "x", different_attrs),
                                   get_value(layer, "y", different_attrs))
     if is_return_line:
         return line.split(" = ")[1]
@@ -386,7 +394,7 @@ def prim_not(layer, indent=1, init_func=[], forward_func=[], layer_id=None, diff
 
 def prim_or(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None, is_return_line=False):
     line = "{} = {} or {}".format(layer.outputs[0],
-                                  get_value(layer, "x", different_attrs), 
+                                  get_value(layer, "x", different_attrs),
                                   get_value(layer, "y", different_attrs))
     if is_return_line:
         return line.split(" = ")[1]
@@ -396,7 +404,7 @@ def prim_or(layer, indent=1, init_func=[], forward_func=[], layer_id=None, diffe
 def prim_replaceitem(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     line = "{}[{}] = {}".format(
         get_value(layer, "list", layer_id, different_attrs),
-        get_value(layer, "index", layer_id, different_attrs), 
+        get_value(layer, "index", layer_id, different_attrs),
         get_value(layer, "item", layer_id, different_attrs))
     forward_func.extend(gen_codes([line], indent=indent))
 
@@ -433,8 +441,8 @@ def prim_set_item(layer, indent=1, init_func=[], forward_func=[], layer_id=None,
         get_value(layer, "dict", different_attrs),
         get_value(layer, "key", different_attrs), get_value(layer, "value", different_attrs))
     forward_func.extend(gen_codes([line], indent=indent))
-    
-    
+
+
 def prim_shape(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     line = "{} = {}.shape".format(layer.outputs[0],
                                   get_value(layer, "input", different_attrs))
@@ -456,8 +464,8 @@ def prim_slice(layer, indent=1, init_func=[], forward_func=[], layer_id=None, di
                                         get_value(layer, "end", different_attrs),
                                         get_value(layer, "step", different_attrs))
     forward_func.extend(gen_codes([line], indent=indent))
-    
-    
+
+
 def prim_startswith(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None, is_return_line=False):
     line = "{} = {}.startswith({})".format(layer.outputs[0],
                                            get_value(layer, "input", different_attrs),
@@ -475,11 +483,11 @@ def prim_str(layer, indent=1, init_func=[], forward_func=[], layer_id=None, diff
 def prim_sub(layer, indent=1, init_func=[], forward_func=[], layer_id=None, different_attrs=None):
     if int(float(get_value(layer, "alpha", different_attrs))) == 1:
         line = "{} = {} - {}".format(layer.outputs[0],
-                                     get_value(layer, "x", different_attrs), 
+                                     get_value(layer, "x", different_attrs),
                                      get_value(layer, "y", different_attrs))
     else:
         line = "{} = {} - {} * {}".format(layer.outputs[0],
-                                     get_value(layer, "x", different_attrs), 
+                                     get_value(layer, "x", different_attrs),
                                      get_value(layer, "alpha", different_attrs),
                                      get_value(layer, "y", different_attrs))
     forward_func.extend(gen_codes([line], indent=indent))
@@ -518,4 +526,3 @@ def prim_warnings(layer, indent=1, init_func=[], forward_func=[], layer_id=None,
         get_value(layer, "input", different_attrs), layer.attrs["stacklevel"])
     lines.append(line)
     forward_func.extend(gen_codes(lines, indent=indent))
-    
@@ -13,8 +13,9 @@
 # limitations under the License.
 
 from x2paddle.decoder.tf_decoder import TFGraph, TFGraphNode
-from x2paddle.core.program import PaddleGraph 
+from x2paddle.core.program import PaddleGraph
 from x2paddle.core.op_mapper import OpMapper
+from x2paddle.core.profiler import profiler
 from x2paddle.core.util import *
 import traceback
 import math
@@ -58,7 +59,7 @@ class TFOpMapper(OpMapper):
         'swish_f32': ['paddle.nn.Swish'],
         'Tanh': ['paddle.nn.Tanh'],
         'Softplus': ['paddle.nn.Softplus'],
-        'LeakyRelu': ['paddle.nn.LeakyReLU', 
+        'LeakyRelu': ['paddle.nn.LeakyReLU',
                       dict(alpha='negative_slope')],
         'Softmax': ['paddle.nn.Softmax'],
         'Floor': ['paddle.floor'],
@@ -85,10 +86,21 @@ class TFOpMapper(OpMapper):
         'NotEqual': 'paddle.not_equal',
         'Equal': 'paddle.equal',
     }
+    # 需要通过decoder.infer_tensor计算的非Const输入：op -> [(输入序号, use_diff_inputs)]
+    infer_inputs = {
+        'Conv2D': [(1, False)],
+        'Conv3D': [(1, False)],
+        'StridedSlice': [(1, True), (2, True), (3, True)],
+        'Slice': [(1, False)],
+        'Conv2DBackpropInput': [(0, True)],
+    }
 
-    def __init__(self, decoder):
+    def __init__(self, decoder, data_format="NCHW"):
         super(TFOpMapper, self).__init__()
+        assert data_format in ["NCHW",
+                               "NHWC"], "data_format must be 'NCHW' or 'NHWC'"
         self.decoder = decoder
+        self.data_format = data_format
         self.graph = decoder.tf_graph
         if not self.op_checker():
             raise Exception("Model is not supported yet.")
@@ -97,6 +109,7 @@ class TFOpMapper(OpMapper):
         self.input_index = 0
         self.inputs_info = dict()
         self.paddle_graph = PaddleGraph(parent_layer=None, graph_type="dygraph", source_type="tf")
+        self.paddle_graph.data_format = data_format
         self.paddle_graph.outputs = self.graph.output_nodes
 
         not_placeholder = list()
@@ -109,32 +122,34 @@ class TFOpMapper(OpMapper):
                 not_placeholder.append(name)
         for name in not_placeholder:
             idx = self.graph.input_nodes.index(name)
-            del self.graph.input_nodes[idx]        
+            del self.graph.input_nodes[idx]
 
         print("Total nodes: {}".format(
             sum([
                 isinstance(node, TFGraphNode)
                 for name, node in self.graph.node_map.items()
             ])))
+        self.prefetch_tensors()
         print("Nodes converting ...")
         for i, node_name in enumerate(self.graph.topo_sort):
             sys.stderr.write("\rConverting node {} ...     ".format(i + 1))
             node = self.graph.get_node(node_name)
             op = node.layer_type
-            if op in self.directly_map_ops:
-                self.directly_map(node)
-            elif op in self.elementwise_ops:
-                self.elementwise_map(node)
-            elif op in self.bool_ops:
-                self.bool_map(node)
-            elif hasattr(self, op):
-                func = getattr(self, op)
-                func(node)
+            with profiler.record("op_mapper", op):
+                if op in self.directly_map_ops:
+                    self.directly_map(node)
+                elif op in self.elementwise_ops:
+                    self.elementwise_map(node)
+                elif op in self.bool_ops:
+                    self.bool_map(node)
+                elif hasattr(self, op):
+                    func = getattr(self, op)
+                    func(node)
         print("\nNodes converted.")
         self.paddle_graph.set_name(self.graph.graph_name)
         self.paddle_graph.set_parameters(self.params)
         self.paddle_graph.set_inputs_info(self.inputs_info)
-        
+
     def op_checker(self):
         unsupported_ops = set()
         for node_name in self.graph.topo_sort:
@@ -153,7 +168,37 @@ class TFOpMapper(OpMapper):
                     len(unsupported_ops)))
             for op in unsupported_ops:
                 print("========== {} ============".format(op))
-            return False 
+            return False
+
+    def prefetch_tensors(self):
+        """ 收集转换过程中需要infer_tensor的tensor，由decoder在每个batch size下
+        一次sess.run计算并缓存，避免每个tensor都执行一次完整的前向。
+        """
+        requests = list()
+        for node_name in self.graph.topo_sort:
+            node = self.graph.get_node(node_name)
+            for idx, use_diff_inputs in self.infer_inputs.get(
+                    node.layer_type, []):
+                if idx >= len(node.layer.input):
+                    continue
+                input = self.graph.get_input_node(node, idx)
+                if input.layer_type != "Const":
+                    requests.append((input, use_diff_inputs))
+        if len(requests) > 0:
+            self.decoder.prefetch_tensors(requests)
+
+    def keep_nhwc(self, data_format):
+        """ 以data_format="NHWC"转换时，NHWC的卷积、池化、BatchNorm、resize
+        直接使用NHWC的paddle kernel，前后不再插入transpose。
+        """
+        return data_format == "NHWC" and self.data_format == "NHWC"
+
+    def get_format_attrs(self, data_format, key="data_format"):
+        """ 获取paddle kernel的数据格式属性，使用默认的NCHW时为空。
+        """
+        if self.keep_nhwc(data_format):
+            return {key: string("NHWC")}
+        return dict()
 
     def directly_map(self, node):
         inputs = node.layer.input
@@ -197,7 +242,7 @@ class TFOpMapper(OpMapper):
                     "y": y.name},
             outputs=[node.name])
         self.paddle_graph.layers[layer_id].input_shapes = {"x": x_shape, "y": y_shape}
-        
+
     def bool_map(self, node):
         op_type = self.bool_ops[node.layer_type]
         self.elementwise_map(node, op_type)
@@ -208,7 +253,7 @@ class TFOpMapper(OpMapper):
         assert len(shape) != 0, "Unknown shape of input nodes[{}].".format(
             node.layer_name)
         dtype = node.dtype
-        
+
         self.paddle_graph.add_layer(
             kernel="paddle.to_tensor",
             inputs={},
@@ -226,15 +271,15 @@ class TFOpMapper(OpMapper):
             if value == float('inf'):
                 value = "float('inf')"
             self.paddle_graph.add_layer(
-                "paddle.full", 
-                inputs={}, 
+                "paddle.full",
+                inputs={},
                 outputs=[node.name],
                 dtype=string(dtype),
                 shape=[1],
                 fill_value=value)
             return
         self.params[node.name] = node.value
-        
+
         if 0 not in shape:
             self.paddle_graph.add_layer(
                 "self.create_parameter",
@@ -244,19 +289,19 @@ class TFOpMapper(OpMapper):
                 attr=string(node.name),
                 dtype=string(dtype),
                 default_initializer="paddle.nn.initializer.Constant(value=0.0)")
-      
+
     def Transpose(self, node):
         input = self.graph.get_input_node(node, 0)
         perm = self.graph.get_input_node(node, 1)
         assert perm.layer_type == "Const", "Perm of transpose OP should be Const"
         perm = perm.value.tolist()
-        
+
         self.paddle_graph.add_layer(
             "paddle.transpose",
             inputs={"x": input.name},
             outputs=[node.name],
             perm=perm)
-        
+
     def Where(self, node):
         if len(node.layer.input) == 1:
             cond = self.graph.get_input_node(node, 0)
@@ -274,10 +319,10 @@ class TFOpMapper(OpMapper):
                         "x": x.name,
                         "y": y.name},
                 outputs=[node.name])
-        
+
     def Neg(self, node):
         input = self.graph.get_input_node(node, 0)
-        
+
         self.paddle_graph.add_layer(
             "paddle.scale",
             inputs={"x": input.name},
@@ -364,19 +409,21 @@ class TFOpMapper(OpMapper):
         k_size = node.get_attr("ksize")
         strides = node.get_attr("strides")
         data_format = node.get_attr("data_format").decode()
+        keep_nhwc = self.keep_nhwc(data_format)
         pad_mode = node.get_attr("padding").decode()
 
         input_name = input.name
         if data_format == "NHWC":
-            transpose_name = gen_name("max_pool", "transpose")
-            self.paddle_graph.add_layer(
-                kernel="paddle.transpose",
-                inputs={"x": input.name},
-                outputs=[transpose_name],
-                perm=[0, 3, 1, 2])
             strides = [strides[i] for i in [0, 3, 1, 2]]
             k_size = [k_size[i] for i in [0, 3, 1, 2]]
-            input_name = transpose_name
+            if not keep_nhwc:
+                transpose_name = gen_name("max_pool", "transpose")
+                self.paddle_graph.add_layer(
+                    kernel="paddle.transpose",
+                    inputs={"x": input.name},
+                    outputs=[transpose_name],
+                    perm=[0, 3, 1, 2])
+                input_name = transpose_name
 
         op_name = name_generator("pool", self.nn_name2id)
         output_name = node.name
@@ -388,9 +435,10 @@ class TFOpMapper(OpMapper):
             outputs=layer_outputs,
             kernel_size=k_size[2:4],
             stride=strides[2:4],
-            padding=string(pad_mode))
+            padding=string(pad_mode),
+            **self.get_format_attrs(data_format))
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
@@ -408,6 +456,7 @@ class TFOpMapper(OpMapper):
         strides = node.get_attr("strides")
         dilations = node.get_attr("dilations")
         data_format = node.get_attr("data_format").decode()
+        keep_nhwc = self.keep_nhwc(data_format)
         pad_mode = node.get_attr("padding").decode()
         if data_format == "NHWC":
             n, h, w, c = input.out_shapes[0]
@@ -426,23 +475,24 @@ class TFOpMapper(OpMapper):
         if data_format == "NHWC":
             strides = [strides[i] for i in [0, 3, 1, 2]]
             dilations = [dilations[i] for i in [0, 3, 1, 2]]
-            transpose_name = gen_name("conv2d", "transpose")
-            self.paddle_graph.add_layer(
-                kernel="paddle.transpose",
-                inputs={"x": input.name},
-                outputs=[transpose_name],
-                perm=[0, 3, 1, 2])
-            input_name = transpose_name
+            if not keep_nhwc:
+                transpose_name = gen_name("conv2d", "transpose")
+                self.paddle_graph.add_layer(
+                    kernel="paddle.transpose",
+                    inputs={"x": input.name},
+                    outputs=[transpose_name],
+                    perm=[0, 3, 1, 2])
+                input_name = transpose_name
 
         if c == -1:
-            attr = {"shape": [0, k_size[2], 0, 0]}
+            shape = [0, 0, 0, k_size[2]] if keep_nhwc else [0, k_size[2], 0, 0]
             self.paddle_graph.add_layer(
                 kernel="paddle.reshape",
                 inputs={"x": input_name},
                 outputs=[input_name],
-                shape=[0, k_size[2], 0, 0])
+                shape=shape)
+
 
-        
         self.paddle_graph.add_layer(
             kernel="paddle.nn.Conv2D",
             inputs={"input": input_name},
@@ -454,15 +504,16 @@ class TFOpMapper(OpMapper):
             kernel_size=k_size[0:2],
             stride=strides[2:4],
             dilation=dilations[2:4],
-            padding=string(pad_mode))
+            padding=string(pad_mode),
+            **self.get_format_attrs(data_format))
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
                 outputs=[node.name],
                 perm=[0, 2, 3, 1])
-            
+
     def Conv3D(self, node):
         op_name = name_generator("conv", self.nn_name2id)
         output_name = node.name
@@ -548,24 +599,26 @@ class TFOpMapper(OpMapper):
         moving_mean = self.graph.get_input_node(node, 3)
         moving_var = self.graph.get_input_node(node, 4)
         data_format = node.get_attr("data_format").decode()
+        keep_nhwc = self.keep_nhwc(data_format)
 
         assert gamma.layer_type == "Const"
         assert beta.layer_type == "Const"
         assert moving_mean.layer_type == "Const"
         assert moving_var.layer_type == "Const"
 
-        input_name = input.name 
+        input_name = input.name
         if data_format == "NHWC":
-            transpose_name = gen_name("batch_norm", "transpose")
-            self.paddle_graph.add_layer(
-                kernel="paddle.transpose",
-                inputs={"x": input.name},
-                outputs=[transpose_name],
-                perm=[0, 3, 1, 2])
-            input_name = transpose_name
+            if not keep_nhwc:
+                transpose_name = gen_name("batch_norm", "transpose")
+                self.paddle_graph.add_layer(
+                    kernel="paddle.transpose",
+                    inputs={"x": input.name},
+                    outputs=[transpose_name],
+                    perm=[0, 3, 1, 2])
+                input_name = transpose_name
             n, h, w, c = input.out_shapes[0]
         else:
-             n, c, h, w = input.out_shapes[0]
+            n, c, h, w = input.out_shapes[0]
 
         self.params["{}_{}".format(node.name, gamma.name)] = self.params[gamma.name]
         self.params["{}_{}".format(node.name, beta.name)] = self.params[beta.name]
@@ -581,15 +634,16 @@ class TFOpMapper(OpMapper):
             bias_attr=string("{}_{}".format(node.name, beta.name)),
             moving_mean_name=string("{}_{}".format(node.name, moving_mean.name)),
             moving_variance_name=string("{}_{}".format(node.name, moving_var.name)),
-            is_test=True)
+            is_test=True,
+            **self.get_format_attrs(data_format, "data_layout"))
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
                 outputs=[node.name],
                 perm=[0, 2, 3, 1])
-            
+
     def FusedBatchNormV3(self, node):
         self.FusedBatchNorm(node)
 
@@ -647,11 +701,11 @@ class TFOpMapper(OpMapper):
             inputs={"x": input.name},
             outputs=[node.name],
             pad=paddings)
-        
+
     def MirrorPad(self, node):
         self.Pad(node)
-        
-        
+
+
     def PadV2(self, node):
         self.Pad(node)
 
@@ -667,14 +721,16 @@ class TFOpMapper(OpMapper):
     def Shape(self, node):
         input = self.graph.get_input_node(node, 0)
         input_name = input.name
+        self.paddle_graph.set_static_shape(input_name, get_out_shape(input))
         self.paddle_graph.add_layer(
             kernel="paddle.shape",
             inputs={"input": input_name},
             outputs=[node.name])
-        
+
     def Size(self, node):
         input = self.graph.get_input_node(node, 0)
         input_name = input.name
+        self.paddle_graph.set_static_shape(input_name, get_out_shape(input))
         self.paddle_graph.add_layer(
             kernel="paddle.shape",
             inputs={"input": input_name},
@@ -683,7 +739,7 @@ class TFOpMapper(OpMapper):
             kernel="paddle.prod",
             inputs={"x": node.name},
             outputs=[node.name])
-        
+
     def Ceil(self, node):
         input = self.graph.get_input_node(node, 0)
         self.paddle_graph.add_layer(
@@ -701,7 +757,7 @@ class TFOpMapper(OpMapper):
             inputs={"x": input.name},
             outputs=[node.name],
             axis=axis)
-        
+
     def TopKV2(self, node):
         input = self.graph.get_input_node(node, 0)
         k = self.graph.get_input_node(node, 1)
@@ -751,6 +807,7 @@ class TFOpMapper(OpMapper):
         strides = node.get_attr("strides")
         dilations = node.get_attr("dilations")
         data_format = node.get_attr("data_format").decode()
+        keep_nhwc = self.keep_nhwc(data_format)
         pad_mode = node.get_attr("padding").decode()
 
         kernel_weight_name = op_name + ".weight"
@@ -763,13 +820,14 @@ class TFOpMapper(OpMapper):
             in_shape = [in_shape[i] for i in [0, 3, 1, 2]]
             strides = [strides[i] for i in [0, 3, 1, 2]]
             dilations = [dilations[i] for i in [0, 3, 1, 2]]
-            transpose_name = gen_name('depthwise_conv2d', 'transpose')
-            self.paddle_graph.add_layer(
-                kernel="paddle.transpose",
-                inputs={"x": input.name},
-                outputs=[transpose_name],
-                perm=[0, 3, 1, 2])
-            input_name = transpose_name
+            if not keep_nhwc:
+                transpose_name = gen_name('depthwise_conv2d', 'transpose')
+                self.paddle_graph.add_layer(
+                    kernel="paddle.transpose",
+                    inputs={"x": input.name},
+                    outputs=[transpose_name],
+                    perm=[0, 3, 1, 2])
+                input_name = transpose_name
 
         self.paddle_graph.add_layer(
             kernel="paddle.nn.Conv2D",
@@ -783,9 +841,10 @@ class TFOpMapper(OpMapper):
             stride=strides[2:4],
             dilation=dilations[2:4],
             groups=k_size[3] * in_shape[1],
-            padding=string(pad_mode))
+            padding=string(pad_mode),
+            **self.get_format_attrs(data_format))
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
@@ -798,24 +857,26 @@ class TFOpMapper(OpMapper):
         k_size = node.get_attr("ksize")
         strides = node.get_attr("strides")
         data_format = node.get_attr("data_format").decode()
+        keep_nhwc = self.keep_nhwc(data_format)
         pad_mode = node.get_attr("padding").decode()
 
         input_name = input.name
         if data_format == "NHWC":
-            transpose_name = gen_name("avg_pool", "transpose")
-            self.paddle_graph.add_layer(
-                kernel="paddle.transpose",
-                inputs={"x": input.name},
-                outputs=[transpose_name],
-                perm=[0, 3, 1, 2])
             strides = [strides[i] for i in [0, 3, 1, 2]]
             k_size = [k_size[i] for i in [0, 3, 1, 2]]
-            input_name = transpose_name
+            if not keep_nhwc:
+                transpose_name = gen_name("avg_pool", "transpose")
+                self.paddle_graph.add_layer(
+                    kernel="paddle.transpose",
+                    inputs={"x": input.name},
+                    outputs=[transpose_name],
+                    perm=[0, 3, 1, 2])
+                input_name = transpose_name
 
         op_name = name_generator("pool", self.nn_name2id)
         output_name = node.name
         layer_outputs = [op_name, output_name]
-        
+
         # TODO(syf): The op has diff.
         self.paddle_graph.add_layer(
             kernel="paddle.nn.AvgPool2D",
@@ -823,18 +884,19 @@ class TFOpMapper(OpMapper):
             outputs=layer_outputs,
             kernel_size=k_size[2:4],
             stride=strides[2:4],
-            padding=string(pad_mode))
-
-#         self.paddle_graph.add_layer(
-#             kernel="fluid.layers.pool2d",
-#             inputs={"input": input_name},
-#             outputs=[node.name],
-#             pool_size=k_size[2:4],
-#             pool_type=string("avg"),
-#             pool_stride=strides[2:4],
-#             pool_padding=string(pad_mode))
-
-        if data_format == "NHWC":
+            padding=string(pad_mode),
+            **self.get_format_attrs(data_format))
+
+        #         self.paddle_graph.add_layer(
+        #             kernel="fluid.layers.pool2d",
+        #             inputs={"input": input_name},
+        #             outputs=[node.name],
+        #             pool_size=k_size[2:4],
+        #             pool_type=string("avg"),
+        #             pool_stride=strides[2:4],
+        #             pool_padding=string(pad_mode))
+
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
@@ -902,7 +964,7 @@ class TFOpMapper(OpMapper):
             inputs={"x": input_names},
             outputs=[node.name],
             axis=axis)
-        
+
     def Concat(self, node):
         inputs_list = list()
         for i in range(1, len(node.inputs)):
@@ -912,14 +974,14 @@ class TFOpMapper(OpMapper):
         axis = axis.value
         if axis < 0:
             axis += len(inputs_list[0].out_shapes[0])
-            
+
         input_names = [i.name for i in inputs_list]
         self.paddle_graph.add_layer(
             kernel="paddle.concat",
             inputs={"x": input_names},
             outputs=[node.name],
             axis=axis)
-        
+
     def AddN(self, node):
         inputs_list = list()
         for i in range(len(node.inputs) - 1):
@@ -997,7 +1059,7 @@ class TFOpMapper(OpMapper):
                 new_end.append(999999)
             else:
                 new_end.append(end[i])
-            
+
         if input.dtype == "bool":
             self.paddle_graph.add_layer(
                 "paddle.cast",
@@ -1012,7 +1074,7 @@ class TFOpMapper(OpMapper):
             axes=[i for i in range(len(new_begin))],
             starts=new_begin,
             ends=new_end)
-        
+
         if input.dtype == "bool":
             self.paddle_graph.add_layer(
                 "paddle.cast",
@@ -1035,7 +1097,7 @@ class TFOpMapper(OpMapper):
                     inputs={"x": node.name},
                     outputs=[node.name],
                     axis=shrink_axes)
-                
+
     def Prod(self, node):
         input = self.graph.get_input_node(node, 0)
         reduction_indices = self.graph.get_input_node(node, 1)
@@ -1065,7 +1127,7 @@ class TFOpMapper(OpMapper):
             ],
             num_or_sections=num_split,
             axis=dim)
-        
+
     def SplitV(self, node):
         input = self.graph.get_input_node(node, 0)
         size_splits = self.graph.get_input_node(node, 1)
@@ -1074,7 +1136,7 @@ class TFOpMapper(OpMapper):
         dim = self.graph.get_input_node(node, 2)
         assert dim.layer_type == "Const", "dim of SplitV OP should be Const"
         dim = dim.value
-        
+
         self.paddle_graph.add_layer(
             kernel="paddle.split",
             inputs={"x": input.name},
@@ -1119,10 +1181,12 @@ class TFOpMapper(OpMapper):
         input = self.graph.get_input_node(node, 0)
         resize_shape = self.graph.get_input_node(node, 1)
         data_format = "NHWC"
+        keep_nhwc = self.keep_nhwc(data_format)
         inputs = {"x": input.name}
         attrs = {"align_corners": node.get_attr("align_corners"),
                  "mode": string("nearest"),
                  "align_mode": 1}
+        attrs.update(self.get_format_attrs(data_format))
 
         if resize_shape.layer_type == "Const":
             resize_shape = resize_shape.value.tolist()
@@ -1137,7 +1201,7 @@ class TFOpMapper(OpMapper):
                 shape=shape)
             inputs["size"] = reshape_name
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             transpose_name = gen_name("resize_nearest", "reshape")
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
@@ -1152,21 +1216,23 @@ class TFOpMapper(OpMapper):
             outputs=[node.name],
             **attrs)
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
                 outputs=[node.name],
                 perm=[0, 2, 3, 1])
-            
+
     def ResizeBilinear(self, node):
         input = self.graph.get_input_node(node, 0)
         resize_shape = self.graph.get_input_node(node, 1)
         data_format = "NHWC"
+        keep_nhwc = self.keep_nhwc(data_format)
         inputs = {"x": input.name}
         attrs = {"align_corners": node.get_attr("align_corners"),
                  "mode": string("bilinear"),
                  "align_mode": 1}
+        attrs.update(self.get_format_attrs(data_format))
 
         if resize_shape.layer_type == "Const":
             resize_shape = resize_shape.value.tolist()
@@ -1181,7 +1247,7 @@ class TFOpMapper(OpMapper):
                 shape=shape)
             inputs["size"] = reshape_name
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             transpose_name = gen_name("resize_bilinear", "reshape")
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
@@ -1196,7 +1262,7 @@ class TFOpMapper(OpMapper):
             outputs=[node.name],
             **attrs)
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
@@ -1303,25 +1369,25 @@ class TFOpMapper(OpMapper):
             input_name = transpose_name
 
         # TODO(syf): The output_size is not set.
-#         self.paddle_graph.add_layer(
-#             kernel="paddle.nn.Conv2DTranspose",
-#             inputs={"input": input_name},
-#             outputs=layer_outputs,
-#             weight_attr=string(kernel_name),
-#             bias_attr=False,
-#             in_channels=k_size[3],
-#             out_channels=k_size[2],
-#             kernel_size=k_size[0:2],
-#             stride=strides[2:4],
-#             dilation=dilations[2:4],
-#             padding=string(pad_mode))
+        #         self.paddle_graph.add_layer(
+        #             kernel="paddle.nn.Conv2DTranspose",
+        #             inputs={"input": input_name},
+        #             outputs=layer_outputs,
+        #             weight_attr=string(kernel_name),
+        #             bias_attr=False,
+        #             in_channels=k_size[3],
+        #             out_channels=k_size[2],
+        #             kernel_size=k_size[0:2],
+        #             stride=strides[2:4],
+        #             dilation=dilations[2:4],
+        #             padding=string(pad_mode))
         self.paddle_graph.add_layer(
             "self.create_parameter",
             inputs={},
             outputs=["{}_{}".format(node.name, kernel_name).replace(".", "_")],
             shape=self.params[kernel_name].shape,
             attr=string(kernel_name))
-    
+
         self.paddle_graph.add_layer(
             kernel="paddle.nn.functional.conv2d_transpose",
             inputs={"x": input_name,
@@ -1371,7 +1437,7 @@ class TFOpMapper(OpMapper):
         if start.layer_type == "Const":
             attr["start"] = start.value
         else:
-            
+
             inputs["start"] = start.name
         if limit.dtype.startswith('float'):
             dtype = limit.dtype
@@ -1499,7 +1565,7 @@ class TFOpMapper(OpMapper):
                 inputs={"x": node.name},
                 outputs=[node.name],
                 shape=out_shape)
-            
+
     def GatherNd(self, node):
         x = self.graph.get_input_node(node, 0)
         index = self.graph.get_input_node(node, 1)
@@ -1526,7 +1592,7 @@ class TFOpMapper(OpMapper):
             inputs=inputs,
             outputs=[node.name],
             **attr)
-        
+
     def ReverseV2(self, node):
         x = self.graph.get_input_node(node, 0)
         axis = self.graph.get_input_node(node, 1)
@@ -17,8 +17,9 @@ import copy
 import numpy as np
 from x2paddle.decoder.caffe_decoder import CaffeGraph, CaffeGraphNode
 from x2paddle.core.op_mapper import OpMapper
+from x2paddle.core.profiler import profiler
 from x2paddle.core.util import *
-from x2paddle.core.program import PaddleGraph 
+from x2paddle.core.program import PaddleGraph
 
 
 def _adjust_parameters(node):
@@ -142,11 +143,12 @@ class CaffeOpMapper(OpMapper):
         for node_name in self.graph.topo_sort:
             node = self.graph.get_node(node_name)
             op = node.layer_type
-            if hasattr(self, op):
-                func = getattr(self, op)
-                func(node)
-            elif op in self.directly_map_ops:
-                self.directly_map(node)
+            with profiler.record("op_mapper", op):
+                if hasattr(self, op):
+                    func = getattr(self, op)
+                    func(node)
+                elif op in self.directly_map_ops:
+                    self.directly_map(node)
         print("\nNodes converted.")
         self.paddle_graph.set_parameters(self.params)
         self.paddle_graph.set_custom(self.used_custom_layers)
@@ -169,7 +171,7 @@ class CaffeOpMapper(OpMapper):
             for op in unsupported_ops:
                 print("========== {} ============".format(op))
             return False
-        
+
     def directly_map(self, node):
         assert node.layer_type in self.directly_map_ops
         op_info = self.directly_map_ops[node.layer_type]
@@ -192,11 +194,11 @@ class CaffeOpMapper(OpMapper):
             inputs={},
             outputs=[node.name],
             **layer_attrs)
-        
+
     def MemoryData(self, node):
         params = node.layer.memory_data_param
         transform_params = node.layer.transform_param
-        
+
         shape = list()
         shape.append(params.batch_size)
         shape.append(params.channels)
@@ -217,7 +219,7 @@ class CaffeOpMapper(OpMapper):
             inputs={},
             outputs=[node.name],
             **layer_attrs)
-        
+
     def Convolution(self, node):
         data = node.data
         params = node.layer.convolution_param
@@ -258,7 +260,7 @@ class CaffeOpMapper(OpMapper):
         assert len(node.inputs
                    ) == 1, 'The count of Convolution node\'s input is not 1.'
         input = self.graph.get_input_node(node, idx=0, copy=True)
-        layer_inputs = {"x": input.name, 
+        layer_inputs = {"x": input.name,
                         "weight": kernel_weight_name}
         layer_attrs = {'stride': stride,
                        'padding': pad,
@@ -272,8 +274,8 @@ class CaffeOpMapper(OpMapper):
             kernel="paddle.nn.functional.conv2d",
             inputs=layer_inputs,
             outputs=[node.name],
-            **layer_attrs) 
-        
+            **layer_attrs)
+
     def Deconvolution(self, node):
         data = node.data
         params = node.layer.convolution_param
@@ -314,7 +316,7 @@ class CaffeOpMapper(OpMapper):
         assert len(node.inputs
                    ) == 1, 'The count of Deconvolution node\'s input is not 1.'
         input = self.graph.get_input_node(node, idx=0, copy=True)
-        layer_inputs = {"x": input.name, 
+        layer_inputs = {"x": input.name,
                         "weight": kernel_weight_name}
         layer_attrs = {'stride': stride,
                        'padding': pad,
@@ -328,12 +330,12 @@ class CaffeOpMapper(OpMapper):
             kernel="paddle.nn.functional.conv2d_transpose",
             inputs=layer_inputs,
             outputs=[node.name],
-            **layer_attrs)    
-        
+            **layer_attrs)
+
     def DepthwiseConvolution(self, node):
         node.layer_type = "ConvolutionDepthwise"
         self.ConvolutionDepthwise(node)
-        
+
     def ConvolutionDepthwise(self, node):
         data = node.data
         params = node.layer.convolution_param
@@ -376,7 +378,7 @@ class CaffeOpMapper(OpMapper):
         assert len(node.inputs
                    ) == 1, "The count of Deconvolution node\'s input is not 1."
         input = self.graph.get_input_node(node, idx=0, copy=True)
-        layer_inputs = {"x": input.name, 
+        layer_inputs = {"x": input.name,
                         "weight": kernel_weight_name}
         layer_attrs = {'stride': stride,
                        'padding': pad,
@@ -390,7 +392,7 @@ class CaffeOpMapper(OpMapper):
             kernel="paddle.nn.functional.conv2d",
             inputs=layer_inputs,
             outputs=[node.name],
-            **layer_attrs) 
+            **layer_attrs)
 
     def Pooling(self, node):
         params = node.layer.pooling_param
@@ -514,7 +516,7 @@ class CaffeOpMapper(OpMapper):
         assert params.axis == 1
         assert params.bias_term == True
         input = self.graph.get_input_node(node, idx=0, copy=True)
-        layer_inputs = {"x": input.name, 
+        layer_inputs = {"x": input.name,
                         "weight": kernel_weight_name}
         layer_attrs = dict()
         if len(data) == 2:
@@ -531,13 +533,13 @@ class CaffeOpMapper(OpMapper):
                 kernel="paddle.nn.functional.linear",
                 inputs=layer_inputs,
                 outputs=[node.name],
-                **layer_attrs)        
+                **layer_attrs)
         else:
             self.paddle_graph.add_layer(
                 kernel="paddle.nn.functional.linear",
                 inputs=layer_inputs,
                 outputs=[node.name],
-                **layer_attrs)        
+                **layer_attrs)
 
     def Softmax(self, node):
         assert len(
@@ -886,7 +888,7 @@ class CaffeOpMapper(OpMapper):
                 "paddle.add",
                 inputs=inputs_dict,
                 outputs=[node.name])
-        
+
 
     def Reshape(self, node):
         input = self.graph.get_input_node(node, idx=0, copy=True)
@@ -957,7 +959,7 @@ class CaffeOpMapper(OpMapper):
                 shape=node.in_shapes[1],
                 offsets=list(offset_real))
 
-        
+
     def Flatten(self, node):
         assert len(
             node.
@@ -1005,7 +1007,7 @@ class CaffeOpMapper(OpMapper):
             axis += input_len + 1
         dim = list(range(input_len))
         # operation = SUM
-        if operation == 1:  
+        if operation == 1:
             layer_attrs = {
                 "dim": dim[axis:],
                 "keep_dim": False,
@@ -1016,7 +1018,7 @@ class CaffeOpMapper(OpMapper):
                 outputs=[node.name],
                 **layer_attrs)
         # operation = ASUM
-        elif operation == 2:  
+        elif operation == 2:
             self.paddle_graph.add_layer(
                 "paddle.abs",
                 inputs={"x": input.name},
@@ -1031,7 +1033,7 @@ class CaffeOpMapper(OpMapper):
                 outputs=[node.name],
                 **layer_attrs)
         # operation = SUMSQ
-        elif operation == 3: 
+        elif operation == 3:
             self.paddle_graph.add_layer(
                 "paddle.pow",
                 inputs={"x": input.name},
@@ -1047,7 +1049,7 @@ class CaffeOpMapper(OpMapper):
                 outputs=[node.name],
                 **layer_attrs)
         # operation = MEAN
-        else: 
+        else:
             layer_attrs = {
                 "axis": dim[axis:],
                 "keepdim": False,
@@ -1062,7 +1064,7 @@ class CaffeOpMapper(OpMapper):
             inputs={"x": node.name},
             outputs=[node.name],
             scale=coeff)
-        
+
     def Axpy(self, node):
         assert len(node.inputs) == 1 and len(
             node.outputs
@@ -1090,7 +1092,7 @@ class CaffeOpMapper(OpMapper):
             "paddle.add",
             inputs=inputs_dict,
             outputs=[node.name + "_mul"])
-        
+
     def DetectionOutput(self, node):
         assert len(
             node.inputs) == 3, "The count of DetectionOutput node\'s input is not 3."
@@ -1146,7 +1148,7 @@ class CaffeOpMapper(OpMapper):
                 np.zeros([1] if params.channel_shared else [node.in_shapes[0][1]]).astype("float32")
         else:
             self.params[scale_name] = _adjust_parameters(node)[0]
-        
+
         layer_attrs = {
             "axis": -1 if params.channel_shared else 1,
             "param_name": string(scale_name),
@@ -1157,19 +1159,19 @@ class CaffeOpMapper(OpMapper):
             inputs={"x": input.name},
             outputs=[node.name],
             **layer_attrs)
-        
+
     def Permute(self, node):
         assert len(
             node.inputs) == 1, "The count of Permute node\'s input is not 1."
         input = self.graph.get_input_node(node, idx=0, copy=True)
         params = node.layer.permute_param
-        order = list(params.order)    
+        order = list(params.order)
         self.paddle_graph.add_layer(
             "paddle.transpose",
             inputs={"x": input.name},
             outputs=[node.name],
             perm=order)
-        
+
     def PriorBox(self, node):
         assert len(
             node.inputs) == 2, "The count of PriorBox node\'s input is not 2."
@@ -1197,7 +1199,7 @@ class CaffeOpMapper(OpMapper):
             inputs=inputs_dict,
             outputs=[node.name],
             **layer_attrs)
-        
+
     def ReLU6(self, node):
         assert len(
             node.inputs) == 1, "The count of RelU6 node\'s input is not 1."
@@ -1206,7 +1208,7 @@ class CaffeOpMapper(OpMapper):
             "paddle.nn.functional.relu6",
             inputs={"x": input.name},
             outputs=[node.name])
-        
+
     def ROIPooling(self, node):
         assert len(
             node.inputs) == 2, "The count of ROIPooling node\'s input is not 2."
@@ -1225,7 +1227,7 @@ class CaffeOpMapper(OpMapper):
             inputs=inputs_dict,
             outputs=[node.name],
             **layer_attrs)
-        
+
     def ShuffleChannel(self, node):
         assert len(
             node.inputs) == 1, "The count of ShuffleChannel node\'s input is not 1."
@@ -1236,7 +1238,7 @@ class CaffeOpMapper(OpMapper):
             inputs={"x": input.name},
             outputs=[node.layer_name],
             group=params.group)
-        
+
     def Upsample(self, node):
         assert len(
             node.inputs) == 1, "The count of Upsample node\'s input is not 1."
@@ -1251,7 +1253,7 @@ class CaffeOpMapper(OpMapper):
             inputs={"input": input.name},
             outputs=[node.layer_name],
             **layer_attrs)
-    
+
     def Select(self, node):
         assert len(
             node.inputs) == 1, "The count of Select node\'s input is not 1."
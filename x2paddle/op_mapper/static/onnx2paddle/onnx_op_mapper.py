@@ -15,6 +15,7 @@
 import sys
 from x2paddle.op_mapper.static.onnx2paddle.opset9 import OpSet9
 from x2paddle.core.op_mapper import OpMapper
+from x2paddle.core.profiler import profiler
 from x2paddle.decoder.onnx_decoder import ONNXGraphNode
 from x2paddle.core.program import PaddleGraph
 
@@ -30,7 +31,7 @@ class ONNXOpMapper(OpMapper):
         self.opset = self.create_opset(decoder)
         if not self.op_checker():
             raise Exception("Model is not supported yet.")
-        
+
         print("Total nodes: {}".format(
             sum([
                 isinstance(node, ONNXGraphNode)
@@ -41,20 +42,21 @@ class ONNXOpMapper(OpMapper):
             sys.stderr.write("\rConverting node {} ...     ".format(i + 1))
             node = self.graph.get_node(node_name)
             op = node.layer_type
-            if hasattr(self.opset, op):
-                func = getattr(self.opset, op)
-                func(node)
-            elif op in self.opset.directly_map_ops:
-                self.opset.directly_map(node)
-            elif op in self.opset.elementwise_ops:
-                self.opset.elementwise_map(node)
+            with profiler.record("op_mapper", op):
+                if hasattr(self.opset, op):
+                    func = getattr(self.opset, op)
+                    func(node)
+                elif op in self.opset.directly_map_ops:
+                    self.opset.directly_map(node)
+                elif op in self.opset.elementwise_ops:
+                    self.opset.elementwise_map(node)
         print("\nNodes converted.")
         self.paddle_graph.set_name(self.graph.graph_name)
         self.paddle_graph.set_parameters(self.opset.params)
         self.paddle_graph.set_inputs_info(self.opset.inputs_info)
         self.paddle_graph.inputs = self.graph.input_nodes
         self.paddle_graph.outputs = self.graph.output_nodes
-        
+
 
     def op_checker(self):
         unsupported_ops = set()
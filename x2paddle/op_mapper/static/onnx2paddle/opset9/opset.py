@@ -14,7 +14,7 @@
 
 from x2paddle.decoder.onnx_decoder import ONNXGraph, ONNXGraphNode, ONNXGraphDataNode
 from x2paddle.core.graph import GraphNode
-from x2paddle.core.util import string
+from x2paddle.core.util import string, get_out_shape
 from functools import reduce
 import numpy as np
 import onnx
@@ -95,41 +95,41 @@ class OpSet9():
         'Ceil': ['paddle.ceil'],
         # reduce function
         'ReduceMean': ['paddle.mean',
-                       dict(axes='axis', keepdims='keepdim'), 
+                       dict(axes='axis', keepdims='keepdim'),
                        dict(axes=None, keepdims=1)],
-        'ReduceSum': ['paddle.sum', 
-                      dict(axes='axis', keepdims='keepdim'), 
+        'ReduceSum': ['paddle.sum',
+                      dict(axes='axis', keepdims='keepdim'),
                       dict(axes=None, keepdims=1)],
-        'ReduceMin': ['paddle.min', 
-                      dict(axes='axis', keepdims='keepdim'), 
+        'ReduceMin': ['paddle.min',
+                      dict(axes='axis', keepdims='keepdim'),
                       dict(axes=None, keepdim=1)],
-        'ReduceMax': ['paddle.max', 
-                      dict(axes='axis', keepdims='keepdim'), 
+        'ReduceMax': ['paddle.max',
+                      dict(axes='axis', keepdims='keepdim'),
                       dict(axes=None, keepdim=1)],
-        'ReduceProd': ['paddle.prod', 
-                      dict(axes='axis', keepdims='keepdim'), 
+        'ReduceProd': ['paddle.prod',
+                      dict(axes='axis', keepdims='keepdim'),
                       dict(axes=None, keepdim=1)],
         # active function
         'Relu': ['paddle.nn.functional.relu'],
-        'LeakyRelu': ['paddle.nn.functional.leaky_relu', 
-                      dict(alpha='negative_slope'), 
+        'LeakyRelu': ['paddle.nn.functional.leaky_relu',
+                      dict(alpha='negative_slope'),
                       dict(negative_slope=.01)],
-        'Elu': ['paddle.nn.functional.elu', 
-                dict(alpha='alpha'), 
+        'Elu': ['paddle.nn.functional.elu',
+                dict(alpha='alpha'),
                 dict(alpha=1.)],
-        'ThresholdedRelu': ['paddle.nn.functional.thresholded_relu', 
+        'ThresholdedRelu': ['paddle.nn.functional.thresholded_relu',
                             dict(alpha='threshold'),
                             dict(alpha=1.)],
         'Tanh': ['paddle.nn.functional.tanh'],
         'Sigmoid': ['paddle.nn.functional.sigmoid'],
         'Softsign': ['paddle.nn.functional.softsign'],
-        'Softplus': ['paddle.nn.functional.softplus', 
-                     dict(threshold='threshold'), 
+        'Softplus': ['paddle.nn.functional.softplus',
+                     dict(threshold='threshold'),
                      dict(threshold=float(sys.maxsize))],
         'Exp': ['paddle.exp'],
         'Log': ['paddle.log'],
-        'Softmax': ['paddle.nn.functional.softmax', 
-                    dict(axis='axis'), 
+        'Softmax': ['paddle.nn.functional.softmax',
+                    dict(axis='axis'),
                     dict(axis=1)],
         'Sqrt': ['paddle.sqrt'],
         'Floor': ['paddle.floor'],
@@ -170,19 +170,19 @@ class OpSet9():
             inputs={"x": input.name},
             outputs=[node.name],
             **layer_attrs)
-            
+
     @print_mapping_info
     def elementwise_map(self, node):
         op_type = self.elementwise_ops[node.layer_type]
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
         val_y = self.graph.get_input_node(node, idx=1, copy=True)
-        inputs_dict = {'x': val_x.name, 
+        inputs_dict = {'x': val_x.name,
                        'y': val_y.name}
         self.paddle_graph.add_layer(
-            op_type, 
-            inputs=inputs_dict, 
+            op_type,
+            inputs=inputs_dict,
             outputs=[node.name])
-        
+
     @print_mapping_info
     def place_holder(self, node):
         shape = node.out_shapes[0]
@@ -209,8 +209,8 @@ class OpSet9():
         shape = node.out_shapes[0]
         if hasattr(node.weight, "shape") and len(node.weight.shape) == 0:
             self.paddle_graph.add_layer(
-                "paddle.full", 
-                inputs={}, 
+                "paddle.full",
+                inputs={},
                 outputs=[node.name],
                 dtype=string(dtype),
                 shape=[1],
@@ -247,14 +247,14 @@ class OpSet9():
             if len(node.layer.input) == 2:
                 # opset 10
                 val_scales = self.graph.get_input_node(node, idx=1, copy=True)
-                # TODO(syf): paddle.nn.functional.interpolate will support the length  
+                # TODO(syf): paddle.nn.functional.interpolate will support the length
                 # which is the same as the rank of input.
 #                 inputs['scale_factor'] = val_scales.name
                 attrs['scale_factor'] = self.params[val_scales.name].tolist()[2:]
             elif len(node.layer.input) == 3:
                 # opset 11
                 val_scales = self.graph.get_input_node(node, idx=2, copy=True)
-                # TODO(syf): paddle.nn.functional.interpolate will support the length  
+                # TODO(syf): paddle.nn.functional.interpolate will support the length
                 # which is the same as the rank of input.
 #                 inputs['scale_factor'] = val_scales.name
                 attrs['scale_factor'] = self.params[val_scales.name].tolist()[2:]
@@ -306,7 +306,7 @@ class OpSet9():
             inputs=inputs,
             outputs=[node.name],
             **attrs)
-        
+
     @print_mapping_info
     def HardSigmoid(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -323,11 +323,12 @@ class OpSet9():
             inputs={"x": node.name + "_val"},
             outputs=[node.name],
             min=0.0,
-            max=1.0)  
-        
+            max=1.0)
+
     @print_mapping_info
     def Shape(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
+        self.paddle_graph.set_static_shape(val_x.name, get_out_shape(val_x))
         self.paddle_graph.add_layer(
             kernel="paddle.shape",
             inputs={"input": val_x.name},
@@ -336,7 +337,7 @@ class OpSet9():
                 'paddle.cast',
                 inputs={"x": node.name},
                 outputs=[node.name],
-                dtype=string('int64'))   
+                dtype=string('int64'))
 
     @print_mapping_info
     def RoiAlign(self, node):
@@ -421,7 +422,7 @@ class OpSet9():
                         data_format = "NCHW"
                     else:
                         data_format = "NCDHW"
-                    
+
                     paddings = np.array(pads).reshape(
                         (2, -1)).transpose().astype("int32")
                     paddings = np.flip(paddings, axis=0).flatten().tolist()
@@ -456,9 +457,9 @@ class OpSet9():
             else:
                  raise Exception("The padding value {} is wrong!".format(pads))
             self.paddle_graph.add_layer(
-                paddle_op, 
-                inputs={'x': val_x.name}, 
-                outputs=layer_outputs, 
+                paddle_op,
+                inputs={'x': val_x.name},
+                outputs=layer_outputs,
                 **layer_attrs)
             if not op_independent:
                 return node.name + '_paded'
@@ -468,7 +469,7 @@ class OpSet9():
                 if data_shape:
                     assume_pad |= data_shape and 2 * (len(data_shape) - 2) == pads_len # NCHW
                 if output_shape:
-                    assume_pad |= output_shape and 2 * (len(output_shape) - 2) == pads_len  # NCHW 
+                    assume_pad |= output_shape and 2 * (len(output_shape) - 2) == pads_len  # NCHW
                 if assume_pad:
                     if pads_len == 2:
                         data_format = "NCL"
@@ -477,8 +478,8 @@ class OpSet9():
                     else:
                         data_format = "NCDHW"
                     self.paddle_graph.add_layer(
-                        "custom_layer:pad_with_two_input", 
-                        inputs={'x': val_x.name, 'pad': val_pad.name}, 
+                        "custom_layer:pad_with_two_input",
+                        inputs={'x': val_x.name, 'pad': val_pad.name},
                         outputs=layer_outputs,
                         value=value,
                         mode=string(mode),
@@ -491,9 +492,9 @@ class OpSet9():
                     if assume_pad:
                         if pads_len == 4:
                             self.paddle_graph.add_layer(
-                                "custom_layer:pad_all_dim2", 
-                                inputs={'x': val_x.name, 'pad': val_pad.name}, 
-                                outputs=layer_outputs, 
+                                "custom_layer:pad_all_dim2",
+                                inputs={'x': val_x.name, 'pad': val_pad.name},
+                                outputs=layer_outputs,
                                 value=value,
                                 mode=string(mode))
                         else:
@@ -505,14 +506,14 @@ class OpSet9():
                     assume_pad |= output_shape and 2 * len(output_shape) == pads_len  # NCHW
                 if assume_pad:
                     self.paddle_graph.add_layer(
-                        "custom_layer:pad_all_dim4", 
-                        inputs={'x': val_x.name, 'pad': val_pad.name}, 
-                        outputs=layer_outputs, 
+                        "custom_layer:pad_all_dim4",
+                        inputs={'x': val_x.name, 'pad': val_pad.name},
+                        outputs=layer_outputs,
                         value=value,
                         mode=string(mode))
             else:
                 print(pads_len)
-                raise Exception("The padding value is wrong!")   
+                raise Exception("The padding value is wrong!")
             if not op_independent:
                 return node.name + '_paded'
 
@@ -530,8 +531,8 @@ class OpSet9():
                     shape=[1])
         else:
             self.paddle_graph.add_layer(
-                'paddle.unsqueeze', 
-                inputs={"x": val_x.name}, 
+                'paddle.unsqueeze',
+                inputs={"x": val_x.name},
                 outputs=[node.name],
                 **layer_attrs)
 
@@ -542,9 +543,9 @@ class OpSet9():
         lambd = node.get_attr('lambd')
         assert bias == 0.0, 'not support bias!=0'
         self.paddle_graph.add_layer(
-            'paddle.nn.functional.hardshrink', 
-            inputs={"x": val_x.name}, 
-            outputs=[node.name], 
+            'paddle.nn.functional.hardshrink',
+            inputs={"x": val_x.name},
+            outputs=[node.name],
             threshold=lambd)
 
     @print_mapping_info
@@ -571,8 +572,8 @@ class OpSet9():
             value = value.tolist()
             value = value[0]
             self.paddle_graph.add_layer(
-                "paddle.full", 
-                inputs={}, 
+                "paddle.full",
+                inputs={},
                 outputs=[node.name],
                 dtype=string(dtype),
                 shape=[1],
@@ -618,11 +619,11 @@ class OpSet9():
         else:
             raise Exception("The paddle only support 2D, 3D, 4D or 5D input in InstanceNormalization.")
         self.paddle_graph.add_layer(
-            "paddle.nn.functional.instance_norm", 
+            "paddle.nn.functional.instance_norm",
             inputs={"x": val_x.name,
                     "weight": val_scale.name,
-                    "bias": val_b.name}, 
-            outputs=[node.name], 
+                    "bias": val_b.name},
+            outputs=[node.name],
             **layer_attrs)
 
     @print_mapping_info
@@ -641,7 +642,7 @@ class OpSet9():
             inputs={},
             outputs=[name_ones],
             **attr_ones)
-        inputs_dict = {'x': name_ones, 
+        inputs_dict = {'x': name_ones,
                        'y': val_x.name}
         self.paddle_graph.add_layer(
             'paddle.multiply',
@@ -700,9 +701,9 @@ class OpSet9():
             for i in range(len(perm)):
                 new_perm[perm[i]] = i
             self.paddle_graph.add_layer(
-                'paddle.transpose', 
-                inputs={"x": node.name}, 
-                outputs=[node.name], 
+                'paddle.transpose',
+                inputs={"x": node.name},
+                outputs=[node.name],
                 perm=new_perm)
             if len(indices_shape) < 1:
                 self.paddle_graph.add_layer(
@@ -881,8 +882,8 @@ class OpSet9():
         val_limit = self.graph.get_input_node(node, idx=1, copy=True)
         val_delta = self.graph.get_input_node(node, idx=2, copy=True)
         dtype = val_start.dtype
-        inputs = {'start': val_start.name, 
-                  'end': val_limit.name, 
+        inputs = {'start': val_start.name,
+                  'end': val_limit.name,
                   'step': val_delta.name}
         self.paddle_graph.add_layer(
             'paddle.arange',
@@ -913,7 +914,7 @@ class OpSet9():
             if len(node.inputs) > 4:
                 steps = self.graph.get_input_node(node, idx=4, copy=True)
                 steps = _const_weight_or_none(steps).tolist()
-            
+
             layer_attrs = {
                 "axes": axes,
                 "starts": starts.name,
@@ -969,15 +970,15 @@ class OpSet9():
         if steps is not None:
             layer_attrs['strides'] = steps
             self.paddle_graph.add_layer(
-                'paddle.strided_slice', 
-                inputs={"x": val_x.name}, 
-                outputs=[node.name], 
+                'paddle.strided_slice',
+                inputs={"x": val_x.name},
+                outputs=[node.name],
                 **layer_attrs)
         else:
             self.paddle_graph.add_layer(
-                'paddle.slice', 
-                inputs={"input": val_x.name}, 
-                outputs=[node.name],  
+                'paddle.slice',
+                inputs={"input": val_x.name},
+                outputs=[node.name],
                 **layer_attrs)
 
     @print_mapping_info
@@ -997,8 +998,8 @@ class OpSet9():
                 'fill_value': value
             }
             self.paddle_graph.add_layer(
-                "paddle.full", 
-                inputs={'shape': val_shape.name}, 
+                "paddle.full",
+                inputs={'shape': val_shape.name},
                 outputs=[node.name],
                 **layer_attrs)
 
@@ -1015,9 +1016,9 @@ class OpSet9():
                 'min': min_value,
             }
             self.paddle_graph.add_layer(
-                'paddle.clip', 
-                inputs={"x": val_x.name}, 
-                outputs=[node.name], 
+                'paddle.clip',
+                inputs={"x": val_x.name},
+                outputs=[node.name],
                 **layer_attrs)
         else:
             min_ipt = self.graph.get_input_node(node, idx=1, copy=True)
@@ -1031,9 +1032,9 @@ class OpSet9():
         if max_value is not None and min_value is not None:
             layer_attrs = {'max': max_value, 'min': min_value}
             self.paddle_graph.add_layer(
-                'paddle.clip', 
-                inputs={"x": val_x.name}, 
-                outputs=[node.name], 
+                'paddle.clip',
+                inputs={"x": val_x.name},
+                outputs=[node.name],
                 **layer_attrs)
         else:
             raise
@@ -1058,9 +1059,9 @@ class OpSet9():
         else:
             outputs_list.append(node.name)
         self.paddle_graph.add_layer(
-            'paddle.split', 
-            inputs={"x": val_x.name}, 
-            outputs=outputs_list, 
+            'paddle.split',
+            inputs={"x": val_x.name},
+            outputs=outputs_list,
             **layer_attrs)
 
     @print_mapping_info
@@ -1117,16 +1118,16 @@ class OpSet9():
         if output_dtype:
             assert dtype == output_dtype, 'dtype of to unmatches output'
         self.paddle_graph.add_layer(
-            'paddle.cast', 
-            inputs={'x': val_input.name}, 
-            outputs=[node.name], 
+            'paddle.cast',
+            inputs={'x': val_input.name},
+            outputs=[node.name],
             dtype=string(dtype))
 
     @print_mapping_info
     def Not(self, node):
         val_input = self.graph.get_input_node(node, idx=0, copy=True)
-        self.paddle_graph.add_layer('paddle.logical_not', 
-                                    inputs={'x': val_input.name}, 
+        self.paddle_graph.add_layer('paddle.logical_not',
+                                    inputs={'x': val_input.name},
                                     outputs=[node.name])
 
     @print_mapping_info
@@ -1162,9 +1163,9 @@ class OpSet9():
             "name": string(node.name)
         }
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs={'x': val_x if isinstance(val_x, str) else val_x.name}, 
-            outputs=[node.name], 
+            paddle_op,
+            inputs={'x': val_x if isinstance(val_x, str) else val_x.name},
+            outputs=[node.name],
             **layer_attrs)
 
     @print_mapping_info
@@ -1179,9 +1180,9 @@ class OpSet9():
             assert 'Unspported situation happened, please create issue on https://github.com/PaddlePaddle/X2Paddle/issues.'
         axis = node.get_attr('axis')
         self.paddle_graph.add_layer(
-            'paddle.concat', 
-            inputs={"x": inputs_list}, 
-            outputs=[node.name], 
+            'paddle.concat',
+            inputs={"x": inputs_list},
+            outputs=[node.name],
             axis=axis)
 
     @print_mapping_info
@@ -1199,8 +1200,8 @@ class OpSet9():
             for s in output_shape[axis:]:
                 shape_list[1] *= s
         self.paddle_graph.add_layer(
-            'paddle.reshape', 
-            inputs={"x": val_x.name}, 
+            'paddle.reshape',
+            inputs={"x": val_x.name},
             outputs=[node.name],
             shape=shape_list)
 
@@ -1215,7 +1216,7 @@ class OpSet9():
         trans_a = bool(node.get_attr('transA', 0))  # optional
         trans_b = bool(node.get_attr('transB', 0))  # optional
         val_mm = node.name + '_mm'
-        matmul_inputs = {"x": val_a.name, 
+        matmul_inputs = {"x": val_a.name,
                          "y": val_b.name}
         attr_matmul = {
             "transpose_x": trans_a,
@@ -1227,14 +1228,14 @@ class OpSet9():
             outputs=[val_mm],
             **attr_matmul)
         self.paddle_graph.add_layer(
-            "paddle.scale", 
-            inputs={"x": val_mm}, 
+            "paddle.scale",
+            inputs={"x": val_mm},
             outputs=[val_mm],
             scale=alpha)
 
         if beta != 0:
             if beta == 1.:
-                add_inputs = {"x": val_mm, 
+                add_inputs = {"x": val_mm,
                               "y": val_c.name}
                 self.paddle_graph.add_layer(
                     "paddle.add",
@@ -1262,8 +1263,8 @@ class OpSet9():
             "y": self.graph.get_input_node(
                 node, idx=1, copy=True).name,
         }
-        self.paddle_graph.add_layer("paddle.add", 
-                                    inputs=inputs_dict, 
+        self.paddle_graph.add_layer("paddle.add",
+                                    inputs=inputs_dict,
                                     outputs=[node.name])
 
         for idx, ipt in enumerate(val_inps[2:]):
@@ -1273,8 +1274,8 @@ class OpSet9():
                 "y": y.name,
             }
             self.paddle_graph.add_layer(
-                "paddle.add", 
-                inputs=inputs_dict, 
+                "paddle.add",
+                inputs=inputs_dict,
                 outputs=[node.name])
 
     @print_mapping_info
@@ -1283,7 +1284,7 @@ class OpSet9():
         val_y = self.graph.get_input_node(node, idx=1, copy=True)
         x_shape = val_x.out_shapes[0]
         y_shape = val_y.out_shapes[0]
-        inputs_dict = {"x": val_x.name, 
+        inputs_dict = {"x": val_x.name,
                        "y": val_y.name}
         if y_shape[0] == 1 and x_shape[-1] != 1 and x_shape[0] != 1:
             y_squeeze = val_y.name + '_squeeze'
@@ -1294,15 +1295,15 @@ class OpSet9():
                 axis=[0])
             inputs_dict['y'] = y_squeeze
             self.paddle_graph.add_layer(
-                "paddle.matmul", 
-                inputs=inputs_dict, 
+                "paddle.matmul",
+                inputs=inputs_dict,
                 outputs=[node.name])
         else:
             self.paddle_graph.add_layer(
-                "paddle.matmul", 
-                inputs=inputs_dict, 
+                "paddle.matmul",
+                inputs=inputs_dict,
                 outputs=[node.name])
-            
+
     @print_mapping_info
     def BatchNormalization(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -1321,15 +1322,15 @@ class OpSet9():
             "epsilon": epsilon,
         }
         self.paddle_graph.add_layer(
-            "paddle.nn.functional.batch_norm", 
+            "paddle.nn.functional.batch_norm",
             inputs={"x": val_x.name,
                     "weight": val_scale.name,
                     "bias": val_b.name,
                     "running_mean": val_mean.name,
-                    "running_var": val_var.name}, 
-            outputs=[node.name], 
+                    "running_var": val_var.name},
+            outputs=[node.name],
             **layer_attrs)
-        
+
     @print_mapping_info
     def Transpose(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -1338,9 +1339,9 @@ class OpSet9():
         perm_default.reverse()
         perm = node.get_attr('perm', perm_default)
         self.paddle_graph.add_layer(
-            "paddle.transpose", 
+            "paddle.transpose",
             inputs={"x": val_x.name},
-            outputs=[node.name], 
+            outputs=[node.name],
             perm=perm)
 
     @print_mapping_info
@@ -1355,23 +1356,23 @@ class OpSet9():
 
         if mode == "element":
             self.paddle_graph.add_layer(
-                "paddle.static.nn.prelu", 
+                "paddle.static.nn.prelu",
                 inputs={"x": val_x.name,
-                        "param_attr": val_slope.name}, 
+                        "param_attr": val_slope.name},
                 outputs=[node.name],
                 mode="element")
         else:
             if mode == 'channel':
                 if len(shape_slope) > 1:
                     self.paddle_graph.add_layer(
-                        "paddle.reshape", 
-                        inputs={"x": val_slope.name}, 
+                        "paddle.reshape",
+                        inputs={"x": val_slope.name},
                         outputs=[val_slope.name],
                         shape=[shape_slope[0]])
             self.paddle_graph.add_layer(
-                "paddle.nn.functional.prelu", 
+                "paddle.nn.functional.prelu",
                 inputs={"x": val_x.name,
-                        "weight": val_slope.name}, 
+                        "weight": val_slope.name},
                 outputs=[node.name])
 
     @print_mapping_info
@@ -1386,9 +1387,9 @@ class OpSet9():
                 dtype=string(val_x.dtype))
         else:
             self.paddle_graph.add_layer(
-                "paddle.squeeze", 
-                inputs={"x": val_x.name}, 
-                outputs=[node.name], 
+                "paddle.squeeze",
+                inputs={"x": val_x.name},
+                outputs=[node.name],
                 axis=axes)
 
     @print_mapping_info
@@ -1460,8 +1461,8 @@ class OpSet9():
         val_x_dim = len(val_x.out_shapes[0])
         if val_x_dim == 1:
             self.paddle_graph.add_layer(
-                "paddle.nonzero", 
-                inputs={"x": val_x.name}, 
+                "paddle.nonzero",
+                inputs={"x": val_x.name},
                 outputs=[val_x.name])
             self.paddle_graph.add_layer(
                 "paddle.transpose",
@@ -1470,28 +1471,28 @@ class OpSet9():
                 perm=[1, 0])
         if val_x_dim > 1:
             self.paddle_graph.add_layer(
-                "paddle.nonzero", 
-                inputs={"x": val_x.name}, 
+                "paddle.nonzero",
+                inputs={"x": val_x.name},
                 outputs=[val_x.name])
             self.paddle_graph.add_layer(
                 "paddle.split",
-                inputs={"x": val_x.name}, 
+                inputs={"x": val_x.name},
                 outputs=[val_x.name],
                 num_or_sections=1,
                 axis=val_x_dim)
             self.paddle_graph.add_layer(
-                "paddle.concat", 
-                inputs={"x": val_x.name}, 
+                "paddle.concat",
+                inputs={"x": val_x.name},
                 outputs=[node.name])
 
     @print_mapping_info
     def Identity(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
         self.paddle_graph.add_layer(
-            "paddle.assign", 
-            inputs={"x": val_x.name}, 
+            "paddle.assign",
+            inputs={"x": val_x.name},
             outputs=[node.name])
-        
+
     @print_mapping_info
     def Tile(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -1516,9 +1517,9 @@ class OpSet9():
             "name": string(node.name),
         }
         self.paddle_graph.add_layer(
-            "paddle.tile", 
-            inputs={"x": val_x.name}, 
-                    outputs=[node.name], 
+            "paddle.tile",
+            inputs={"x": val_x.name},
+                    outputs=[node.name],
                     repeat_times=repeats)
 
     @print_mapping_info
@@ -1546,7 +1547,7 @@ class OpSet9():
             pad_w = _get_same_padding(input_shape[3], kernel_shape[1],
                                       strides[1])
             paddings = pad_h + pad_w
-            
+
         layer_attrs = {
             "kernel_size": kernel_shape,
             "stride": strides,
@@ -1554,9 +1555,9 @@ class OpSet9():
             "ceil_mode": ceil_mode,
         }
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs={'x': val_x if isinstance(val_x, str) else val_x.name}, 
-            outputs=[node.name], 
+            paddle_op,
+            inputs={'x': val_x if isinstance(val_x, str) else val_x.name},
+            outputs=[node.name],
             **layer_attrs)
 
     @print_mapping_info
@@ -1573,11 +1574,11 @@ class OpSet9():
         assert 1 <= poolnd <= 3, 'only adaptive_max_pool1d, adaptive_max_pool2d and adaptive_max_pool3d are supported'
         output_shape = node.out_shapes[0]
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs={'x': val_x.name}, 
-            outputs=[node.name], 
+            paddle_op,
+            inputs={'x': val_x.name},
+            outputs=[node.name],
             output_size=output_shape[2:])
-        
+
     @print_mapping_info
     def GlobalAveragePool(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -1592,9 +1593,9 @@ class OpSet9():
         assert 1 <= poolnd <= 3, 'only Pool1D, Pool2D and Pool3D are supported'
         output_shape = node.out_shapes[0]
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs={'x': val_x.name}, 
-            outputs=[node.name], 
+            paddle_op,
+            inputs={'x': val_x.name},
+            outputs=[node.name],
             output_size=output_shape[2:])
 
     @print_mapping_info
@@ -1645,14 +1646,14 @@ class OpSet9():
             input_shape[0] = 0
             input_shape[2] = 0
             self.paddle_graph.add_layer(
-                "paddle.reshape", 
-                inputs={"x": layer_inputs["x"]}, 
-                outputs=[layer_inputs["x"]], 
+                "paddle.reshape",
+                inputs={"x": layer_inputs["x"]},
+                outputs=[layer_inputs["x"]],
                 shape=input_shape)
         self.paddle_graph.add_layer(
-            paddle_op, 
-            inputs=layer_inputs, 
-            outputs=[node.name], 
+            paddle_op,
+            inputs=layer_inputs,
+            outputs=[node.name],
             **layer_attrs)
 
     @print_mapping_info
@@ -1703,7 +1704,7 @@ class OpSet9():
             inputs=layer_inputs,
             outputs=[node.name],
             **layer_attrs)
-        
+
     @print_mapping_info
     def ArgMax(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -1712,23 +1713,24 @@ class OpSet9():
         layer_attrs = {'axis': axis,
                       'keepdim': keepdims}
         self.paddle_graph.add_layer(
-            'paddle.argmax', 
-            inputs={"x": val_x.name}, 
+            'paddle.argmax',
+            inputs={"x": val_x.name},
             outputs=[node.name],
             **layer_attrs)
-        
+
     @print_mapping_info
     def Size(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
+        self.paddle_graph.set_static_shape(val_x.name, get_out_shape(val_x))
         self.paddle_graph.add_layer(
-            "paddle.shape", 
-            inputs={"input": val_x.name}, 
+            "paddle.shape",
+            inputs={"input": val_x.name},
             outputs=[node.name])
         self.paddle_graph.add_layer(
             'paddle.cast',
             inputs={"x": node.name},
             outputs=[node.name],
-            dtype=string('int64'))  
+            dtype=string('int64'))
         self.paddle_graph.add_layer(
             "paddle.prod",
             inputs={"x": node.name},
@@ -1739,18 +1741,18 @@ class OpSet9():
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
         if node.dtype not in ["float16", "float32", "float64"]:
             self.paddle_graph.add_layer(
-                "paddle.cast", 
-                inputs={"x": val_x.name}, 
+                "paddle.cast",
+                inputs={"x": val_x.name},
                 outputs=[val_x.name],
                 dtype=string("float32"))
         self.paddle_graph.add_layer(
-            "paddle.sign", 
-            inputs={"x": val_x.name}, 
+            "paddle.sign",
+            inputs={"x": val_x.name},
             outputs=[node.name])
         if node.dtype not in ["float16", "float32", "float64"]:
             self.paddle_graph.add_layer(
-                "paddle.cast", 
-                inputs={"x": node.name}, 
+                "paddle.cast",
+                inputs={"x": node.name},
                 outputs=[node.name],
                 dtype=string(node.dtype))
 
@@ -1761,10 +1763,10 @@ class OpSet9():
         values = self.graph.get_input_node(node, idx=2, copy=True)
         axis = node.get_attr('axis', -1)
         self.paddle_graph.add_layer(
-            "custom_layer:one_hot", 
+            "custom_layer:one_hot",
             inputs={"indices": indices.name,
                     "depth": depth.name,
-                    "values": values.name}, 
+                    "values": values.name},
             outputs=[node.name],
             axis=axis)
 
@@ -1772,8 +1774,8 @@ class OpSet9():
     def Reciprocal(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
         self.paddle_graph.add_layer(
-            "paddle.reciprocal", 
-            inputs={"x": val_x.name}, 
+            "paddle.reciprocal",
+            inputs={"x": val_x.name},
             outputs=[node.name])
 
     @print_mapping_info
@@ -1785,12 +1787,12 @@ class OpSet9():
         layer_attrs["largest"] = True if node.get_attr('largest', 1) == 1 else False
         layer_attrs["sorted"] = True if node.get_attr('sorted', 1) == 1 else False
         self.paddle_graph.add_layer(
-            "paddle.topk", 
+            "paddle.topk",
             inputs={"x": val_x.name,
-                    "k": val_k.name}, 
+                    "k": val_k.name},
             outputs=["{}_p{}".format(node.layer_name, 0), "{}_p{}".format(node.layer_name, 1)],
             **layer_attrs)
-        
+
     @print_mapping_info
     def LRN(self, node):
         val_x = self.graph.get_input_node(node, idx=0, copy=True)
@@ -1806,9 +1808,9 @@ class OpSet9():
             'k': bias
         }
         self.paddle_graph.add_layer(
-            "custom_layer:local_response_norm", 
-            inputs={"x": val_x.name}, 
-            outputs=[node.name], 
+            "custom_layer:local_response_norm",
+            inputs={"x": val_x.name},
+            outputs=[node.name],
             **layer_attrs)
 
     @print_mapping_info
@@ -1856,4 +1858,3 @@ class OpSet9():
                 outputs=[node.name],
                 shape=[b, c // (blocksize ** 2), h * blocksize, w * blocksize]
                 )
-                
\ No newline at end of file
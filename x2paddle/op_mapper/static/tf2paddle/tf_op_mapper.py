@@ -13,8 +13,9 @@
 # limitations under the License.
 
 from x2paddle.decoder.tf_decoder import TFGraph, TFGraphNode
-from x2paddle.core.program import PaddleGraph 
+from x2paddle.core.program import PaddleGraph
 from x2paddle.core.op_mapper import OpMapper
+from x2paddle.core.profiler import profiler
 from x2paddle.core.util import *
 from x2paddle import program
 import traceback
@@ -60,7 +61,7 @@ class TFOpMapper(OpMapper):
         'swish_f32': ['paddle.nn.functional.swish'],
         'Tanh': ['paddle.tanh'],
         'Softplus': ['paddle.nn.functional.softplus'],
-        'LeakyRelu': ['paddle.nn.functional.leaky_relu', 
+        'LeakyRelu': ['paddle.nn.functional.leaky_relu',
                      dict(alpha='negative_slope')],
         'Floor': ['paddle.floor'],
         'Erf': ['paddle.erf'],
@@ -87,15 +88,27 @@ class TFOpMapper(OpMapper):
         'NotEqual': 'paddle.not_equal',
         'Equal': 'paddle.equal',
     }
+    # 需要通过decoder.infer_tensor计算的非Const输入：op -> [(输入序号, use_diff_inputs)]
+    infer_inputs = {
+        'Conv2D': [(1, False)],
+        'Conv3D': [(1, False)],
+        'StridedSlice': [(1, True), (2, True), (3, True)],
+        'Slice': [(1, False)],
+        'Conv2DBackpropInput': [(0, True)],
+    }
 
-    def __init__(self, decoder):
+    def __init__(self, decoder, data_format="NCHW"):
         super(TFOpMapper, self).__init__()
+        assert data_format in ["NCHW",
+                               "NHWC"], "data_format must be 'NCHW' or 'NHWC'"
         self.decoder = decoder
+        self.data_format = data_format
         self.graph = decoder.tf_graph
         if not self.op_checker():
             raise Exception("Model is not supported yet.")
         self.params = dict()
         self.paddle_graph = PaddleGraph(parent_layer=None, graph_type="static", source_type="tf")
+        self.paddle_graph.data_format = data_format
         self.params_output2id = dict()
 
         not_placeholder = list()
@@ -118,24 +131,26 @@ class TFOpMapper(OpMapper):
                 isinstance(node, TFGraphNode)
                 for name, node in self.graph.node_map.items()
             ])))
+        self.prefetch_tensors()
         print("Nodes converting ...")
         for i, node_name in enumerate(self.graph.topo_sort):
             sys.stderr.write("\rConverting node {} ...     ".format(i + 1))
             node = self.graph.get_node(node_name)
             op = node.layer_type
-            if op in self.directly_map_ops:
-                self.directly_map(node)
-            elif op in self.elementwise_ops:
-                self.elementwise_map(node)
-            elif op in self.bool_ops:
-                self.bool_map(node)
-            elif hasattr(self, op):
-                func = getattr(self, op)
-                func(node)
+            with profiler.record("op_mapper", op):
+                if op in self.directly_map_ops:
+                    self.directly_map(node)
+                elif op in self.elementwise_ops:
+                    self.elementwise_map(node)
+                elif op in self.bool_ops:
+                    self.bool_map(node)
+                elif hasattr(self, op):
+                    func = getattr(self, op)
+                    func(node)
         print("\nNodes converted.")
         self.paddle_graph.set_name(self.graph.graph_name)
         self.paddle_graph.set_parameters(self.params)
-        
+
     def op_checker(self):
         unsupported_ops = set()
         for node_name in self.graph.topo_sort:
@@ -156,6 +171,36 @@ class TFOpMapper(OpMapper):
                 print("========== {} ============".format(op))
             return False
 
+    def prefetch_tensors(self):
+        """ 收集转换过程中需要infer_tensor的tensor，由decoder在每个batch size下
+        一次sess.run计算并缓存，避免每个tensor都执行一次完整的前向。
+        """
+        requests = list()
+        for node_name in self.graph.topo_sort:
+            node = self.graph.get_node(node_name)
+            for idx, use_diff_inputs in self.infer_inputs.get(
+                    node.layer_type, []):
+                if idx >= len(node.layer.input):
+                    continue
+                input = self.graph.get_input_node(node, idx)
+                if input.layer_type != "Const":
+                    requests.append((input, use_diff_inputs))
+        if len(requests) > 0:
+            self.decoder.prefetch_tensors(requests)
+
+    def keep_nhwc(self, data_format):
+        """ 以data_format="NHWC"转换时，NHWC的卷积、池化、BatchNorm、resize
+        直接使用NHWC的paddle kernel，前后不再插入transpose。
+        """
+        return data_format == "NHWC" and self.data_format == "NHWC"
+
+    def get_format_attrs(self, data_format, key="data_format"):
+        """ 获取paddle kernel的数据格式属性，使用默认的NCHW时为空。
+        """
+        if self.keep_nhwc(data_format):
+            return {key: string("NHWC")}
+        return dict()
+
     def directly_map(self, node):
         assert node.layer_type in self.directly_map_ops
         op_info = self.directly_map_ops[node.layer_type]
@@ -187,7 +232,7 @@ class TFOpMapper(OpMapper):
                     "y": y.name},
             outputs=[node.name])
         self.paddle_graph.layers[layer_id].input_shapes = {"x": x_shape, "y": y_shape}
-        
+
     def bool_map(self, node):
         op_type = self.bool_ops[node.layer_type]
         self.elementwise_map(node, op_type)
@@ -326,7 +371,7 @@ class TFOpMapper(OpMapper):
                 inputs={"x": node.name},
                 outputs=[node.name],
                 perm=[0, 2, 3, 1])
-            
+
     def Where(self, node):
         if len(node.layer.input) == 1:
             cond = self.graph.get_input_node(node, 0)
@@ -344,10 +389,10 @@ class TFOpMapper(OpMapper):
                         "x": x.name,
                         "y": y.name},
                 outputs=[node.name])
-            
+
     def Neg(self, node):
         input = self.graph.get_input_node(node, 0)
-        
+
         self.paddle_graph.add_layer(
             "paddle.scale",
             inputs={"x": input.name},
@@ -360,19 +405,21 @@ class TFOpMapper(OpMapper):
         k_size = node.get_attr("ksize")
         strides = node.get_attr("strides")
         data_format = node.get_attr("data_format").decode()
+        keep_nhwc = self.keep_nhwc(data_format)
         pad_mode = node.get_attr("padding").decode()
 
         input_name = input.name
         if data_format == "NHWC":
-            transpose_name = gen_name("max_pool", "transpose")
-            self.paddle_graph.add_layer(
-                kernel="paddle.transpose",
-                inputs={"x": input.name},
-                outputs=[transpose_name],
-                perm=[0, 3, 1, 2])
             strides = [strides[i] for i in [0, 3, 1, 2]]
             k_size = [k_size[i] for i in [0, 3, 1, 2]]
-            input_name = transpose_name
+            if not keep_nhwc:
+                transpose_name = gen_name("max_pool", "transpose")
+                self.paddle_graph.add_layer(
+                    kernel="paddle.transpose",
+                    inputs={"x": input.name},
+                    outputs=[transpose_name],
+                    perm=[0, 3, 1, 2])
+                input_name = transpose_name
 
         self.paddle_graph.add_layer(
             kernel="paddle.nn.functional.max_pool2d",
@@ -380,9 +427,10 @@ class TFOpMapper(OpMapper):
             outputs=[node.name],
             kernel_size=k_size[2:4],
             stride=strides[2:4],
-            padding=string(pad_mode))
+            padding=string(pad_mode),
+            **self.get_format_attrs(data_format))
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
@@ -397,6 +445,7 @@ class TFOpMapper(OpMapper):
         strides = node.get_attr("strides")
         dilations = node.get_attr("dilations")
         data_format = node.get_attr("data_format").decode()
+        keep_nhwc = self.keep_nhwc(data_format)
         pad_mode = node.get_attr("padding").decode()
         if data_format == "NHWC":
             n, h, w, c = input.out_shapes[0]
@@ -422,26 +471,27 @@ class TFOpMapper(OpMapper):
             shape=self.params[kernel_weight_name].shape,
             dtype=string(str(self.params[kernel_weight_name].dtype)),
             name=string(kernel_weight_name))
-        
+
         input_name = input.name
         if data_format == "NHWC":
             strides = [strides[i] for i in [0, 3, 1, 2]]
             dilations = [dilations[i] for i in [0, 3, 1, 2]]
-            transpose_name = gen_name("conv2d", "transpose")
-            self.paddle_graph.add_layer(
-                kernel="paddle.transpose",
-                inputs={"x": input.name},
-                outputs=[transpose_name],
-                perm=[0, 3, 1, 2])
-            input_name = transpose_name
+            if not keep_nhwc:
+                transpose_name = gen_name("conv2d", "transpose")
+                self.paddle_graph.add_layer(
+                    kernel="paddle.transpose",
+                    inputs={"x": input.name},
+                    outputs=[transpose_name],
+                    perm=[0, 3, 1, 2])
+                input_name = transpose_name
 
         if c == -1:
-            attr = {"shape": [0, k_size[2], 0, 0]}
+            shape = [0, 0, 0, k_size[2]] if keep_nhwc else [0, k_size[2], 0, 0]
             self.paddle_graph.add_layer(
                 kernel="paddle.reshape",
                 inputs={"x": input_name},
                 outputs=[input_name],
-                shape=[0, k_size[2], 0, 0])
+                shape=shape)
 
         self.paddle_graph.add_layer(
             kernel="paddle.nn.functional.conv2d",
@@ -450,15 +500,16 @@ class TFOpMapper(OpMapper):
             bias=None,
             stride=strides[2:4],
             dilation=dilations[2:4],
-            padding=string(pad_mode))
+            padding=string(pad_mode),
+            **self.get_format_attrs(data_format))
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
                 outputs=[node.name],
                 perm=[0, 2, 3, 1])
-            
+
     def Conv3D(self, node):
         input = self.graph.get_input_node(node, 0)
         kernel = self.graph.get_input_node(node, 1)
@@ -492,7 +543,7 @@ class TFOpMapper(OpMapper):
             shape=self.params[kernel_weight_name].shape,
             dtype=string(str(self.params[kernel_weight_name].dtype)),
             name=string(kernel_weight_name))
-        
+
         input_name = input.name
         if data_format == "NDHWC":
             strides = [strides[i] for i in [0, 4, 1, 2, 3]]
@@ -511,8 +562,8 @@ class TFOpMapper(OpMapper):
                 kernel="paddle.reshape",
                 inputs={"x": input_name},
                 outputs=[input_name],
-                shape=[0, k_size[2], 0, 0, 0])        
-            
+                shape=[0, k_size[2], 0, 0, 0])
+
         self.paddle_graph.add_layer(
             kernel="paddle.nn.functional.conv3d",
             inputs={"x": input_name,  "weight": kernel_weight_name},
@@ -545,6 +596,7 @@ class TFOpMapper(OpMapper):
         moving_mean = self.graph.get_node(node.layer.input[3])
         moving_var = self.graph.get_node(node.layer.input[4])
         data_format = node.get_attr("data_format").decode()
+        keep_nhwc = self.keep_nhwc(data_format)
 
         assert gamma.layer_type == "Const"
         assert beta.layer_type == "Const"
@@ -552,7 +604,7 @@ class TFOpMapper(OpMapper):
         assert moving_var.layer_type == "Const"
 
         input_name = input.name
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             transpose_name = gen_name("batch_norm", "transpose")
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
@@ -569,15 +621,16 @@ class TFOpMapper(OpMapper):
                     "weight": gamma.name,
                     "bias": beta.name},
             outputs=[node.name],
-            epsilon=node.get_attr("epsilon"))
+            epsilon=node.get_attr("epsilon"),
+            **self.get_format_attrs(data_format))
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
                 outputs=[node.name],
                 perm=[0, 2, 3, 1])
-            
+
     def FusedBatchNormV3(self, node):
         self.FusedBatchNorm(node)
 
@@ -635,11 +688,11 @@ class TFOpMapper(OpMapper):
             inputs={"x": input.name},
             outputs=[node.name],
             pad=paddings)
-        
+
     def MirrorPad(self, node):
         self.Pad(node)
-        
-        
+
+
     def PadV2(self, node):
         self.Pad(node)
 
@@ -655,6 +708,7 @@ class TFOpMapper(OpMapper):
     def Shape(self, node):
         input = self.graph.get_input_node(node, 0)
         input_name = input.name
+        self.paddle_graph.set_static_shape(input_name, get_out_shape(input))
         self.paddle_graph.add_layer(
             kernel="paddle.shape",
             inputs={"input": input_name},
@@ -663,6 +717,7 @@ class TFOpMapper(OpMapper):
     def Size(self, node):
         input = self.graph.get_input_node(node, 0)
         input_name = input.name
+        self.paddle_graph.set_static_shape(input_name, get_out_shape(input))
         self.paddle_graph.add_layer(
             kernel="paddle.shape",
             inputs={"input": input_name},
@@ -671,7 +726,7 @@ class TFOpMapper(OpMapper):
             kernel="paddle.prod",
             inputs={"x": node.name},
             outputs=[node.name])
-        
+
     def Ceil(self, node):
         input = self.graph.get_input_node(node, 0)
         self.paddle_graph.add_layer(
@@ -689,7 +744,7 @@ class TFOpMapper(OpMapper):
             inputs={"x": input.name},
             outputs=[node.name],
             axis=axis)
-        
+
     def TopKV2(self, node):
         input = self.graph.get_input_node(node, 0)
         k = self.graph.get_input_node(node, 1)
@@ -736,12 +791,13 @@ class TFOpMapper(OpMapper):
         strides = node.get_attr("strides")
         dilations = node.get_attr("dilations")
         data_format = node.get_attr("data_format").decode()
+        keep_nhwc = self.keep_nhwc(data_format)
         pad_mode = node.get_attr("padding").decode()
 
         if len(kernel.outputs) == 1:
             self.params[kernel.name] = numpy.transpose(self.params[kernel.name],
                                                           (2, 3, 0, 1))
-            layer = self.paddle_graph.layers[self.params_output2id[kernel.name]] 
+            layer = self.paddle_graph.layers[self.params_output2id[kernel.name]]
             layer.attrs["shape"] = self.params[kernel.name].shape
         else:
             self.paddle_graph.add_layer(
@@ -755,13 +811,14 @@ class TFOpMapper(OpMapper):
             in_shape = [in_shape[i] for i in [0, 3, 1, 2]]
             strides = [strides[i] for i in [0, 3, 1, 2]]
             dilations = [dilations[i] for i in [0, 3, 1, 2]]
-            transpose_name = gen_name('depthwise_conv2d', 'transpose')
-            self.paddle_graph.add_layer(
-                kernel="paddle.transpose",
-                inputs={"x": input.name},
-                outputs=[transpose_name],
-                perm=[0, 3, 1, 2])
-            input_name = transpose_name
+            if not keep_nhwc:
+                transpose_name = gen_name('depthwise_conv2d', 'transpose')
+                self.paddle_graph.add_layer(
+                    kernel="paddle.transpose",
+                    inputs={"x": input.name},
+                    outputs=[transpose_name],
+                    perm=[0, 3, 1, 2])
+                input_name = transpose_name
 
         self.paddle_graph.add_layer(
             kernel="paddle.nn.functional.conv2d",
@@ -772,9 +829,10 @@ class TFOpMapper(OpMapper):
             dilation=dilations[2:4],
             groups=k_size[3] * in_shape[1],
             padding=string(pad_mode),
-            bias=None)
+            bias=None,
+            **self.get_format_attrs(data_format))
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
@@ -787,20 +845,22 @@ class TFOpMapper(OpMapper):
         k_size = node.get_attr("ksize")
         strides = node.get_attr("strides")
         data_format = node.get_attr("data_format").decode()
+        keep_nhwc = self.keep_nhwc(data_format)
         pad_mode = node.get_attr("padding").decode()
 
         input_name = input.name
         if data_format == "NHWC":
-            transpose_name = gen_name("avg_pool", "transpose")
-            self.paddle_graph.add_layer(
-                kernel="paddle.transpose",
-                inputs={"x": input.name},
-                outputs=[transpose_name],
-                perm=[0, 3, 1, 2])
             strides = [strides[i] for i in [0, 3, 1, 2]]
             k_size = [k_size[i] for i in [0, 3, 1, 2]]
-            input_name = transpose_name
-        
+            if not keep_nhwc:
+                transpose_name = gen_name("avg_pool", "transpose")
+                self.paddle_graph.add_layer(
+                    kernel="paddle.transpose",
+                    inputs={"x": input.name},
+                    outputs=[transpose_name],
+                    perm=[0, 3, 1, 2])
+                input_name = transpose_name
+
         # TODO(syf): The op has diff.
 
         self.paddle_graph.add_layer(
@@ -809,9 +869,10 @@ class TFOpMapper(OpMapper):
             outputs=[node.name],
             kernel_size=k_size[2:4],
             stride=strides[2:4],
-            padding=string(pad_mode))
+            padding=string(pad_mode),
+            **self.get_format_attrs(data_format))
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
@@ -879,7 +940,7 @@ class TFOpMapper(OpMapper):
             inputs={"x": input_names},
             outputs=[node.name],
             axis=axis)
-        
+
     def Concat(self, node):
         inputs_list = list()
         for i in range(1, len(node.inputs)):
@@ -889,14 +950,14 @@ class TFOpMapper(OpMapper):
         axis = axis.value
         if axis < 0:
             axis += len(inputs_list[0].out_shapes[0])
-            
+
         input_names = [i.name for i in inputs_list]
         self.paddle_graph.add_layer(
             kernel="paddle.concat",
             inputs={"x": input_names},
             outputs=[node.name],
             axis=axis)
-            
+
     def AddN(self, node):
         inputs_list = list()
         for i in range(len(node.inputs) - 1):
@@ -974,7 +1035,7 @@ class TFOpMapper(OpMapper):
                 new_end.append(999999)
             else:
                 new_end.append(end[i])
-            
+
         if input.dtype == "bool":
             self.paddle_graph.add_layer(
                 "paddle.cast",
@@ -989,7 +1050,7 @@ class TFOpMapper(OpMapper):
             axes=[i for i in range(len(new_begin))],
             starts=new_begin,
             ends=new_end)
-        
+
         if input.dtype == "bool":
             self.paddle_graph.add_layer(
                 "paddle.cast",
@@ -1012,7 +1073,7 @@ class TFOpMapper(OpMapper):
                     inputs={"x": node.name},
                     outputs=[node.name],
                     axis=shrink_axes)
-                
+
     def Prod(self, node):
         input = self.graph.get_input_node(node, 0)
         reduction_indices = self.graph.get_input_node(node, 1)
@@ -1042,7 +1103,7 @@ class TFOpMapper(OpMapper):
             ],
             num_or_sections=num_split,
             axis=dim)
-        
+
     def SplitV(self, node):
         input = self.graph.get_input_node(node, 0)
         size_splits = self.graph.get_input_node(node, 1)
@@ -1051,7 +1112,7 @@ class TFOpMapper(OpMapper):
         dim = self.graph.get_input_node(node, 2)
         assert dim.layer_type == "Const", "dim of SplitV OP should be Const"
         dim = dim.value
-        
+
         self.paddle_graph.add_layer(
             kernel="paddle.split",
             inputs={"x": input.name},
@@ -1104,10 +1165,12 @@ class TFOpMapper(OpMapper):
         input = self.graph.get_input_node(node, 0)
         resize_shape = self.graph.get_input_node(node, 1)
         data_format = "NHWC"
+        keep_nhwc = self.keep_nhwc(data_format)
         inputs = {"x": input.name}
         attrs = {"align_corners": node.get_attr("align_corners"),
                  "mode": string("nearest"),
                  "align_mode": 1}
+        attrs.update(self.get_format_attrs(data_format))
 
         if resize_shape.layer_type == "Const":
             resize_shape = resize_shape.value.tolist()
@@ -1122,7 +1185,7 @@ class TFOpMapper(OpMapper):
                 shape=shape)
             inputs["size"] = reshape_name
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             transpose_name = gen_name("resize_nearest", "reshape")
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
@@ -1137,7 +1200,7 @@ class TFOpMapper(OpMapper):
             outputs=[node.name],
             **attrs)
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
@@ -1148,10 +1211,12 @@ class TFOpMapper(OpMapper):
         input = self.graph.get_input_node(node, 0)
         resize_shape = self.graph.get_input_node(node, 1)
         data_format = "NHWC"
+        keep_nhwc = self.keep_nhwc(data_format)
         inputs = {"x": input.name}
         attrs = {"align_corners": node.get_attr("align_corners"),
                  "mode": string("bilinear"),
                  "align_mode": 1}
+        attrs.update(self.get_format_attrs(data_format))
 
         if resize_shape.layer_type == "Const":
             resize_shape = resize_shape.value.tolist()
@@ -1166,7 +1231,7 @@ class TFOpMapper(OpMapper):
                 shape=shape)
             inputs["size"] = reshape_name
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             transpose_name = gen_name("resize_bilinear", "reshape")
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
@@ -1181,7 +1246,7 @@ class TFOpMapper(OpMapper):
             outputs=[node.name],
             **attrs)
 
-        if data_format == "NHWC":
+        if data_format == "NHWC" and not keep_nhwc:
             self.paddle_graph.add_layer(
                 kernel="paddle.transpose",
                 inputs={"x": node.name},
@@ -1291,7 +1356,7 @@ class TFOpMapper(OpMapper):
             dtype=string(str(self.params[kernel_name].dtype)),
             shape=self.params[kernel_name].shape,
             name=string(kernel_name))
-    
+
         self.paddle_graph.add_layer(
             kernel="paddle.nn.functional.conv2d_transpose",
             inputs={"x": input_name,
@@ -1320,13 +1385,13 @@ class TFOpMapper(OpMapper):
             attr["repeat_times"] = repeat_times
         else:
             inputs["repeat_times"] = repeat_times.name
-            
+
         self.paddle_graph.add_layer(
             kernel="paddle.tile",
             inputs=inputs,
             outputs=[node.name],
             **attr)
-        
+
         if not isinstance(repeat_times, list) and repeat_times.layer_type != "Const":
             self.paddle_graph.add_layer(
                 kernel="paddle.reshape",
@@ -1482,7 +1547,7 @@ class TFOpMapper(OpMapper):
                 inputs={"x": node.name},
                 outputs=[node.name],
                 shape=out_shape)
-            
+
     def GatherNd(self, node):
         x = self.graph.get_input_node(node, 0)
         index = self.graph.get_input_node(node, 1)
@@ -1509,7 +1574,7 @@ class TFOpMapper(OpMapper):
             inputs=inputs,
             outputs=[node.name],
             **attr)
-        
+
     def ReverseV2(self, node):
         x = self.graph.get_input_node(node, 0)
         axis = self.graph.get_input_node(node, 1)
@@ -1527,4 +1592,3 @@ class TFOpMapper(OpMapper):
             inputs=inputs,
             outputs=[node.name],
             **attr)
-
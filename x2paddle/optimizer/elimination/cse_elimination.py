@@ -0,0 +1,140 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+from x2paddle.optimizer.pattern_matcher import FuseBase
+from x2paddle.optimizer.pass_manager import PassManager
+from x2paddle.optimizer.utils import *
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+# 原地修改输入（list、dict、tensor）的kernel，其输入的值可能在不改变名字的情况下变化
+MUTATING_KERNELS = ["prim.append", "prim.set_item", "prim.replaceitem"]
+
+# 结果只由输入与属性决定的prim kernel
+PURE_PRIM_KERNELS = [
+    "prim.constant", "prim.shape", "prim.shape_dim", "prim.len", "prim.eq",
+    "prim.ne", "prim.gt", "prim.lt", "prim.le", "prim.add", "prim.sub",
+    "prim.mul", "prim.div", "prim.floordiv", "prim.neg", "prim.not", "prim.and",
+    "prim.or", "prim.is", "prim.isnot"
+]
+
+
+def is_random_kernel(kernel):
+    """ 判断kernel的结果是否随机（每次执行的结果不同）。
+    """
+    return "rand" in kernel or "dropout" in kernel or kernel in [
+        "paddle.uniform", "paddle.normal", "paddle.bernoulli",
+        "paddle.multinomial", "paddle.poisson"
+    ]
+
+
+class CSEElimination(FuseBase):
+    """ 公共子表达式消除：kernel、输入（及其版本）、属性均相同的layer只计算一次，
+    之后的layer被删除，使用其输出的layer改为使用第一个layer的输出。
+    子类通过is_candidate排除有状态（如带参数）的layer。
+    """
+
+    def __init__(self, graph_type):
+        super(CSEElimination, self).__init__(graph_type=graph_type)
+
+    def operate(self, graph, match_kind=None):
+        """ 按拓扑序遍历一次最外层的图，用(kernel, 输入, 属性)的哈希表查找相同的layer。
+        输入用名字及最后写入该名字的layer表示，原地改写（如ONNX中Shape之后原地cast）
+        之前与之后的同名tensor不会被当作相同的输入。
+        消除前:
+        shape0 = paddle.shape(input=x)
+        shape1 = paddle.shape(input=x)
+        y = paddle.reshape(x=z, shape=shape1)
+        消除后:
+        shape0 = paddle.shape(input=x)
+        y = paddle.reshape(x=z, shape=shape0)
+        """
+        # 被多次写入、原地修改、在属性中引用的名字不能被替换
+        output_count = collections.Counter()
+        mutated = set()
+        attr_refs = set()
+        for layer in graph.get_global_layers().values():
+            output_count.update(layer.outputs)
+            attr_refs.update(get_attr_refs(layer))
+            if layer.kernel in MUTATING_KERNELS:
+                mutated.update(get_input_names(layer))
+
+        def is_stable(names):
+            return all(
+                [output_count[n] == 1 and n not in mutated for n in names])
+
+        # 被删除的layer的输出还需要不是图的输出，且没有在属性中被引用
+        unremovable = attr_refs | set(graph.outputs)
+        # 名字 -> 最后写入它的最外层layer的id
+        versions = dict()
+        # 被删除的layer的输出 -> 保留的layer的对应输出
+        rename = dict()
+        table = dict()
+        changed_ids = set()
+        for layer_id, layer in list(graph.layers.items()):
+            if len(rename) > 0 and rename_inputs(layer, rename):
+                changed_ids.add(layer_id)
+            key = None
+            if self.is_candidate(layer) and \
+                    not any([n in mutated for n in get_input_names(layer)]):
+                key = self.get_key(layer, versions, output_count)
+            if key is not None and key in table and is_stable(layer.outputs) \
+                    and not any([n in unremovable for n in layer.outputs]):
+                kept_layer = graph.layers[table[key]]
+                for name, kept_name in zip(layer.outputs, kept_layer.outputs):
+                    rename[name] = kept_name
+                graph.layers.pop(layer_id)
+                continue
+            if key is not None and key not in table and \
+                    is_stable(layer.outputs):
+                table[key] = layer_id
+            for name in get_written_names(layer):
+                versions[name] = layer_id
+        PassManager.add_stats(matches=len(rename))
+        if len(rename) > 0:
+            graph.update_edges([i for i in changed_ids if i in graph.layers])
+
+    def is_candidate(self, layer):
+        """ 判断layer能否与相同的layer合并：结果只由输入与属性决定，且没有子图。
+        """
+        if len(layer.outputs) == 0 or len(layer.blocks) > 0:
+            return False
+        kernel = layer.kernel
+        if kernel.startswith("prim."):
+            return kernel in PURE_PRIM_KERNELS
+        if not kernel.startswith("paddle.") or kernel.endswith("_") or \
+                kernel.startswith("paddle.static.") or \
+                is_random_kernel(kernel):
+            return False
+        return True
+
+    def get_key(self, layer, versions, output_count):
+        """ 生成layer的哈希键，输入与属性中引用的tensor均带有其版本。
+        PyTorch中不同scope（模块）的layer不合并，以保持生成代码的模块划分。
+        """
+
+        def resolve(value):
+            if isinstance(value, (list, tuple)):
+                return (type(value).__name__, ) + tuple(
+                    [resolve(v) for v in value])
+            if isinstance(value, dict):
+                return tuple(
+                    sorted([(k, resolve(v)) for k, v in value.items()]))
+            if isinstance(value, str) and value in output_count:
+                return (value, versions.get(value, -1))
+            return repr(value)
+
+        return (layer.kernel, layer.scope_name, len(layer.outputs),
+                resolve(layer.inputs), resolve(layer.attrs))
@@ -0,0 +1,86 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+from x2paddle.optimizer.pattern_matcher import FuseBase
+from x2paddle.optimizer.pass_manager import PassManager
+from x2paddle.optimizer.elimination.cse_elimination import MUTATING_KERNELS
+from x2paddle.optimizer.utils import *
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+# 有副作用的kernel，即使输出没有被使用也需要保留
+SIDE_EFFECT_KERNELS = MUTATING_KERNELS + [
+    "prim.exception", "prim.warnings", "prim.assert"
+]
+
+
+class DeadCodeElimination(FuseBase):
+    """ 死代码消除：从图的输出反向做活跃性分析，删除输出不会被用到的layer。
+    子类需指定param_kernels（创建参数的kernel）及input_kernels（图的输入）。
+    """
+
+    def __init__(self, graph_type):
+        super(DeadCodeElimination, self).__init__(graph_type=graph_type)
+        self.param_kernels = list()
+        self.input_kernels = list()
+
+    def operate(self, graph, match_kind=None):
+        """ 逆拓扑序遍历最外层的图，维护之后仍会被读取的tensor名字（活跃集合），
+        没有副作用且输出均不在活跃集合中的layer被删除，删除的参数同时从graph.parameters中去掉。
+        与build中删除孤立layer不同，只被死代码使用的整条链都会被删除。
+        """
+        output_count = collections.Counter()
+        for layer in graph.get_global_layers().values():
+            output_count.update(layer.outputs)
+        # 图的输出不是由layer产生时（如输出名字与layer的输出不一致），无法判断活跃性
+        if len(graph.outputs) == 0 or any(
+            [output_count[n] == 0 for n in graph.outputs]):
+            PassManager.add_stats(matches=0)
+            return
+        live = set(graph.outputs)
+        removed = list()
+        for layer_id in reversed(list(graph.layers.keys())):
+            layer = graph.layers[layer_id]
+            if not self.has_side_effect(layer) and \
+                    not any([n in live for n in layer.outputs]):
+                removed.append(layer)
+                graph.layers.pop(layer_id)
+                continue
+            # 有子图的layer（如prim.if）可能只在部分分支中写入输出，之前的写入仍然活跃
+            if len(layer.blocks) == 0:
+                live.difference_update(layer.outputs)
+            live.update(get_read_names(layer))
+        PassManager.add_stats(matches=len(removed))
+        if len(removed) == 0:
+            return
+        for layer in removed:
+            for name in self.get_param_names(graph, layer):
+                if output_count[name] <= 1:
+                    graph.parameters.pop(name, None)
+        graph.update_edges()
+
+    def has_side_effect(self, layer):
+        """ 判断layer是否有输出之外的作用（修改输入、抛出异常、作为图的输入等）。
+        """
+        return len(layer.outputs) == 0 or len(layer.blocks) > 0 or \
+            layer.kernel in SIDE_EFFECT_KERNELS or \
+            layer.kernel in self.input_kernels or layer.kernel.endswith("_")
+
+    def get_param_names(self, graph, layer):
+        """ 获取随layer一起删除的参数名字。
+        """
+        if layer.kernel in self.param_kernels:
+            return [layer.outputs[0]]
+        return []
@@ -13,4 +13,8 @@
 # limitations under the License.
 
 from .transpose_elimination import DygraphTransposeElimination
-from .transpose_eliminate_pass import DygraphTransposeEliminatePass
\ No newline at end of file
+from .transpose_eliminate_pass import DygraphTransposeEliminatePass
+from .cse_elimination import DygraphCSEElimination
+from .cse_eliminate_pass import DygraphCSEEliminatePass
+from .dead_code_elimination import DygraphDeadCodeElimination
+from .dead_code_eliminate_pass import DygraphDeadCodeEliminatePass
@@ -0,0 +1,37 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from x2paddle.optimizer.pass_ import Pass
+from x2paddle.optimizer.elimination.dygraph import DygraphCSEElimination
+from x2paddle.optimizer.pass_manager import pass_register
+
+
+@pass_register
+class DygraphCSEEliminatePass(Pass):
+    name = "dygraph_cse_eliminate_pass"
+    # 按拓扑序遍历一次即可合并所有相同的layer
+    fixpoint = False
+    # 常量折叠产生的相同paddle.full也可以被合并
+    after = ["dygraph_constant_fold_pass"]
+
+    def __init__(self):
+        Pass.__init__(self)
+
+    def apply(self, graph):
+        eliminator = DygraphCSEElimination()
+        eliminator.operate(graph)
+
+
+# 用于注册
+cse_eliminate_pass = DygraphCSEEliminatePass()
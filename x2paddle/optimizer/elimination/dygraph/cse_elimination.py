@@ -0,0 +1,31 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from x2paddle.optimizer.elimination.cse_elimination import CSEElimination
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+
+class DygraphCSEElimination(CSEElimination):
+    def __init__(self):
+        super(DygraphCSEElimination, self).__init__(graph_type="dygraph")
+
+    def is_candidate(self, layer):
+        # paddle.nn类layer带有参数或状态，paddle.to_tensor为图的输入
+        kernel = layer.kernel
+        if ("paddle.nn" in kernel and "functional" not in kernel) or \
+                kernel == "paddle.to_tensor" or \
+                kernel == "self.create_parameter":
+            return False
+        return super(DygraphCSEElimination, self).is_candidate(layer)
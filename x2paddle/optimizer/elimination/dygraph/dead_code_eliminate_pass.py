@@ -0,0 +1,37 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from x2paddle.optimizer.pass_ import Pass
+from x2paddle.optimizer.elimination.dygraph import DygraphDeadCodeElimination
+from x2paddle.optimizer.pass_manager import pass_register
+
+
+@pass_register
+class DygraphDeadCodeEliminatePass(Pass):
+    name = "dygraph_dead_code_eliminate_pass"
+    # 一次反向的活跃性分析即可删除所有死代码
+    fixpoint = False
+    # 公共子表达式消除后被合并的layer的输入链可能成为死代码
+    after = ["dygraph_cse_eliminate_pass"]
+
+    def __init__(self):
+        Pass.__init__(self)
+
+    def apply(self, graph):
+        eliminator = DygraphDeadCodeElimination()
+        eliminator.operate(graph)
+
+
+# 用于注册
+dead_code_eliminate_pass = DygraphDeadCodeEliminatePass()
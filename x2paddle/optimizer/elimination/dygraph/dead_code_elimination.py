@@ -0,0 +1,33 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from x2paddle.optimizer.elimination.dead_code_elimination import DeadCodeElimination
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+
+class DygraphDeadCodeElimination(DeadCodeElimination):
+    def __init__(self):
+        super(DygraphDeadCodeElimination, self).__init__(graph_type="dygraph")
+        self.param_kernels = ["self.create_parameter"]
+        self.input_kernels = ["paddle.to_tensor"]
+
+    def get_param_names(self, graph, layer):
+        # paddle.nn类layer的参数以layer的名字为前缀（如conv0.weight）
+        kernel = layer.kernel
+        if "paddle.nn" in kernel and "functional" not in kernel:
+            prefix = layer.outputs[0] + "."
+            return [k for k in graph.parameters.keys() if k.startswith(prefix)]
+        return super(DygraphDeadCodeElimination, self).get_param_names(
+            graph, layer)
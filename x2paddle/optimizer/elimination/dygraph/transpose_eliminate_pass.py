@@ -20,6 +20,12 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphTransposeEliminatePass(Pass):
     name = "transpose_eliminate_pass"
+    fixpoint = False
+    # 在融合之后消除transpose，融合可能去掉transpose之间的layer
+    after = [
+        "dygraph_conv2d_add_fuse_pass", "dygraph_tf_batchnorm_fuse_pass",
+        "dygraph_prelu_fuse_pass"
+    ]
 
     def __init__(self):
         Pass.__init__(self)
@@ -30,4 +36,4 @@ class DygraphTransposeEliminatePass(Pass):
 
 
 # 用于注册
-transpose_eliminate_pass = DygraphTransposeEliminatePass()
\ No newline at end of file
+transpose_eliminate_pass = DygraphTransposeEliminatePass()
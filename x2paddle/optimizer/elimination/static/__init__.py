@@ -13,4 +13,8 @@
 # limitations under the License.
 
 from .transpose_elimination import StaticTransposeElimination
-from .transpose_eliminate_pass import StaticTransposeEliminatePass
\ No newline at end of file
+from .transpose_eliminate_pass import StaticTransposeEliminatePass
+from .cse_elimination import StaticCSEElimination
+from .cse_eliminate_pass import StaticCSEEliminatePass
+from .dead_code_elimination import StaticDeadCodeElimination
+from .dead_code_eliminate_pass import StaticDeadCodeEliminatePass
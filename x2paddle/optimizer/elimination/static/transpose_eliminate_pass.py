@@ -20,6 +20,12 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class StaticTransposeEliminatePass(Pass):
     name = "static_transpose_eliminate_pass"
+    fixpoint = False
+    # 在融合之后消除transpose，融合可能去掉transpose之间的layer
+    after = [
+        "static_conv2d_add_fuse_pass", "static_tf_batchnorm_fuse_pass",
+        "static_prelu_fuse_pass"
+    ]
 
     def __init__(self):
         Pass.__init__(self)
@@ -30,4 +36,4 @@ class StaticTransposeEliminatePass(Pass):
 
 
 # 用于注册
-static_transpose_eliminate_pass = StaticTransposeEliminatePass()
\ No newline at end of file
+static_transpose_eliminate_pass = StaticTransposeEliminatePass()
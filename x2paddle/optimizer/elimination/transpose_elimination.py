@@ -0,0 +1,545 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import itertools
+import numpy as np
+from x2paddle.optimizer.pattern_matcher import FuseBase
+from x2paddle.optimizer.pass_manager import PassManager
+from x2paddle.optimizer.utils import *
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+# NCHW转为NHWC、NHWC转为NCHW的perm
+NHWC_PERM = [0, 2, 3, 1]
+NCHW_PERM = [0, 3, 1, 2]
+
+# layer在布局分析中的角色
+TO_NHWC = "to_nhwc"
+TO_NCHW = "to_nchw"
+# 输入、输出均为区域中的4维tensor，布局改变时只需改写属性
+AGNOSTIC = "agnostic"
+# 输入为区域中的4维tensor，输出的维数减少且与布局无关（如对H、W求平均后为[N, C]）
+SINK = "sink"
+
+
+class UnionFind(object):
+    """ 带路径压缩与按大小合并的并查集，元素为layer id。
+    """
+
+    def __init__(self):
+        self.parent = dict()
+        self.size = dict()
+
+    def find(self, x):
+        if x not in self.parent:
+            self.parent[x] = x
+            self.size[x] = 1
+            return x
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, x, y):
+        x, y = self.find(x), self.find(y)
+        if x == y:
+            return
+        if self.size[x] < self.size[y]:
+            x, y = y, x
+        self.parent[y] = x
+        self.size[x] += self.size[y]
+
+
+class TransposeElimination(FuseBase):
+    """ 布局分配：TensorFlow等NHWC的模型转换后，卷积等layer前后会插入
+    transpose(perm=[0, 2, 3, 1])与transpose(perm=[0, 3, 1, 2])。
+    与布局无关的layer（激活、elementwise、reduce、concat、split、pad、slice等）
+    按数据流连成区域，每个区域的布局（保持NHWC或改为NCHW）是一个变量：
+    改为NCHW时删除区域中的transpose，区域与布局固定的layer相接处需要插入transpose。
+    区域之间只通过布局固定的layer相连，各自选择transpose较少的布局即为整体最优。
+    子类需在direct_layers中加入激活layer，并指定param_kernels（创建参数的kernel）。
+    """
+
+    def __init__(self, graph_type):
+        super(TransposeElimination, self).__init__(graph_type=graph_type)
+        # 逐元素计算的单输入layer
+        self.direct_layers = [
+            'paddle.abs', 'paddle.exp', 'paddle.rsqrt', 'paddle.sqrt',
+            'paddle.floor', 'paddle.ceil', 'paddle.erf', 'paddle.square',
+            'paddle.log', 'paddle.sign', 'paddle.cast', 'paddle.scale',
+            'paddle.clip'
+        ]
+        self.elementwise_layers = [
+            'paddle.add', 'paddle.subtract', 'paddle.multiply', 'paddle.divide',
+            'paddle.maximum', 'paddle.minimum'
+        ]
+        self.reduce_layers = [
+            'paddle.mean', 'paddle.all', 'paddle.max', 'paddle.min',
+            'paddle.any', 'paddle.sum', 'paddle.prod'
+        ]
+        # axis默认为-1的layer
+        self.softmax_layers = [
+            'paddle.nn.Softmax', 'paddle.nn.functional.softmax'
+        ]
+        self.slice_layers = ['paddle.slice', 'paddle.strided_slice']
+        self.param_kernels = list()
+
+    def operate(self, graph, match_kind=None):
+        """ 一次布局分析：按拓扑序遍历最外层的图，用并查集把
+        转为NHWC的transpose、与布局无关的layer、转为NCHW的transpose按数据流合并为区域，
+        并记录每个区域与布局固定的layer相接的位置。区域改为NCHW时：
+        - 删除区域中的transpose，转为NHWC的transpose还被区域外使用时保留；
+        - 区域外的输入插入转为NCHW的transpose，只被区域使用的参数直接改写为NCHW；
+        - 被区域外使用的输出插入转回NHWC的transpose；
+        - 原地改写区域中layer的axis、pad、offsets等属性。
+        删除的transpose多于插入的transpose时区域改为NCHW。
+        消除前:
+        x_nhwc = paddle.transpose(x=x, perm=[0, 2, 3, 1])
+        y_nhwc = paddle.nn.functional.pad(x_nhwc, pad=[0, 0, 1, 1, 1, 1, 0, 0])
+        z_nhwc = paddle.add(x=y_nhwc, y=bias)  # bias的形状为[C]
+        z = paddle.transpose(x=z_nhwc, perm=[0, 3, 1, 2])
+        消除后:
+        y_nhwc = paddle.nn.functional.pad(x, pad=[0, 0, 0, 0, 1, 1, 1, 1])
+        z_nhwc = paddle.add(x=y_nhwc, y=bias)  # bias的形状为[1, C, 1, 1]
+        """
+        # 在属性中以名字引用的tensor不体现在边中，其布局不能改变
+        attr_refs = set()
+        for layer in graph.get_global_layers().values():
+            attr_refs.update(get_attr_refs(layer))
+        graph_outputs = set(graph.outputs)
+        roles = dict()
+        # 名字 -> 最后写入它的最外层layer的id
+        producers = dict()
+        # 所在区域不能改为NCHW的layer
+        external = set()
+        # 不能删除的转为NHWC的transpose（输出是图的输出或被区域外使用）
+        kept = set()
+        # 区域外的输入：(使用者, 名字, 产生者)
+        conversions = list()
+        # 参数输入：(使用者, 参数layer的id, 参数是否需要为4维)
+        constants = list()
+        # 读取区域中layer的输出、但不与其合并的layer：(使用者, 名字, 产生者)
+        reads = list()
+        uf = UnionFind()
+        for layer_id, layer in graph.layers.items():
+            role = self.get_role(layer)
+            linked = set()
+            if role is not None:
+                roles[layer_id] = role
+                uf.find(layer_id)
+                if role != SINK and any([
+                        n in graph_outputs or n in attr_refs
+                        for n in self.get_tensor_outputs(layer)
+                ]):
+                    if role == TO_NHWC:
+                        kept.add(layer_id)
+                    else:
+                        external.add(layer_id)
+                if role == TO_NHWC:
+                    input_role = roles.get(producers.get(layer.inputs["x"]))
+                    if input_role in [TO_NHWC, AGNOSTIC]:
+                        external.add(layer_id)
+                else:
+                    linked = self.link_inputs(graph, layer_id, layer, roles,
+                                              producers, uf, external,
+                                              conversions, constants)
+            for name in get_input_names(layer):
+                input_id = producers.get(name, None)
+                if input_id in roles and name not in linked:
+                    reads.append((layer_id, name, input_id))
+            for name in layer.outputs:
+                producers[name] = layer_id
+
+        # 区域（并查集的根） -> 区域中的layer
+        members = collections.defaultdict(list)
+        for layer_id in roles.keys():
+            members[uf.find(layer_id)].append(layer_id)
+        invalid = set([uf.find(i) for i in external])
+        # 需要插入的transpose：(产生者, 名字, 所属区域)
+        to_convert = set()
+        to_restore = set()
+        # 直接改写的参数layer -> 所属区域
+        params = dict()
+        for layer_id, name, input_id in conversions:
+            to_convert.add((input_id, name, uf.find(layer_id)))
+        for layer_id, param_id, need_4d in constants:
+            root = uf.find(layer_id)
+            name = graph.layers[param_id].outputs[0]
+            value = graph.parameters[name]
+            consumers = graph.edges_out.get(param_id, [])
+            if all([i in roles and uf.find(i) == root for i in consumers]) \
+                    and (value.ndim == 4 or not need_4d and value.ndim < 4):
+                params[param_id] = root
+            elif value.ndim == 4:
+                to_convert.add((param_id, name, root))
+            else:
+                invalid.add(root)
+        for layer_id, name, input_id in reads:
+            if roles[input_id] == AGNOSTIC:
+                to_restore.add((input_id, name, uf.find(input_id)))
+            elif roles[input_id] == TO_NHWC:
+                kept.add(input_id)
+        # 区域 -> 改为NCHW时删除的transpose数减去插入的transpose数
+        benefit = collections.Counter()
+        for input_id, name, root in itertools.chain(to_convert, to_restore):
+            benefit[root] -= 1
+        has_source = set()
+        for layer_id, role in roles.items():
+            root = uf.find(layer_id)
+            if role == TO_NHWC:
+                has_source.add(root)
+            if role == TO_NCHW or role == TO_NHWC and layer_id not in kept:
+                benefit[root] += 1
+        flipped = set([
+            root for root in members.keys()
+            if root in has_source and root not in invalid and benefit[root] > 0
+        ])
+
+        before_transpose_num = self.get_transpose_num(graph)
+        # 绕过transpose后使用者读到的值不正确的区域不能改为NCHW，直到没有冲突为止
+        while True:
+            region_of = dict()
+            bypassed = set()
+            for root in flipped:
+                for layer_id in members[root]:
+                    region_of[layer_id] = root
+                    if roles[layer_id] in [TO_NHWC, TO_NCHW]:
+                        bypassed.add(layer_id)
+            renames, conflicts = self.get_renames(graph, bypassed, kept,
+                                                  region_of)
+            if len(conflicts) == 0:
+                break
+            for layer_id in conflicts:
+                flipped.discard(uf.find(layer_id))
+
+        for layer_id in region_of.keys():
+            if roles[layer_id] not in [AGNOSTIC, SINK]:
+                continue
+            layer = graph.layers[layer_id]
+            self.update_layout(layer)
+            if roles[layer_id] == AGNOSTIC:
+                # 输出的布局改变，记录的静态形状不再有效
+                for name in layer.outputs:
+                    graph.static_shapes.pop(name, None)
+        for param_id, root in params.items():
+            if root in flipped:
+                self.update_parameter(graph, graph.layers[param_id])
+
+        # 插入位置（产生者） -> 插入的transpose
+        insert_after = collections.defaultdict(list)
+        # (产生者, 名字, 所属区域) -> 插入的transpose的输出
+        new_names = dict()
+        used_names = None
+        for perm, transposes in [(NCHW_PERM, to_convert), (NHWC_PERM,
+                                                           to_restore)]:
+            for key in sorted(transposes):
+                input_id, name, root = key
+                if root not in flipped:
+                    continue
+                if used_names is None:
+                    used_names = get_used_names(graph)
+                    next_id = self.get_next_layer_id(graph)
+                suffix = "_nchw" if perm == NCHW_PERM else "_nhwc"
+                new_names[key] = gen_layer_name(name + suffix, used_names)
+                insert_after[input_id].append(
+                    PaddleLayer(
+                        str(next_id),
+                        "paddle.transpose",
+                        inputs={"x": name},
+                        outputs=[new_names[key]],
+                        perm=perm))
+                next_id += 1
+        for layer_id, name, input_id in conversions:
+            key = (input_id, name, uf.find(layer_id))
+            if key in new_names:
+                renames.setdefault(layer_id, dict())[name] = new_names[key]
+        for layer_id, param_id, need_4d in constants:
+            name = graph.layers[param_id].outputs[0]
+            key = (param_id, name, uf.find(layer_id))
+            if key in new_names:
+                renames.setdefault(layer_id, dict())[name] = new_names[key]
+        for layer_id, name, input_id in reads:
+            key = (input_id, name, uf.find(input_id))
+            if key in new_names:
+                renames.setdefault(layer_id, dict())[name] = new_names[key]
+
+        removed_ids = set([i for i in bypassed if i not in kept])
+        PassManager.add_stats(matches=len(flipped))
+        if len(removed_ids) > 0 or len(insert_after) > 0:
+            for layer_id, rename in renames.items():
+                rename_inputs(graph.layers[layer_id], rename)
+            for layer_id in removed_ids:
+                graph.layers.pop(layer_id)
+            self.insert_layers(graph, insert_after)
+            graph.update_edges(list(renames.keys()))
+        current_transpose_num = self.get_transpose_num(graph)
+        print(
+            "\nTranspose layers optimized, before: transpose_num={}, after: transpose_num={}".
+            format(before_transpose_num, current_transpose_num))
+
+    def link_inputs(self, graph, layer_id, layer, roles, producers, uf,
+                    external, conversions, constants):
+        """ 将layer与产生其输入的区域中的layer合并，并记录区域外的输入，返回已处理的输入名字。
+        标量输入与布局无关；参数与已知为4维的输入在区域改为NCHW时改写或插入transpose；
+        其他的输入使区域不能改为NCHW。
+        """
+        linked = set()
+        for key, var in layer.inputs.items():
+            names = var if isinstance(var, (list, tuple)) else [var]
+            for name in names:
+                input_id = producers.get(name, None)
+                input_role = roles.get(input_id, None)
+                if input_role in [TO_NHWC, AGNOSTIC]:
+                    uf.union(input_id, layer_id)
+                elif self.is_scalar_input(graph, layer, key, input_id):
+                    pass
+                elif input_role is None and input_id is not None and \
+                        self.is_parameter(graph, graph.layers[input_id]):
+                    constants.append(
+                        (layer_id, input_id,
+                         layer.kernel not in self.elementwise_layers))
+                elif input_role is None and input_id is not None and \
+                        self.get_input_rank(layer, key) == 4:
+                    conversions.append((layer_id, name, input_id))
+                else:
+                    external.add(layer_id)
+                    continue
+                linked.add(name)
+        return linked
+
+    def get_role(self, layer):
+        """ 获取layer在布局分析中的角色，不能出现在区域中时返回None。
+        """
+        kernel = layer.kernel
+        attrs = layer.attrs
+        if len(layer.blocks) > 0 or len(layer.outputs) == 0:
+            return None
+        if kernel == "paddle.transpose":
+            perm = attrs.get("perm", None)
+            if len(layer.outputs) != 1 or list(layer.inputs.keys()) != ["x"]:
+                return None
+            if perm == NHWC_PERM:
+                return TO_NHWC
+            if perm == NCHW_PERM:
+                return TO_NCHW
+            return None
+        if kernel in self.direct_layers or kernel in self.elementwise_layers:
+            return AGNOSTIC
+        if kernel in self.reduce_layers:
+            axis = attrs.get("axis", None)
+            if not self.is_axis(axis, allow_list=True):
+                return None
+            if attrs.get("keepdim", False):
+                return AGNOSTIC
+            # 不保留维度时，剩余维度的顺序不变才能改写
+            if axis is None:
+                return SINK
+            axes = axis if isinstance(axis, list) else [axis]
+            return SINK if self.keeps_order(axes) else None
+        if kernel == "paddle.squeeze":
+            axis = attrs.get("axis", None)
+            if not isinstance(axis, list) or not self.is_axis(
+                    axis, allow_list=True):
+                return None
+            # 长度不为1的维度不会被删除，删除其中任意一部分时顺序都需要不变
+            for num in range(len(axis) + 1):
+                for axes in itertools.combinations(axis, num):
+                    if not self.keeps_order(axes):
+                        return None
+            return SINK
+        if kernel in ["paddle.concat", "paddle.split"] + self.softmax_layers:
+            default = -1 if kernel in self.softmax_layers else 0
+            if not self.is_axis(attrs.get("axis", default)):
+                return None
+            return AGNOSTIC
+        if kernel == "paddle.nn.functional.pad":
+            # pad的长度为8时，从第0维开始依次为每一维前后的pad
+            pad = attrs.get("pad", None)
+            if "data_format" in attrs or not self.is_int_list(pad, 8):
+                return None
+            return AGNOSTIC
+        if kernel == "paddle.crop":
+            if list(layer.inputs.keys()) != ["x"] or \
+                    not self.is_int_list(attrs.get("offsets", None), 4) or \
+                    not self.is_int_list(attrs.get("shape", None), 4):
+                return None
+            return AGNOSTIC
+        if kernel in self.slice_layers:
+            axes = attrs.get("axes", None)
+            if axes is None or not self.is_axis(axes, allow_list=True):
+                return None
+            return AGNOSTIC
+        return None
+
+    def update_layout(self, layer):
+        """ 将区域中的layer在NHWC下的属性原地改写为NCHW下的属性。
+        """
+        kernel = layer.kernel
+        attrs = layer.attrs
+        if kernel in self.reduce_layers or kernel == "paddle.squeeze":
+            axis = attrs.get("axis", None)
+            if isinstance(axis, list):
+                attrs["axis"] = [NHWC_PERM[a] for a in axis]
+            elif axis is not None:
+                attrs["axis"] = NHWC_PERM[axis]
+        elif kernel in ["paddle.concat", "paddle.split"] + self.softmax_layers:
+            default = -1 if kernel in self.softmax_layers else 0
+            attrs["axis"] = NHWC_PERM[attrs.get("axis", default)]
+        elif kernel == "paddle.nn.functional.pad":
+            pad = attrs["pad"]
+            attrs["pad"] = list(
+                itertools.chain(*[pad[2 * i:2 * i + 2] for i in NCHW_PERM]))
+        elif kernel == "paddle.crop":
+            for key in ["offsets", "shape"]:
+                attrs[key] = [attrs[key][i] for i in NCHW_PERM]
+        elif kernel in self.slice_layers:
+            attrs["axes"] = [NHWC_PERM[a] for a in attrs["axes"]]
+
+    def update_parameter(self, graph, layer):
+        """ 将区域使用的参数改写为NCHW，维数小于4时先在前面补1（与广播的规则一致）。
+        """
+        name = layer.outputs[0]
+        value = graph.parameters[name]
+        value = value.reshape([1] * (4 - value.ndim) + list(value.shape))
+        graph.parameters[name] = np.ascontiguousarray(
+            value.transpose(NCHW_PERM))
+        layer.attrs["shape"] = list(graph.parameters[name].shape)
+
+    def is_parameter(self, graph, layer):
+        return layer.kernel in self.param_kernels and isinstance(
+            graph.parameters.get(layer.outputs[0], None), np.ndarray)
+
+    def keeps_order(self, axes):
+        """ 判断删除NHWC下的axes之后，剩余维度在NCHW下的顺序是否不变。
+        """
+        axes = [a % 4 for a in axes]
+        kept = [NHWC_PERM[i] for i in range(4) if i not in axes]
+        return kept == sorted(kept)
+
+    def is_axis(self, axis, allow_list=False):
+        if allow_list and (axis is None or isinstance(axis, list)):
+            return axis is None or all([self.is_axis(a) for a in axis])
+        return isinstance(axis, int) and not isinstance(axis, bool) and \
+            -4 <= axis < 4
+
+    def is_int_list(self, value, length):
+        return isinstance(value, list) and len(value) == length and all(
+            [isinstance(v, int) and not isinstance(v, bool) for v in value])
+
+    def get_tensor_outputs(self, layer):
+        return layer.outputs[get_output_index(layer):]
+
+    def get_input_rank(self, layer, key):
+        """ 获取layer的输入在转换时已知的维数，未知时返回None。
+        """
+        if layer.kernel in ["paddle.nn.functional.pad", "paddle.crop"]:
+            return 4
+        shape = getattr(layer, "input_shapes", dict()).get(key, None)
+        if shape is None:
+            return None
+        return len(shape)
+
+    def is_scalar_input(self, graph, layer, key, input_id):
+        """ 判断elementwise layer的输入是否为标量（形状为[1]），标量的输入与布局无关。
+        输入的形状由op mapper记录在layer.input_shapes中，或由产生它的paddle.full、参数得到。
+        """
+        if layer.kernel not in self.elementwise_layers:
+            return False
+        shape = getattr(layer, "input_shapes", dict()).get(key, None)
+        if shape is not None:
+            return list(shape) == [1] or len(shape) < 1
+        if input_id is None:
+            return False
+        input_layer = graph.layers[input_id]
+        if input_layer.kernel == "paddle.full":
+            return input_layer.attrs.get("shape", None) == [1]
+        if self.is_parameter(graph, input_layer):
+            return graph.parameters[input_layer.outputs[0]].size == 1
+        return False
+
+    def get_renames(self, graph, bypassed, kept, region_of):
+        """ 按拓扑序遍历一次，计算改为NCHW的区域中的transpose被删除（或绕过）后，
+        使用其输出的layer应改用的名字。保留的转为NHWC的transpose只对区域中的使用者绕过。
+        TensorFlow的op mapper常原地写入transpose的输出（如卷积之后的transpose与卷积输出同名），
+        因此按名字最后的写入者判断：绕过后使用者读到的名字，其最后的写入者必须是transpose输入的产生者，
+        否则该transpose为冲突。
+        Returns:
+            tuple: (使用者的layer id -> 改名的dict, 冲突的transpose的id)
+        """
+        # 被绕过的transpose -> (使用者应读取的名字, 该名字的产生者)
+        sources = dict()
+        # 名字 -> 最后写入它的layer，current中不包括被删除的transpose
+        latest = dict()
+        current = dict()
+        renames = dict()
+        conflicts = set()
+        for layer_id, layer in graph.layers.items():
+            if layer_id not in bypassed or layer_id in kept:
+                rename = dict()
+                for name in get_input_names(layer):
+                    input_id = latest.get(name, None)
+                    if input_id not in bypassed or input_id in kept and \
+                            region_of.get(layer_id) != region_of[input_id]:
+                        continue
+                    source, source_id = sources[input_id]
+                    if current.get(source, None) != source_id:
+                        conflicts.add(input_id)
+                    elif source != name:
+                        rename[name] = source
+                if len(rename) > 0:
+                    renames[layer_id] = rename
+                for name in layer.outputs:
+                    current[name] = layer_id
+            if layer_id in bypassed:
+                name = layer.inputs["x"]
+                input_id = latest.get(name, None)
+                if input_id in bypassed:
+                    sources[layer_id] = sources[input_id]
+                else:
+                    sources[layer_id] = (name, input_id)
+            for name in layer.outputs:
+                latest[name] = layer_id
+        return renames, conflicts
+
+    def get_next_layer_id(self, graph):
+        """ 获取新加入最外层的layer可以使用的id。
+        """
+        ids = [int(i) for i in graph.layers.keys() if i.isdigit()]
+        return max(ids) + 1 if len(ids) > 0 else 0
+
+    def insert_layers(self, graph, insert_after):
+        """ 将新的layer插入到insert_after中对应的layer之后。
+        只把第一个插入位置及之后的layer依次移到最后，不复制图。
+        """
+        if len(insert_after) == 0:
+            return
+        layer_ids = list(graph.layers.keys())
+        start = min([
+            i for i, layer_id in enumerate(layer_ids)
+            if layer_id in insert_after
+        ])
+        for layer_id in layer_ids[start:]:
+            graph.layers.move_to_end(layer_id)
+            for new_layer in insert_after.pop(layer_id, []):
+                graph.layers[new_layer.id] = new_layer
+
+    def get_transpose_num(self, graph):
+        count = 0
+        for layer_id, layer in graph.layers.items():
+            if layer.kernel == "paddle.transpose":
+                count += 1
+        return count
@@ -0,0 +1,210 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import numpy as np
+from x2paddle.optimizer.pattern_matcher import FuseBase
+from x2paddle.optimizer.pass_manager import PassManager
+from x2paddle.optimizer.folding.evaluator import evaluate, get_attr
+from x2paddle.optimizer.utils import *
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+
+class ConstantFolding(FuseBase):
+    """ 常量折叠：用NumPy预先计算输入全部为常量的layer。
+    常量来自参数、paddle.full等产生常量的layer，以及静态形状已知的tensor上的paddle.shape。
+    只有一个元素的结果替换为paddle.full，其余的结果替换为新的参数。
+    子类需指定param_kernels（第一个用于生成新的参数）并实现gen_parameter_layer。
+    """
+    # 结果比输入中参数的元素总数多出的上限，避免广播、paddle.full等使参数明显变大
+    max_new_size = 1024
+    # -O3中激进的常量折叠使用的上限（约为4MB的float32参数）
+    aggressive_max_new_size = 1 << 20
+
+    def __init__(self, graph_type, max_new_size=None):
+        super(ConstantFolding, self).__init__(graph_type=graph_type)
+        if max_new_size is not None:
+            self.max_new_size = max_new_size
+        self.param_kernels = list()
+        # 产生常量的layer及其默认的fill_value
+        self.constant_kernels = {
+            "paddle.full": None,
+            "paddle.ones": 1,
+            "paddle.zeros": 0
+        }
+
+    def operate(self, graph, match_kind=None):
+        """ 按拓扑序遍历一次，折叠只依赖常量的layer，可以折叠整条常量链，只处理最外层的图。
+        ONNX中静态形状上的Shape->Gather->Unsqueeze->Concat会被折叠为一个参数，
+        输出被原地改写的tensor（如ONNX的Shape之后原地cast）折叠为参数时，
+        参数使用新的名字，并修改使用该输出的layer。
+        """
+        parameters = graph.parameters
+        # 每个tensor被多少个layer产生，只被产生一次的才能直接作为参数的名字
+        output_count = collections.Counter()
+        attr_refs = set()
+        for layer in graph.get_global_layers().values():
+            output_count.update(layer.outputs)
+            attr_refs.update(get_attr_refs(layer))
+        self.used_names = None
+        # 当前为常量的tensor名字 -> (产生它的layer id, 值, 是否为参数)
+        constants = dict()
+        # 被折叠的layer所使用的常量layer的id -> 参数名（不是参数时为None）
+        input_layers = dict()
+        changed_ids = set()
+        fold_num = 0
+        for layer_id, layer in list(graph.layers.items()):
+            value = self.get_constant(graph, layer)
+            if value is not None:
+                constants[layer.outputs[0]] = (
+                    layer_id, value, layer.kernel in self.param_kernels)
+                continue
+            out = self.fold(graph, layer, constants, output_count, attr_refs)
+            new_layer = None
+            if out is not None:
+                new_layer = self.replace(graph, layer_id, out, output_count,
+                                         changed_ids)
+            if new_layer is None:
+                for name in get_written_names(layer):
+                    constants.pop(name, None)
+                continue
+            for var in get_input_names(layer):
+                # paddle.shape的输入不是常量
+                if var not in constants:
+                    continue
+                input_id, _, is_param = constants[var]
+                input_layers[input_id] = var if is_param else None
+            graph.layers[layer_id] = new_layer
+            constants.pop(layer.outputs[0], None)
+            constants[new_layer.outputs[0]] = (
+                layer_id, out, new_layer.kernel in self.param_kernels)
+            fold_num += 1
+        PassManager.add_stats(matches=fold_num)
+        if fold_num > 0:
+            graph.update_edges(
+                list(input_layers.keys()) + list(changed_ids),
+                remove_isolated=True)
+            # 不再被使用的参数随其layer一起删除
+            for input_id, name in input_layers.items():
+                if name is not None and input_id not in graph.layers and \
+                        output_count[name] == 1:
+                    parameters.pop(name, None)
+
+    def get_constant(self, graph, layer):
+        """ layer为常量的来源时返回其值，否则返回None。
+        """
+        if len(layer.outputs) != 1 or len(layer.inputs) > 0 or \
+                len(layer.blocks) > 0:
+            return None
+        if layer.kernel in self.param_kernels:
+            value = graph.parameters.get(layer.outputs[0], None)
+            return value if isinstance(value, np.ndarray) else None
+        if layer.kernel in self.constant_kernels:
+            shape = get_attr(layer.attrs, "shape")
+            fill_value = self.constant_kernels[layer.kernel]
+            if fill_value is None:
+                fill_value = get_attr(layer.attrs, "fill_value")
+            dtype = get_attr(layer.attrs, "dtype", "float32")
+            if not isinstance(shape, (list, tuple)) or \
+                    not all([isinstance(s, int) and s >= 0 for s in shape]) or \
+                    not isinstance(fill_value, (bool, int, float)):
+                return None
+            try:
+                return np.full(shape, fill_value, dtype=np.dtype(dtype))
+            except TypeError:
+                return None
+        return None
+
+    def fold(self, graph, layer, constants, output_count, attr_refs):
+        """ 计算输入全部为常量的layer，无法折叠时返回None。
+        """
+        if len(layer.outputs) != 1 or len(layer.blocks) > 0:
+            return None
+        name = layer.outputs[0]
+        if name in attr_refs:
+            return None
+        if layer.kernel == "paddle.shape":
+            # 输入只被产生一次时，记录的静态形状即为该tensor的形状
+            var = layer.inputs.get("input", None)
+            shape = graph.static_shapes.get(var, None)
+            if shape is None or output_count[var] > 1:
+                return None
+            return np.array(shape, dtype="int32")
+        if len(layer.inputs) == 0:
+            return None
+        inputs = dict()
+        input_size = 0
+        for key, var in layer.inputs.items():
+            names = var if isinstance(var, (list, tuple)) else [var]
+            if any([n not in constants or n in attr_refs for n in names]):
+                return None
+            values = [constants[n][1] for n in names]
+            input_size += sum(
+                [v.size for n, v in zip(names, values) if constants[n][2]])
+            inputs[key] = values if isinstance(var, (list,
+                                                     tuple)) else values[0]
+        out = evaluate(layer.kernel, inputs, layer.attrs)
+        if out is None or out.size == 0 or out.dtype.kind not in "biuf":
+            return None
+        if out.size > input_size + self.max_new_size:
+            return None
+        if out.ndim == 0:
+            # paddle中没有0维的tensor，prod、reduce等对所有维度计算时结果的形状为[1]
+            out = out.reshape([1])
+        return out
+
+    def replace(self, graph, layer_id, value, output_count, changed_ids):
+        """ 生成替换被折叠的layer的新layer，无法替换时返回None。
+        """
+        layer = graph.layers[layer_id]
+        name = layer.outputs[0]
+        if value.size == 1 and np.isfinite(value).all():
+            return PaddleLayer(
+                layer_id,
+                "paddle.full",
+                inputs={},
+                outputs=[name],
+                scope_name=layer.scope_name,
+                shape=list(value.shape),
+                fill_value=value.item(),
+                dtype=string(str(value.dtype)))
+        param_name = name
+        if output_count[name] != 1 or name in graph.parameters:
+            # 名字被多个layer使用，参数改用新的名字并修改使用该输出的layer
+            consumers = graph.edges_out.get(layer_id, [])
+            if name in graph.outputs or any(
+                [i == -1 or len(graph.layers[i].blocks) > 0
+                 for i in consumers]):
+                return None
+            if self.used_names is None:
+                self.used_names = get_used_names(graph)
+            param_name = gen_layer_name(name + "_", self.used_names)
+            for consumer_id in consumers:
+                consumer = graph.layers[consumer_id]
+                for key, var in consumer.inputs.items():
+                    if isinstance(var, (list, tuple)):
+                        consumer.inputs[key] = type(var)(
+                            [param_name if v == name else v for v in var])
+                    elif var == name:
+                        consumer.inputs[key] = param_name
+                changed_ids.add(consumer_id)
+            output_count[name] -= 1
+            output_count[param_name] = 1
+        graph.parameters[param_name] = value
+        return self.gen_parameter_layer(layer_id, param_name, value)
+
+    def gen_parameter_layer(self, layer_id, name, value):
+        raise NotImplementedError(
+            "The gen_parameter_layer function must be implemented!")
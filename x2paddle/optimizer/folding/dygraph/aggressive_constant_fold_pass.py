@@ -0,0 +1,37 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from x2paddle.optimizer.pass_ import Pass
+from x2paddle.optimizer.folding.dygraph import DygraphConstantFolding
+from x2paddle.optimizer.folding.dygraph.constant_fold_pass import DygraphConstantFoldPass
+from x2paddle.optimizer.pass_manager import pass_register
+
+
+@pass_register
+class DygraphAggressiveConstantFoldPass(Pass):
+    name = "dygraph_aggressive_constant_fold_pass"
+    fixpoint = False
+    # 在普通的常量折叠之后，继续折叠结果较大（如广播、paddle.full）的layer
+    after = DygraphConstantFoldPass.after + ["dygraph_constant_fold_pass"]
+
+    def __init__(self):
+        Pass.__init__(self)
+
+    def apply(self, graph):
+        folding = DygraphConstantFolding(
+            max_new_size=DygraphConstantFolding.aggressive_max_new_size)
+        folding.operate(graph)
+
+
+aggressive_constant_fold_pass = DygraphAggressiveConstantFoldPass()
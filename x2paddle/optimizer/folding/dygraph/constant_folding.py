@@ -0,0 +1,67 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import ast
+import numpy as np
+from x2paddle.optimizer.folding.constant_folding import ConstantFolding
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+
+class DygraphConstantFolding(ConstantFolding):
+    def __init__(self, max_new_size=None):
+        super(DygraphConstantFolding, self).__init__(
+            graph_type="dygraph", max_new_size=max_new_size)
+        self.param_kernels = ["self.create_parameter"]
+
+    def operate(self, graph, match_kind=None):
+        """ 将输入全部为常量的layer用NumPy预先计算，替换为参数或paddle.full。
+        常量包括参数、paddle.full、prim.constant，以及静态形状已知的paddle.shape。
+        折叠前:
+        fc_w = self.fc_w
+        fc_w_squeeze = paddle.squeeze(x=fc_w, axis=[0])
+        x2 = paddle.matmul(x=x1, y=fc_w_squeeze)
+        折叠后:
+        fc_w_squeeze = self.fc_w_squeeze
+        x2 = paddle.matmul(x=x1, y=fc_w_squeeze)
+        """
+        super(DygraphConstantFolding, self).operate(graph, match_kind)
+
+    def get_constant(self, graph, layer):
+        if layer.kernel != "prim.constant":
+            return super(DygraphConstantFolding, self).get_constant(
+                graph, layer)
+        value = layer.attrs.get("value", None)
+        if isinstance(value, str):
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                return None
+        # 只使用数值及数值组成的list，字符串、None等不作为常量
+        values = value if isinstance(value, (list, tuple)) else [value]
+        if len(values) == 0 or not all(
+            [isinstance(v, (bool, int, float)) for v in values]):
+            return None
+        return np.array(value)
+
+    def gen_parameter_layer(self, layer_id, name, value):
+        return PaddleLayer(
+            layer_id,
+            self.param_kernels[0],
+            inputs={},
+            outputs=[name],
+            shape=list(value.shape),
+            attr=string(name),
+            dtype=string(str(value.dtype)),
+            default_initializer="paddle.nn.initializer.Constant(value=0.0)")
@@ -0,0 +1,40 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from x2paddle.optimizer.pass_ import Pass
+from x2paddle.optimizer.folding.dygraph import DygraphConvBNFolding
+from x2paddle.optimizer.pass_manager import pass_register
+
+
+@pass_register
+class DygraphConvBNFoldPass(Pass):
+    name = "dygraph_conv_bn_fold_pass"
+    # 一次遍历即可折叠所有的卷积+BatchNorm
+    fixpoint = False
+    # BatchNorm需先由融合pass合并为一个layer，TensorFlow中还需先消除卷积与BatchNorm之间的transpose
+    after = [
+        "dygraph_bn_scale_fuse_pass", "dygraph_batchnorm2d_fuse_pass",
+        "dygraph_tf_batchnorm_fuse_pass", "transpose_eliminate_pass"
+    ]
+
+    def __init__(self):
+        Pass.__init__(self)
+
+    def apply(self, graph):
+        folding = DygraphConvBNFolding()
+        folding.operate(graph)
+
+
+# 用于注册
+conv_bn_fold_pass = DygraphConvBNFoldPass()
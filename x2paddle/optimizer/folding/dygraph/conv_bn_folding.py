@@ -0,0 +1,168 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+from x2paddle.optimizer.pattern_matcher import FuseBase
+from x2paddle.optimizer.pass_manager import PassManager
+from x2paddle.optimizer.utils import *
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+
+class DygraphConvBNFolding(FuseBase):
+    def __init__(self):
+        super(DygraphConvBNFolding, self).__init__(graph_type="dygraph")
+        self.conv_layers = [
+            "paddle.nn.Conv1D", "paddle.nn.Conv2D", "paddle.nn.Conv3D"
+        ]
+        self.conv_transpose_layers = [
+            "paddle.nn.Conv1DTranspose", "paddle.nn.Conv2DTranspose",
+            "paddle.nn.Conv3DTranspose"
+        ]
+        # BatchNorm的kernel -> 各参数的属性名
+        self.bn_layers = {
+            "paddle.nn.BatchNorm": ["param_attr", "bias_attr"],
+            "paddle.nn.BatchNorm1D": ["weight_attr", "bias_attr"],
+            "paddle.nn.BatchNorm2D": ["weight_attr", "bias_attr"],
+            "paddle.nn.BatchNorm3D": ["weight_attr", "bias_attr"],
+        }
+
+    def operate(self, graph, match_kind=None):
+        """ 将卷积（包括转置卷积、depthwise卷积）之后的BatchNorm合并到卷积的参数中，
+        删除BatchNorm，卷积移动到BatchNorm的位置。
+        要求卷积的输出只被BatchNorm使用。Caffe的BatchNorm+Scale需先经过bn_scale_fuse_pass。
+        折叠前:
+        conv0 = paddle.nn.Conv2D(in_channels=3, out_channels=64, kernel_size=[7, 7], bias_attr=False)
+        batchnorm0 = paddle.nn.BatchNorm(num_channels=64, epsilon=1e-05, is_test=True)
+        x1 = self.conv0(x0)
+        x2 = self.batchnorm0(x1)
+        折叠后:
+        conv0 = paddle.nn.Conv2D(in_channels=3, out_channels=64, kernel_size=[7, 7])
+        x2 = self.conv0(x0)
+        """
+        parameters = graph.parameters
+        layer_ids = list(graph.layers.keys())
+        positions = dict([(layer_id, i)
+                          for i, layer_id in enumerate(layer_ids)])
+        changed_ids = list()
+        for layer_id in layer_ids:
+            if layer_id not in graph.layers or \
+                    graph.layers[layer_id].kernel not in self.bn_layers:
+                continue
+            layer = graph.layers[layer_id]
+            input_layers = list(get_input_layers(graph, layer_id).values())
+            if len(input_layers) != 1:
+                continue
+            conv_id = input_layers[0]
+            if conv_id == -1 or conv_id not in graph.layers:
+                continue
+            conv_layer = graph.layers[conv_id]
+            if conv_layer.kernel not in self.conv_layers + \
+                    self.conv_transpose_layers or \
+                    not has_single_consumer(graph, conv_id) or \
+                    not can_move_to(graph, layer_ids, positions, conv_id,
+                                    layer_id):
+                continue
+            params = self.get_parameters(parameters, conv_layer, layer)
+            if params is None:
+                continue
+            weight, bias = fold_batch_norm(
+                params["weight"], params["bias"], params["scale"],
+                params["shift"], params["mean"], params["variance"],
+                layer.attrs.get("epsilon",
+                                1e-05), params["transposed"], params["groups"])
+            parameters[params["weight_name"]] = weight
+            parameters[params["bias_name"]] = bias
+            if params["bias"] is None:
+                if "weight_attr" in conv_layer.attrs:
+                    # 权重使用指定名字的参数时（如TensorFlow），偏置也需要指定名字
+                    conv_layer.attrs["bias_attr"] = string(params["bias_name"])
+                else:
+                    conv_layer.attrs.pop("bias_attr", None)
+            for param_name in params["bn_names"]:
+                parameters.pop(param_name)
+            conv_layer.outputs[1] = layer.outputs[1]
+            # 卷积替换BatchNorm，保证BatchNorm的输出仍在原位置产生
+            conv_layer.id = layer_id
+            graph.layers[layer_id] = conv_layer
+            graph.layers.pop(conv_id)
+            changed_ids.append(layer_id)
+        PassManager.add_stats(matches=len(changed_ids))
+        if len(changed_ids) > 0:
+            graph.update_edges(changed_ids, remove_isolated=True)
+
+    def get_parameters(self, parameters, conv_layer, bn_layer):
+        """ 获取卷积与BatchNorm的参数，无法折叠时返回None。
+        """
+        # 折叠与通道所在的维度无关，卷积与BatchNorm的数据格式（通道在前或在后）一致即可
+        channel_last = set()
+        for layer in [conv_layer, bn_layer]:
+            data_format = layer.attrs.get("data_format",
+                                          layer.attrs.get("data_layout", None))
+            channel_last.add(
+                data_format is not None and
+                data_format.strip("'\"") not in ["NCL", "NCHW", "NCDHW"])
+        if len(channel_last) != 1:
+            return None
+        conv_name = conv_layer.outputs[0]
+        bn_name = bn_layer.outputs[0]
+        params = dict()
+        params["weight_name"] = get_param_name(conv_layer, "weight_attr",
+                                               ".weight")
+        if params["weight_name"] not in parameters:
+            return None
+        params["weight"] = parameters[params["weight_name"]]
+        params["transposed"] = conv_layer.kernel in self.conv_transpose_layers
+        params["groups"] = conv_layer.attrs.get("groups", 1)
+        out_channels = get_out_channels(params["weight"], params["transposed"],
+                                        params["groups"])
+        if out_channels is None:
+            return None
+        bias_name = get_param_name(conv_layer, "bias_attr", ".bias")
+        if bias_name is None:
+            bias_name = conv_name + ".bias"
+            if bias_name in parameters:
+                return None
+            params["bias"] = None
+        elif bias_name in parameters:
+            params["bias"] = parameters[bias_name]
+        else:
+            return None
+        params["bias_name"] = bias_name
+        # BatchNorm的weight、bias可能不存在（属性为False），此时分别为1、0
+        scale_attr, shift_attr = self.bn_layers[bn_layer.kernel]
+        defaults = {"scale": 1.0, "shift": 0.0}
+        bn_names = list()
+        for key, attr, suffix in [("scale", scale_attr,
+                                   ".weight"), ("shift", shift_attr, ".bias"),
+                                  ("mean", "moving_mean_name", "._mean"),
+                                  ("variance", "moving_variance_name",
+                                   "._variance")]:
+            name = get_param_name(bn_layer, attr, suffix)
+            if name is None:
+                if key not in defaults:
+                    return None
+                params[key] = np.full([out_channels], defaults[key])
+                continue
+            if name not in parameters:
+                return None
+            params[key] = parameters[name]
+            bn_names.append(name)
+        params["bn_names"] = bn_names
+        for key in ["bias", "scale", "shift", "mean", "variance"]:
+            if params[key] is not None and \
+                    (not isinstance(params[key], np.ndarray) or
+                     params[key].size != out_channels):
+                return None
+        return params
@@ -0,0 +1,218 @@
+# -*- coding:UTF-8 -*-
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# 常量折叠中各paddle kernel的NumPy实现。
+# 每个实现的参数为(inputs, attrs)，inputs为输入key到np.ndarray（list类型的输入为
+# np.ndarray组成的list）的dict，attrs为layer的属性；无法计算（如属性不是常量）时返回None。
+
+import ast
+import numpy as np
+
+
+def get_attr(attrs, name, default=None):
+    """ 获取layer的属性，字符串形式的常量（如"'float32'"）会被解析为对应的值。
+    """
+    value = attrs.get(name, default)
+    if isinstance(value, str):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            if value.startswith("paddle."):
+                value = value[len("paddle."):]
+    return value
+
+
+def _get_axes(axis, ndim):
+    if axis is None:
+        return None
+    if not isinstance(axis, (list, tuple)):
+        axis = [axis]
+    if not all([isinstance(a, int) for a in axis]):
+        return None
+    return [a + ndim if a < 0 else a for a in axis]
+
+
+def _transpose(inputs, attrs):
+    perm = get_attr(attrs, "perm")
+    if not isinstance(perm, (list, tuple)):
+        return None
+    return np.transpose(inputs["x"], perm)
+
+
+def _reshape(inputs, attrs):
+    x = inputs["x"]
+    shape = inputs["shape"].tolist() if "shape" in inputs else get_attr(
+        attrs, "shape")
+    if not isinstance(shape, (list, tuple)) or \
+            not all([isinstance(s, int) for s in shape]):
+        return None
+    # paddle.reshape中0表示与输入的对应维度相同
+    shape = [x.shape[i] if s == 0 else s for i, s in enumerate(shape)]
+    return np.reshape(x, shape)
+
+
+def _squeeze(inputs, attrs):
+    x = inputs["x"]
+    axes = _get_axes(get_attr(attrs, "axis"), x.ndim)
+    if axes is None:
+        return np.squeeze(x)
+    # 与paddle.squeeze一致，忽略长度不为1的维度
+    axes = tuple([a for a in axes if x.shape[a] == 1])
+    return np.squeeze(x, axis=axes)
+
+
+def _unsqueeze(inputs, attrs):
+    x = inputs["x"]
+    axis = get_attr(attrs, "axis")
+    if not isinstance(axis, (list, tuple)):
+        axis = [axis]
+    for a in axis:
+        if not isinstance(a, int):
+            return None
+        x = np.expand_dims(x, a + x.ndim + 1 if a < 0 else a)
+    return x
+
+
+def _cast(inputs, attrs):
+    dtype = get_attr(attrs, "dtype")
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        return None
+    return inputs["x"].astype(dtype)
+
+
+def _scale(inputs, attrs):
+    x = inputs["x"]
+    scale = get_attr(attrs, "scale", 1.0)
+    bias = get_attr(attrs, "bias", 0.0)
+    if not isinstance(scale, (int, float)) or \
+            not isinstance(bias, (int, float)):
+        return None
+    if get_attr(attrs, "bias_after_scale", True):
+        out = x * scale + bias
+    else:
+        out = (x + bias) * scale
+    return out.astype(x.dtype)
+
+
+def _gather(inputs, attrs):
+    x, index = inputs["x"], inputs["index"]
+    axis = get_attr(attrs, "axis", 0)
+    if index.ndim != 1 or not np.issubdtype(index.dtype, np.integer) or \
+            not isinstance(axis, int):
+        return None
+    return np.take(x, index, axis=axis)
+
+
+def _concat(inputs, attrs):
+    xs = inputs["x"]
+    axis = get_attr(attrs, "axis", 0)
+    if not isinstance(xs, list) or not isinstance(axis, int) or \
+            len(set([x.dtype for x in xs])) != 1:
+        return None
+    return np.concatenate(xs, axis=axis)
+
+
+def _stack(inputs, attrs):
+    xs = inputs["x"]
+    axis = get_attr(attrs, "axis", 0)
+    if not isinstance(xs, list) or not isinstance(axis, int) or \
+            len(set([x.dtype for x in xs])) != 1:
+        return None
+    return np.stack(xs, axis=axis)
+
+
+def _slice(inputs, attrs):
+    x = inputs["input"] if "input" in inputs else inputs["x"]
+    axes = get_attr(attrs, "axes")
+    starts = get_attr(attrs, "starts")
+    ends = get_attr(attrs, "ends")
+    strides = get_attr(attrs, "strides", [1] * len(axes or []))
+    for value in [axes, starts, ends, strides]:
+        # starts、ends等为tensor时属性是变量名，无法计算
+        if not isinstance(value, (list, tuple)) or \
+                not all([isinstance(v, int) for v in value]):
+            return None
+    if not len(axes) == len(starts) == len(ends) == len(strides) or \
+            any([s <= 0 for s in strides]):
+        return None
+    slices = [slice(None)] * x.ndim
+    for axis, start, end, stride in zip(axes, starts, ends, strides):
+        slices[axis] = slice(start, end, stride)
+    return x[tuple(slices)]
+
+
+def _prod(inputs, attrs):
+    x = inputs["x"]
+    axis = get_attr(attrs, "axis", None)
+    if axis is not None and not isinstance(axis, (int, list, tuple)):
+        return None
+    if isinstance(axis, list):
+        axis = tuple(axis)
+    keepdim = get_attr(attrs, "keepdim", False)
+    dtype = get_attr(attrs, "dtype", None)
+    out = np.prod(x, axis=axis, keepdims=keepdim)
+    return out.astype(dtype if dtype is not None else x.dtype)
+
+
+def _elementwise(func, float_only=False):
+    def evaluate(inputs, attrs):
+        x, y = inputs["x"], inputs["y"]
+        if x.dtype != y.dtype or get_attr(attrs, "axis", -1) != -1:
+            return None
+        if float_only and not np.issubdtype(x.dtype, np.floating):
+            return None
+        return func(x, y).astype(x.dtype)
+
+    return evaluate
+
+
+EVALUATORS = {
+    "paddle.transpose": _transpose,
+    "paddle.reshape": _reshape,
+    "paddle.squeeze": _squeeze,
+    "paddle.unsqueeze": _unsqueeze,
+    "paddle.cast": _cast,
+    "paddle.scale": _scale,
+    "paddle.add": _elementwise(np.add),
+    "paddle.subtract": _elementwise(np.subtract),
+    "paddle.multiply": _elementwise(np.multiply),
+    "paddle.divide": _elementwise(np.divide, float_only=True),
+    "paddle.gather": _gather,
+    "paddle.concat": _concat,
+    "paddle.stack": _stack,
+    "paddle.slice": _slice,
+    "paddle.strided_slice": _slice,
+    "paddle.prod": _prod,
+}
+
+
+def evaluate(kernel, inputs, attrs):
+    """ 用NumPy计算kernel的结果，不支持或无法计算时返回None。
+    """
+    if kernel not in EVALUATORS:
+        return None
+    try:
+        out = EVALUATORS[kernel](inputs, attrs)
+    except (KeyError, ValueError, TypeError, IndexError, AttributeError):
+        return None
+    if out is None:
+        return None
+    out = np.asarray(out)
+    # paddle中没有0维的tensor，标量的形状为[1]
+    if out.ndim == 0:
+        out = out.reshape([1])
+    return out
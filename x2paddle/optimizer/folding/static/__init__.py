@@ -0,0 +1,19 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .constant_folding import StaticConstantFolding
+from .constant_fold_pass import StaticConstantFoldPass
+from .aggressive_constant_fold_pass import StaticAggressiveConstantFoldPass
+from .conv_bn_folding import StaticConvBNFolding
+from .conv_bn_fold_pass import StaticConvBNFoldPass
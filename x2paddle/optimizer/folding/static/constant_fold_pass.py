@@ -0,0 +1,40 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from x2paddle.optimizer.pass_ import Pass
+from x2paddle.optimizer.folding.static import StaticConstantFolding
+from x2paddle.optimizer.pass_manager import pass_register
+
+
+@pass_register
+class StaticConstantFoldPass(Pass):
+    name = "static_constant_fold_pass"
+    # 按拓扑序遍历一次即可折叠所有只依赖常量的layer
+    fixpoint = False
+    # 融合pass会匹配参数上的add、multiply等layer，需在折叠之前执行
+    after = [
+        "static_bn_scale_fuse_pass", "static_conv2d_add_fuse_pass",
+        "static_tf_batchnorm_fuse_pass", "static_prelu_fuse_pass"
+    ]
+
+    def __init__(self):
+        Pass.__init__(self)
+
+    def apply(self, graph):
+        folding = StaticConstantFolding()
+        folding.operate(graph)
+
+
+# 用于注册
+constant_fold_pass = StaticConstantFoldPass()
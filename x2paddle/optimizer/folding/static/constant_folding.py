@@ -0,0 +1,51 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from x2paddle.optimizer.folding.constant_folding import ConstantFolding
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+
+class StaticConstantFolding(ConstantFolding):
+    def __init__(self, max_new_size=None):
+        super(StaticConstantFolding, self).__init__(
+            graph_type="static", max_new_size=max_new_size)
+        self.param_kernels = [
+            "paddle.static.create_parameter",
+            "paddle.static.nn.create_parameter"
+        ]
+
+    def operate(self, graph, match_kind=None):
+        """ 将输入全部为常量的layer用NumPy预先计算，替换为参数或paddle.full。
+        常量包括参数、paddle.full，以及静态形状已知的paddle.shape。
+        折叠前:
+        fc_w = paddle.static.create_parameter(dtype='float32', shape=[1, 2048, 1000], name='fc_w')
+        fc_w_squeeze = paddle.squeeze(x=fc_w, axis=[0])
+        x2 = paddle.matmul(x=x1, y=fc_w_squeeze)
+        折叠后:
+        fc_w_squeeze = paddle.static.create_parameter(dtype='float32', shape=[2048, 1000], name='fc_w_squeeze')
+        x2 = paddle.matmul(x=x1, y=fc_w_squeeze)
+        """
+        super(StaticConstantFolding, self).operate(graph, match_kind)
+
+    def gen_parameter_layer(self, layer_id, name, value):
+        return PaddleLayer(
+            layer_id,
+            self.param_kernels[0],
+            inputs={},
+            outputs=[name],
+            dtype=string(str(value.dtype)),
+            shape=list(value.shape),
+            name=string(name),
+            default_initializer="paddle.nn.initializer.Constant(value=0.0)")
@@ -0,0 +1,204 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+from x2paddle.optimizer.pattern_matcher import FuseBase
+from x2paddle.optimizer.pass_manager import PassManager
+from x2paddle.optimizer.utils import *
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+
+class StaticConvBNFolding(FuseBase):
+    def __init__(self):
+        super(StaticConvBNFolding, self).__init__(graph_type="static")
+        self.conv_layers = [
+            "paddle.nn.functional.conv1d", "paddle.nn.functional.conv2d",
+            "paddle.nn.functional.conv3d"
+        ]
+        self.conv_transpose_layers = [
+            "paddle.nn.functional.conv1d_transpose",
+            "paddle.nn.functional.conv2d_transpose",
+            "paddle.nn.functional.conv3d_transpose"
+        ]
+        self.bn_layers = ["paddle.nn.functional.batch_norm"]
+        self.bn_param_keys = ["weight", "bias", "running_mean", "running_var"]
+        self.param_layers = [
+            "paddle.static.create_parameter",
+            "paddle.static.nn.create_parameter"
+        ]
+        # 产生常量的layer，如Caffe中BatchNorm的weight、bias
+        self.constant_layers = {
+            "paddle.ones": 1.0,
+            "paddle.zeros": 0.0,
+            "paddle.full": None
+        }
+
+    def operate(self, graph, match_kind=None):
+        """ 将卷积（包括转置卷积、depthwise卷积）之后的BatchNorm合并到卷积的参数中，
+        删除BatchNorm，卷积移动到BatchNorm的位置。
+        要求卷积的输出只被BatchNorm使用，卷积的权重、偏置只被该卷积使用。
+        卷积没有偏置时使用BatchNorm的bias存放折叠后的偏置，bias为常量时替换为参数。
+        折叠前:
+        conv_w = paddle.static.create_parameter(dtype='float32', shape=[64, 3, 7, 7], name='conv_w')
+        x1 = paddle.nn.functional.conv2d(x=x0, weight=conv_w, stride=[2, 2], padding=[3, 3])
+        x2 = paddle.nn.functional.batch_norm(x=x1, weight=bn_scale, bias=bn_b, running_mean=bn_mean, running_var=bn_var, epsilon=1e-05)
+        折叠后:
+        conv_w = paddle.static.create_parameter(dtype='float32', shape=[64, 3, 7, 7], name='conv_w')
+        bn_b = paddle.static.create_parameter(dtype='float32', shape=[64], name='bn_b')
+        x2 = paddle.nn.functional.conv2d(x=x0, weight=conv_w, bias=bn_b, stride=[2, 2], padding=[3, 3])
+        """
+        parameters = graph.parameters
+        layer_ids = list(graph.layers.keys())
+        positions = dict([(layer_id, i)
+                          for i, layer_id in enumerate(layer_ids)])
+        changed_ids = list()
+        param_layers = dict()
+        fold_num = 0
+        for layer_id in layer_ids:
+            if layer_id not in graph.layers or \
+                    graph.layers[layer_id].kernel not in self.bn_layers:
+                continue
+            layer = graph.layers[layer_id]
+            match = self.match(graph, layer_id, layer_ids, positions)
+            if match is None:
+                continue
+            conv_id, conv_layer, param_ids, params = match
+            weight, bias = fold_batch_norm(
+                params["weight"],
+                params.get("conv_bias"), params["bn_weight"], params["bn_bias"],
+                params["bn_running_mean"], params["bn_running_var"],
+                layer.attrs.get("epsilon", 1e-05),
+                conv_layer.kernel in self.conv_transpose_layers,
+                conv_layer.attrs.get("groups", 1))
+            for key, param_id in param_ids.items():
+                if graph.layers[param_id].kernel in self.param_layers:
+                    param_layers[param_id] = graph.layers[param_id].outputs[0]
+            weight_layer = graph.layers[param_ids["weight"]]
+            bias_id = param_ids.get("conv_bias", param_ids["bn_bias"])
+            bias_name = graph.layers[bias_id].outputs[0]
+            if graph.layers[bias_id].kernel not in self.param_layers:
+                # BatchNorm的bias为常量，替换为同名的参数
+                graph.layers[bias_id] = PaddleLayer(
+                    bias_id,
+                    weight_layer.kernel,
+                    inputs={},
+                    outputs=[bias_name],
+                    shape=list(bias.shape),
+                    dtype=string(str(bias.dtype)),
+                    name=string(bias_name))
+            parameters[weight_layer.outputs[0]] = weight
+            parameters[bias_name] = bias
+            graph.layers[bias_id].attrs["shape"] = list(bias.shape)
+            conv_layer.inputs["bias"] = bias_name
+            conv_layer.attrs.pop("bias", None)
+            conv_layer.outputs = list(layer.outputs)
+            # 卷积替换BatchNorm，BatchNorm的参数均位于该位置之前
+            conv_layer.id = layer_id
+            graph.layers[layer_id] = conv_layer
+            graph.layers.pop(conv_id)
+            param_layers.pop(bias_id, None)
+            param_layers.pop(param_ids["weight"], None)
+            changed_ids.append(layer_id)
+            changed_ids.extend(param_ids.values())
+            fold_num += 1
+        PassManager.add_stats(matches=fold_num)
+        if fold_num > 0:
+            graph.update_edges(changed_ids, remove_isolated=True)
+            # 不再被使用的BatchNorm参数随create_parameter一起删除
+            for param_id, param_name in param_layers.items():
+                if param_id not in graph.layers:
+                    parameters.pop(param_name, None)
+
+    def match(self, graph, bn_id, layer_ids, positions):
+        """ 匹配BatchNorm及其之前的卷积，
+        成功时返回(卷积的id, 卷积, 各参数所在layer的id, 各参数的值)。
+        """
+        parameters = graph.parameters
+        bn_layer = graph.layers[bn_id]
+        input_layers = get_input_layers(graph, bn_id)
+        data_keys = [k for k in input_layers if k not in self.bn_param_keys]
+        if len(data_keys) != 1 or any(
+            [k not in input_layers for k in self.bn_param_keys]):
+            return None
+        conv_id = input_layers[data_keys[0]]
+        if conv_id == -1 or conv_id not in graph.layers:
+            return None
+        conv_layer = graph.layers[conv_id]
+        if conv_layer.kernel not in self.conv_layers + \
+                self.conv_transpose_layers or \
+                not has_single_consumer(graph, conv_id) or \
+                not can_move_to(graph, layer_ids, positions, conv_id, bn_id):
+            return None
+        # 折叠与通道所在的维度无关，卷积与BatchNorm的数据格式（通道在前或在后）一致即可
+        channel_last = set()
+        for layer in [conv_layer, bn_layer]:
+            data_format = layer.attrs.get("data_format", None)
+            channel_last.add(
+                data_format is not None and
+                data_format.strip("'\"") not in ["NCL", "NCHW", "NCDHW"])
+        if len(channel_last) != 1:
+            return None
+
+        def get_value(layer_id, single_consumer):
+            """ 获取参数或常量layer的值，无法获取时返回None。
+            """
+            if layer_id == -1 or layer_id not in graph.layers:
+                return None
+            if single_consumer and not has_single_consumer(graph, layer_id):
+                return None
+            layer = graph.layers[layer_id]
+            if layer.kernel in self.param_layers:
+                return parameters.get(layer.outputs[0], None)
+            if layer.kernel not in self.constant_layers:
+                return None
+            shape = layer.attrs.get("shape", None)
+            value = self.constant_layers[layer.kernel]
+            if value is None:
+                value = layer.attrs.get("fill_value", None)
+            if not isinstance(shape, (list, tuple)) or \
+                    not isinstance(value, (int, float)):
+                return None
+            return np.full(shape, value)
+
+        conv_inputs = get_input_layers(graph, conv_id)
+        param_ids = dict()
+        # 卷积的权重与偏置会被改写，只能被该卷积使用
+        param_ids["weight"] = conv_inputs.get("weight", -1)
+        if "bias" in conv_layer.inputs:
+            param_ids["conv_bias"] = conv_inputs.get("bias", -1)
+        for key in self.bn_param_keys:
+            param_ids["bn_" + key] = input_layers[key]
+        if len(set(param_ids.values())) != len(param_ids):
+            return None
+        params = dict()
+        for key, param_id in param_ids.items():
+            single_consumer = key in ["weight", "conv_bias"] or \
+                (key == "bn_bias" and "conv_bias" not in param_ids)
+            params[key] = get_value(param_id, single_consumer)
+            if not isinstance(params[key], np.ndarray):
+                return None
+        if graph.layers[param_ids["weight"]].kernel not in self.param_layers:
+            return None
+        if "conv_bias" in param_ids and graph.layers[param_ids["conv_bias"]].kernel not in self.param_layers:
+            return None
+        out_channels = get_out_channels(
+            params["weight"], conv_layer.kernel in self.conv_transpose_layers,
+            conv_layer.attrs.get("groups", 1))
+        if out_channels is None:
+            return None
+        for key, value in params.items():
+            if key != "weight" and value.size != out_channels:
+                return None
+        return conv_id, conv_layer, param_ids, params
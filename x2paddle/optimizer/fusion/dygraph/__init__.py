@@ -24,6 +24,8 @@ from .conv2d_add_fuser import DygraphConv2DAddFuser
 from .conv2d_add_fuse_pass import DygraphConv2DAddFusePass
 from .dropout_fuser import DygraphDropoutFuser
 from .dropout_fuse_pass import DygraphDropoutFusePass
+from .gemm_fuser import DygraphGemmFuser
+from .gemm_fuse_pass import DygraphGemmFusePass
 from .fc_fuser import DygraphFcFuser
 from .fc_fuse_pass import DygraphFcFusePass
 from .if_fuser import DygraphIfFuser
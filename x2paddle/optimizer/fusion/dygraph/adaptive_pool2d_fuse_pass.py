@@ -20,14 +20,11 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphAdaptivePool2dFusePass(Pass):
     name = "dygraph_adaptive_pool2d_fuse_pass"
+    fuser = DygraphAdaptivePool2dFuser
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphAdaptivePool2dFuser()
-        fuser.operate(graph, match_kind="topo")
-
 
 # 用于注册
 adaptive_pool2d_fuse_pass = DygraphAdaptivePool2dFusePass()
@@ -20,14 +20,11 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphBatchNorm2dFusePass(Pass):
     name = "dygraph_batchnorm2d_fuse_pass"
+    fuser = DygraphBatchNorm2dFuser
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphBatchNorm2dFuser()
-        fuser.operate(graph, match_kind="topo")
-
 
 # 用于注册
 batchnorm2d_fuse_pass = DygraphBatchNorm2dFusePass()
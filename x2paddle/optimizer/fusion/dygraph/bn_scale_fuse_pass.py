@@ -20,14 +20,11 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphBNScaleFusePass(Pass):
     name = "dygraph_bn_scale_fuse_pass"
+    fuser = DygraphBNScaleFuser
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphBNScaleFuser()
-        fuser.operate(graph, match_kind="topo")
-
 
 # 用于注册
 bn_scale_fuse_pass = DygraphBNScaleFusePass()
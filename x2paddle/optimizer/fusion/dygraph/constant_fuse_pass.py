@@ -20,14 +20,11 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphConstantFusePass(Pass):
     name = "dygraph_constant_fuse_pass"
+    fuser = DygraphConstantFuser
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphConstantFuser()
-        fuser.operate(graph, match_kind="topo")
-
 
 # 用于注册
 constant_fuse_pass = DygraphConstantFuser()
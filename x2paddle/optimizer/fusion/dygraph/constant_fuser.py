@@ -19,21 +19,21 @@ from x2paddle.core.util import *
 
 
 class DygraphConstantFuser(FuseBase):
+    # 描述需要替换的constant图结构。
+    # constant层模式python实现代码示例:
+    #     x3 = 10
+    #     for _x70 in range(x3):
+    #         ...
+    pattern_defs = [{
+        "layers": [("prim.constant", {}, ["x1"], {
+            "value": 2
+        })],
+        "outputs": ["x1"],
+    }]
+
     def __init__(self):
         super(DygraphConstantFuser, self).__init__(graph_type="dygraph")
 
-    def build_pattern(self):
-        """ 描述需要替换的constant图结构。
-        constant层模式python实现代码示例:
-            x3 = 10
-            for _x70 in range(x3):
-                ...
-        """
-        self.pattern.add_layer(
-            "prim.constant", inputs={}, outputs=["x1"], value=2)
-        self.pattern.build()
-        self.pattern.outputs = ["x1"]
-
     def insert_new_layer(self, graph, parameters, matches):
         def replace_value(layer_connect, match_name, match_value):
             for k, v in layer_connect.inputs.items():
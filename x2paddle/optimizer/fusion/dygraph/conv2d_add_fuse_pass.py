@@ -20,14 +20,13 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphConv2DAddFusePass(Pass):
     name = "dygraph_conv2d_add_fuse_pass"
+    fuser = DygraphConv2DAddFuser
+    match_kind = "edge"
+    fixpoint = False
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphConv2DAddFuser()
-        fuser.operate(graph, match_kind="edge")
-
 
 # 用于注册
-dygraph_conv2d_add_fuse_pass = DygraphConv2DAddFusePass()
\ No newline at end of file
+dygraph_conv2d_add_fuse_pass = DygraphConv2DAddFusePass()
@@ -20,14 +20,11 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphDropoutFusePass(Pass):
     name = "dygraph_dropout_fuse_pass"
+    fuser = DygraphDropoutFuser
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphDropoutFuser()
-        fuser.operate(graph, match_kind="topo")
-
 
 # 用于注册
 dropout_fuse_pass = DygraphDropoutFuser()
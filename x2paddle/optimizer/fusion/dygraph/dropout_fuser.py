@@ -19,23 +19,20 @@ from x2paddle.core.util import *
 
 
 class DygraphDropoutFuser(FuseBase):
+    # 描述需要替换的dropout图结构。
+    # dropout层模式python实现代码示例:
+    #     x1 = self.dropout0(x0)
+    pattern_defs = [{
+        "layers": [("paddle.nn.Dropout", {
+            "input": "dropout-input-0"
+        }, ["dropout0", "x1"])],
+        "inputs": ["dropout-input-0"],
+        "outputs": ["dropout0", "x1"],
+    }]
+
     def __init__(self):
         super(DygraphDropoutFuser, self).__init__(graph_type="dygraph")
 
-    def build_pattern(self):
-        """ 描述需要替换的constant图结构。
-        constant层模式python实现代码示例:
-            x3 = 10
-            for _x70 in range(x3):
-                ...
-        """
-        self.pattern.add_layer(
-            "paddle.nn.Dropout",
-            inputs={"input": "dropout-input-0"},
-            outputs=["dropout0", "x1"])
-        self.pattern.build(inputs={"input-0": "dropout-input-0"})
-        self.pattern.outputs = ["dropout0", "x1"]
-
     def insert_new_layer(self, graph, parameters, matches):
         def replace_value(layer_connect, match_name, match_input):
             for k, v in layer_connect.inputs.items():
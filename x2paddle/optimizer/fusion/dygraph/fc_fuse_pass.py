@@ -20,14 +20,11 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphFcFusePass(Pass):
     name = "dygraph_fc_fuse_pass"
+    fuser = DygraphFcFuser
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphFcFuser()
-        fuser.operate(graph, match_kind="topo")
-
 
 # 用于注册
 fc_fuse_pass = DygraphFcFusePass()
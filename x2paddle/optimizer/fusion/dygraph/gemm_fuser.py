@@ -0,0 +1,195 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+from x2paddle.optimizer.pattern_matcher import FuseBase
+from x2paddle.optimizer.pass_manager import PassManager
+from x2paddle.optimizer.utils import *
+from x2paddle.core.program import PaddleGraph, PaddleLayer
+from x2paddle.core.util import *
+
+
+class DygraphGemmFuser(FuseBase):
+    def __init__(self):
+        super(DygraphGemmFuser, self).__init__(graph_type="dygraph")
+
+    def operate(self, graph, match_kind=None):
+        """ 将权重为参数的matmul（及Gemm中的scale）与加上参数的add融合为paddle.nn.Linear，
+        alpha、beta以及MatMul中对权重的squeeze直接作用在参数上。
+        ONNX的Gemm与MatMul+Add会被转换为如下代码:
+        模式一（Gemm）：
+        fc_w = self.fc_w
+        x2_mm = paddle.matmul(x=x1, y=fc_w, transpose_y=True)
+        x2_mm = paddle.scale(x=x2_mm, scale=1.0)
+        fc_b = self.fc_b
+        x2 = paddle.add(x=x2_mm, y=fc_b)
+        模式二（MatMul+Add）：
+        fc_w = self.fc_w
+        fc_w_squeeze = paddle.squeeze(x=fc_w, axis=[0])
+        x2 = paddle.matmul(x=x1, y=fc_w_squeeze)
+        fc_b = self.fc_b
+        x3 = paddle.add(x=x2, y=fc_b)
+        融合后为：
+        x3 = self.linear0(x1)
+        """
+        parameters = graph.parameters
+        used_names = get_used_names(graph)
+        match_num = 0
+        for layer_id, layer in list(graph.layers.items()):
+            if layer.kernel != "paddle.add":
+                continue
+            match = self.match(graph, layer_id)
+            if match is None:
+                continue
+            weight = match["weight"]
+            linear_name = gen_layer_name("linear", used_names)
+            parameters["{}.weight".format(linear_name)] = weight
+            parameters["{}.bias".format(linear_name)] = match["bias"]
+            for param_name in match["param_names"]:
+                parameters.pop(param_name)
+            graph.layers[layer_id] = PaddleLayer(
+                layer_id,
+                "paddle.nn.Linear",
+                inputs={"x": match["input"]},
+                outputs=[linear_name, layer.outputs[0]],
+                scope_name=layer.scope_name,
+                in_features=weight.shape[0],
+                out_features=weight.shape[1])
+            for removed_id in match["removed_ids"]:
+                graph.layers.pop(removed_id)
+            match_num += 1
+        PassManager.add_stats(matches=match_num)
+        if match_num > 0:
+            graph.update_edges(remove_isolated=True)
+
+    def match(self, graph, add_id):
+        """ 以add为终点向上匹配，匹配成功时返回融合所需的信息，否则返回None。
+        除add外，匹配到的layer的输出都只能被匹配中的下一个layer使用。
+        """
+        parameters = graph.parameters
+
+        def get_layer(layer_id, kernel):
+            if layer_id == -1 or layer_id not in graph.layers:
+                return None
+            layer = graph.layers[layer_id]
+            if layer.kernel != kernel or not has_single_consumer(
+                    graph, layer_id):
+                return None
+            return layer
+
+        def get_scale(layer):
+            scale = layer.attrs.get("scale", 1.0)
+            bias = layer.attrs.get("bias", 0.0)
+            if not isinstance(scale, (int, float)) or bias != 0:
+                return None
+            return float(scale)
+
+        def get_parameter(layer_id):
+            layer = get_layer(layer_id, "self.create_parameter")
+            if layer is None or layer.outputs[0] not in parameters:
+                return None
+            return layer.outputs[0]
+
+        def get_output_rank(mm_layer, is_gemm):
+            # Gemm的输入均为2维；MatMul的权重为2维时，输出与x的维数相同
+            if is_gemm:
+                return 2
+            shape = getattr(mm_layer, "input_shapes", dict()).get("x", None)
+            if shape is None:
+                shape = graph.static_shapes.get(mm_layer.inputs["x"], None)
+            if shape is None:
+                return None
+            return len(shape)
+
+        input_layers = get_input_layers(graph, add_id)
+        for mm_key, bias_key in [("x", "y"), ("y", "x")]:
+            if mm_key not in input_layers or bias_key not in input_layers:
+                return None
+            removed_ids = list()
+            # matmul及Gemm中的scale(alpha)
+            mm_id = input_layers[mm_key]
+            alpha = 1.0
+            alpha_layer = get_layer(mm_id, "paddle.scale")
+            if alpha_layer is not None:
+                alpha = get_scale(alpha_layer)
+                if alpha is None:
+                    continue
+                removed_ids.append(mm_id)
+                mm_id = get_input_layers(graph, mm_id).get("x", -1)
+            mm_layer = get_layer(mm_id, "paddle.matmul")
+            if mm_layer is None or mm_layer.attrs.get("transpose_x", False):
+                continue
+            removed_ids.append(mm_id)
+            # 权重，MatMul中可能先squeeze
+            weight_id = get_input_layers(graph, mm_id).get("y", -1)
+            squeeze_axis = None
+            squeeze_layer = get_layer(weight_id, "paddle.squeeze")
+            if squeeze_layer is not None:
+                squeeze_axis = squeeze_layer.attrs.get("axis", None)
+                if not isinstance(squeeze_axis, (list, tuple)):
+                    continue
+                removed_ids.append(weight_id)
+                weight_id = get_input_layers(graph, weight_id).get("x", -1)
+            weight_name = get_parameter(weight_id)
+            if weight_name is None:
+                continue
+            removed_ids.append(weight_id)
+            # 偏置，Gemm中beta不为1时会先scale
+            bias_id = input_layers[bias_key]
+            beta = 1.0
+            scale_layer = get_layer(bias_id, "paddle.scale")
+            if scale_layer is not None:
+                beta = get_scale(scale_layer)
+                if beta is None:
+                    continue
+                removed_ids.append(bias_id)
+                bias_id = get_input_layers(graph, bias_id).get("x", -1)
+            bias_name = get_parameter(bias_id)
+            if bias_name is None or bias_name == weight_name:
+                continue
+            removed_ids.append(bias_id)
+
+            weight = parameters[weight_name]
+            bias = parameters[bias_name]
+            if not isinstance(weight, np.ndarray) or \
+                    not isinstance(bias, np.ndarray) or \
+                    weight.dtype != np.float32:
+                continue
+            if squeeze_axis is not None:
+                if any([weight.shape[i] != 1 for i in squeeze_axis]):
+                    continue
+                weight = np.squeeze(weight, axis=tuple(squeeze_axis))
+            if weight.ndim != 2:
+                continue
+            if mm_layer.attrs.get("transpose_y", False):
+                weight = weight.transpose((1, 0))
+            out_features = weight.shape[1]
+            # 偏置需要只在最后一维上变化，且不能使add的输出比matmul的输出多出维度，
+            # 如[1, out_features]的偏置要求matmul的输出至少为2维
+            if bias.size != out_features or bias.ndim > 2 or (
+                    bias.ndim > 1 and bias.shape[-1] != out_features):
+                continue
+            if bias.ndim == 2:
+                out_rank = get_output_rank(mm_layer, alpha_layer is not None)
+                if out_rank is None or out_rank < 2:
+                    continue
+            return {
+                "input": mm_layer.inputs["x"],
+                "weight": (weight * alpha).astype(np.float32),
+                "bias":
+                (bias.reshape([out_features]) * beta).astype(np.float32),
+                "param_names": [weight_name, bias_name],
+                "removed_ids": removed_ids
+            }
+        return None
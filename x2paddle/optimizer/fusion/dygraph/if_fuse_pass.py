@@ -20,14 +20,12 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphIfFusePass(Pass):
     name = "dygraph_if_fuse_pass"
+    fuser = DygraphIfFuser
+    match_kind = "op"
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphIfFuser()
-        fuser.operate(graph, match_kind="op")
-
 
 # 用于注册
 if_fuse_pass = DygraphIfFuser()
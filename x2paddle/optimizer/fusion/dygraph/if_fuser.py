@@ -19,26 +19,27 @@ from x2paddle.core.util import *
 
 
 class DygraphIfFuser(FuseBase):
+    # 描述需要替换的if图结构。
+    # if层模式python实现代码示例:
+    #     x81 = 'relu' in {'layer4': 'out', 'layer3': 'aux'}
+    #     if x81 :
+    #         ...
+    pattern_defs = [{
+        "layers": [("prim.if", {
+            "input": "if-input-0"
+        }, ["x0"])],
+        "inputs": ["if-input-0"],
+    }]
+
     def __init__(self):
         super(DygraphIfFuser, self).__init__(graph_type="dygraph")
 
-    def build_pattern(self):
-        """ 描述需要替换的if图结构。
-        if层模式python实现代码示例:
-            x81 = 'relu' in {'layer4': 'out', 'layer3': 'aux'}
-            if x81 :
-                ...
-        """
-        self.pattern.add_layer(
-            "prim.if", inputs={"input": "if-input-0"}, outputs=["x0"])
-        self.pattern.build(inputs={"input-0": "if-input-0"})
-
     def insert_new_layer(self, graph, parameters, matches):
         layer_id = list(matches.keys())[0]
         layer = list(matches.values())[0]
         if "input" not in layer.inputs:
             matches.pop(layer_id)
-            return 
+            return
         for id in graph.edges_in[layer_id]:
             input_layer = graph.layers[id]
             input_layer_id = id
@@ -63,4 +64,4 @@ class DygraphIfFuser(FuseBase):
         layer.inputs.pop("input")
         matches.pop(layer_id)
         if len(input_layer.outputs) == 1:
-            matches[input_id] = input_layer
\ No newline at end of file
+            matches[input_id] = input_layer
@@ -20,14 +20,11 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphInterpolateBilinearFusePass(Pass):
     name = "dygraph_interpolate_bilinear_fuse_pass"
+    fuser = DygraphInterpolateBilinearFuser
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphInterpolateBilinearFuser()
-        fuser.operate(graph, match_kind="topo")
-
 
 # 用于注册
 interpolate_bilinear_fuse_pass = DygraphInterpolateBilinearFusePass()
@@ -149,7 +149,7 @@ class DygraphInterpolateBilinearFuser(FuseBase):
             outputs=[gen_name(20)])
         if_layer2 = pattern_block.layers[list(pattern_block.layers.keys())[
             -1]]
-        pattern_block_block = PaddleGraph(parent_layer=if_layer2, graph_type="dygraph")            
+        pattern_block_block = PaddleGraph(parent_layer=if_layer2, graph_type="dygraph")
         pattern_block_block.add_layer(
             "prim.getitem",
             inputs={"list": gen_name(11)},
@@ -245,11 +245,11 @@ class DygraphInterpolateBilinearFuser(FuseBase):
             outputs=[gen_name(14)])
         if_layer1.add_block(pattern_block)
         if_layer1.inputs.update({
-            'input-2': 'interpolate-input-0', 
-            'input-4': gen_name(11), 
-            'input-6': gen_name(11), 
-            'input-8': 'interpolate-input-0', 
-            'input-9': 'interpolate-input-3', 
+            'input-2': 'interpolate-input-0',
+            'input-4': gen_name(11),
+            'input-6': gen_name(11),
+            'input-8': 'interpolate-input-0',
+            'input-9': 'interpolate-input-3',
             'input-10': 'interpolate-input-0'
         })
         pattern.build(inputs={
@@ -260,8 +260,8 @@ class DygraphInterpolateBilinearFuser(FuseBase):
             "input-4": "interpolate-input-4"
         })
         self.patterns.append(pattern)
-            
-            
+
+
 
     def insert_new_layer(self, graph, parameters, matches):
         new_layer = self.gen_new_layer(parameters, matches)
@@ -276,13 +276,13 @@ class DygraphInterpolateBilinearFuser(FuseBase):
                 new_matches[layer_id] = layer
                 if layer_id == list(matches.keys())[-1]:
                     break
-        new_layer_id = new_layer.layer_id
+        new_layer_id = new_layer.id
         graph.layers[new_layer_id] = new_layer
         new_matches.pop(new_layer_id)
         matches.clear()
         for layer_id, layer in new_matches.items():
             matches[layer_id] = layer
-        
+
 
     def gen_new_layer(self, parameters, matches):
         layers = list()
@@ -293,6 +293,6 @@ class DygraphInterpolateBilinearFuser(FuseBase):
         new_layer = copy.deepcopy(layer)
         layer = matches[layers_id[9]]
         new_layer.outputs[0] = layer.outputs[0]
-        new_layer.layer_id = layers_id[7]
+        new_layer.id = layers_id[7]
         new_layer.inputs["size"] = size
         return new_layer
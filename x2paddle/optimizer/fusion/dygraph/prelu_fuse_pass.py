@@ -20,14 +20,12 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphPReLUFusePass(Pass):
     name = "dygraph_prelu_fuse_pass"
+    fuser = DygraphPReLUFuser
+    match_kind = "edge"
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphPReLUFuser()
-        fuser.operate(graph, match_kind="edge")
-
 
 # 用于注册
-dygraph_prelu_fuse_pass = DygraphPReLUFusePass()
\ No newline at end of file
+dygraph_prelu_fuse_pass = DygraphPReLUFusePass()
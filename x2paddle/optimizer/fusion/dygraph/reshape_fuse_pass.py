@@ -20,14 +20,12 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphReshapeFusePass(Pass):
     name = "dygraph_reshape_fuse_pass"
+    fuser = DygraphReshapeFuser
+    match_kind = "edge"
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphReshapeFuser()
-        fuser.operate(graph, match_kind="edge")
-
 
 # 用于注册
 reshape_fuse_pass = DygraphReshapeFusePass()
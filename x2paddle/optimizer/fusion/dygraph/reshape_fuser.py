@@ -19,43 +19,34 @@ from x2paddle.core.util import *
 
 
 class DygraphReshapeFuser(FuseBase):
-    def __init__(self):
-        super(DygraphReshapeFuser, self).__init__(graph_type="dygraph")
-
-    def build_pattern(self):
-        """ 描述需要替换的reshape图结构。
-        reshape层模式python实现代码示例:
-            x165 = int(x164)
-            x166 = [x158, x159, x165]
-            x167 = paddle.reshape(x=x157, shape=x166)
-        """
-
-        def gen_name(id):
-            return "x" + str(id)
-
-        self.pattern.add_layer(
-            "prim.int",
-            inputs={"input": "reshape-input-0"},
-            outputs=[gen_name(0)])
-        self.pattern.add_layer(
-            "prim.list",
-            inputs={
+    # 描述需要替换的reshape图结构。
+    # reshape层模式python实现代码示例:
+    #     x165 = int(x164)
+    #     x166 = [x158, x159, x165]
+    #     x167 = paddle.reshape(x=x157, shape=x166)
+    pattern_defs = [{
+        "layers": [
+            ("prim.int", {
+                "input": "reshape-input-0"
+            }, ["x0"]),
+            ("prim.list", {
                 "input0": "reshape-input-1",
                 "input1": "reshape-input-2",
-                "input2": gen_name(0)
-            },
-            outputs=[gen_name(1)])
-        self.pattern.add_layer(
-            "paddle.reshape",
-            inputs={"x": "reshape-input-3",
-                    "shape": gen_name(1)},
-            outputs=[gen_name(2)])
-        self.pattern.build(inputs={
-            "input-0": "reshape-input-0",
-            "input-1": "reshape-input-1",
-            "input-2": "reshape-input-2",
-            "input-3": "reshape-input-3",
-        })
+                "input2": "x0"
+            }, ["x1"]),
+            ("paddle.reshape", {
+                "x": "reshape-input-3",
+                "shape": "x1"
+            }, ["x2"]),
+        ],
+        "inputs": [
+            "reshape-input-0", "reshape-input-1", "reshape-input-2",
+            "reshape-input-3"
+        ],
+    }]
+
+    def __init__(self):
+        super(DygraphReshapeFuser, self).__init__(graph_type="dygraph")
 
     def insert_new_layer(self, graph, parameters, matches):
         self.update_layer(matches)
@@ -20,14 +20,12 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class DygraphTFBatchNormFusePass(Pass):
     name = "dygraph_tf_batchnorm_fuse_pass"
+    fuser = DygraphTFBatchNormFuser
+    match_kind = "edge"
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = DygraphTFBatchNormFuser()
-        fuser.operate(graph, match_kind="edge")
-
 
 # 用于注册
-dygraph_tf_batchnorm_fuse_pass = DygraphTFBatchNormFusePass()
\ No newline at end of file
+dygraph_tf_batchnorm_fuse_pass = DygraphTFBatchNormFusePass()
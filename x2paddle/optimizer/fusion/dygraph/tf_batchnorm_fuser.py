@@ -29,7 +29,7 @@ class DygraphTFBatchNormFuser(FuseBase):
     def build_pattern(self):
         """ 描述需要替换的batchnorm图结构。
         batchnorm层模式python实现代码示例:
-            
+
         """
 
         def gen_name(id):
@@ -87,7 +87,7 @@ class DygraphTFBatchNormFuser(FuseBase):
             outputs=[gen_name(11)])
         pattern.build(inputs={"input-0": "bn-input-0", })
         self.patterns.append(pattern)
-        
+
         pattern = PaddleGraph(graph_type="dygraph")
         pattern.add_layer(
             "self.create_parameter",
@@ -145,9 +145,9 @@ class DygraphTFBatchNormFuser(FuseBase):
         new_layers, last_layer_id = self.gen_new_layer(matches, parameters, graph)
         matches_copy = copy.deepcopy(matches)
         for layer_id, layer in matches_copy.items():
-            for i in range(3):
-                if layer_id == new_layers[i].id:
-                    matches.pop(new_layers[i].id)
+            for new_layer in new_layers:
+                if layer_id == new_layer.id:
+                    matches.pop(new_layer.id)
         prefix_layers = OrderedDict()
         mid_layers = OrderedDict()
         suffix_layers = OrderedDict()
@@ -157,8 +157,8 @@ class DygraphTFBatchNormFuser(FuseBase):
                 suffix_layers[layer_id] = layer
             else:
                 if layer_id == last_layer_id:
-                    for i in range(3):
-                        mid_layers[new_layers[i].id] = new_layers[i]
+                    for new_layer in new_layers:
+                        mid_layers[new_layer.id] = new_layer
                     is_need_id = True
                 prefix_layers[layer_id] = layer
         prefix_layers.update(mid_layers)
@@ -195,21 +195,11 @@ class DygraphTFBatchNormFuser(FuseBase):
                     in_layer_id = graph.edges_in[layer_id][0]
                     if in_layer_id not in matches:
                         input_name = layer.inputs["x"]
-        transpose0 = PaddleLayer(
-            id=layer_id_list[-1] + "_1",
-            kernel="paddle.transpose",
-            inputs={"x": input_name},
-            outputs=["{}_transpose_for_bn".format(input_name)],
-            perm=[0, 3, 1, 2])
         bn_name = "merge_bn{}".format(self.bn_index)
         self.bn_index += 1
         params = parameters[gamma_layer.outputs[0]]
         c = params.shape[0]
-        bn = PaddleLayer(
-            id=layer_id_list[-1] + "_2",
-            kernel="paddle.nn.BatchNorm",
-            inputs={"input": "{}_transpose_for_bn".format(input_name)},
-            outputs=[bn_name, "{}_bn".format(input_name)],
+        bn_attrs = dict(
             num_channels=c,
             epsilon=full_layer.attrs["fill_value"],
             param_attr=string(gamma_layer.outputs[0]),
@@ -217,6 +207,28 @@ class DygraphTFBatchNormFuser(FuseBase):
             moving_mean_name=string(mean_layer.outputs[0]),
             moving_variance_name=string(var_layer.outputs[0]),
             is_test=True)
+        if graph.data_format == "NHWC":
+            # 保持NHWC时直接使用NHWC的BatchNorm，不插入transpose
+            bn = PaddleLayer(
+                id=layer_id_list[-1] + "_2",
+                kernel="paddle.nn.BatchNorm",
+                inputs={"input": input_name},
+                outputs=[bn_name] + add_layer.outputs,
+                data_layout=string("NHWC"),
+                **bn_attrs)
+            return [bn], layer_id_list[-1]
+        transpose0 = PaddleLayer(
+            id=layer_id_list[-1] + "_1",
+            kernel="paddle.transpose",
+            inputs={"x": input_name},
+            outputs=["{}_transpose_for_bn".format(input_name)],
+            perm=[0, 3, 1, 2])
+        bn = PaddleLayer(
+            id=layer_id_list[-1] + "_2",
+            kernel="paddle.nn.BatchNorm",
+            inputs={"input": "{}_transpose_for_bn".format(input_name)},
+            outputs=[bn_name, "{}_bn".format(input_name)],
+            **bn_attrs)
         transpose1 = PaddleLayer(
             id=layer_id_list[-1] + "_3",
             kernel="paddle.transpose",
@@ -224,4 +236,3 @@ class DygraphTFBatchNormFuser(FuseBase):
             outputs=add_layer.outputs,
             perm=[0, 2, 3, 1])
         return [transpose0, bn, transpose1], layer_id_list[-1]
-
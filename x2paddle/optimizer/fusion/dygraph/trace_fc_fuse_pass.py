@@ -20,14 +20,11 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class TraceFcFusePass(Pass):
     name = "trace_fc_fuse_pass"
+    fuser = TraceFcFuser
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = TraceFcFuser()
-        fuser.operate(graph, match_kind="topo")
-
 
 # 用于注册
-trace_fc_fuse_pass = TraceFcFusePass()
\ No newline at end of file
+trace_fc_fuse_pass = TraceFcFusePass()
@@ -16,8 +16,9 @@ from .bn_scale_fuser import Static_BNScaleFuser
 from .bn_scale_fuse_pass import Static_BNScaleFusePass
 from .conv2d_add_fuser import StaticConv2DAddFuser
 from .conv2d_add_fuse_pass import StaticConv2DAddFusePass
+from .gemm_fuser import StaticGemmFuser
+from .gemm_fuse_pass import StaticGemmFusePass
 from .prelu_fuser import StaticPReLUFuser
 from .prelu_fuse_pass import StaticPReLUFusePass
 from .tf_batchnorm_fuser import StaticTFBatchNormFuser
 from .tf_batchnorm_fuse_pass import StaticTFBatchNormFusePass
-
@@ -20,14 +20,11 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class Static_BNScaleFusePass(Pass):
     name = "static_bn_scale_fuse_pass"
+    fuser = Static_BNScaleFuser
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = Static_BNScaleFuser()
-        fuser.operate(graph, match_kind="topo")
-
 
 # 用于注册
 bn_scale_fuse_pass = Static_BNScaleFusePass()
@@ -20,14 +20,13 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class StaticConv2DAddFusePass(Pass):
     name = "static_conv2d_add_fuse_pass"
+    fuser = StaticConv2DAddFuser
+    match_kind = "edge"
+    fixpoint = False
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = StaticConv2DAddFuser()
-        fuser.operate(graph, match_kind="edge")
-
 
 # 用于注册
-static_conv2d_add_fuse_pass = StaticConv2DAddFusePass()
\ No newline at end of file
+static_conv2d_add_fuse_pass = StaticConv2DAddFusePass()
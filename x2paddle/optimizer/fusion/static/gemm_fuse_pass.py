@@ -0,0 +1,35 @@
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from x2paddle.optimizer.pass_ import Pass
+from x2paddle.optimizer.fusion.static import StaticGemmFuser
+from x2paddle.optimizer.pass_manager import pass_register
+
+
+@pass_register
+class StaticGemmFusePass(Pass):
+    name = "static_gemm_fuse_pass"
+    # 一次遍历即可完成所有融合，融合结果不会产生新的匹配
+    fixpoint = False
+
+    def __init__(self):
+        Pass.__init__(self)
+
+    def apply(self, graph):
+        fuser = StaticGemmFuser()
+        fuser.operate(graph)
+
+
+# 用于注册
+gemm_fuse_pass = StaticGemmFusePass()
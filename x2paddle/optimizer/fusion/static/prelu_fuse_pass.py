@@ -20,14 +20,12 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class StaticPReLUFusePass(Pass):
     name = "static_prelu_fuse_pass"
+    fuser = StaticPReLUFuser
+    match_kind = "edge"
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = StaticPReLUFuser()
-        fuser.operate(graph, match_kind="edge")
-
 
 # 用于注册
-static_prelu_fuse_pass = StaticPReLUFusePass()
\ No newline at end of file
+static_prelu_fuse_pass = StaticPReLUFusePass()
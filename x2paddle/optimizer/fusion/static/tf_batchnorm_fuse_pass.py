@@ -20,14 +20,12 @@ from x2paddle.optimizer.pass_manager import pass_register
 @pass_register
 class StaticTFBatchNormFusePass(Pass):
     name = "static_tf_batchnorm_fuse_pass"
+    fuser = StaticTFBatchNormFuser
+    match_kind = "edge"
 
     def __init__(self):
         Pass.__init__(self)
 
-    def apply(self, graph):
-        fuser = StaticTFBatchNormFuser()
-        fuser.operate(graph, match_kind="edge")
-
 
 # 用于注册
-static_tf_batchnorm_fuse_pass = StaticTFBatchNormFusePass()
\ No newline at end of file
+static_tf_batchnorm_fuse_pass = StaticTFBatchNormFusePass()
@@ -28,7 +28,7 @@ class StaticTFBatchNormFuser(FuseBase):
     def build_pattern(self):
         """ 描述需要替换的batchnorm图结构。
         batchnorm层模式python实现代码示例:
-            
+
         """
 
         def gen_name(id):
@@ -86,7 +86,7 @@ class StaticTFBatchNormFuser(FuseBase):
             outputs=[gen_name(11)])
         pattern.build(inputs={"input-0": "bn-input-0", })
         self.patterns.append(pattern)
-        
+
         pattern = PaddleGraph(graph_type="dygraph")
         pattern.add_layer(
             "paddle.static.create_parameter",
@@ -144,9 +144,9 @@ class StaticTFBatchNormFuser(FuseBase):
         new_layers, last_layer_id = self.gen_new_layer(matches, parameters, graph)
         matches_copy = copy.deepcopy(matches)
         for layer_id, layer in matches_copy.items():
-            for i in range(7):
-                if layer_id == new_layers[i].id:
-                    matches.pop(new_layers[i].id)
+            for new_layer in new_layers:
+                if layer_id == new_layer.id:
+                    matches.pop(new_layer.id)
         prefix_layers = OrderedDict()
         mid_layers = OrderedDict()
         suffix_layers = OrderedDict()
@@ -156,8 +156,8 @@ class StaticTFBatchNormFuser(FuseBase):
                 suffix_layers[layer_id] = layer
             else:
                 if layer_id == last_layer_id:
-                    for i in range(7):
-                        mid_layers[new_layers[i].id] = new_layers[i]
+                    for new_layer in new_layers:
+                        mid_layers[new_layer.id] = new_layer
                     is_need_id = True
                 prefix_layers[layer_id] = layer
         prefix_layers.update(mid_layers)
@@ -194,22 +194,41 @@ class StaticTFBatchNormFuser(FuseBase):
                     in_layer_id = graph.edges_in[layer_id][0]
                     if in_layer_id not in matches:
                         input_name = layer.inputs["x"]
+        bn_inputs = {
+            "running_mean": mean_layer.outputs[0],
+            "running_var": var_layer.outputs[0],
+            "weight": gamma_layer.outputs[0],
+            "bias": beta_layer.outputs[0]
+        }
+        mean_layer.id = layer_id_list[-1] + "_01"
+        var_layer.id = layer_id_list[-1] + "_02"
+        gamma_layer.id = layer_id_list[-1] + "_03"
+        beta_layer.id = layer_id_list[-1] + "_04"
+        param_layers = [mean_layer, var_layer, gamma_layer, beta_layer]
+        if graph.data_format == "NHWC":
+            # 保持NHWC时直接使用NHWC的batch_norm，不插入transpose
+            bn = PaddleLayer(
+                id=layer_id_list[-1] + "_2",
+                kernel="paddle.nn.functional.batch_norm",
+                inputs=dict({
+                    "x": input_name
+                }, **bn_inputs),
+                outputs=add_layer.outputs,
+                epsilon=full_layer.attrs["fill_value"],
+                data_format=string("NHWC"))
+            return param_layers + [bn], layer_id_list[-1]
         transpose0 = PaddleLayer(
             id=layer_id_list[-1] + "_1",
             kernel="paddle.transpose",
             inputs={"x": input_name},
             outputs=["{}_transpose_for_bn".format(input_name)],
             perm=[0, 3, 1, 2])
-        params = parameters[gamma_layer.outputs[0]]
-        c = params.shape[0]
         bn = PaddleLayer(
             id=layer_id_list[-1] + "_2",
             kernel="paddle.nn.functional.batch_norm",
-            inputs={"x": "{}_transpose_for_bn".format(input_name),
-                    "running_mean": mean_layer.outputs[0],
-                    "running_var": var_layer.outputs[0],
-                    "weight": gamma_layer.outputs[0],
-                    "bias": beta_layer.outputs[0]},
+            inputs=dict({
+                "x": "{}_transpose_for_bn".format(input_name)
+            }, **bn_inputs),
             outputs=["{}_bn".format(input_name)],
             epsilon=full_layer.attrs["fill_value"])
         transpose1 = PaddleLayer(
@@ -218,10 +237,4 @@ class StaticTFBatchNormFuser(FuseBase):
             inputs={"x": "{}_bn".format(input_name)},
             outputs=add_layer.outputs,
             perm=[0, 2, 3, 1])
-        mean_layer.id = layer_id_list[-1] + "_01"
-        var_layer.id = layer_id_list[-1] + "_02"
-        gamma_layer.id = layer_id_list[-1] + "_03"
-        beta_layer.id = layer_id_list[-1] + "_04"
-        return [mean_layer, var_layer, gamma_layer, beta_layer, 
-                transpose0, bn, transpose1], layer_id_list[-1]
-
+        return param_layers + [transpose0, bn, transpose1], layer_id_list[-1]
@@ -13,61 +13,177 @@
 # limitations under the License.
 
 from x2paddle.optimizer.pass_manager import PassManager
-from x2paddle.optimizer.fusion.dygraph import *
-from x2paddle.optimizer.fusion.static import *
-from x2paddle.optimizer.elimination.dygraph import *
-from x2paddle.optimizer.elimination.static import *
+
+# 各框架默认的pass流水线，每一项为(pass的名字, 启用该pass的最低优化级别)：
+#     -O0: 不执行任何pass；
+#     -O1: 只执行局部的算子融合；
+#     -O2: 默认级别，增加转置消除、常量折叠、卷积与BatchNorm折叠等分析整个图或改写参数的pass；
+#     -O3: 增加激进的常量折叠，允许折叠结果明显大于输入的layer（如广播、paddle.full）。
+# key为(source_frame, paddle_type)，PyTorch按jit_type区分。
+DEFAULT_PIPELINES = {
+    ("pytorch", "trace"): [
+        ("trace_fc_fuse_pass", 1),
+        ("dygraph_constant_fold_pass", 2),
+        ("dygraph_aggressive_constant_fold_pass", 3),
+        ("dygraph_conv_bn_fold_pass", 2),
+        ("dygraph_cse_eliminate_pass", 2),
+        ("dygraph_dead_code_eliminate_pass", 2),
+    ],
+    ("pytorch", "script"): [
+        ("dygraph_constant_fuse_pass", 1),
+        ("dygraph_batchnorm2d_fuse_pass", 1),
+        ("dygraph_interpolate_bilinear_fuse_pass", 1),
+        ("dygraph_fc_fuse_pass", 1),
+        ("dygraph_adaptive_pool2d_fuse_pass", 1),
+        ("dygraph_reshape_fuse_pass", 1),
+        ("dygraph_dropout_fuse_pass", 1),
+        ("dygraph_if_fuse_pass", 1),
+        ("dygraph_constant_fold_pass", 2),
+        ("dygraph_aggressive_constant_fold_pass", 3),
+        ("dygraph_conv_bn_fold_pass", 2),
+        ("dygraph_cse_eliminate_pass", 2),
+        ("dygraph_dead_code_eliminate_pass", 2),
+    ],
+    ("caffe", "dygraph"): [
+        ("dygraph_bn_scale_fuse_pass", 1),
+        ("dygraph_constant_fold_pass", 2),
+        ("dygraph_aggressive_constant_fold_pass", 3),
+        ("dygraph_conv_bn_fold_pass", 2),
+        ("dygraph_cse_eliminate_pass", 2),
+        ("dygraph_dead_code_eliminate_pass", 2),
+    ],
+    ("caffe", "static"): [
+        ("static_bn_scale_fuse_pass", 1),
+        ("static_constant_fold_pass", 2),
+        ("static_aggressive_constant_fold_pass", 3),
+        ("static_conv_bn_fold_pass", 2),
+        ("static_cse_eliminate_pass", 2),
+        ("static_dead_code_eliminate_pass", 2),
+    ],
+    ("tf", "dygraph"): [
+        ("dygraph_conv2d_add_fuse_pass", 1),
+        ("dygraph_tf_batchnorm_fuse_pass", 1),
+        ("dygraph_prelu_fuse_pass", 1),
+        ("dygraph_constant_fold_pass", 2),
+        ("dygraph_aggressive_constant_fold_pass", 3),
+        ("transpose_eliminate_pass", 2),
+        ("dygraph_conv_bn_fold_pass", 2),
+        ("dygraph_cse_eliminate_pass", 2),
+        ("dygraph_dead_code_eliminate_pass", 2),
+    ],
+    ("tf", "static"): [
+        ("static_conv2d_add_fuse_pass", 1),
+        ("static_tf_batchnorm_fuse_pass", 1),
+        ("static_prelu_fuse_pass", 1),
+        ("static_constant_fold_pass", 2),
+        ("static_aggressive_constant_fold_pass", 3),
+        ("static_transpose_eliminate_pass", 2),
+        ("static_conv_bn_fold_pass", 2),
+        ("static_cse_eliminate_pass", 2),
+        ("static_dead_code_eliminate_pass", 2),
+    ],
+    ("onnx", "dygraph"): [
+        ("dygraph_constant_fold_pass", 2),
+        ("dygraph_aggressive_constant_fold_pass", 3),
+        ("dygraph_gemm_fuse_pass", 1),
+        ("transpose_eliminate_pass", 2),
+        ("dygraph_conv_bn_fold_pass", 2),
+        ("dygraph_cse_eliminate_pass", 2),
+        ("dygraph_dead_code_eliminate_pass", 2),
+    ],
+    ("onnx", "static"): [
+        ("static_constant_fold_pass", 2),
+        ("static_aggressive_constant_fold_pass", 3),
+        ("static_gemm_fuse_pass", 1),
+        ("static_transpose_eliminate_pass", 2),
+        ("static_conv_bn_fold_pass", 2),
+        ("static_cse_eliminate_pass", 2),
+        ("static_dead_code_eliminate_pass", 2),
+    ],
+}
+
+
+def get_default_passes(source_frame,
+                       paddle_type="dygraph",
+                       jit_type="trace",
+                       opt_level=2):
+    """ 获取默认流水线中优化级别不超过opt_level的pass。
+    """
+    if source_frame == "pytorch":
+        key = (source_frame, "trace" if jit_type == "trace" else "script")
+    else:
+        key = (source_frame, paddle_type)
+    return [
+        name for name, level in DEFAULT_PIPELINES.get(key, [])
+        if level <= opt_level
+    ]
+
 
 class GraphOptimizer(object):
-    def __init__(self, source_frame, paddle_type="dygraph", jit_type="trace"):
-        if source_frame == "pytorch":
-            if jit_type == "trace":
-                self.passes = ["trace_fc_fuse_pass"]
-            else:
-                self.passes = [
-                    "dygraph_constant_fuse_pass", 
-                    "dygraph_batchnorm2d_fuse_pass",
-                    "dygraph_interpolate_bilinear_fuse_pass", 
-                    "dygraph_fc_fuse_pass",
-                    "dygraph_adaptive_pool2d_fuse_pass", 
-                    "dygraph_reshape_fuse_pass",
-                    "dygraph_dropout_fuse_pass",
-                    "dygraph_if_fuse_pass"
-                ]
-        elif source_frame == "caffe":
-            if paddle_type == "dygraph":
-                self.passes = ["dygraph_bn_scale_fuse_pass"]
-            else:
-                self.passes = ["static_bn_scale_fuse_pass"]
-        elif source_frame == "tf":
-            if paddle_type == "dygraph":
-                self.passes = [
-                    "dygraph_conv2d_add_fuse_pass",
-                    "dygraph_tf_batchnorm_fuse_pass",
-                    "dygraph_prelu_fuse_pass",
-                    "transpose_eliminate_pass"
-                ]
-            else:
-                self.passes = [
-                    "static_conv2d_add_fuse_pass",
-                    "static_tf_batchnorm_fuse_pass",
-                    "static_prelu_fuse_pass",
-                    "static_transpose_eliminate_pass"
-                ]
-        else:
-            self.passes = []
+    """ 图优化器。
+
+    Args:
+        source_frame (str): 源框架，为"pytorch"、"caffe"、"tf"、"onnx"。
+        paddle_type (str): 转换后的模型类型，为"dygraph"或"static"。
+        jit_type (str): PyTorch模型的转换方式，为"trace"或"script"。
+        opt_level (int): 优化级别，取值为0~3，见DEFAULT_PIPELINES。
+        passes (list): 指定需要执行的pass，指定后忽略opt_level及默认流水线。
+        disable_passes (list): 不执行的pass。
+    """
+
+    def __init__(self,
+                 source_frame,
+                 paddle_type="dygraph",
+                 jit_type="trace",
+                 opt_level=2,
+                 passes=None,
+                 disable_passes=None):
+        assert opt_level in [0, 1, 2, 3], \
+            "opt_level must be 0, 1, 2 or 3, but received {}".format(opt_level)
+        if passes is None:
+            passes = get_default_passes(source_frame, paddle_type, jit_type,
+                                        opt_level)
+        disable_passes = list(disable_passes or [])
+        for name in disable_passes:
+            PassManager.get_pass(name)
+        passes = [name for name in passes if name not in disable_passes]
+        self.passes = PassManager.resolve(passes)
+        for name in self.passes:
+            if name in disable_passes:
+                raise Exception(
+                    "Pass '{}' is disabled but required by other passes".format(
+                        name))
+
+    def get_match_stages(self):
+        """ 获取每个pass开始的匹配阶段：从该pass开始连续的融合pass的(fuser类, match_kind)，
+        不是融合pass时为None。同一阶段的fuser在一次遍历中一起匹配。
+        """
+        stages = [None] * len(self.passes)
+        stage = list()
+        for i in reversed(range(len(self.passes))):
+            pass_ = PassManager.get_pass(self.passes[i])
+            if pass_.fuser is None:
+                stage = list()
+                continue
+            stage = [(pass_.fuser, pass_.match_kind)] + stage
+            stages[i] = stage
+        return stages
 
     def optimize(self, graph):
-        for pass_name in self.passes:
-            pass_ = PassManager.lookup(pass_name)()
-            if pass_name.endswith("_eliminate_pass") or pass_name.endswith("_conv2d_add_fuse_pass"):
-                pass_.apply(graph)
-            else:
-                while True:
-                    before_len = len(graph.layers)
-                    pass_.apply(graph)
-                    after_len = len(graph.layers)
-                    if before_len == after_len:
-                        break
-            print("{} done!".format(pass_name))
+        stages = self.get_match_stages()
+        graph.prefetched_matches = dict()
+        try:
+            for pass_name, stage in zip(self.passes, stages):
+                graph.match_stage = stage
+                PassManager.run(pass_name, graph)
+                if stage is None:
+                    # 其他pass修改图后，预先匹配的结果失效
+                    graph.prefetched_matches.clear()
+                print("{} done!".format(pass_name))
+        finally:
+            graph.match_stage = None
+            graph.prefetched_matches = None
+        if len(self.passes) > 0:
+            # 各pass中只增量更新了边，最后整体build一次以更新输入输出
+            graph.build()
         return graph
@@ -15,12 +15,25 @@
 
 class Pass(object):
     name = "pass"
+    # 是否重复执行直到图不再变化
+    fixpoint = True
+    # 依赖的pass，未在流水线中时会被自动加入，并排在本pass之前
+    requires = []
+    # 只约束顺序的pass，同时在流水线中时需排在本pass之前
+    after = []
+    # 融合pass的fuser类及其匹配方式，apply默认执行fuser的operate；
+    # 流水线中相邻的融合pass会在一次遍历中一起匹配
+    fuser = None
+    match_kind = "topo"
 
     def __init__(self):
         pass
 
     def apply(self, graph):
-        raise NotImplementedError("The apply function must be implemented!")
+        if self.fuser is None:
+            raise NotImplementedError("The apply function must be implemented!")
+        fuser = self.fuser()
+        fuser.operate(graph, match_kind=self.match_kind)
 
     @classmethod
     def get_name(cls):
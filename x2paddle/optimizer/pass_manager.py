@@ -14,11 +14,94 @@
 # limitations under the License.
 
 
+import collections
+import importlib
+import time
+
+from x2paddle.core.profiler import profiler
+
+# 每个pass统计的字段
+STAT_KEYS = [
+    "time", "applied", "iterations", "matches", "dropped_matches",
+    "layers_removed", "layers_added", "params_folded"
+]
+
+
 class PassManager(object):
     """ pass管理器。
     """
     # pass_map存储name与其对应的pass
     pass_map = dict()
+    # 各pass的统计信息，name -> {STAT_KEYS中的字段: 数值}
+    stats = collections.OrderedDict()
+    # 正在执行的pass，fuser通过add_stats上报匹配数量时使用
+    current_pass = None
+    # pass_modules存储name与定义该pass的模块，
+    # 在lookup时才导入对应模块完成注册，避免导入optimizer时加载所有pass
+    pass_modules = {
+        "transpose_eliminate_pass":
+        "x2paddle.optimizer.elimination.dygraph.transpose_eliminate_pass",
+        "static_transpose_eliminate_pass":
+        "x2paddle.optimizer.elimination.static.transpose_eliminate_pass",
+        "dygraph_cse_eliminate_pass":
+        "x2paddle.optimizer.elimination.dygraph.cse_eliminate_pass",
+        "static_cse_eliminate_pass":
+        "x2paddle.optimizer.elimination.static.cse_eliminate_pass",
+        "dygraph_dead_code_eliminate_pass":
+        "x2paddle.optimizer.elimination.dygraph.dead_code_eliminate_pass",
+        "static_dead_code_eliminate_pass":
+        "x2paddle.optimizer.elimination.static.dead_code_eliminate_pass",
+        "dygraph_adaptive_pool2d_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.adaptive_pool2d_fuse_pass",
+        "dygraph_batchnorm2d_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.batchnorm2d_fuse_pass",
+        "dygraph_bn_scale_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.bn_scale_fuse_pass",
+        "dygraph_constant_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.constant_fuse_pass",
+        "dygraph_conv2d_add_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.conv2d_add_fuse_pass",
+        "dygraph_dropout_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.dropout_fuse_pass",
+        "dygraph_fc_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.fc_fuse_pass",
+        "dygraph_gemm_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.gemm_fuse_pass",
+        "dygraph_if_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.if_fuse_pass",
+        "dygraph_interpolate_bilinear_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.interpolate_bilinear_fuse_pass",
+        "dygraph_prelu_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.prelu_fuse_pass",
+        "dygraph_reshape_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.reshape_fuse_pass",
+        "dygraph_tf_batchnorm_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.tf_batchnorm_fuse_pass",
+        "trace_fc_fuse_pass":
+        "x2paddle.optimizer.fusion.dygraph.trace_fc_fuse_pass",
+        "static_bn_scale_fuse_pass":
+        "x2paddle.optimizer.fusion.static.bn_scale_fuse_pass",
+        "static_conv2d_add_fuse_pass":
+        "x2paddle.optimizer.fusion.static.conv2d_add_fuse_pass",
+        "static_gemm_fuse_pass":
+        "x2paddle.optimizer.fusion.static.gemm_fuse_pass",
+        "static_prelu_fuse_pass":
+        "x2paddle.optimizer.fusion.static.prelu_fuse_pass",
+        "static_tf_batchnorm_fuse_pass":
+        "x2paddle.optimizer.fusion.static.tf_batchnorm_fuse_pass",
+        "dygraph_constant_fold_pass":
+        "x2paddle.optimizer.folding.dygraph.constant_fold_pass",
+        "dygraph_aggressive_constant_fold_pass":
+        "x2paddle.optimizer.folding.dygraph.aggressive_constant_fold_pass",
+        "dygraph_conv_bn_fold_pass":
+        "x2paddle.optimizer.folding.dygraph.conv_bn_fold_pass",
+        "static_constant_fold_pass":
+        "x2paddle.optimizer.folding.static.constant_fold_pass",
+        "static_aggressive_constant_fold_pass":
+        "x2paddle.optimizer.folding.static.aggressive_constant_fold_pass",
+        "static_conv_bn_fold_pass":
+        "x2paddle.optimizer.folding.static.conv_bn_fold_pass",
+    }
 
     def __init__(self):
         pass
@@ -32,10 +115,183 @@ class PassManager(object):
     def clear():
         PassManager.passes = list()
 
+    @staticmethod
+    def add_pass_module(name, module_name):
+        PassManager.pass_modules[name] = module_name
+
     @staticmethod
     def lookup(name):
+        if name not in PassManager.pass_map and \
+                name in PassManager.pass_modules:
+            importlib.import_module(PassManager.pass_modules[name])
         return PassManager.pass_map[name]
 
+    @staticmethod
+    def resolve(names):
+        """ 根据各pass声明的requires和after确定执行顺序。
+        requires中未出现在names中的pass会被自动加入；在满足依赖与顺序约束的前提下，
+        尽量保持names中的顺序，自动加入的pass排在依赖它的pass之前。
+
+        Args:
+            names (list): pass的名字。
+        Returns:
+            list: 排序后的pass名字。
+        """
+        ordered = list()
+
+        def add(name, chain):
+            if name in chain:
+                raise Exception("Circular pass dependency: {}".format(
+                    " -> ".join(chain + [name])))
+            if name in ordered:
+                return
+            for required in PassManager.get_pass(name).requires:
+                add(required, chain + [name])
+            if name not in ordered:
+                ordered.append(name)
+
+        for name in names:
+            add(name, list())
+        # 按requires和after做稳定的拓扑排序
+        befores = dict()
+        for name in ordered:
+            pass_ = PassManager.get_pass(name)
+            befores[name] = set([
+                n for n in list(pass_.requires) + list(pass_.after)
+                if n in ordered and n != name
+            ])
+        result = list()
+        while len(result) < len(ordered):
+            for name in ordered:
+                if name not in result and befores[name].issubset(result):
+                    result.append(name)
+                    break
+            else:
+                rest = [n for n in ordered if n not in result]
+                raise Exception(
+                    "Circular pass ordering among: {}".format(", ".join(rest)))
+        return result
+
+    @staticmethod
+    def get_pass(name):
+        """ 与lookup相同，pass不存在时给出所有可用的pass。
+        """
+        try:
+            return PassManager.lookup(name)
+        except KeyError:
+            names = sorted(
+                set(PassManager.pass_modules.keys()) |
+                set(PassManager.pass_map.keys()))
+            raise Exception("Pass '{}' is not registered, available passes: {}".
+                            format(name, ", ".join(names)))
+
+    @staticmethod
+    def add_stats(name=None, **stats):
+        """ 累加pass的统计信息，name为None时记录到正在执行的pass。
+        """
+        if name is None:
+            name = PassManager.current_pass
+        if name is None:
+            return
+        if name not in PassManager.stats:
+            PassManager.stats[name] = dict([(k, 0) for k in STAT_KEYS])
+        for k, v in stats.items():
+            PassManager.stats[name][k] = PassManager.stats[name].get(k, 0) + v
+
+    @staticmethod
+    def get_stats():
+        """ 返回各pass的统计信息：耗时time、执行次数applied、达到不动点的迭代次数iterations、
+        匹配到的子图数matches、因重叠被舍弃的子图数dropped_matches、
+        删除/新增的layer数layers_removed/layers_added、被折叠（删除）的参数数params_folded。
+        """
+        return collections.OrderedDict([(k, dict(v))
+                                        for k, v in PassManager.stats.items()])
+
+    @staticmethod
+    def reset_stats():
+        PassManager.stats = collections.OrderedDict()
+
+    @staticmethod
+    def report():
+        """ 生成各pass统计信息的表格。
+        """
+        head = "{:<40} {:>9} {:>6} {:>6} {:>8} {:>8} {:>8} {:>8} {:>8}".format(
+            "pass", "time(s)", "runs", "iters", "matches", "dropped", "layer-",
+            "layer+", "params-")
+        lines = [head, "-" * len(head)]
+        total = 0.0
+        for name, info in PassManager.stats.items():
+            total += info["time"]
+            lines.append(
+                "{:<40} {:>9.3f} {:>6} {:>6} {:>8} {:>8} {:>8} {:>8} {:>8}".
+                format(name[-40:], info["time"], info["applied"], info[
+                    "iterations"], info["matches"], info["dropped_matches"],
+                       info["layers_removed"], info["layers_added"], info[
+                           "params_folded"]))
+        lines.append("total {:.3f}s".format(total))
+        return "\n".join(lines)
+
+    @staticmethod
+    def run(name, graph, fixpoint=None):
+        """ 执行pass并统计其效果。
+
+        Args:
+            name (str): pass的名字。
+            graph (x2paddle.core.program.PaddleGraph): 需要优化的图。
+            fixpoint (bool): 是否重复执行直到图不再变化，默认使用pass的fixpoint属性。
+                第一轮匹配整个图，之后只在上一轮融合影响到的layer附近重新匹配，
+                工作表为空（没有新的融合）时达到不动点。
+        """
+        pass_ = PassManager.get_pass(name)()
+        if fixpoint is None:
+            fixpoint = pass_.fixpoint
+        layers = graph.get_global_layers()
+        parameters = set(graph.parameters.keys())
+        PassManager.current_pass = name
+        start = time.time()
+        iterations = 1
+        try:
+            if not fixpoint:
+                pass_.apply(graph)
+            else:
+                iterations = 0
+                graph.match_worklist = None
+                while True:
+                    before_len = len(graph.layers)
+                    graph.next_match_worklist = None
+                    pass_.apply(graph)
+                    iterations += 1
+                    after_len = len(graph.layers)
+                    worklist = graph.next_match_worklist
+                    if before_len == after_len or (worklist is not None and sum(
+                        [len(ids) for ids in worklist.values()]) == 0):
+                        break
+                    graph.match_worklist = worklist
+                graph.match_worklist = None
+                graph.next_match_worklist = None
+        finally:
+            PassManager.current_pass = None
+        cost = time.time() - start
+        # layer以对象区分，被替换的layer同时计入删除与新增
+        new_layers = graph.get_global_layers()
+        layers_removed = len([
+            i for i, layer in layers.items() if new_layers.get(i) is not layer
+        ])
+        layers_added = len([
+            i for i, layer in new_layers.items() if layers.get(i) is not layer
+        ])
+        params_folded = len(parameters - set(graph.parameters.keys()))
+        PassManager.add_stats(
+            name,
+            time=cost,
+            applied=1,
+            iterations=iterations,
+            layers_removed=layers_removed,
+            layers_added=layers_added,
+            params_folded=params_folded)
+        profiler.add("pass", name, cost, iterations=iterations)
+        return graph
+
 
 def pass_register(cls):
     name = cls.get_name()
@@ -13,81 +13,356 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import bisect
+import collections
 from x2paddle.core.program import PaddleGraph
+from x2paddle.optimizer.pass_manager import PassManager
+
+
+def build_pattern_graph(pattern_def, graph_type="dygraph"):
+    """ 根据声明式的描述构建pattern。
+        Args:
+            pattern_def (dict): pattern的描述，包括：
+                layers (list): 按拓扑序排列的layer，每个layer为(kernel, inputs, outputs)
+                    或(kernel, inputs, outputs, attrs)；
+                inputs (list): 可选，pattern的输入，依次对应build时的"input-0"、"input-1"等；
+                outputs (list): 可选，pattern的输出。
+            graph_type (str): pattern的类型，为"dygraph"或"static"。
+    """
+    pattern = PaddleGraph(graph_type=graph_type)
+    for layer_def in pattern_def["layers"]:
+        kernel, inputs, outputs = layer_def[:3]
+        attrs = layer_def[3] if len(layer_def) > 3 else dict()
+        pattern.add_layer(
+            kernel, inputs=dict(inputs), outputs=list(outputs), **attrs)
+    if "inputs" in pattern_def:
+        pattern.build(inputs=dict(
+            [("input-{}".format(i), name)
+             for i, name in enumerate(pattern_def["inputs"])]))
+    else:
+        pattern.build()
+    if "outputs" in pattern_def:
+        pattern.outputs = list(pattern_def["outputs"])
+    return pattern
+
+
+class CompiledPatterns(object):
+    """ 编译后的pattern集合。编译时计算每个pattern（及其子图）的全局layer、
+    按拓扑序排列的layer及layer id在全局layer中的序号，并将所有pattern按拓扑序的
+    kernel序列编译为前缀树。编译后不再修改，同一个fuser类的所有匹配共享同一份结果。
+
+    Args:
+        patterns (list): pattern的list。
+        match_kinds (list): 每个pattern的匹配方式（"topo"、"edge"或"op"），
+            为None时所有pattern使用PatternMatcher.operate指定的匹配方式。
+            指定时topo方式的pattern编译为前缀树，edge、op方式的pattern按第一个layer的kernel分派，
+            用于将多个fuser的pattern合并在一次遍历中匹配。
+    """
+
+    def __init__(self, patterns, match_kinds=None):
+        self.patterns = tuple(patterns)
+        self.match_kinds = tuple(
+            match_kinds) if match_kinds is not None else None
+        self.pattern_id2layers = dict()
+        self.pattern_info = dict()
+        for pattern in self.patterns:
+            self.compile_pattern(pattern)
+        # 前缀树的每个节点为[结束于该节点的pattern序号, {kernel: 子节点}]，
+        # 根节点的子节点即以各pattern第一个layer的kernel作为分派的入口
+        self.trie = [list(), dict()]
+        for index, pattern in enumerate(self.patterns):
+            if not self.is_kind(index, ["topo"]):
+                continue
+            node = self.trie
+            for pattern_layer in self.pattern_info[id(pattern)][1]:
+                node = node[1].setdefault(pattern_layer.kernel,
+                                          [list(), dict()])
+            node[0].append(index)
+        # 每个pattern第一个全局layer的kernel，用于edge/op方式的分派
+        self.anchors = dict()
+        for index, pattern in enumerate(self.patterns):
+            if not self.is_kind(index, ["edge", "op"]):
+                continue
+            anchor_kernel = list(
+                self.pattern_id2layers[id(pattern)].values())[0].kernel
+            self.anchors.setdefault(anchor_kernel, list()).append(index)
+
+    def is_kind(self, index, kinds):
+        return self.match_kinds is None or self.match_kinds[index] in kinds
+
+    def compile_pattern(self, pattern):
+        key = id(pattern)
+        if key in self.pattern_info:
+            return
+        id2layers = pattern.get_global_layers()
+        pattern_ids = list(id2layers.keys())
+        pattern_id2index = dict([(layer_id, i)
+                                 for i, layer_id in enumerate(pattern_ids)])
+        self.pattern_id2layers[key] = id2layers
+        self.pattern_info[key] = (pattern_ids, list(pattern.layers.values()),
+                                  pattern_id2index)
+        for layer in pattern.layers.values():
+            for block in layer.blocks:
+                self.compile_pattern(block)
 
 
 class PatternMatcher(object):
-    def __init__(self, pattern):
-        self.pattern = pattern
-        # matches的每个match是按照拓扑排序组成layer的dict
+    """ 模式匹配器。pattern可以是单个PaddleGraph、多个PaddleGraph组成的list，
+    或编译好的CompiledPatterns。多个pattern在对图的一次遍历中完成匹配，
+    结果按pattern的顺序依次排列，与逐个pattern分别匹配的结果一致。
+    worklist为子图id到layer id集合的映射，不为None时只在其中的layer处开始匹配，
+    不在worklist中的子图不尝试匹配。
+    """
+
+    # 重叠子图组成的分量不超过该数量时精确求解
+    exact_limit = 16
 
+    def __init__(self, pattern, worklist=None):
+        if isinstance(pattern, CompiledPatterns):
+            self.compiled = pattern
+        elif isinstance(pattern, (list, tuple)):
+            self.compiled = CompiledPatterns(pattern)
+        else:
+            self.compiled = CompiledPatterns([pattern])
+        self.patterns = self.compiled.patterns
+        self.pattern = self.patterns[0]
+        # matches的每个match是按照拓扑排序组成layer的dict
         self.matches = list()
+        # pattern_matches[i]为第i个pattern的匹配结果
+        self.pattern_matches = [list() for _ in self.patterns]
+        self.pattern_match_keys = [set() for _ in self.patterns]
+        self.worklist = worklist
+        # 需要完整匹配的子图id（如位于worklist中的layer的子图）
+        self.full_graphs = set()
+        # 因与其他子图重叠而被舍弃的子图数量
+        self.dropped_matches = 0
+
+    def get_candidates(self, kernel, pos, kernel_positions):
+        """ 获取可能在pos处开始匹配的pattern序号。沿前缀树依次查找
+        每个kernel在pos之后第一次出现的位置，找不到时整棵子树都被剪枝，
+        结果与对每个pattern分别调用is_feasible一致。
+        """
+        node = self.compiled.trie[1].get(kernel)
+        if node is None:
+            return list()
+        candidates = list()
+        stack = [(node, pos)]
+        while len(stack) > 0:
+            node, pos = stack.pop()
+            candidates.extend(node[0])
+            for next_kernel, child in node[1].items():
+                next_pos = self.get_next_position(next_kernel, pos,
+                                                  kernel_positions)
+                if next_pos is not None:
+                    stack.append((child, next_pos))
+        candidates.sort()
+        return candidates
+
+    def get_sweep_positions(self, graph, kernels):
+        """ 获取一次遍历中需要访问的layer：kernel在kernels中的layer以及含有子图的layer。
+        存在worklist时只访问worklist中的layer，含有子图的layer仍需访问以进入子图。
+
+        Returns:
+            tuple: (layer_items, kernel_positions, positions)。
+        """
+        layer_items, kernel_positions, block_positions, layer_positions = \
+            graph.get_kernel_index()
+        positions = list(block_positions)
+        if self.worklist is None or id(graph) in self.full_graphs:
+            for kernel in kernels:
+                positions.extend(kernel_positions.get(kernel, []))
+        else:
+            for layer_id in self.worklist.get(id(graph), ()):
+                pos = layer_positions.get(layer_id)
+                if pos is not None and layer_items[pos][1].kernel in kernels:
+                    positions.append(pos)
+        return layer_items, kernel_positions, sorted(set(positions))
+
+    def sweep_blocks(self, graph, layer_id, layer, detect):
+        """ 在layer的子图中继续匹配，layer位于worklist中时其子图需要完整匹配。
+        """
+        is_full = self.worklist is None or id(graph) in self.full_graphs or \
+            layer_id in self.worklist.get(id(graph), ())
+        for block in layer.blocks:
+            if len(block.layers) > 0:
+                if is_full:
+                    self.full_graphs.add(id(block))
+                detect(block)
+
+    def get_pattern_id2layers(self, pattern):
+        """ 获取pattern（或其子图）的全局layer。
+        """
+        self.compiled.compile_pattern(pattern)
+        return self.compiled.pattern_id2layers[id(pattern)]
+
+    def get_pattern_info(self, pattern):
+        """ 获取pattern（或其子图）全局layer的id、按拓扑序排列的layer，
+        以及layer id在全局layer中的序号。
+        """
+        self.compiled.compile_pattern(pattern)
+        return self.compiled.pattern_info[id(pattern)]
+
+    def get_next_position(self, kernel, pos, kernel_positions):
+        """ 获取pos之后第一个kernel相同的layer的位置，不存在时返回None。
+        """
+        positions = kernel_positions.get(kernel, [])
+        i = bisect.bisect_right(positions, pos)
+        if i < len(positions):
+            return positions[i]
+        return None
+
+    def is_feasible(self, pattern_layers, pattern_index, pos, kernel_positions):
+        """ 判断pattern_layers[pattern_index]位于pos时，之后的pattern layer
+        能否依次在pos之后找到kernel相同的layer。
+        """
+        for pattern_layer in pattern_layers[pattern_index + 1:]:
+            pos = self.get_next_position(pattern_layer.kernel, pos,
+                                         kernel_positions)
+            if pos is None:
+                return False
+        return True
 
     def operate(self, graph, match_kind="topo"):
+        if self.compiled.match_kinds is not None:
+            # 各pattern指定了匹配方式（多个fuser的pattern合并编译）
+            self.detect_patterns(graph)
+            self.matches = self.get_group_matches([(0,
+                                                    len(self.patterns))])[0][0]
+            return self.matches
         if match_kind == "topo":
             self.detect_patterns_by_topo(graph)
         elif match_kind == "edge":
             self.detect_patterns_by_edge(graph)
         elif match_kind == "op":
             self.detect_patterns_by_op(graph)
+        for matches in self.pattern_matches:
+            self.matches.extend(matches)
         self.remove_overlapped_match()
         return self.matches
 
-    def detect_patterns_by_topo(self, graph):
-        """ 找到与模式匹配的子图，
-            并将子图的id以拓扑排序存放到subgraph_id2layers。
+    def operate_groups(self, graph, groups):
+        """ 在一次遍历中匹配多组pattern（如流水线中相邻的多个fuser的pattern），
+        compiled需指定每个pattern的匹配方式。
+
+        Args:
+            graph (x2paddle.core.program.PaddleGraph): 需要匹配的图。
+            groups (list): 每组pattern在patterns中的范围(start, end)。
+        Returns:
+            list: 每组的(matches, dropped_matches)，与每组pattern单独匹配的结果一致。
+        """
+        self.detect_patterns(graph)
+        return self.get_group_matches(groups)
+
+    def get_group_matches(self, groups):
+        """ 按组合并各pattern的匹配结果，并在每组内去除重叠的子图。
+        """
+        results = list()
+        for start, end in groups:
+            matches = list()
+            for pattern_matches in self.pattern_matches[start:end]:
+                matches.extend(pattern_matches)
+            dropped_matches = self.dropped_matches
+            self.remove_overlapped_match(matches)
+            results.append((matches, self.dropped_matches - dropped_matches))
+        return results
+
+    def match_by_topo(self,
+                      pattern,
+                      graph,
+                      start_index,
+                      is_subblock=False,
+                      layer_items=None,
+                      kernel_positions=None):
+        """ 从graph中拓扑序号为start_index的layer开始按拓扑序匹配pattern，
+        匹配成功时返回按拓扑序排列的layer的dict，否则返回False。
         """
+        pattern_index = 0
+        pattern_ids, pattern_layers, pattern_id2index = \
+            self.get_pattern_info(pattern)
+        subgraph_id2layers = dict()
+        if layer_items is None:
+            layer_items = list(graph.layers.items())
+
+        def scan():
+            # 依次返回需要与pattern_layers[pattern_index]比较的layer。
+            # 非子图中开始匹配后，kernel不同的layer会被直接跳过，
+            # 因此只需通过kernel_positions找到之后第一个kernel相同的layer
+            pos = start_index - 1
+            while True:
+                if is_subblock or pattern_index == 0 or \
+                        kernel_positions is None:
+                    pos += 1
+                else:
+                    pos = self.get_next_position(
+                        pattern_layers[pattern_index].kernel, pos,
+                        kernel_positions)
+                    # 剩余的pattern layer无法按顺序找到时不可能匹配，提前结束
+                    if pos is not None and not self.is_feasible(
+                            pattern_layers, pattern_index, pos,
+                            kernel_positions):
+                        return
+                if pos is None or pos >= len(layer_items):
+                    return
+                yield layer_items[pos]
 
-        def get_subgraph(pattern, graph, start_index, is_subblock=False):
-            pattern_index = 0
-            pattern_id2layers = pattern.get_global_layers()
-            pattern_ids = list(pattern_id2layers.keys())
-            subgraph_id2layers = dict()
-            graph_layers = dict(list(graph.layers.items())[start_index:])
-            for layer_id, layer in graph_layers.items():
-                pattern_layer = pattern.layers[list(pattern.layers.keys())[
-                    pattern_index]]
-                if layer.kernel == pattern_layer.kernel:
-                    subgraph_id2layers[layer_id] = layer
-                    pattern_layer_id = pattern_layer.id
-                    # 判断输入连接是否一致
-                    if layer_id in graph.edges_in:
-                        if pattern_layer_id not in pattern.edges_in:
+        for layer_id, layer in scan():
+            pattern_layer = pattern_layers[pattern_index]
+            if layer.kernel == pattern_layer.kernel:
+                subgraph_id2layers[layer_id] = layer
+                pattern_layer_id = pattern_layer.id
+                # 判断输入连接是否一致
+                if layer_id in graph.edges_in:
+                    if pattern_layer_id not in pattern.edges_in:
+                        if pattern_index == 0 or is_subblock:
+                            return False
+                        else:
+                            subgraph_id2layers.pop(layer_id)
+                            continue
+                    else:
+                        if len(graph.edges_in[layer_id]) != len(
+                                pattern.edges_in[pattern_layer_id]):
+                            if pattern_index == 0 or is_subblock:
+                                return False
+                            else:
+                                subgraph_id2layers.pop(layer_id)
+                                continue
+                    layer_in = graph.edges_in[layer_id]
+                    pattern_layer_in = pattern.edges_in[pattern_layer_id]
+                    for i in range(len(layer_in)):
+                        layer_id_in = layer_in[i]
+                        pattern_layer_id_in = pattern_layer_in[i]
+                        if pattern_layer_id_in != -1:
+                            subgraph_ids = list(subgraph_id2layers.keys())
+                            if layer_id_in not in subgraph_ids:
+                                return False
+                            if pattern_id2index[pattern_layer_id_in] == \
+                            subgraph_ids.index(layer_id_in):
+                                # 判断pattern输入在pattern_ids的索引
+                                # 和graph输入在subgraph_ids的索引一致
+                                continue
                             if pattern_index == 0 or is_subblock:
                                 return False
                             else:
                                 subgraph_id2layers.pop(layer_id)
                                 continue
+                # 判断subgraph中的节点是否被外部图使用到(如若被使用到则无效)
+                if layer_id in graph.edges_out:
+                    if pattern_layer_id not in pattern.edges_out:
+                        if "paddle.nn" in layer.kernel and "functional" not in layer.kernel:
+                            pattern_layer_opt = pattern_layer.outputs[1:]
                         else:
-                            if len(graph.edges_in[layer_id]) != len(
-                                    pattern.edges_in[pattern_layer_id]):
-                                if pattern_index == 0 or is_subblock:
-                                    return False
-                                else:
-                                    subgraph_id2layers.pop(layer_id)
-                                    continue
-                        layer_in = graph.edges_in[layer_id]
-                        pattern_layer_in = pattern.edges_in[pattern_layer_id]
-                        for i in range(len(layer_in)):
-                            layer_id_in = layer_in[i]
-                            pattern_layer_id_in = pattern_layer_in[i]
-                            if pattern_layer_id_in != -1:
-                                subgraph_ids = list(subgraph_id2layers.keys())
-                                if layer_id_in not in subgraph_ids:
-                                    return False
-                                if pattern_ids.index(pattern_layer_id_in) == \
-                                subgraph_ids.index(layer_id_in):
-                                    # 判断pattern输入在pattern_ids的索引
-                                    # 和graph输入在subgraph_ids的索引一致
-                                    continue
-                                if pattern_index == 0 or is_subblock:
-                                    return False
-                                else:
-                                    subgraph_id2layers.pop(layer_id)
-                                    continue
-                    # 判断subgraph中的节点是否被外部图使用到(如若被使用到则无效)
-                    if layer_id in graph.edges_out:
-                        if pattern_layer_id not in pattern.edges_out:
+                            pattern_layer_opt = pattern_layer.outputs
+                        if not set(pattern_layer_opt).issubset(pattern.outputs):
+                            # 若pattern当前layer的输出是pattern的输出，则是正确的
+                            if pattern_index == 0 or is_subblock:
+                                return False
+                            else:
+                                subgraph_id2layers.pop(layer_id)
+                                continue
+                    else:
+                        if len(graph.edges_out[layer_id]) != len(
+                                pattern.edges_out[pattern_layer_id]):
+                            # 如果在每个节点edges_in相同的情况下，edges_out数目相同则说明无节点在subgraph外被用到
                             if "paddle.nn" in layer.kernel and "functional" not in layer.kernel:
                                 pattern_layer_opt = pattern_layer.outputs[1:]
                             else:
@@ -98,201 +373,321 @@ class PatternMatcher(object):
                                 if pattern_index == 0 or is_subblock:
                                     return False
                                 else:
-                                    subgraph_id2layers.pop(layer_id)
-                                    continue                                
-                        else:
-                            if len(graph.edges_out[layer_id]) != len(
-                                    pattern.edges_out[pattern_layer_id]):
-                                # 如果在每个节点edges_in相同的情况下，edges_out数目相同则说明无节点在subgraph外被用到
-                                if "paddle.nn" in layer.kernel and "functional" not in layer.kernel:
-                                    pattern_layer_opt = pattern_layer.outputs[1:]
-                                else:
-                                    pattern_layer_opt = pattern_layer.outputs
-                                if not set(pattern_layer_opt).issubset(
-                                        pattern.outputs):
-                                    # 若pattern当前layer的输出是pattern的输出，则是正确的
-                                    if pattern_index == 0 or is_subblock:
-                                        return False
-                                    else:
-                                        subgraph_id2layers.pop(layer_id)
-                                        continue
-                            else:
-                                layer_out = graph.edges_out[layer_id]
-                                pattern_layer_out = pattern.edges_out[pattern_layer_id]
-                                is_pop = False
-                                for i in range(len(layer_out)):
-                                    layer_id_out = layer_out[i]
-                                    pattern_layer_id_out = pattern_layer_out[i]
-                                    if layer_id_out != -1:
-                                        if graph_layers[layer_id_out].kernel != pattern.layers[pattern_layer_id_out].kernel:
-                                            is_pop = True
-                                            break
-                                if is_pop:
                                     subgraph_id2layers.pop(layer_id)
                                     continue
-                    # 当为控制流时的处理
-                    if layer.kernel == "prim.if" or layer.kernel == "prim.loop":
-                        if len(pattern_layer.blocks) != len(layer.blocks):
-                            if pattern_index == 0 or is_subblock:
-                                return False
-                            else:
+                        else:
+                            layer_out = graph.edges_out[layer_id]
+                            pattern_layer_out = pattern.edges_out[
+                                pattern_layer_id]
+                            is_pop = False
+                            for i in range(len(layer_out)):
+                                layer_id_out = layer_out[i]
+                                pattern_layer_id_out = pattern_layer_out[i]
+                                if layer_id_out != -1:
+                                    if graph.layers[layer_id_out].kernel != pattern.layers[pattern_layer_id_out].kernel:
+                                        is_pop = True
+                                        break
+                            if is_pop:
                                 subgraph_id2layers.pop(layer_id)
                                 continue
-                        is_subblock_match = True
-                        for i, b in enumerate(pattern_layer.blocks):
-                            match_info = get_subgraph(
-                                pattern_layer.blocks[i],
-                                layer.blocks[i],
-                                0,
-                                is_subblock=True)
-                            if match_info is not False:
-                                subgraph_id2layers.update(match_info)
-                            else:
-                                is_subblock_match = False
-                                break
-                        if not is_subblock_match:
-                            if pattern_index == 0 or is_subblock:
-                                return False
-                            else:
-                                index = list(subgraph_id2layers.keys()).index(
-                                    layer_id)
-                                for key in list(subgraph_id2layers.keys())[
-                                        index:]:
-                                    subgraph_id2layers.pop(key)
-                                continue
-                    pattern_index += 1
-                    if pattern_index == len(pattern.layers):
-                        return subgraph_id2layers
+                # 当为控制流时的处理
+                if layer.kernel == "prim.if" or layer.kernel == "prim.loop":
+                    if len(pattern_layer.blocks) != len(layer.blocks):
+                        if pattern_index == 0 or is_subblock:
+                            return False
+                        else:
+                            subgraph_id2layers.pop(layer_id)
+                            continue
+                    is_subblock_match = True
+                    for i, b in enumerate(pattern_layer.blocks):
+                        match_info = self.match_by_topo(
+                            pattern_layer.blocks[i],
+                            layer.blocks[i],
+                            0,
+                            is_subblock=True)
+                        if match_info is not False:
+                            subgraph_id2layers.update(match_info)
+                        else:
+                            is_subblock_match = False
+                            break
+                    if not is_subblock_match:
+                        if pattern_index == 0 or is_subblock:
+                            return False
+                        else:
+                            index = list(
+                                subgraph_id2layers.keys()).index(layer_id)
+                            for key in list(subgraph_id2layers.keys())[index:]:
+                                subgraph_id2layers.pop(key)
+                            continue
+                pattern_index += 1
+                if pattern_index == len(pattern.layers):
+                    return subgraph_id2layers
+            else:
+                if pattern_index == 0 or is_subblock:
+                    return False
                 else:
-                    if pattern_index == 0 or is_subblock:
-                        return False
-                    else:
-                        continue
-            if pattern_index == len(pattern.layers):
-                return subgraph_id2layers
-            return False
-
-        for i, (layer_id, layer) in enumerate(graph.layers.items()):
-            match_info = get_subgraph(self.pattern, graph, i)
-            if match_info and match_info not in self.matches:
-                self.matches.append(match_info)
-            for j, block in enumerate(layer.blocks):
-                if len(block.layers) > 0:
-                    self.detect_patterns_by_topo(layer.blocks[j])
+                    continue
+        if pattern_index == len(pattern.layers):
+            return subgraph_id2layers
+        return False
 
-    def detect_patterns_by_edge(self, graph):
-        """当遇见顺序没有强制规定的pattern时使用该方式
+    def match_by_edge(self, pattern, graph, layer_id):
+        """ 从layer_id开始沿边匹配pattern，匹配成功时返回layer的dict，否则返回False。
         """
+        pattern_id2layers = self.get_pattern_id2layers(pattern)
+        pattern_ids, _, pattern_id2index = self.get_pattern_info(pattern)
+        pattern_layer_id = pattern_ids[0]
+        subgraph_id2layers = dict()
+        graph_layers = graph.layers
 
-        def get_subgraph(pattern, graph, start_index):
-            pattern_id2layers = pattern.get_global_layers()
-            pattern_ids = list(pattern_id2layers.keys())
-            pattern_layer_id = pattern_ids[0]
-            subgraph_id2layers = dict()
-            layer_id = list(graph.layers.keys())[start_index]
-            graph_layers = graph.layers
-
-            def update(layer_id, pattern_layer_id):
-                layer = graph_layers[layer_id]
-                pattern_layer = pattern_id2layers[pattern_layer_id]
-                if layer.kernel != pattern_layer.kernel:
-                    return False
-                subgraph_id2layers[layer_id] = layer
+        def update(layer_id, pattern_layer_id):
+            layer = graph_layers[layer_id]
+            pattern_layer = pattern_id2layers[pattern_layer_id]
+            if layer.kernel != pattern_layer.kernel:
+                return False
+            subgraph_id2layers[layer_id] = layer
 
-                if pattern.edges_in.get(pattern_layer_id, 0) != 0:
-                    if len(pattern.edges_in[pattern_layer_id]) != \
-                            len(graph.edges_in[layer_id]):
-                        return False
-                    for i, pattern_layer_id_in in enumerate(pattern.edges_in[
-                            pattern_layer_id]):
-                        if pattern_layer_id_in == -1:
+            if pattern.edges_in.get(pattern_layer_id, 0) != 0:
+                if len(pattern.edges_in[pattern_layer_id]) != \
+                        len(graph.edges_in[layer_id]):
+                    return False
+                for i, pattern_layer_id_in in enumerate(
+                        pattern.edges_in[pattern_layer_id]):
+                    if pattern_layer_id_in == -1:
+                        continue
+                    if pattern_layer_id_in in pattern_id2index:
+                        new_layer_id_in = graph.edges_in[layer_id][i]
+                        if new_layer_id_in in subgraph_id2layers:
                             continue
-                        if pattern_layer_id_in in pattern_ids:
-                            new_layer_id_in = graph.edges_in[layer_id][i]
-                            if new_layer_id_in in subgraph_id2layers:
-                                continue
-                            update(new_layer_id_in, pattern_layer_id_in)
-                if pattern.edges_out.get(pattern_layer_id, 0) != 0:
-                    if layer_id not in graph.edges_out:
-                        return False
-                    if len(pattern.edges_out[pattern_layer_id]) != \
-                            len(graph.edges_out[layer_id]):
-                        return False
-                    for i, pattern_layer_id_out in enumerate(pattern.edges_out[
-                            pattern_layer_id]):
-                        if pattern_layer_id_out in pattern_ids:
-                            new_layer_id_out = graph.edges_out[layer_id][i]
-                            if new_layer_id_out in subgraph_id2layers:
-                                continue
-                            update(new_layer_id_out, pattern_layer_id_out)
+                        update(new_layer_id_in, pattern_layer_id_in)
+            if pattern.edges_out.get(pattern_layer_id, 0) != 0:
+                if layer_id not in graph.edges_out:
+                    return False
+                if len(pattern.edges_out[pattern_layer_id]) != \
+                        len(graph.edges_out[layer_id]):
+                    return False
+                for i, pattern_layer_id_out in enumerate(
+                        pattern.edges_out[pattern_layer_id]):
+                    if pattern_layer_id_out in pattern_id2index:
+                        new_layer_id_out = graph.edges_out[layer_id][i]
+                        if new_layer_id_out in subgraph_id2layers:
+                            continue
+                        update(new_layer_id_out, pattern_layer_id_out)
 
-            while len(subgraph_id2layers) != len(pattern_id2layers):
-                out = update(layer_id, pattern_layer_id)
-                if out == False:
+        while len(subgraph_id2layers) != len(pattern_id2layers):
+            out = update(layer_id, pattern_layer_id)
+            if out == False:
+                return False
+            else:
+                if len(subgraph_id2layers) == len(pattern_id2layers):
+                    return subgraph_id2layers
+                else:
                     return False
+
+    def match_by_op(self, pattern, graph, layer_id):
+        """ 只比较kernel匹配pattern，匹配成功时返回layer的dict，否则返回False。
+        """
+        pattern_id2layers = self.get_pattern_id2layers(pattern)
+        pattern_ids, _, pattern_id2index = self.get_pattern_info(pattern)
+        pattern_layer_id = pattern_ids[0]
+        subgraph_id2layers = dict()
+        graph_layers = graph.layers
+
+        def update(layer_id, pattern_layer_id):
+            layer = graph_layers[layer_id]
+            pattern_layer = pattern_id2layers[pattern_layer_id]
+            if layer.kernel != pattern_layer.kernel:
+                return False
+            subgraph_id2layers[layer_id] = layer
+
+        while len(subgraph_id2layers) != len(pattern_id2layers):
+            out = update(layer_id, pattern_layer_id)
+            if out == False:
+                return False
+            else:
+                if len(subgraph_id2layers) == len(pattern_id2layers):
+                    return subgraph_id2layers
                 else:
-                    if len(subgraph_id2layers) == len(pattern_id2layers):
-                        return subgraph_id2layers
-                    else:
-                        return False
-
-        for i, (layer_id, layer) in enumerate(graph.layers.items()):
-            match_info = get_subgraph(self.pattern, graph, i)
-            if match_info:
-                self.matches.append(match_info)
-            for j, block in enumerate(layer.blocks):
-                if len(block.layers) > 0:
-                    self.detect_patterns_by_edge(layer.blocks[j])
-                    
+                    return False
+
+    def detect_patterns_by_topo(self, graph):
+        """ 找到与模式匹配的子图，
+            并将子图的id以拓扑排序存放到subgraph_id2layers。
+        """
+        # 只在kernel与某个pattern第一个layer相同的layer处尝试匹配，
+        # 所有pattern共享同一次遍历
+        trie = self.compiled.trie
+        layer_items, kernel_positions, positions = self.get_sweep_positions(
+            graph, trie[1])
+        for i in positions:
+            layer_id, layer = layer_items[i]
+            for index in self.get_candidates(layer.kernel, i, kernel_positions):
+                match_info = self.match_by_topo(
+                    self.patterns[index],
+                    graph,
+                    i,
+                    layer_items=layer_items,
+                    kernel_positions=kernel_positions)
+                match_keys = self.pattern_match_keys[index]
+                if match_info and frozenset(
+                        match_info.keys()) not in match_keys:
+                    self.pattern_matches[index].append(match_info)
+                    match_keys.add(frozenset(match_info.keys()))
+            self.sweep_blocks(graph, layer_id, layer,
+                              self.detect_patterns_by_topo)
+
+    def detect_patterns_by_edge(self, graph):
+        """当遇见顺序没有强制规定的pattern时使用该方式
+        """
+        anchors = self.compiled.anchors
+        layer_items, kernel_positions, positions = self.get_sweep_positions(
+            graph, anchors)
+        for i in positions:
+            layer_id, layer = layer_items[i]
+            # 第一个layer的kernel不一致时必然不匹配
+            for index in anchors.get(layer.kernel, []):
+                match_info = self.match_by_edge(self.patterns[index], graph,
+                                                layer_id)
+                if match_info:
+                    self.pattern_matches[index].append(match_info)
+            self.sweep_blocks(graph, layer_id, layer,
+                              self.detect_patterns_by_edge)
+
     def detect_patterns_by_op(self, graph):
         """ 当只匹配op时使用此方式。
         """
-        def get_subgraph(pattern, graph, start_index):
-            pattern_id2layers = pattern.get_global_layers()
-            pattern_ids = list(pattern_id2layers.keys())
-            pattern_layer_id = pattern_ids[0]
-            subgraph_id2layers = dict()
-            layer_id = list(graph.layers.keys())[start_index]
-            graph_layers = graph.layers
-
-            def update(layer_id, pattern_layer_id):
-                layer = graph_layers[layer_id]
-                pattern_layer = pattern_id2layers[pattern_layer_id]
-                if layer.kernel != pattern_layer.kernel:
-                    return False
-                subgraph_id2layers[layer_id] = layer
-                
-            while len(subgraph_id2layers) != len(pattern_id2layers):
-                out = update(layer_id, pattern_layer_id)
-                if out == False:
-                    return False
+        anchors = self.compiled.anchors
+        layer_items, kernel_positions, positions = self.get_sweep_positions(
+            graph, anchors)
+        for i in positions:
+            layer_id, layer = layer_items[i]
+            # 第一个layer的kernel不一致时必然不匹配
+            for index in anchors.get(layer.kernel, []):
+                match_info = self.match_by_op(self.patterns[index], graph,
+                                              layer_id)
+                if match_info:
+                    self.pattern_matches[index].append(match_info)
+            self.sweep_blocks(graph, layer_id, layer,
+                              self.detect_patterns_by_op)
+
+    def detect_patterns(self, graph):
+        """ 按compiled.match_kinds中每个pattern各自的匹配方式，在一次遍历中匹配所有pattern。
+        topo方式的pattern通过前缀树分派，edge、op方式的pattern通过第一个layer的kernel分派。
+        """
+        trie = self.compiled.trie
+        anchors = self.compiled.anchors
+        match_kinds = self.compiled.match_kinds
+        layer_items, kernel_positions, positions = self.get_sweep_positions(
+            graph, set(trie[1]) | set(anchors))
+        for i in positions:
+            layer_id, layer = layer_items[i]
+            for index in self.get_candidates(layer.kernel, i, kernel_positions):
+                match_info = self.match_by_topo(
+                    self.patterns[index],
+                    graph,
+                    i,
+                    layer_items=layer_items,
+                    kernel_positions=kernel_positions)
+                match_keys = self.pattern_match_keys[index]
+                if match_info and frozenset(
+                        match_info.keys()) not in match_keys:
+                    self.pattern_matches[index].append(match_info)
+                    match_keys.add(frozenset(match_info.keys()))
+            for index in anchors.get(layer.kernel, []):
+                if match_kinds[index] == "edge":
+                    match_info = self.match_by_edge(self.patterns[index], graph,
+                                                    layer_id)
                 else:
-                    if len(subgraph_id2layers) == len(pattern_id2layers):
-                        return subgraph_id2layers
-                    else:
-                        return False
-        for i, (layer_id, layer) in enumerate(graph.layers.items()):
-            match_info = get_subgraph(self.pattern, graph, i)
-            if match_info:
-                self.matches.append(match_info)
-            for j, block in enumerate(layer.blocks):
-                if len(block.layers) > 0:
-                    self.detect_patterns_by_op(layer.blocks[j])
-
-
-    def remove_overlapped_match(self):
-        """ 如果2个子图有重叠，只取前一个子图。
+                    match_info = self.match_by_op(self.patterns[index], graph,
+                                                  layer_id)
+                if match_info:
+                    self.pattern_matches[index].append(match_info)
+            self.sweep_blocks(graph, layer_id, layer, self.detect_patterns)
+
+    def remove_overlapped_match(self, matches=None):
+        """ 从相互重叠的子图中选出互不重叠、融合后删除layer最多的一组子图。
+        以layer id建立到子图的索引，不与其他子图重叠的子图直接保留；
+        重叠的子图按重叠关系划分为连通分量，不超过exact_limit个子图的分量精确求解，
+        更大的分量按收益从高到低贪心选择。保留的子图维持原有顺序，
+        被舍弃的子图数量记录在dropped_matches中。
         """
-        match_ids = []
-        for i, match in enumerate(self.matches):
-            is_overlapped = False
-            for id in match.keys():
-                if id in match_ids:
-                    self.matches.pop(i)
-                    is_overlapped = True
-                    break
-            if not is_overlapped:
-                match_ids.extend(list(match.keys()))
+        if matches is None:
+            matches = self.matches
+        id2matches = dict()
+        for i, match in enumerate(matches):
+            for layer_id in match.keys():
+                id2matches.setdefault(layer_id, list()).append(i)
+        neighbors = [set() for _ in matches]
+        for indices in id2matches.values():
+            if len(indices) > 1:
+                for i in indices:
+                    neighbors[i].update(indices)
+        for i in range(len(matches)):
+            neighbors[i].discard(i)
+        # 融合后每个子图通常被替换为一个layer，收益首先是删除的layer数，其次是子图数
+        weights = [(len(match) - 1) * (len(matches) + 1) + 1
+                   for match in matches]
+        keep = [len(neighbors[i]) == 0 for i in range(len(matches))]
+        visited = set()
+        for i in range(len(matches)):
+            if keep[i] or i in visited:
+                continue
+            component = list()
+            stack = [i]
+            visited.add(i)
+            while len(stack) > 0:
+                j = stack.pop()
+                component.append(j)
+                for k in neighbors[j]:
+                    if k not in visited:
+                        visited.add(k)
+                        stack.append(k)
+            component.sort()
+            if len(component) <= self.exact_limit:
+                selected = self.select_exact(component, neighbors, weights)
+            else:
+                selected = self.select_greedy(component, neighbors, weights)
+            for j in selected:
+                keep[j] = True
+        self.dropped_matches += keep.count(False)
+        matches[:] = [match for i, match in enumerate(matches) if keep[i]]
+
+    def select_exact(self, component, neighbors, weights):
+        """ 枚举求出分量中收益最大的互不重叠子图集合，
+        收益相同时优先保留排在前面的子图。
+        """
+        best = [list(), 0]
+
+        def search(pos, selected, blocked, weight, rest):
+            if weight + rest <= best[1] and pos < len(component):
+                return
+            if pos == len(component):
+                if weight > best[1]:
+                    best[0], best[1] = list(selected), weight
+                return
+            i = component[pos]
+            rest -= weights[i]
+            if i not in blocked:
+                selected.append(i)
+                search(pos + 1, selected, blocked | neighbors[i],
+                       weight + weights[i], rest)
+                selected.pop()
+            search(pos + 1, selected, blocked, weight, rest)
+
+        search(0, list(), set(), 0, sum([weights[i] for i in component]))
+        return best[0]
+
+    def select_greedy(self, component, neighbors, weights):
+        """ 按收益从高到低、重叠数从少到多依次选择不与已选子图重叠的子图。
+        """
+        selected = list()
+        blocked = set()
+        for i in sorted(
+                component, key=lambda i: (-weights[i], len(neighbors[i]), i)):
+            if i not in blocked:
+                selected.append(i)
+                blocked.update(neighbors[i])
+        return selected
 
 
 def get_subgraph(prefix_layer_id, suffix_layer_id, graph):
@@ -317,32 +712,176 @@ def get_subgraph(prefix_layer_id, suffix_layer_id, graph):
 
 
 class FuseBase(object):
+    # 声明式的pattern，每一项的格式见build_pattern_graph；
+    # 子类也可以重写build_pattern，手动构建self.pattern或self.patterns
+    pattern_defs = None
+    # 各fuser类编译后的pattern，由该类的所有实例共享，在第一次使用时编译
+    compiled_patterns = dict()
+    # 流水线中相邻的多个fuser合并编译的pattern，
+    # key为((fuser类, match_kind), ...)，value为(CompiledPatterns, 每个fuser的pattern范围)
+    compiled_stages = dict()
+
     def __init__(self, graph_type):
+        self.graph_type = graph_type
         self.pattern = PaddleGraph(graph_type=graph_type)
         self.patterns = list()
 
+    def build_pattern(self):
+        if self.pattern_defs is None:
+            raise NotImplementedError(
+                "The build_pattern function or pattern_defs must be implemented!"
+            )
+        self.patterns = [
+            build_pattern_graph(pattern_def, self.graph_type)
+            for pattern_def in self.pattern_defs
+        ]
+
+    def compile_patterns(self):
+        """ 构建并编译pattern，每个fuser类只执行一次build_pattern，
+        之后的实例直接复用编译好的pattern。
+        """
+        cls = type(self)
+        if cls not in FuseBase.compiled_patterns:
+            self.build_pattern()
+            patterns = self.patterns if len(self.patterns) > 0 else [
+                self.pattern
+            ]
+            FuseBase.compiled_patterns[cls] = (self.pattern, self.patterns,
+                                               CompiledPatterns(patterns))
+        self.pattern, self.patterns, compiled = FuseBase.compiled_patterns[cls]
+        return compiled
+
     def operate(self, graph, match_kind="topo"):
         parameters = graph.parameters
-        self.build_pattern()
         self.perform_pattern_matcher(graph, match_kind)
+        if len(self.matches) > 0 and \
+                getattr(graph, "prefetched_matches", None) is not None:
+            # 图将被修改，之后的fuser不能再使用预先匹配的结果
+            graph.prefetched_matches.clear()
+        # 记录每个子图中可能被修改的layer（匹配到的layer及其相邻layer），
+        # 融合后只增量更新这些layer的边，避免每个pass都重新build整个图
+        subgraphs = collections.OrderedDict()
         for match in self.matches:
             first_layer_id = list(match.keys())[0]
             subgraph = get_subgraph("", first_layer_id, graph)
+            if id(subgraph) not in subgraphs:
+                subgraphs[id(subgraph)] = (subgraph, set())
+            affected_ids = subgraphs[id(subgraph)][1]
+            for layer_id in match.keys():
+                affected_ids.add(layer_id)
+                affected_ids.update(subgraph.edges_in.get(layer_id, []))
+                affected_ids.update(subgraph.edges_out.get(layer_id, []))
             self.insert_new_layer(subgraph, parameters, match)
         self.delete_match(graph)
-        graph.build()
+        for subgraph, affected_ids in subgraphs.values():
+            affected_ids.update(
+                subgraph.update_edges(affected_ids, remove_isolated=True))
+        graph.next_match_worklist = self.get_next_worklist(graph, subgraphs)
 
     def perform_pattern_matcher(self, graph, match_kind="topo"):
         """ 执行模式匹配，找到匹配的子图。
+        完整匹配整个图时，优先使用与流水线中之后的fuser一起匹配的结果（见prefetch_matches）。
         """
-        if len(self.patterns) > 0:
-            self.matches = list()
-            for pattern in self.patterns:
-                pattern_matcher = PatternMatcher(pattern)
-                self.matches.extend(pattern_matcher.operate(graph, match_kind))
-        else:
-            pattern_matcher = PatternMatcher(self.pattern)
-            self.matches = pattern_matcher.operate(graph, match_kind)
+        worklist = getattr(graph, "match_worklist", None)
+        prefetched = getattr(graph, "prefetched_matches", None)
+        key = (type(self), match_kind)
+        if worklist is None and prefetched is not None:
+            if key not in prefetched:
+                self.prefetch_matches(graph, match_kind)
+            if key in prefetched:
+                self.compile_patterns()
+                self.matches, self.dropped_matches = prefetched.pop(key)
+                PassManager.add_stats(
+                    matches=len(self.matches),
+                    dropped_matches=self.dropped_matches)
+                return
+        # 所有pattern在一次遍历中完成匹配
+        pattern_matcher = PatternMatcher(self.compile_patterns(), worklist)
+        self.matches = pattern_matcher.operate(graph, match_kind)
+        self.dropped_matches = pattern_matcher.dropped_matches
+        PassManager.add_stats(
+            matches=len(self.matches), dropped_matches=self.dropped_matches)
+
+    def prefetch_matches(self, graph, match_kind="topo"):
+        """ 在一次遍历中同时匹配本fuser及graph.match_stage中排在其后的fuser的pattern，
+        各fuser的结果保存在graph.prefetched_matches中。
+        graph.match_stage由GraphOptimizer设置，为流水线中从当前pass开始连续的融合pass的
+        (fuser类, match_kind)。某个fuser修改了图时会清空prefetched_matches，
+        之后的fuser重新合并匹配，因此结果与各fuser分别匹配一致。
+        """
+        stage = list(getattr(graph, "match_stage", None) or [])
+        key = (type(self), match_kind)
+        if key not in stage:
+            return
+        stage = tuple(stage[stage.index(key):])
+        if stage not in FuseBase.compiled_stages:
+            patterns = list()
+            match_kinds = list()
+            groups = list()
+            for fuser_cls, kind in stage:
+                fuser = self if fuser_cls is type(self) else fuser_cls()
+                fuser.compile_patterns()
+                fuser_patterns = fuser.patterns if len(
+                    fuser.patterns) > 0 else [fuser.pattern]
+                groups.append((len(patterns),
+                               len(patterns) + len(fuser_patterns)))
+                patterns.extend(fuser_patterns)
+                match_kinds.extend([kind] * len(fuser_patterns))
+            FuseBase.compiled_stages[stage] = (CompiledPatterns(
+                patterns, match_kinds), groups)
+        compiled, groups = FuseBase.compiled_stages[stage]
+        pattern_matcher = PatternMatcher(compiled)
+        try:
+            results = pattern_matcher.operate_groups(graph, groups)
+        except Exception:
+            # 之后的fuser的匹配可能在当前的图上出错，而在之前的fuser修改后的图上不会，
+            # 此时不保存结果，由各fuser分别匹配，出错时与分别匹配时一致
+            return
+        for stage_key, result in zip(stage, results):
+            graph.prefetched_matches[stage_key] = result
+
+    def get_next_worklist(self, graph, subgraphs):
+        """ 根据融合影响到的layer生成下一轮匹配的工作表。
+        新的匹配必然包含被影响的layer，且pattern中的layer是连通的，
+        因此只需在与被影响的layer距离不超过pattern layer数的layer处开始匹配。
+        子图中的融合可能使包含控制流的pattern在父图中匹配，父layer同样需要加入。
+
+        Args:
+            graph (x2paddle.core.program.PaddleGraph): 进行融合的图。
+            subgraphs (dict): 子图id到(子图, 被影响的layer id)的映射。
+        """
+        patterns = self.patterns if len(self.patterns) > 0 else [self.pattern]
+        radius = max([len(pattern.layers) for pattern in patterns])
+        seeds = collections.OrderedDict()
+        for subgraph, affected_ids in subgraphs.values():
+            if id(subgraph) not in seeds:
+                seeds[id(subgraph)] = (subgraph, set())
+            seeds[id(subgraph)][1].update(affected_ids)
+            layer_ids = [i for i in affected_ids if i in subgraph.layers]
+            if len(layer_ids) == 0:
+                continue
+            id_part = layer_ids[0].split(".")
+            for i in range(1, len(id_part), 2):
+                parent_layer_id = ".".join(id_part[:i])
+                parent_graph = get_subgraph("", parent_layer_id, graph)
+                if id(parent_graph) not in seeds:
+                    seeds[id(parent_graph)] = (parent_graph, set())
+                seeds[id(parent_graph)][1].add(parent_layer_id)
+        worklist = dict()
+        for key, (subgraph, layer_ids) in seeds.items():
+            visited = set([i for i in layer_ids if i in subgraph.layers])
+            frontier = list(visited)
+            for step in range(radius):
+                next_frontier = list()
+                for layer_id in frontier:
+                    for i in subgraph.edges_in.get(layer_id, []) + \
+                            subgraph.edges_out.get(layer_id, []):
+                        if i != -1 and i not in visited:
+                            visited.add(i)
+                            next_frontier.append(i)
+                frontier = next_frontier
+            worklist[key] = visited
+        return worklist
 
     def delete_match(self, graph):
         """ 删除不需要的中间layer及其对应参数。
@@ -356,5 +895,3 @@ class FuseBase(object):
                 if layer_id in subgraph.layers:
                     # layer_id可能是属于子图的，此时删除父layer，即删除整个子图
                     subgraph.layers.pop(layer_id)
-                    
-                    
\ No newline at end of file
@@ -12,6 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# HierarchicalTree依赖treelib，ModuleGraph依赖pandas，只在真正使用时才导入对应模块。
+# 这里不使用模块级__getattr__（需要Python 3.7），以保持对Python 3.5的支持。
 
-from x2paddle.optimizer.pytorch_code_optimizer.hierachical_tree import HierarchicalTree
-from x2paddle.optimizer.pytorch_code_optimizer.module_graph import ModuleGraph
\ No newline at end of file
+
+def HierarchicalTree(pd_graph):
+    from x2paddle.optimizer.pytorch_code_optimizer.hierachical_tree import HierarchicalTree
+    return HierarchicalTree(pd_graph)
+
+
+def ModuleGraph(graph):
+    from x2paddle.optimizer.pytorch_code_optimizer.module_graph import ModuleGraph
+    return ModuleGraph(graph)
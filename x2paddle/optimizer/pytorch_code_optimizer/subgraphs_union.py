@@ -15,13 +15,13 @@
 
 
 import copy
-import pandas as pd
 from x2paddle.optimizer.pytorch_code_optimizer.layer_code_generator import rename_layers
 
 
 def construct_attrs_table(sub_layers_list, node_name2sub_layers=None, module_name=None):
     """ 构造不同属性的表格。
     """
+    import pandas as pd
     def get_node_name(sub_layers):
         for k, v in node_name2sub_layers.items():
             if v == sub_layers:
@@ -78,7 +78,7 @@ def get_inputs_outputs(pd_graph, layers):
         for k, v in layer.inputs.items():
             if v not in cur_outputs and v not in inputs:
                 inputs.append(v)
-                
+
         if ("paddle.nn" in layer.kernel and "functional" not in layer.kernel):
             cur_outputs.extend(layer.outputs[1:])
         else:
@@ -117,7 +117,7 @@ def distinguish_sequential(pd_graph, module_name, sub_layers, sub_identifiers, n
                 sequentials2attrs_table["{}__{}".format(part_module_name, i)] = \
                         construct_attrs_table(new_sub_layers["{}__{}".format(part_module_name, i)], node_name2sub_layers)
         return new_sub_layers, new_sub_sequentials, sequentials2attrs_table
-        
+
     new_sub_layers = dict()
     new_sub_sequentials = dict()
     sequentials2attrs_table = dict()
@@ -153,4 +153,4 @@ def distinguish_sequential(pd_graph, module_name, sub_layers, sub_identifiers, n
         new_new_sub_layers.update(part_sub_layers)
         new_new_sub_sequentials.update(part_sub_sequentials)
         sequentials2attrs_table.update(part_sequentials2attrs_table)
-    return new_new_sub_layers, new_new_sub_sequentials, sequentials2attrs_table
\ No newline at end of file
+    return new_new_sub_layers, new_new_sub_sequentials, sequentials2attrs_table
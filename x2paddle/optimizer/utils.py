@@ -0,0 +1,243 @@
+# -*- coding:UTF-8 -*-
+#   Copyright (c) 2020  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# 不使用模式匹配、直接遍历图的pass所共用的函数，
+# 其中与图相关的函数均基于PaddleGraph当前的边（edges_in/edges_out）。
+
+import numpy as np
+
+
+def get_output_index(layer):
+    """ 获取layer实际输出的tensor在outputs中的位置，
+    paddle.nn类layer的第一个输出为layer的名字。
+    """
+    if layer.kernel.startswith("paddle.nn") and \
+            "functional" not in layer.kernel:
+        return 1
+    return 0
+
+
+def get_input_layers(graph, layer_id):
+    """ 获取layer每个输入key对应的产生该输入的layer id，输入来自图外时为-1。
+    输入为list/tuple的key不包含在结果中。
+    """
+    layer = graph.layers[layer_id]
+    edges_in = graph.edges_in.get(layer_id, [])
+    input_layers = dict()
+    index = 0
+    for key, var in layer.inputs.items():
+        if isinstance(var, (list, tuple)):
+            index += len(var)
+            continue
+        if index < len(edges_in):
+            input_layers[key] = edges_in[index]
+        index += 1
+    return input_layers
+
+
+def has_single_consumer(graph, layer_id):
+    """ 判断layer的输出是否只被一个layer使用，且不是图的输出。
+    满足时删除或改写该layer不会影响图中的其他部分。
+    """
+    if len(graph.edges_out.get(layer_id, [])) != 1:
+        return False
+    if graph.edges_out[layer_id][0] == -1:
+        return False
+    layer = graph.layers[layer_id]
+    return len(set(layer.outputs) & set(graph.outputs)) == 0
+
+
+def get_input_names(layer):
+    """ 获取layer的所有输入tensor名字，list/tuple类型的输入会被展开。
+    """
+    names = list()
+    for var in layer.inputs.values():
+        if isinstance(var, (list, tuple)):
+            names.extend(var)
+        else:
+            names.append(var)
+    return names
+
+
+def get_written_names(layer):
+    """ 获取layer（包括其子图）写入的所有tensor名字。
+    """
+    names = set(layer.outputs)
+    for block in layer.blocks:
+        for block_layer in block.layers.values():
+            names.update(get_written_names(block_layer))
+    return names
+
+
+def get_attr_refs(layer):
+    """ 获取layer的属性中以变量名形式引用的tensor名字（如paddle.slice的starts为tensor时），
+    这类引用不体现在图的边中。
+    """
+    refs = set()
+    for value in layer.attrs.values():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for v in values:
+            if isinstance(v, str) and not v.startswith(("'", '"')):
+                refs.add(v)
+    return refs
+
+
+def get_read_names(layer):
+    """ 获取layer（包括其子图）读取的所有tensor名字，包括属性中引用的名字。
+    """
+    names = set(get_input_names(layer)) | get_attr_refs(layer)
+    for block in layer.blocks:
+        for block_layer in block.layers.values():
+            names.update(get_read_names(block_layer))
+    return names
+
+
+def rename_inputs(layer, rename):
+    """ 将layer（包括其子图）的输入按rename（原名字到新名字的dict）改名，返回是否有修改。
+    """
+    changed = False
+    for key, var in layer.inputs.items():
+        if isinstance(var, (list, tuple)):
+            if any([v in rename for v in var]):
+                layer.inputs[key] = type(var)([rename.get(v, v) for v in var])
+                changed = True
+        elif var in rename:
+            layer.inputs[key] = rename[var]
+            changed = True
+    for block in layer.blocks:
+        for block_layer in block.layers.values():
+            if rename_inputs(block_layer, rename):
+                changed = True
+        for names in [block.inputs, block.outputs]:
+            if isinstance(names, list):
+                names[:] = [rename.get(n, n) for n in names]
+    return changed
+
+
+def get_param_name(layer, attr_name, suffix):
+    """ 获取动态图中paddle.nn类layer的参数在graph.parameters中的名字。
+    属性为字符串时为其指定的参数名，为False时没有该参数（返回None），
+    否则为layer的名字加上suffix（如".weight"）。
+    """
+    value = layer.attrs.get(attr_name, None)
+    if value is False:
+        return None
+    if isinstance(value, str):
+        return value.strip("'\"")
+    return layer.outputs[0] + suffix
+
+
+def get_used_names(graph):
+    """ 获取图（包括子图）中已使用的tensor名字及参数所属的layer名字。
+    """
+    names = set()
+    for layer in graph.get_global_layers().values():
+        names.update(layer.outputs)
+    for key in graph.parameters.keys():
+        names.add(key.split(".")[0])
+    return names
+
+
+def gen_layer_name(prefix, used_names):
+    """ 为新加入的paddle.nn类layer生成不与used_names重复的名字，并加入used_names。
+    """
+    index = 0
+    while "{}{}".format(prefix, index) in used_names:
+        index += 1
+    name = "{}{}".format(prefix, index)
+    used_names.add(name)
+    return name
+
+
+def can_move_to(graph, layer_ids, positions, layer_id, target_id):
+    """ 判断能否将layer移动到位于其后的target_id处（替换target_id的layer），
+    即两者之间的layer没有（原地）改写该layer的输入。
+    layer_ids为移动前layer的顺序，positions为layer id到其在layer_ids中位置的dict。
+    """
+    inputs = set()
+    for var in graph.layers[layer_id].inputs.values():
+        if isinstance(var, (list, tuple)):
+            inputs.update(var)
+        else:
+            inputs.add(var)
+    for i in range(positions[layer_id] + 1, positions[target_id]):
+        if layer_ids[i] not in graph.layers:
+            continue
+        if len(inputs & set(graph.layers[layer_ids[i]].outputs)) > 0:
+            return False
+    return True
+
+
+def fold_batch_norm(weight,
+                    bias,
+                    scale,
+                    shift,
+                    mean,
+                    variance,
+                    epsilon,
+                    transposed=False,
+                    groups=1):
+    """ 将卷积之后的BatchNorm合并到卷积的权重与偏置中。
+    BatchNorm的计算为 (x - mean) / sqrt(variance + epsilon) * scale + shift，
+    对每个输出通道是一个仿射变换，可以直接作用在卷积的参数上。
+
+    Args:
+        weight (np.ndarray): 卷积的权重，普通卷积（包括depthwise卷积）的第0维为输出通道；
+            转置卷积的形状为[in_channels, out_channels / groups, ...]。
+        bias (np.ndarray|None): 卷积的偏置，为None时视为0。
+        scale, shift, mean, variance (np.ndarray): BatchNorm的参数，长度为输出通道数。
+        epsilon (float): BatchNorm的epsilon。
+        transposed (bool): 是否为转置卷积。
+        groups (int): 卷积的组数，只对转置卷积有影响。
+    Returns:
+        tuple: 合并后的(weight, bias)，数据类型与原权重一致。
+    """
+    dtype = weight.dtype
+    out_channels = get_out_channels(weight, transposed, groups)
+    scale, shift, mean, variance = [
+        np.asarray(p, dtype="float64").reshape([out_channels])
+        for p in [scale, shift, mean, variance]
+    ]
+    if bias is None:
+        bias = np.zeros([out_channels], dtype="float64")
+    else:
+        bias = np.asarray(bias, dtype="float64").reshape([out_channels])
+    factor = scale / np.sqrt(variance + epsilon)
+    kernel_shape = list(weight.shape[2:])
+    if transposed:
+        # 第g组输出通道的权重为weight[g * in_per_group: (g + 1) * in_per_group]
+        new_weight = weight.astype("float64").reshape(
+            [groups, -1, out_channels // groups] + kernel_shape)
+        new_weight = new_weight * factor.reshape(
+            [groups, 1, out_channels // groups] + [1] * len(kernel_shape))
+        new_weight = new_weight.reshape(weight.shape)
+    else:
+        new_weight = weight.astype("float64") * factor.reshape(
+            [out_channels] + [1] * (weight.ndim - 1))
+    new_bias = (bias - mean) * factor + shift
+    return new_weight.astype(dtype), new_bias.astype(dtype)
+
+
+def get_out_channels(weight, transposed=False, groups=1):
+    """ 根据卷积的权重获取输出通道数，无法确定时返回None。
+    """
+    if not isinstance(weight, np.ndarray) or weight.ndim < 3:
+        return None
+    if not transposed:
+        return weight.shape[0]
+    if not isinstance(groups, int) or groups < 1 or \
+            weight.shape[0] % groups != 0:
+        return None
+    return weight.shape[1] * groups